@@ -1,6 +1,6 @@
 {
     "name": "Records Management - Enterprise Edition",
-    'version': '18.0.1.0.26',
+    'version': '18.0.1.0.27',
     'category': 'Productivity/Records',
     "summary": "Complete Enterprise Records Management System with NAID AAA Compliance",
     "description": "Records Management - Enterprise Grade DMS Module. Enterprise physical & digital records lifecycle, NAID AAA + ISO 15489 compliance, portal, shredding, retention, audit, billing.",
@@ -137,6 +137,7 @@
         "data/records_retrieval_order_sequences.xml",
         "data/recurring_work_order_cron.xml",
         "data/required_document_cron.xml",
+        "data/search_performance_cron_data.xml",  # Index maintenance and search performance jobs
         "data/scheduled_actions_data.xml",
         "data/temp_inventory_configurator_data.xml",
         "data/rm_service_products.xml",  # Work order service products (pickup, retrieval, destruction, etc.)
@@ -675,6 +676,10 @@
         "views/records_billing_views.xml",
         "views/records_bulk_user_import_views.xml",
         "views/records_category_views.xml",
+        "views/records_db_index_views.xml",  # Managed composite/partial database indexes
+        "views/records_search_metric_views.xml",  # Search latency histograms and slow query plans
+        "views/records_stock_reconciliation_views.xml",  # Container / stock reconciliation reports
+        "wizards/search_regression_report_wizard_views.xml",  # Search latency regression report
         "views/records_container_type_converter_views.xml",
         "views/records_department_billing_approval_views.xml",
         "views/records_management_dashboard_views.xml",
@@ -718,6 +723,7 @@
         "templates/portal_recycling_stats.xml",  # Recycling stats card for portal home
         "templates/portal_access_templates.xml",
         "templates/portal_errors.xml",
+        "templates/portal_export_job.xml",  # Background export progress page
         # Inventory & Container Templates
         "templates/my_portal_inventory.xml",
         "templates/portal_inventory_tabs.xml",
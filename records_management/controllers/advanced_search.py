@@ -13,17 +13,23 @@ Version: 19.0.0.1
 License: LGPL-3
 """
 
-from odoo import http
+from odoo import http, _
 from odoo.http import request
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
 import json
-from datetime import datetime, timedelta
+
+from .intelligent_search import search_monitor
+from .portal_interactive import enqueue_export_response, get_export_async_threshold, stream_export_response
+
+# Results returned per inventory type (also the cap of the JSON 'limit' parameter)
+MAX_RESULTS_PER_TYPE = 100
 
 
 class AdvancedInventorySearch(CustomerPortal):
     """Advanced search for physical inventory items"""
 
     @http.route(['/my/inventory/advanced_search'], type='http', auth="user", website=True)
+    @search_monitor.monitored('advanced_inventory_search_page')
     def advanced_inventory_search(self, page=1, **filters):
         """
         Advanced search for physical inventory items
@@ -39,25 +45,102 @@ class AdvancedInventorySearch(CustomerPortal):
         user = request.env.user
         partner = user.partner_id.commercial_partner_id
 
-        # Build search domain from filters
-        domain_filters = self._build_advanced_search_domain(partner, filters)
+        # Build search domains from filters (only for the requested types)
+        domains = self._get_unified_search_domains(partner, filters)
 
-        # Search across all inventory types
-        search_results = {
-            'containers': [],
-            'files': [],
-            'documents': [],
+        # Materialized preset: only rows changed since its watermark are re-evaluated
+        new_match_count = 0
+        saved_search = self._get_materialized_preset(filters)
+        if saved_search:
+            domains = saved_search.get_materialized_domains()
+            new_match_count = domains.pop('new_match_count')
+
+        # One UNION query: merged ranking + facets; PDF counts in one grouped query
+        unified = request.env['records.inventory.search'].sudo().search_inventory(
+            domains, barcode=filters.get('barcode'), limit_per_type=MAX_RESULTS_PER_TYPE
+        )
+        search_results = self._format_unified_results(unified)
+        total_results = unified['total']
+
+        # Get saved searches for this user
+        saved_searches = request.env['records.saved.search'].search([
+            ('user_id', '=', user.id)
+        ])
+
+        values = {
+            'page_name': 'Advanced Inventory Search',
+            'search_results': search_results,
+            'total_results': total_results,
+            'facets': unified['facets'],
+            'filters': filters,
+            'saved_searches': saved_searches,
+            'saved_search': saved_search,
+            'new_match_count': new_match_count,
+            'can_export': True,
         }
 
-        # Search containers if requested
-        if filters.get('search_type') in [False, 'all', 'container']:
-            Container = request.env['records.container'].sudo()
-            containers = Container.search(
-                domain_filters.get('container', []),
-                order='create_date desc',
-                limit=100
-            )
-            search_results['containers'] = [{
+        return request.render("records_management.portal_advanced_inventory_search", values)
+
+    @http.route(['/my/inventory/advanced_search/results'], type='json', auth="user")
+    @search_monitor.monitored('advanced_inventory_search')
+    def advanced_inventory_search_results(self, **filters):
+        """JSON variant of the advanced search: merged items, per-type results and facets."""
+        partner = request.env.user.partner_id.commercial_partner_id
+        domains = self._get_unified_search_domains(partner, filters)
+        try:
+            limit = min(max(int(filters.get('limit', MAX_RESULTS_PER_TYPE)), 1), MAX_RESULTS_PER_TYPE)
+        except (TypeError, ValueError):
+            limit = MAX_RESULTS_PER_TYPE
+        unified = request.env['records.inventory.search'].sudo().search_inventory(
+            domains, barcode=filters.get('barcode'), limit_per_type=limit
+        )
+        results = self._format_unified_results(unified)
+        by_key = {
+            (item['model'], item['id']): item
+            for key in ('containers', 'files', 'documents')
+            for item in results[key]
+        }
+        return {
+            'success': True,
+            'items': [
+                dict(by_key[(item['record']._name, item['record'].id)], rank=item['rank'])
+                for item in unified['items']
+            ],
+            'facets': unified['facets'],
+            'total': unified['total'],
+        }
+
+    def _get_materialized_preset(self, filters):
+        """
+        The current user's materialized preset named by 'saved_search_id', if
+        the submitted filters are still the preset's own criteria.
+        """
+        try:
+            search_id = int(filters.get('saved_search_id') or 0)
+        except (TypeError, ValueError):
+            return None
+        if not search_id:
+            return None
+        saved_search = request.env['records.saved.search'].sudo().search([
+            ('id', '=', search_id),
+            ('user_id', '=', request.env.user.id),
+            ('materialize', '=', True),
+        ])
+        if not saved_search:
+            return None
+        submitted = {key: str(value) for key, value in filters.items() if value and key != 'saved_search_id'}
+        preset = {key: str(value) for key, value in saved_search.get_filters_dict().items() if value}
+        return saved_search if submitted == preset else None
+
+    def _get_unified_search_domains(self, partner, filters):
+        """Domains for records.inventory.search, limited to the requested type."""
+        return request.env['records.inventory.search'].sudo().get_search_domains(partner, filters)
+
+    def _format_unified_results(self, unified):
+        """Turn records.inventory.search output into the portal result dicts."""
+        pdf_scans = unified['pdf_scans']
+        search_results = {
+            'containers': [{
                 'id': c.id,
                 'type': 'container',
                 'name': c.name,
@@ -65,19 +148,10 @@ class AdvancedInventorySearch(CustomerPortal):
                 'location': c.current_location_id.name if c.current_location_id else 'Unknown',
                 'date_created': c.create_date,
                 'state': c.state or 'active',
-                'file_count': len(c.file_ids),
+                'file_count': c.file_count,
                 'model': 'records.container',
-            } for c in containers]
-
-        # Search file folders if requested
-        if filters.get('search_type') in [False, 'all', 'file']:
-            File = request.env['records.file'].sudo()
-            files = File.search(
-                domain_filters.get('file', []),
-                order='create_date desc',
-                limit=100
-            )
-            search_results['files'] = [{
+            } for c in unified['containers']],
+            'files': [{
                 'id': f.id,
                 'type': 'file',
                 'name': f.name,
@@ -85,19 +159,10 @@ class AdvancedInventorySearch(CustomerPortal):
                 'container': f.container_id.name if f.container_id else 'Not in container',
                 'date_created': f.create_date,
                 'state': f.state or 'draft',
-                'document_count': len(f.document_ids),
+                'document_count': f.document_count,
                 'model': 'records.file',
-            } for f in files]
-
-        # Search physical documents if requested
-        if filters.get('search_type') in [False, 'all', 'document']:
-            Document = request.env['records.document'].sudo()
-            documents = Document.search(
-                domain_filters.get('document', []),
-                order='create_date desc',
-                limit=100
-            )
-            search_results['documents'] = [{
+            } for f in unified['files']],
+            'documents': [{
                 'id': d.id,
                 'type': 'document',
                 'name': d.name,
@@ -106,117 +171,33 @@ class AdvancedInventorySearch(CustomerPortal):
                 'container': d.container_id.name if d.container_id else 'Not in container',
                 'date_created': d.create_date,
                 'document_type': d.document_type_id.name if d.document_type_id else 'Unclassified',
-                'pdf_scans': request.env['ir.attachment'].search_count([
-                    ('res_model', '=', 'records.document'),
-                    ('res_id', '=', d.id),
-                    ('mimetype', 'like', 'pdf')
-                ]),
+                'pdf_scans': pdf_scans.get(d.id, 0),
                 'model': 'records.document',
-            } for d in documents]
-
-        # Combine all results
-        total_results = (
-            len(search_results['containers']) +
-            len(search_results['files']) +
-            len(search_results['documents'])
-        )
-
-        # Get saved searches for this user
-        saved_searches = request.env['records.saved.search'].search([
-            ('user_id', '=', user.id)
-        ])
-
-        values = {
-            'page_name': 'Advanced Inventory Search',
-            'search_results': search_results,
-            'total_results': total_results,
-            'filters': filters,
-            'saved_searches': saved_searches,
-            'can_export': True,
+            } for d in unified['documents']],
         }
-
-        return request.render("records_management.portal_advanced_inventory_search", values)
+        # Template name for the file folder tab
+        search_results['file_folders'] = search_results['files']
+        return search_results
 
     def _build_advanced_search_domain(self, partner, filters):
         """
-        Build domain filters for advanced search
-        
-        Filters supported:
-        - barcode: Search by barcode
-        - location_id: Filter by warehouse location
-        - date_from/date_to: Date range filter
-        - retention_status: Active, eligible for destruction, etc.
-        - document_type_id: Document type classification
-        """
-        base_domain = [('partner_id', '=', partner.id)]
+        Build domain filters for advanced search, per search type.
 
-        domains = {
-            'container': list(base_domain),
-            'file': list(base_domain),
-            'document': list(base_domain),
-        }
-
-        # Barcode search (across all types)
-        if filters.get('barcode'):
-            barcode = filters['barcode']
-            domains['container'].append('|')
-            domains['container'].append(('barcode', 'ilike', barcode))
-            domains['container'].append(('temp_barcode', 'ilike', barcode))
-
-            domains['file'].append(('barcode', 'ilike', barcode))
-
-            domains['document'].append(('temp_barcode', 'ilike', barcode))
-
-        # Location filter
-        if filters.get('location_id'):
-            location_id = int(filters['location_id'])
-            domains['container'].append(('current_location_id', '=', location_id))
-            domains['file'].append(('container_id.current_location_id', '=', location_id))
-            domains['document'].append(('container_id.current_location_id', '=', location_id))
-
-        # Date range filter
-        if filters.get('date_from'):
-            date_from = datetime.strptime(filters['date_from'], '%Y-%m-%d')
-            for domain in domains.values():
-                domain.append(('create_date', '>=', date_from))
-
-        if filters.get('date_to'):
-            date_to = datetime.strptime(filters['date_to'], '%Y-%m-%d')
-            for domain in domains.values():
-                domain.append(('create_date', '<=', date_to))
-
-        # State filter
-        if filters.get('state'):
-            state = filters['state']
-            for domain in domains.values():
-                domain.append(('state', '=', state))
-
-        # Document type filter (documents only)
-        if filters.get('document_type_id'):
-            document_type_id = int(filters['document_type_id'])
-            domains['document'].append(('document_type_id', '=', document_type_id))
-
-        # Retention status filter
-        if filters.get('retention_status'):
-            status = filters['retention_status']
-            if status == 'eligible_destruction':
-                # Documents eligible for destruction based on retention policy
-                today = datetime.today().date()
-                domains['document'].append(('retention_end_date', '<=', today))
-            elif status == 'active_retention':
-                today = datetime.today().date()
-                domains['document'].append(('retention_end_date', '>', today))
-
-        return domains
+        See records.inventory.search.build_domains for the supported filters
+        (shared with materialized saved searches).
+        """
+        return request.env['records.inventory.search'].sudo().build_domains(partner, filters)
 
     @http.route(['/my/inventory/save_search'], type='json', auth="user")
-    def save_search_preset(self, name, filters):
+    def save_search_preset(self, name, filters, is_default=False, materialize=False):
         """
         Save search criteria as a preset for quick access
         
         Args:
             name (str): Name for the saved search
             filters (dict): Search filter criteria
+            is_default (bool): Use this preset as the user's default search
+            materialize (bool): Store the result set and refresh it incrementally
         
         Returns:
             dict: Success status and saved search ID
@@ -229,6 +210,8 @@ class AdvancedInventorySearch(CustomerPortal):
             'user_id': user.id,
             'name': name,
             'filters': json.dumps(filters),
+            'is_default': bool(is_default),
+            'materialize': bool(materialize),
         })
 
         return {
@@ -254,6 +237,9 @@ class AdvancedInventorySearch(CustomerPortal):
         # Build search domain
         domain_filters = self._build_advanced_search_domain(partner, filters)
 
+        if format in ('xlsx', 'csv'):
+            return self._export_inventory(format, domain_filters)
+
         # Get all matching records
         Container = request.env['records.container'].sudo()
         File = request.env['records.file'].sudo()
@@ -263,154 +249,32 @@ class AdvancedInventorySearch(CustomerPortal):
         files = File.search(domain_filters.get('file', []))
         documents = Document.search(domain_filters.get('document', []))
 
-        if format == 'xlsx':
-            return self._export_to_excel(containers, files, documents)
-        elif format == 'csv':
-            return self._export_to_csv(containers, files, documents)
-        elif format == 'pdf':
+        if format == 'pdf':
             return self._export_to_pdf(containers, files, documents)
         else:
             return request.not_found()
 
-    def _export_to_excel(self, containers, files, documents):
-        """Export inventory to Excel format"""
-        # Import required library
-        try:
-            import xlsxwriter
-            from io import BytesIO
-        except ImportError:
-            return request.render('website.404')
-
-        # Create Excel workbook
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-
-        # Header format
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D3D3D3',
-            'border': 1
-        })
-
-        # Containers sheet
-        if containers:
-            sheet = workbook.add_worksheet('Containers')
-            headers = ['Name', 'Barcode', 'Location', 'State', 'File Count', 'Created Date']
-            for col, header in enumerate(headers):
-                sheet.write(0, col, header, header_format)
-
-            for row, container in enumerate(containers, start=1):
-                sheet.write(row, 0, container.name)
-                sheet.write(row, 1, container.barcode or container.temp_barcode or '')
-                sheet.write(row, 2, container.current_location_id.name if container.current_location_id else '')
-                sheet.write(row, 3, container.state or 'active')
-                sheet.write(row, 4, len(container.file_ids))
-                sheet.write(row, 5, str(container.create_date))
-
-        # Files sheet
-        if files:
-            sheet = workbook.add_worksheet('File Folders')
-            headers = ['Name', 'Barcode', 'Container', 'State', 'Document Count', 'Created Date']
-            for col, header in enumerate(headers):
-                sheet.write(0, col, header, header_format)
-
-            for row, file_folder in enumerate(files, start=1):
-                sheet.write(row, 0, file_folder.name)
-                sheet.write(row, 1, file_folder.barcode or '')
-                sheet.write(row, 2, file_folder.container_id.name if file_folder.container_id else '')
-                sheet.write(row, 3, file_folder.state or 'draft')
-                sheet.write(row, 4, len(file_folder.document_ids))
-                sheet.write(row, 5, str(file_folder.create_date))
-
-        # Documents sheet
-        if documents:
-            sheet = workbook.add_worksheet('Documents')
-            headers = ['Name', 'Barcode', 'File Folder', 'Container', 'Document Type', 'PDF Scans', 'Created Date']
-            for col, header in enumerate(headers):
-                sheet.write(0, col, header, header_format)
-
-            for row, document in enumerate(documents, start=1):
-                pdf_count = request.env['ir.attachment'].search_count([
-                    ('res_model', '=', 'records.document'),
-                    ('res_id', '=', document.id),
-                    ('mimetype', 'like', 'pdf')
-                ])
-
-                sheet.write(row, 0, document.name)
-                sheet.write(row, 1, document.temp_barcode or '')
-                sheet.write(row, 2, document.file_id.name if document.file_id else '')
-                sheet.write(row, 3, document.container_id.name if document.container_id else '')
-                sheet.write(row, 4, document.document_type_id.name if document.document_type_id else '')
-                sheet.write(row, 5, pdf_count)
-                sheet.write(row, 6, str(document.create_date))
-
-        workbook.close()
-        output.seek(0)
-
-        # Return file download
-        return request.make_response(
-            output.read(),
-            headers=[
-                ('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
-                ('Content-Disposition', 'attachment; filename="inventory_export.xlsx"'),
-            ]
-        )
+    def _export_inventory(self, file_format, domain_filters):
+        """
+        Export containers, file folders and documents to Excel or CSV.
 
-    def _export_to_csv(self, containers, files, documents):
-        """Export inventory to CSV format"""
-        import csv
-        from io import StringIO
-
-        output = StringIO()
-        writer = csv.writer(output)
-
-        # Write headers
-        writer.writerow(['Type', 'Name', 'Barcode', 'Location/Container', 'State', 'Count', 'Created Date'])
-
-        # Write containers
-        for container in containers:
-            writer.writerow([
-                'Container',
-                container.name,
-                container.barcode or container.temp_barcode or '',
-                container.current_location_id.name if container.current_location_id else '',
-                container.state or 'active',
-                len(container.file_ids),
-                str(container.create_date)
-            ])
-
-        # Write files
-        for file_folder in files:
-            writer.writerow([
-                'File Folder',
-                file_folder.name,
-                file_folder.barcode or '',
-                file_folder.container_id.name if file_folder.container_id else '',
-                file_folder.state or 'draft',
-                len(file_folder.document_ids),
-                str(file_folder.create_date)
-            ])
-
-        # Write documents
-        for document in documents:
-            writer.writerow([
-                'Document',
-                document.name,
-                document.temp_barcode or '',
-                document.file_id.name if document.file_id else '',
-                document.document_type_id.name if document.document_type_id else '',
-                0,
-                str(document.create_date)
-            ])
-
-        # Return CSV download
-        return request.make_response(
-            output.getvalue(),
-            headers=[
-                ('Content-Type', 'text/csv'),
-                ('Content-Disposition', 'attachment; filename="inventory_export.csv"'),
-            ]
-        )
+        Small exports are streamed right away; above the async threshold the
+        export is queued as a background job (see records.export.job).
+        """
+        sections = [
+            {'kind': 'search_containers', 'model': 'records.container', 'domain': domain_filters.get('container', [])},
+            {'kind': 'search_files', 'model': 'records.file', 'domain': domain_filters.get('file', [])},
+            {'kind': 'search_documents', 'model': 'records.document', 'domain': domain_filters.get('document', [])},
+        ]
+        total = sum(request.env[section['model']].sudo().search_count(section['domain']) for section in sections)
+        if total > get_export_async_threshold():
+            return enqueue_export_response(_('Inventory Search'), file_format, sections, use_sudo=True)
+
+        engine = request.env['records.export.engine'].sudo()
+        return stream_export_response(engine, [
+            (section['kind'], request.env[section['model']].sudo().search(section['domain']).ids)
+            for section in sections
+        ], file_format)
 
     def _export_to_pdf(self, containers, files, documents):
         """Export inventory to PDF format"""
@@ -9,39 +9,146 @@ Provides advanced search capabilities including:
 - Performance monitoring and optimization
 """
 
+import functools
 import logging
+import threading
 import time
 from datetime import datetime
 from odoo.http import request
 
 from odoo import http
 
-from collections import defaultdict
+from collections import defaultdict, deque
 
 
 
 _logger = logging.getLogger(__name__)
 
+# Container states that can be recommended to users (perm_out/destroyed are archived)
+SEARCHABLE_CONTAINER_STATES = ["pending", "in", "out"]
+
+# Buffered latency samples are flushed to records.search.metric this often (seconds)
+METRICS_FLUSH_INTERVAL = 60
+# ... or as soon as this many samples are waiting
+METRICS_FLUSH_SIZE = 500
+# At most one EXPLAIN ANALYZE per endpoint and worker in this window (seconds)
+EXPLAIN_INTERVAL = 300
+
+# Response keys holding the result list of the search endpoints
+RESULT_KEYS = ("suggestions", "recommendations", "results", "containers", "files", "items")
+
 
 class SearchPerformanceMonitor:
-    """Monitor and log search performance metrics"""
+    """
+    Monitor and log search performance metrics
+
+    Latency samples are buffered per worker and flushed periodically into the
+    hourly histograms of records.search.metric. Searches slower than
+    records_management.search.slow_query_threshold_ms are stored in
+    records.search.slow.query with the EXPLAIN plan of their slowest statement.
+    """
 
     def __init__(self):
-        self.query_times = defaultdict(list)
-        self.slow_queries = []
+        self.slow_queries = deque(maxlen=100)
+        self.cache_hits = defaultdict(int)
+        self.cache_misses = defaultdict(int)
+        self._samples = defaultdict(list)  # dbname -> [(type, ms, results, slow, utc time)]
+        self._last_flush = time.time()
+        self._last_explain = {}
+        self._lock = threading.Lock()
+
+    def monitored(self, query_type):
+        """
+        Decorator timing a search endpoint and tracking its slowest SQL
+        statement (through the cursor's per-thread query hooks).
+        """
+        def decorator(endpoint):
+            @functools.wraps(endpoint)
+            def wrapper(controller, *args, **kwargs):
+                slowest = []
+
+                def hook(cr, query, params, start, delay):
+                    if not slowest or delay > slowest[0][0]:
+                        slowest[:] = [(delay, query, params)]
+
+                thread = threading.current_thread()
+                previous_hooks = getattr(thread, "query_hooks", None)
+                thread.query_hooks = list(previous_hooks or ()) + [hook]
+                start_time = time.time()
+                response = None
+                try:
+                    response = endpoint(controller, *args, **kwargs)
+                    return response
+                finally:
+                    if previous_hooks is None:
+                        del thread.query_hooks
+                    else:
+                        thread.query_hooks = previous_hooks
+                    duration_ms = (time.time() - start_time) * 1000
+                    statement = None
+                    if slowest:
+                        delay, query, params = slowest[0]
+                        statement = (delay * 1000, query, params)
+                    try:
+                        self.log_query(
+                            query_type, duration_ms, kwargs,
+                            result_count=self._result_count(response),
+                            slowest_statement=statement,
+                        )
+                    except Exception as e:
+                        # Metrics must never break the search itself
+                        _logger.warning("Search metrics: could not log %s (%s)", query_type, e)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _result_count(response):
+        if not isinstance(response, dict):
+            return None
+        if isinstance(response.get("total"), int):
+            return response["total"]
+        for key in RESULT_KEYS:
+            if isinstance(response.get(key), list):
+                return len(response[key])
+        return None
+
+    def log_cache(self, query_type, hit):
+        """Count a search result cache hit or miss for this worker"""
+        if hit:
+            self.cache_hits[query_type] += 1
+        else:
+            self.cache_misses[query_type] += 1
+
+    def get_cache_stats(self):
+        """Hit/miss counters and hit ratio per query type (this worker)"""
+        stats = {}
+        for query_type in set(self.cache_hits) | set(self.cache_misses):
+            hits = self.cache_hits[query_type]
+            misses = self.cache_misses[query_type]
+            stats[query_type] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            }
+        return stats
 
-    def log_query(self, query_type, duration_ms, query_params=None):
+    def log_query(self, query_type, duration_ms, query_params=None, result_count=None, slowest_statement=None):
         """Log query performance metrics"""
-        self.query_times[query_type].append(duration_ms)
+        env = request.env
+        dbname = env.cr.dbname
 
         # Get slow query threshold from config
         threshold = int(
-            request.env["ir.config_parameter"]
+            env["ir.config_parameter"]
             .sudo()
             .get_param("records_management.search.slow_query_threshold_ms", 1000)
         )
+        slow = duration_ms > threshold
 
-        if duration_ms > threshold:
+        with self._lock:
+            self._samples[dbname].append((query_type, duration_ms, result_count, slow, datetime.utcnow()))
+
+        if slow:
             self.slow_queries.append(
                 {
                     "type": query_type,
@@ -54,6 +161,28 @@ class SearchPerformanceMonitor:
                 "Slow search query detected: %s took %sms (threshold: %sms)",
                 query_type, duration_ms, threshold
             )
+            # Capture the plan of the slowest statement, rate limited per endpoint
+            explain_key = (dbname, query_type)
+            if time.time() - self._last_explain.get(explain_key, 0) > EXPLAIN_INTERVAL:
+                self._last_explain[explain_key] = time.time()
+                env["records.search.slow.query"].sudo()._record_slow_query(
+                    query_type, duration_ms, query_params, slowest_statement
+                )
+
+        self._maybe_flush(env)
+
+    def _maybe_flush(self, env):
+        """Flush buffered samples of this database into records.search.metric"""
+        dbname = env.cr.dbname
+        with self._lock:
+            pending = self._samples[dbname]
+            if not pending or (
+                time.time() - self._last_flush < METRICS_FLUSH_INTERVAL and len(pending) < METRICS_FLUSH_SIZE
+            ):
+                return
+            self._samples[dbname] = []
+            self._last_flush = time.time()
+        env["records.search.metric"].sudo()._flush_samples(pending)
 
 
 # Global performance monitor instance
@@ -75,14 +204,15 @@ class IntelligentSearchController(http.Controller):
     @http.route(
         ["/records/search/containers"], type="json", auth="user", methods=["POST"]
     )
+    @search_monitor.monitored("container_autocomplete")
     def _search_containers_autocomplete(self, query="", limit=10, customer_id=None):
         """
         Auto-suggest containers based on partial box number input
 
         Example: query="45" returns containers 4511, 4512, 4589, etc.
+        Box numbers and barcodes one typo away are suggested after the
+        prefix matches ("4S11" still finds 4511).
         """
-        start_time = time.time()
-
         try:
             if not query or not query.strip():
                 return {"suggestions": [], "total": 0}
@@ -92,27 +222,42 @@ class IntelligentSearchController(http.Controller):
             if not query:
                 return {"suggestions": [], "total": 0}
 
-            domain = [
-                ("name", "ilike", "%s%%" % query),  # Starts with query
-                ("active", "=", True),
-                ("state", "in", ["active", "in_storage"]),
-            ]
-
-            # Filter by customer if specified
+            # Validate customer filter if specified
             if customer_id:
                 try:
                     customer_id = int(customer_id)
-                    domain.append(("partner_id", "=", customer_id))
                 except (ValueError, TypeError):
                     _logger.warning("Invalid customer_id provided: %s", customer_id)
                     return {"error": "Invalid customer ID", "suggestions": []}
 
-            # Apply department security if applicable
-            domain = self._apply_department_security(domain)
-
-            containers = request.env["records.container"].search(
-                domain, limit=int(limit), order="name asc"
+            # Shared result cache, keyed by customer + department scope + the
+            # user's record rule inputs; entries are invalidated when that
+            # customer's containers change
+            cache = request.env["records.search.cache"].sudo()
+            cache_args = (
+                "container_autocomplete",
+                self._get_cache_partner_id(customer_id),
+                query,
+                self._get_cache_scope(),
+                dict(request.env["records.search.cache"].get_visibility(), limit=int(limit), customer_id=customer_id),
+            )
+            cached = cache.get(*cache_args)
+            search_monitor.log_cache("container_autocomplete", cached is not None)
+            if cached is not None:
+                return cached
+
+            # In-memory prefix/trigram index: prefix matches first, then box
+            # numbers one typo away (see records.container.autocomplete)
+            matches = request.env["records.container.autocomplete"].sudo().suggest(
+                query,
+                partner_id=cache_args[1],
+                department_ids=cache_args[3],
+                limit=int(limit),
             )
+            match_types = dict(matches)
+            # Re-check the candidates against the user's record rules
+            visible = request.env["records.container"].search([("id", "in", list(match_types))])
+            containers = visible.browse([container_id for container_id, _match in matches]) & visible
 
             suggestions = []
             for container in containers:
@@ -120,6 +265,7 @@ class IntelligentSearchController(http.Controller):
                     {
                         "id": container.id,
                         "name": container.name,
+                        "match": match_types[container.id],
                         "description": container.content_description or "",
                         "location": (
                             container.location_id.name if container.location_id else ""
@@ -131,11 +277,9 @@ class IntelligentSearchController(http.Controller):
                     }
                 )
 
-            # Log performance metrics
-            duration_ms = (time.time() - start_time) * 1000
-            search_monitor.log_query("container_autocomplete", duration_ms, {"query": query, "limit": limit})
-
-            return {"suggestions": suggestions, "total": len(suggestions)}
+            response = {"suggestions": suggestions, "total": len(suggestions)}
+            cache.put(cache_args[0], cache_args[1], cache_args[2], response, scope=cache_args[3], params=cache_args[4])
+            return response
 
         except Exception as e:
             _logger.error("Error in container autocomplete search: %s", str(e))
@@ -151,6 +295,7 @@ class IntelligentSearchController(http.Controller):
         auth="user",
         methods=["POST"],
     )
+    @search_monitor.monitored("container_recommendations")
     def _search_recommend_containers_for_file(self, **kwargs):
         """
         Smart container recommendations based on file search criteria
@@ -161,7 +306,6 @@ class IntelligentSearchController(http.Controller):
         - customer_id: Customer ID for filtering
         - content_type: Type of document being searched
         """
-        start_time = time.time()
         recommendations = []
 
         try:
@@ -179,7 +323,7 @@ class IntelligentSearchController(http.Controller):
                 }
 
             # Build base domain with better error handling
-            domain = [("active", "=", True), ("state", "in", ["active", "in_storage"])]
+            domain = [("active", "=", True), ("state", "in", SEARCHABLE_CONTAINER_STATES)]
 
             if customer_id:
                 try:
@@ -192,131 +336,51 @@ class IntelligentSearchController(http.Controller):
             # Apply department security
             domain = self._apply_department_security(domain)
 
-            # Search containers using different criteria
-            containers = request.env["records.container"].search(domain, limit=100)  # Reasonable limit for processing
+            search_date = None
+            if service_date:
+                try:
+                    if isinstance(service_date, str):
+                        search_date = datetime.strptime(service_date, "%Y-%m-%d").date()
+                    else:
+                        search_date = service_date
+                except (ValueError, TypeError) as e:
+                    _logger.debug("Date parsing error in container search: %s", e)
+
+            # Score the partner's whole inventory in SQL (records.search.engine)
+            scored, total = request.env["records.search.engine"].recommend_containers(
+                file_name=file_name,
+                service_date=search_date,
+                content_type=content_type,
+                domain=domain,
+                limit=15,
+            )
 
-            for container in containers:
-                score = 0
-                reasons = []
-
-                # 1. Alphabetical range matching
-                if file_name and container.alpha_range_start and container.alpha_range_end:
-                    name_start = file_name[0].upper() if file_name else ""
-                    if name_start:
-                        alpha_start = container.alpha_range_start.upper()
-                        alpha_end = container.alpha_range_end.upper()
-
-                        # Check if name falls within alphabetical range
-                        if alpha_start <= name_start <= alpha_end:
-                            score += 50
-                            reasons.append(
-                                "Name '%s' fits alphabetical range %s" % (
-                                    file_name, container.alpha_range_display
-                                )
-                            )
-
-                # 2. Date range matching with improved error handling
-                if (
-                    service_date
-                    and container.content_date_from
-                    and container.content_date_to
-                ):
-                    try:
-                        if isinstance(service_date, str):
-                            search_date = datetime.strptime(service_date, "%Y-%m-%d").date()
-                        else:
-                            search_date = service_date
-
-                        if (
-                            container.content_date_from
-                            <= search_date
-                            <= container.content_date_to
-                        ):
-                            score += 40
-                            reasons.append(
-                                "Service date %s falls within container date range" %
-                                search_date.strftime('%m/%d/%Y')
-                            )
-                    except (ValueError, TypeError) as e:
-                        _logger.debug("Date parsing error in container search: %s", e)
-
-                # 3. Content type matching (case-insensitive)
-                if (
-                    content_type
-                    and container.primary_content_type
-                    and container.primary_content_type.lower() == content_type.lower()
-                ):
-                    score += 30
-                    reasons.append("Content type matches: %s" % content_type)
-
-                # 4. Keyword matching in search_keywords - FIXED LOGIC
-                if file_name and container.search_keywords:
-                    keywords = container.search_keywords.lower()
-                    file_name_lower = file_name.lower()
-
-                    # Check for exact word matches (more precise than substring)
-                    file_words = file_name_lower.split()
-                    keyword_words = keywords.split()
-
-                    matches = 0
-                    for word in file_words:
-                        if len(word) >= 3 and word in keyword_words:  # Only count words 3+ chars
-                            matches += 1
-
-                    if matches > 0:
-                        score += 25 + (matches * 5)  # Bonus for multiple word matches
-                        reasons.append("Found %d matching keywords in container" % matches)
-
-                # 5. Content description matching with word boundary logic
-                if file_name and container.content_description:
-                    description_lower = container.content_description.lower()
-                    file_name_lower = file_name.lower()
-
-                    # Check for whole word matches first
-                    file_words = file_name_lower.split()
-                    desc_words = description_lower.split()
-
-                    word_matches = sum(1 for word in file_words if len(word) >= 3 and word in desc_words)
-
-                    if word_matches > 0:
-                        score += 20 + (word_matches * 5)
-                        reasons.append("Found %d matching words in description" % word_matches)
-                    elif file_name_lower in description_lower:  # Fallback to substring
-                        score += 15
-                        reasons.append("File name found in content description")
-
-                # Only include containers with reasonable match scores
-                if score >= 20:
-                    recommendations.append(
-                        {
-                            "id": container.id,
-                            "name": container.name,
-                            "score": score,
-                            "confidence": min(score, 95),  # Use score directly, cap at 95%
-                            "reasons": reasons,
-                            "location": (
-                                container.location_id.name
-                                if container.location_id
-                                else "Unknown"
-                            ),
-                            "alpha_range": container.alpha_range_display or "",
-                            "date_range": container.content_date_range_display or "",
-                            "content_type": container.primary_content_type or "",
-                            "document_count": container.document_count or 0,
-                            "description": container.content_description or "",
-                        }
-                    )
-
-            # Sort by score (highest first) and limit results
-            recommendations.sort(key=lambda x: x["score"], reverse=True)
-
-            # Log performance metrics
-            duration_ms = (time.time() - start_time) * 1000
-            search_monitor.log_query("container_recommendations", duration_ms, kwargs)
+            for match in scored:
+                container = match["container"]
+                score = match["score"]
+                recommendations.append(
+                    {
+                        "id": container.id,
+                        "name": container.name,
+                        "score": score,
+                        "confidence": min(score, 95),  # Use score directly, cap at 95%
+                        "reasons": match["reasons"],
+                        "location": (
+                            container.location_id.name
+                            if container.location_id
+                            else "Unknown"
+                        ),
+                        "alpha_range": container.alpha_range_display or "",
+                        "date_range": container.content_date_range_display or "",
+                        "content_type": container.primary_content_type or "",
+                        "document_count": container.document_count or 0,
+                        "description": container.content_description or "",
+                    }
+                )
 
             return {
-                "recommendations": recommendations[:15],  # Limit to top 15 suggestions
-                "total": len(recommendations),
+                "recommendations": recommendations,  # Top 15 suggestions, already ranked
+                "total": total,
                 "search_criteria": {
                     "file_name": file_name,
                     "service_date": service_date,
@@ -335,6 +399,7 @@ class IntelligentSearchController(http.Controller):
     @http.route(
         ["/my/records/search"], type="json", auth="user", website=True, methods=["POST"]
     )
+    @search_monitor.monitored("portal_records_search")
     def _search_portal_containers(self, **kwargs):
         """
         Portal search for customers to find their containers and files
@@ -367,6 +432,7 @@ class IntelligentSearchController(http.Controller):
     @http.route(
         ["/records/search/fulltext"], type="json", auth="user", methods=["POST"]
     )
+    @search_monitor.monitored("container_fulltext")
     def _search_fulltext_containers(self, query="", customer_id=None, limit=20):
         """
         Full-text search across container contents, descriptions, and keywords
@@ -467,22 +533,48 @@ class IntelligentSearchController(http.Controller):
         Returns:
             list: The updated domain with department-level security applied if needed.
         """
-        user = request.env.user
+        allowed_departments = self._get_cache_scope()
+        if allowed_departments:
+            # Restrict search to allowed departments
+            domain += [
+                "|",
+                ("department_id", "in", allowed_departments),
+                ("department_id", "=", False),  # Include records with no department
+            ]
 
-        # Check if user has department restrictions
-        if user.has_group("records_management.group_department_restricted"):
-            # Get user's allowed department IDs
-            allowed_departments = user.department_ids.ids
+        return domain
 
-            if allowed_departments:
-                # Restrict search to allowed departments
-                domain += [
-                    "|",
-                    ("department_id", "in", allowed_departments),
-                    ("department_id", "=", False),  # Include records with no department
-                ]
+    def _get_cache_partner_id(self, customer_id=None):
+        """
+        Cache scope of the current user.
 
-        return domain
+        Portal users are always scoped to their own company (record rules
+        differ per company); staff share entries per requested customer, or
+        the global scope when searching every customer.
+        """
+        user = request.env.user
+        if user._is_internal():
+            return customer_id or False
+        return user.partner_id.commercial_partner_id.id
+
+    def _get_cache_scope(self):
+        """Department ids restricting the current user (part of the cache key)"""
+        snapshot = request.env["records.portal.access"].get_snapshot()
+        if snapshot["roles"]["is_department_restricted"]:
+            return list(snapshot["accessible_department_ids"]) or None
+        return None
+
+    @http.route(
+        ["/records/search/cache/stats"], type="json", auth="user", methods=["POST"]
+    )
+    def _search_cache_stats(self):
+        """Search cache hit/miss metrics (system administrators only)"""
+        if not request.env.user.has_group("base.group_system"):
+            return {"error": "Access denied"}
+        return {
+            "worker": search_monitor.get_cache_stats(),
+            "entries": request.env["records.search.cache"].sudo().get_stats(),
+        }
 
     @http.route(
         ["/records/search/suggestions/config"],
@@ -29,6 +29,10 @@ from odoo import http, _, fields
 from odoo.http import request
 from dateutil.relativedelta import relativedelta
 
+from odoo.addons.records_management.models.records_portal_inventory import INVENTORY_SECTIONS
+
+from .intelligent_search import search_monitor
+
 _logger = logging.getLogger(__name__)
 
 
@@ -65,174 +69,10 @@ class RecordsManagementController(http.Controller):
         Note: In records management, customers don't "delete" items - they request
         destruction services. The physical containers/files are retrieved, shredded,
         and billed. Records are archived (not deleted) in the system.
-        """
-        user = request.env.user
 
-        # Determine user's role level
-        is_system_admin = user.has_group('base.group_system')
-        is_records_manager = user.has_group('records_management.group_records_manager')
-        is_records_user = user.has_group('records_management.group_records_user')
-        is_portal_company_admin = user.has_group('records_management.group_portal_company_admin')
-        is_portal_dept_admin = user.has_group('records_management.group_portal_department_admin')
-        is_portal_dept_user = user.has_group('records_management.group_portal_department_user')
-        is_portal_readonly = user.has_group('records_management.group_portal_readonly_employee')
-
-        def make_perm(can_create, can_read, can_update, can_request_destruction):
-            """Helper to build permission dict from action flags.
-            
-            Args:
-                can_create: Can add new items
-                can_read: Can view items
-                can_update: Can edit item details
-                can_request_destruction: Can submit destruction service requests
-            """
-            if can_create and can_read and can_update and can_request_destruction:
-                level = 'full'
-                color = 'green'
-                message = 'Full access: You can add, view, edit, and request destruction'
-            elif can_create and can_read and can_update:
-                level = 'partial'
-                color = 'yellow'
-                message = 'Partial access: You can add, view, and edit (cannot request destruction)'
-            elif can_read and can_update:
-                level = 'partial'
-                color = 'yellow'
-                message = 'Partial access: You can view and edit (cannot add new or request destruction)'
-            elif can_read:
-                level = 'readonly'
-                color = 'yellow'
-                message = 'Read only: You can view but cannot make changes'
-            else:
-                level = 'none'
-                color = 'red'
-                message = 'No access: You do not have permission for this feature'
-
-            return {
-                'level': level,
-                'color': color,
-                'can_create': can_create,
-                'can_read': can_read,
-                'can_update': can_update,
-                'can_request_destruction': can_request_destruction,
-                # Keep can_delete as alias for backward compatibility
-                'can_delete': can_request_destruction,
-                'message': message,
-            }
-
-        permissions = {}
-
-        # Containers
-        if is_system_admin or is_records_manager or is_portal_company_admin:
-            permissions['containers'] = make_perm(True, True, True, True)
-        elif is_portal_dept_admin or is_portal_dept_user or is_records_user:
-            permissions['containers'] = make_perm(True, True, True, False)
-        elif is_portal_readonly:
-            permissions['containers'] = make_perm(False, True, False, False)
-        else:
-            permissions['containers'] = make_perm(False, False, False, False)
-
-        # Files/Folders within containers
-        if is_system_admin or is_records_manager or is_portal_company_admin:
-            permissions['files'] = make_perm(True, True, True, True)
-        elif is_portal_dept_admin or is_portal_dept_user or is_records_user:
-            permissions['files'] = make_perm(True, True, True, False)
-        elif is_portal_readonly:
-            permissions['files'] = make_perm(False, True, False, False)
-        else:
-            permissions['files'] = make_perm(False, False, False, False)
-
-        # Inventory items
-        if is_system_admin or is_records_manager or is_portal_company_admin:
-            permissions['inventory'] = make_perm(True, True, True, True)
-        elif is_portal_dept_admin or is_portal_dept_user or is_records_user:
-            permissions['inventory'] = make_perm(True, True, True, False)
-        elif is_portal_readonly:
-            permissions['inventory'] = make_perm(False, True, False, False)
-        else:
-            permissions['inventory'] = make_perm(False, False, False, False)
-
-        # Requests (retrieval, destruction, etc.)
-        if is_system_admin or is_records_manager or is_portal_company_admin:
-            permissions['requests'] = make_perm(True, True, True, True)
-        elif is_portal_dept_admin or is_portal_dept_user or is_records_user:
-            permissions['requests'] = make_perm(True, True, True, False)
-        elif is_portal_readonly:
-            permissions['requests'] = make_perm(False, True, False, False)
-        else:
-            permissions['requests'] = make_perm(False, False, False, False)
-
-        # User management
-        if is_system_admin or is_records_manager or is_portal_company_admin:
-            permissions['users'] = make_perm(True, True, True, True)
-        elif is_portal_dept_admin:
-            permissions['users'] = make_perm(True, True, True, False)
-            permissions['users']['message'] = 'Partial access: You can manage users in your department only'
-        else:
-            permissions['users'] = make_perm(False, False, False, False)
-
-        # Departments
-        if is_system_admin or is_records_manager or is_portal_company_admin:
-            permissions['departments'] = make_perm(True, True, True, True)
-        elif is_portal_dept_admin:
-            permissions['departments'] = make_perm(False, True, True, False)
-            permissions['departments']['message'] = 'Partial access: You can view and edit your department only'
-        else:
-            permissions['departments'] = make_perm(False, True, False, False)
-
-        # Billing/Invoices (view only for most portal users)
-        if is_system_admin or is_records_manager:
-            permissions['billing'] = make_perm(True, True, True, True)
-        elif is_portal_company_admin:
-            permissions['billing'] = make_perm(False, True, False, False)
-        else:
-            permissions['billing'] = make_perm(False, True, False, False)
-
-        # Reports/Analytics
-        if is_system_admin or is_records_manager or is_portal_company_admin:
-            permissions['reports'] = make_perm(True, True, True, True)
-        elif is_portal_dept_admin:
-            permissions['reports'] = make_perm(False, True, False, False)
-            permissions['reports']['message'] = 'Read only: You can view reports for your department'
-        else:
-            permissions['reports'] = make_perm(False, False, False, False)
-
-        # Destruction certificates
-        if is_system_admin or is_records_manager or is_portal_company_admin:
-            permissions['certificates'] = make_perm(False, True, False, False)
-            permissions['certificates']['message'] = 'Read only: Certificates are system-generated'
-        elif is_portal_dept_admin or is_portal_dept_user:
-            permissions['certificates'] = make_perm(False, True, False, False)
-        else:
-            permissions['certificates'] = make_perm(False, True, False, False)
-
-        # Settings/Configuration
-        if is_system_admin or is_records_manager:
-            permissions['settings'] = make_perm(True, True, True, True)
-        elif is_portal_company_admin:
-            permissions['settings'] = make_perm(False, True, True, False)
-            permissions['settings']['message'] = 'Partial access: You can view and edit company settings'
-        else:
-            permissions['settings'] = make_perm(False, False, False, False)
-
-        # Add user role info for display
-        if is_system_admin:
-            permissions['user_role'] = 'System Administrator'
-        elif is_records_manager:
-            permissions['user_role'] = 'Records Manager'
-        elif is_records_user:
-            permissions['user_role'] = 'Records User'
-        elif is_portal_company_admin:
-            permissions['user_role'] = 'Company Administrator'
-        elif is_portal_dept_admin:
-            permissions['user_role'] = 'Department Administrator'
-        elif is_portal_dept_user:
-            permissions['user_role'] = 'Department User'
-        elif is_portal_readonly:
-            permissions['user_role'] = 'Read-Only User'
-        else:
-            permissions['user_role'] = 'Portal User'
-
-        return permissions
+        Built once per user and cached (see records.portal.access).
+        """
+        return request.env['records.portal.access'].get_snapshot()['permissions']
 
     def _get_smart_department_context(self, user=None, partner=None):
         """Get smart department selection context for portal forms.
@@ -253,35 +93,17 @@ class RecordsManagementController(http.Controller):
         if partner is None:
             partner = user.partner_id
 
-        # Get user's assigned departments via records.storage.department.user
-        user_dept_assignments = request.env['records.storage.department.user'].sudo().search([
-            ('user_id', '=', user.id),
-            ('state', '=', 'active'),
-            ('active', '=', True),
-        ])
-        user_departments = user_dept_assignments.mapped('department_id')
-
-        # Get all departments for the company (for company admins / to check if company uses depts)
-        company_departments = request.env['records.department'].sudo().search([
-            ('partner_id', '=', partner.commercial_partner_id.id),
-        ])
-
-        # Determine which departments to show based on user role
-        is_company_admin = user.has_group('records_management.group_portal_company_admin')
-
-        if user_departments:
-            # User has specific department assignments - include child departments too
-            all_user_depts = user_departments
-            for dept in user_departments:
-                if dept.child_ids:
-                    all_user_depts |= dept.child_ids
-            departments = all_user_depts
-        elif is_company_admin:
-            # Company admin with no specific dept assignment - show all
-            departments = company_departments
-        else:
-            # Regular user with no department assignment - show none (company-level only)
-            departments = request.env['records.department'].sudo().browse()
+        Department = request.env['records.department'].sudo()
+        snapshot = request.env['records.portal.access'].get_snapshot(user.id)
+        departments = Department.browse(snapshot['selectable_department_ids'])
+        has_departments = snapshot['has_departments']
+        commercial_partner = partner.commercial_partner_id
+        if commercial_partner.id != snapshot['commercial_partner_id']:
+            # Context requested for another company than the user's own
+            company_departments = Department.search([('partner_id', '=', commercial_partner.id)])
+            has_departments = bool(company_departments)
+            if not snapshot['accessible_department_ids']:
+                departments = company_departments if snapshot['roles']['is_portal_company_admin'] else Department
 
         # Determine default department (first one if user has exactly one)
         default_department = departments[0] if len(departments) == 1 else False
@@ -289,7 +111,7 @@ class RecordsManagementController(http.Controller):
         return {
             'departments': departments,
             'default_department': default_department,
-            'has_departments': bool(company_departments),
+            'has_departments': has_departments,
             'show_department_selector': len(departments) > 1,
         }
 
@@ -375,78 +197,8 @@ class RecordsManagementController(http.Controller):
         """
         if partner is None:
             partner = request.env.user.partner_id
-        
-        commercial_partner = partner.commercial_partner_id
-        ServiceEvent = request.env['shredding.service.event'].sudo()
-        WorkOrderLine = request.env['work.order.line'].sudo()
-        
-        # Base domain - only billable events (tips and swap_outs) for this customer
-        base_domain = [
-            ('service_customer_id', 'child_of', commercial_partner.id),
-            ('service_type', 'in', ['tip', 'swap_out']),
-        ]
-        
-        # Get all completed service events (bin services)
-        all_events = ServiceEvent.search(base_domain)
-        total_lbs = sum(e.actual_weight_lbs or 0 for e in all_events)
-        bins_serviced = len(all_events)
-        
-        # Get shred boxes destroyed (customer-supplied boxes)
-        shred_box_lines = WorkOrderLine.search([
-            ('work_order_id.partner_id', 'child_of', commercial_partner.id),
-            ('line_type', '=', 'shred_box'),
-            ('work_order_id.state', 'in', ['completed', 'done']),
-        ])
-        shred_boxes_qty = int(sum(line.quantity for line in shred_box_lines))
-        
-        # Current year
-        now = fields.Datetime.now()
-        year_start = datetime(now.year, 1, 1)
-        year_events = all_events.filtered(
-            lambda e: e.service_date and e.service_date >= year_start
-        )
-        year_lbs = sum(e.actual_weight_lbs or 0 for e in year_events)
-        year_bins = len(year_events)
-        
-        # Current month
-        month_start = datetime(now.year, now.month, 1)
-        month_events = all_events.filtered(
-            lambda e: e.service_date and e.service_date >= month_start
-        )
-        month_lbs = sum(e.actual_weight_lbs or 0 for e in month_events)
-        month_bins = len(month_events)
-        
-        # Current week (Monday start)
-        week_start = now - timedelta(days=now.weekday())
-        week_start = datetime(week_start.year, week_start.month, week_start.day)
-        week_events = all_events.filtered(
-            lambda e: e.service_date and e.service_date >= week_start
-        )
-        week_lbs = sum(e.actual_weight_lbs or 0 for e in week_events) if week_events else None
-        week_bins = len(week_events) if week_events else None
-        
-        # Environmental impact estimates
-        # ~3.5 lbs CO2 saved per lb of paper recycled (vs landfill)
-        co2_saved_lbs = round(total_lbs * 3.5, 1)
-        # ~1 tree saved per 1,000 lbs paper recycled
-        trees_saved = round(total_lbs / 1000, 1)
-        
-        return {
-            'total_lbs': round(total_lbs, 1),
-            'year_lbs': round(year_lbs, 1),
-            'month_lbs': round(month_lbs, 1),
-            'week_lbs': round(week_lbs, 1) if week_lbs else None,
-            'bins_serviced': bins_serviced,
-            'year_bins': year_bins,
-            'month_bins': month_bins,
-            'week_bins': week_bins,
-            'shred_boxes_qty': shred_boxes_qty,
-            'service_count': bins_serviced + shred_boxes_qty,
-            'co2_saved_lbs': co2_saved_lbs,
-            'trees_saved': trees_saved,
-            'current_year': now.year,
-            'current_month': now.strftime('%B'),
-        }
+        # Grouped SQL per date bucket, cached per company (see shredding.service.event)
+        return request.env['shredding.service.event'].sudo().get_recycling_stats(partner)
 
     # ============================================================================
     # DASHBOARD ROUTES
@@ -1333,6 +1085,21 @@ class RecordsManagementController(http.Controller):
         # Implementation would check for compliance violations
         return []  # Placeholder
 
+    # ============================================================================
+    # FILE DOWNLOADS
+    # ============================================================================
+    def _stream_download(self, record, field_name='raw', filename=None):
+        """
+        Download response for a binary stored as an attachment.
+
+        The file is sent straight from the filestore (``datas`` is never
+        decoded in memory) with its checksum as a strong ETag: repeated
+        downloads are answered 304 on ``If-None-Match`` and ``Range`` requests
+        get partial content, so large scans can be resumed.
+        """
+        stream = request.env['ir.binary']._get_stream_from(record, field_name, filename=filename)
+        return stream.get_response(as_attachment=True)
+
     # ============================================================================
     # NAID CERTIFICATION ROUTES
     # ============================================================================
@@ -1399,6 +1166,13 @@ class RecordsManagementController(http.Controller):
             except Exception:
                 return request.redirect("/my")
 
+        filename = (cert.certificate_filename or ("CoD-%s.pdf" % (cert.certificate_number or cert.id))).replace(" ", "_")
+
+        # Issued certificates keep their PDF: serve the stored file (bin_size
+        # only tells whether it exists, without loading it)
+        if cert.with_context(bin_size=True).certificate_data:
+            return self._stream_download(cert, "certificate_data", filename=filename)
+
         # Use the report to render PDF content
         report = request.env.ref(
             "records_management.action_report_naid_certificate", raise_if_not_found=False
@@ -1432,7 +1206,6 @@ class RecordsManagementController(http.Controller):
         pdf_content = pdf_tuple[0] if isinstance(pdf_tuple, tuple) else pdf_tuple
         pdf_bytes = pdf_content if isinstance(pdf_content, (bytes, bytearray)) else bytes(pdf_content or b"")
 
-        filename = (cert.certificate_filename or ("CoD-%s.pdf" % (cert.certificate_number or cert.id))).replace(" ", "_")
         headers = [
             ("Content-Type", "application/pdf"),
             ("Content-Disposition", f"attachment; filename={filename}"),
@@ -1557,27 +1330,21 @@ class RecordsManagementController(http.Controller):
         partner = request.env.user.partner_id
 
         # Get summary counts for dashboard cards - Hierarchical Inventory
-        container_count = request.env['records.container'].sudo().search_count([
-            ('partner_id', 'child_of', partner.commercial_partner_id.id)
-        ])
+        # (one read of the inventory counters for the whole company tree)
+        Counter = request.env['records.inventory.counter'].sudo()
+        company_partner_ids = request.env['res.partner'].sudo().with_context(active_test=False).search([
+            ('id', 'child_of', partner.commercial_partner_id.id)
+        ]).ids
+        counts = Counter.get_counts(company_partner_ids)
 
-        file_folder_count = request.env['records.file'].sudo().search_count([
-            ('partner_id', 'child_of', partner.commercial_partner_id.id)
-        ])
-
-        document_count = request.env['records.document'].sudo().search_count([
-            ('partner_id', 'child_of', partner.commercial_partner_id.id)
-        ])
+        container_count = Counter.get_total(counts['records.container'])
+        file_folder_count = Counter.get_total(counts['records.file'])
+        document_count = Counter.get_total(counts['records.document'])
 
         # Get active service request count
-        request_count = request.env['portal.request'].sudo().search_count([
-            ('partner_id', 'child_of', partner.commercial_partner_id.id),
-            ('state', 'not in', ['cancelled', 'done'])
-        ])
+        request_count = Counter.get_total(counts['portal.request'], exclude_states=('cancelled', 'done'))
 
-        certificate_count = request.env['destruction.certificate'].sudo().search_count([
-            ('partner_id', 'child_of', partner.commercial_partner_id.id)
-        ])
+        certificate_count = Counter.get_total(counts['destruction.certificate'])
 
         # Get recent activities
         recent_requests = request.env['portal.request'].sudo().search([
@@ -1680,6 +1447,12 @@ class RecordsManagementController(http.Controller):
         if not certificate.exists() or certificate.partner_id.commercial_partner_id != request.env.user.partner_id.commercial_partner_id:
             return request.redirect('/my/certificates')
 
+        # Issued certificates are immutable: serve (and keep) their stored PDF
+        if certificate.state != 'draft':
+            attachment = certificate.generate_certificate_document()
+            if attachment and attachment.mimetype == 'application/pdf':
+                return self._stream_download(attachment, filename=f'Certificate-{certificate.name}.pdf')
+
         # Generate PDF report
         pdf = request.env.ref('records_management.action_report_destruction_certificate').sudo()._render_qweb_pdf([certificate.id])[0]
 
@@ -1865,11 +1638,7 @@ class RecordsManagementController(http.Controller):
         if not allowed:
             return request.redirect('/my/service-attachments')
 
-        # Return file download
-        return request.env['ir.http']._get_content_common(
-            xmlid=None, model='ir.attachment', res_id=attachment.id, field='datas',
-            filename=attachment.name, filename_field='name', download=True
-        )
+        return self._stream_download(attachment)
 
     # Legacy route redirect (for backwards compatibility)
     @http.route(['/my/service-photos', '/my/service-photos/page/<int:page>'], type='http', auth="user", website=True)
@@ -1977,9 +1746,10 @@ class RecordsManagementController(http.Controller):
         if not document.exists() or document.partner_id.commercial_partner_id != request.env.user.partner_id.commercial_partner_id:
             return request.redirect('/my/documents')
 
-        # Get attachment if exists
-        if document.attachment_id:
-            return request.redirect(f'/web/content/{document.attachment_id.id}?download=true')
+        # Newest attachment of the document, as listed on the portal pages
+        attachment = document.attachment_ids[:1]
+        if attachment:
+            return self._stream_download(attachment)
         else:
             return request.redirect('/my/documents?error=no_attachment')
 
@@ -2021,12 +1791,13 @@ class RecordsManagementController(http.Controller):
         if date_begin and date_end:
             base_domain += [('create_date', '>=', date_begin), ('create_date', '<=', date_end)]
 
-        # Calculate counts for each state (for tab badges)
+        # Calculate counts for each state (for tab badges) in one grouped query
+        state_counts = dict(Container._read_group(base_domain, ['state'], ['__count']))
         counts = {
-            'all': Container.search_count(base_domain),
-            'in': Container.search_count(base_domain + [('state', '=', 'in')]),
-            'out': Container.search_count(base_domain + [('state', '=', 'out')]),
-            'pending': Container.search_count(base_domain + [('state', '=', 'pending')]),
+            'all': sum(state_counts.values()),
+            'in': state_counts.get('in', 0),
+            'out': state_counts.get('out', 0),
+            'pending': state_counts.get('pending', 0),
         }
 
         # Apply state filter to domain
@@ -2133,50 +1904,28 @@ class RecordsManagementController(http.Controller):
         Enhanced inventory dashboard with comprehensive stock integration.
         
         Features:
-        - Real-time stock quant synchronization
-        - Comprehensive movement tracking
-        - Location-based filtering and search
+        - Headline counts from the inventory counters
+        - One page of the inventory list (search / sort / type filter /
+          pager) read from records.portal.inventory, which also serves the
+          JSON sections of /my/inventory/section
         - Mobile-optimized responsive design
         
         Security Layer Pattern: Use sudo() for model access but maintain data filtering
         """
         # Permission check: All portal user types can view inventory
-        user = request.env.user
-        if not (user.has_group("records_management.group_records_user") or
-               user.has_group("records_management.group_records_manager") or
-               user.has_group("records_management.group_portal_company_admin") or
-               user.has_group("records_management.group_portal_department_admin") or
-               user.has_group("records_management.group_portal_department_user") or
-               user.has_group("records_management.group_portal_readonly_employee")):
+        roles = request.env['records.portal.access'].get_snapshot()['roles']
+        if not any(roles[flag] for flag in (
+            'is_records_user', 'is_records_manager', 'is_portal_company_admin',
+            'is_portal_dept_admin', 'is_portal_dept_user', 'is_portal_readonly',
+        )):
             return request.render("website.403")
 
         values = self._prepare_portal_layout_values()
         partner = request.env.user.partner_id
         commercial_partner = partner.commercial_partner_id
 
-        # Enhanced Dashboard with Stock Integration (Phase 1 Implementation)
-        # Get stock quants owned by customer (Security Layer Pattern)
-        stock_quants = request.env['stock.quant'].sudo().search([
-            ('owner_id', '=', commercial_partner.id),
-            ('quantity', '>', 0),
-            ('product_id.default_code', '=', 'RECORDS-CONTAINER')
-        ])
-
-        # Get comprehensive stock summary
-        stock_summary = self._get_comprehensive_stock_summary(stock_quants)
-
-        # Get recent movements for dashboard
-        recent_movements = self._get_recent_dashboard_movements(commercial_partner)
-
-        # Group containers by location for location-based overview
-        containers_by_location = self._group_containers_by_location(stock_quants)
-
-        # Initialize inventory collections
-        all_inventory_items = []
-        total_count = 0
-
-        # Search term for filtering across all inventory types
-        search_term = search or ''
+        # Headline numbers come from the inventory counters
+        section_counts = self._get_inventory_section_counts()
 
         # Inventory type filter
         inventory_type_filters = {
@@ -2186,162 +1935,11 @@ class RecordsManagementController(http.Controller):
             'documents': {'label': 'Documents', 'types': ['documents']},
             'temp': {'label': 'Temp Inventory', 'types': ['temp']},
         }
-
-        if not inventory_type:
+        if inventory_type not in inventory_type_filters:
             inventory_type = 'all'
-
-        active_types = inventory_type_filters[inventory_type]['types']
-
-        # 1. CONTAINERS/BOXES
-        if 'containers' in active_types:
-            Container = request.env['records.container'].sudo()
-            container_domain = [('partner_id', '=', commercial_partner.id)]
-
-            if search_term:
-                container_domain += ['|', '|', ('name', 'ilike', search_term),
-                                   ('barcode', 'ilike', search_term),
-                                   ('temp_barcode', 'ilike', search_term)]
-
-            containers = Container.search(container_domain, order='create_date desc')
-
-            for container in containers:
-                all_inventory_items.append({
-                    'type': 'container',
-                    'id': container.id,
-                    'name': container.name,
-                    'barcode': container.barcode or container.temp_barcode,
-                    'description': f"Container - {container.state.title() if container.state else 'Active'}",
-                    'location': container.current_location_id.name if container.current_location_id else 'Unknown',
-                    'date': container.create_date,
-                    'state': container.state or 'active',
-                    'model': 'records.container',
-                    'icon': 'fa-archive',
-                    'color': 'primary'
-                })
-
-        # 2. FILE FOLDERS
-        if 'files' in active_types:
-            FileFolder = request.env['records.file']
-            file_domain = [('partner_id', '=', commercial_partner.id)]
-
-            if search_term:
-                file_domain += ['|', '|', ('name', 'ilike', search_term),
-                              ('barcode', 'ilike', search_term),
-                              ('description', 'ilike', search_term)]
-
-            file_folders = FileFolder.search(file_domain, order='create_date desc')
-
-            for file_folder in file_folders:
-                all_inventory_items.append({
-                    'type': 'file',
-                    'id': file_folder.id,
-                    'name': file_folder.name,
-                    'barcode': file_folder.barcode,
-                    'description': f"File Folder - {file_folder.description or 'No description'}",
-                    'location': file_folder.location_id.name if file_folder.location_id else 'Unknown',
-                    'date': file_folder.create_date,
-                    'state': file_folder.state or 'active',
-                    'model': 'records.file',
-                    'icon': 'fa-folder',
-                    'color': 'info'
-                })
-
-        # 3. DOCUMENTS (including PDF scans)
-        if 'documents' in active_types:
-            Document = request.env['records.document']
-            doc_domain = [('partner_id', '=', commercial_partner.id)]
-
-            if search_term:
-                doc_domain += ['|', '|', ('name', 'ilike', search_term),
-                              ('temp_barcode', 'ilike', search_term),
-                              ('description', 'ilike', search_term)]
-
-            documents = Document.search(doc_domain, order='create_date desc')
-
-            for document in documents:
-                # Check if document has PDF attachments/scans
-                attachments = request.env['ir.attachment'].sudo().search([
-                    ('res_model', '=', 'records.document'),
-                    ('res_id', '=', document.id),
-                    ('mimetype', 'like', 'pdf')
-                ])
-
-                attachment_info = f" - {len(attachments)} PDF scan(s)" if attachments else ""
-
-                # Get file state for document availability
-                file_state = document.file_id.state if document.file_id else 'in'
-
-                all_inventory_items.append({
-                    'type': 'document',
-                    'id': document.id,
-                    'name': document.name,
-                    'barcode': document.temp_barcode,
-                    'description': f"Document - {document.description or 'No description'}{attachment_info}",
-                    'location': document.container_id.current_location_id.name if document.container_id and document.container_id.current_location_id else 'Unknown',
-                    'date': document.create_date,
-                    'state': file_state,
-                    'model': 'records.document',
-                    'icon': 'fa-file-text',
-                    'color': 'success',
-                    'has_pdf': bool(attachments),
-                    'pdf_count': len(attachments)
-                })
-
-        # 4. TEMP INVENTORY
-        if 'temp' in active_types:
-            TempInventory = request.env['temp.inventory']
-            temp_domain = [('partner_id', '=', partner.id)]
-
-            if search_term:
-                temp_domain += ['|', ('name', 'ilike', search_term), ('description', 'ilike', search_term)]
-
-            temp_inventory = TempInventory.search(temp_domain, order='date_created desc')
-
-            for temp_item in temp_inventory:
-                all_inventory_items.append({
-                    'type': 'temp',
-                    'id': temp_item.id,
-                    'name': temp_item.name,
-                    'barcode': temp_item.name or '',  # temp.inventory has no barcode field
-                    'description': f"Temp Item - {temp_item.description or 'No description'}",
-                    'location': 'Temporary',
-                    'date': temp_item.date_created,
-                    'state': temp_item.state or 'draft',
-                    'model': 'temp.inventory',
-                    'icon': 'fa-clock-o',
-                    'color': 'warning'
-                })
-
-        # Sort all inventory items
-        sortby_options = {
-            'date': lambda x: x['date'],
-            'name': lambda x: x['name'].lower(),
-            'type': lambda x: x['type'],
-            'state': lambda x: x['state']
-        }
-
         if not sortby:
             sortby = 'date'
 
-        reverse_sort = sortby == 'date'  # Most recent first for dates
-        all_inventory_items.sort(key=sortby_options.get(sortby, sortby_options['date']), reverse=reverse_sort)
-
-        # Apply pagination
-        total_count = len(all_inventory_items)
-        items_per_page = self._items_per_page
-        start_index = (page - 1) * items_per_page
-        end_index = start_index + items_per_page
-        inventory_records = all_inventory_items[start_index:end_index]
-
-        # Pager setup
-        pager = request.website.pager(
-            url="/my/inventory",
-            url_args={'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby, 'filterby': filterby, 'search': search, 'inventory_type': inventory_type},
-            total=total_count,
-            page=page,
-            step=items_per_page,
-        )
-
         # Sorting options
         searchbar_sortings = {
             'date': {'label': 'Recent First', 'order': 'date desc'},
@@ -2350,22 +1948,34 @@ class RecordsManagementController(http.Controller):
             'state': {'label': 'Status', 'order': 'state asc'},
         }
 
+        # First page of the list rendered with the shell, from the same
+        # section query as /my/inventory/section (search, sort and pager apply)
+        section_page = request.env['records.portal.inventory'].get_section(
+            inventory_type, page=page, search=search, sortby=sortby,
+        )
+        pager = request.website.pager(
+            url="/my/inventory",
+            url_args={'search': search, 'sortby': sortby, 'inventory_type': inventory_type},
+            total=section_page['total'],
+            page=section_page['page'],
+            step=section_page['step'],
+        )
+
         values.update({
-            'inventory_records': inventory_records,
-            'page_name': 'inventory',
+            'inventory_records': section_page['items'],
             'pager': pager,
+            'searchbar_inputs': {'all': {'input': 'all', 'label': _('Search in All')}},
+            'search_in': 'all',
+            'page_name': 'inventory',
             'default_url': '/my/inventory',
             'searchbar_sortings': searchbar_sortings,
             'inventory_type_filters': inventory_type_filters,
             'sortby': sortby,
             'inventory_type': inventory_type,
-            'search': search_term,
-            'inventory_count': total_count,
+            'search': search or '',
+            'section_counts': section_counts,
+            'inventory_count': section_page['total'],
             'commercial_partner': commercial_partner,
-            # Phase 1 Enhanced Stock Integration Data
-            'stock_summary': stock_summary,
-            'recent_movements': recent_movements,
-            'containers_by_location': containers_by_location,
             # Real-time monitoring capabilities
             'enable_real_time_updates': True,
             'movement_refresh_interval': 30000,  # 30 seconds
@@ -2373,6 +1983,23 @@ class RecordsManagementController(http.Controller):
 
         return request.render("records_management.portal_inventory_enhanced", values)
 
+    @http.route(['/my/inventory/section/<string:section>'], type='http', auth="user", website=True)
+    def portal_inventory_section(self, section, page=1, search=None, sortby=None, **kw):
+        """One page of an inventory dashboard section - Returns JSON for AJAX calls."""
+        Inventory = request.env['records.portal.inventory']
+        if section == 'locations':
+            data = Inventory.get_locations(page=page)
+        elif section == 'movements':
+            data = {'items': Inventory.get_recent_movements()}
+        elif section == 'all' or section in INVENTORY_SECTIONS:
+            data = Inventory.get_section(section, page=page, search=search, sortby=sortby)
+        else:
+            return request.not_found()
+        return request.make_response(
+            json.dumps(data, default=str),
+            headers=[('Content-Type', 'application/json')]
+        )
+
     # ============================================================================
     # INVENTORY TAB ROUTES (Backend-style list/detail views)
     # ============================================================================
@@ -2389,12 +2016,19 @@ class RecordsManagementController(http.Controller):
         if search:
             base_domain += ['|', '|', ('name', 'ilike', search), ('barcode', 'ilike', search), ('temp_barcode', 'ilike', search)]
 
-        # Calculate counts for each state (for tab badges)
+        # Calculate counts for each state (for tab badges): inventory counters
+        # when unfiltered, otherwise a single grouped count of the search
+        if search:
+            state_counts = dict(Container._read_group(base_domain, ['state'], ['__count']))
+        else:
+            state_counts = request.env['records.inventory.counter'].sudo().get_counts(
+                [partner.id], ['records.container']
+            )['records.container']
         counts = {
-            'all': Container.search_count(base_domain),
-            'in': Container.search_count(base_domain + [('state', '=', 'in')]),
-            'out': Container.search_count(base_domain + [('state', '=', 'out')]),
-            'pending': Container.search_count(base_domain + [('state', '=', 'pending')]),
+            'all': sum(state_counts.values()),
+            'in': state_counts.get('in', 0),
+            'out': state_counts.get('out', 0),
+            'pending': state_counts.get('pending', 0),
         }
 
         # Apply state filter to domain
@@ -3655,14 +3289,8 @@ class RecordsManagementController(http.Controller):
 
         documents = Document.search(domain, order='create_date desc', limit=20, offset=pager['offset'])
 
-        # Build PDF scan info dictionary for each document
-        doc_pdf_scans = {}
-        for doc in documents:
-            doc_pdf_scans[doc.id] = request.env['ir.attachment'].sudo().search([
-                ('res_model', '=', 'records.document'),
-                ('res_id', '=', doc.id),
-                ('mimetype', 'like', 'pdf')
-            ])
+        # PDF scans of the whole page in one grouped query
+        doc_pdf_scans = request.env['records.attachment.index'].get_scans(documents)
 
         values.update({
             'documents': documents,
@@ -4435,48 +4063,73 @@ class RecordsManagementController(http.Controller):
                 'count': 0
             }
 
+    def _instant_search_page(self, model_name, query, domain, cursor=None, offset=0, limit=50):
+        """
+        Run one instant-search page through records.search.engine.
+
+        Clients should page with the opaque ``next_cursor`` (seek pagination:
+        every page costs the same and the total is counted once per query).
+        A plain ``offset`` is still honoured for older clients.
+
+        Returns:
+            tuple: (records, pagination dict merged into the JSON response)
+        """
+        engine = request.env['records.search.engine'].sudo()
+        limit = int(limit or 50)
+        offset = int(offset or 0)
+        if offset and not cursor:
+            records, total = engine.search_ranked(model_name, query, domain, offset=offset, limit=limit)
+            has_more = (offset + limit) < total
+            return records, {
+                'total': total,
+                'has_more': has_more,
+                'next_offset': offset + limit if has_more else None,
+                'next_cursor': None,
+            }
+        page = engine.search_page(model_name, query, domain, cursor=cursor, limit=limit)
+        has_more = page['has_more']
+        return page['records'], {
+            'total': page['total'],
+            'has_more': has_more,
+            'next_offset': offset + limit if has_more and not cursor else None,
+            'next_cursor': page['next_cursor'],
+        }
+
     @http.route(['/my/containers/search'], type='json', auth='user', methods=['POST'])
-    def instant_container_search(self, query='', offset=0, limit=50, **kw):
+    @search_monitor.monitored('portal_container_search')
+    def instant_container_search(self, query='', offset=0, limit=50, cursor=None, **kw):
         """
         Chunked instant search for containers with indexed fields.
         Handles large datasets (20,000+ containers) with pagination.
         
         Args:
             query: Search string
-            offset: Starting record (for pagination)
+            offset: Starting record (legacy pagination)
             limit: Number of records per chunk (default 50)
+            cursor: Opaque next_cursor from the previous chunk
         """
         try:
             partner = request.env.user.partner_id.commercial_partner_id
 
-            # Build search domain with indexed fields
             domain = [('partner_id', '=', partner.id)]
 
-            if query:
-                query = query.strip()
-                # Search across indexed fields: name (Box Number), barcode, temp_barcode,
-                # alpha_range, content_description for comprehensive instant search
-                domain.append('|')
-                domain.append('|')
-                domain.append('|')
-                domain.append('|')
-                domain.append(('name', 'ilike', query))
-                domain.append(('barcode', 'ilike', query))
-                domain.append(('temp_barcode', 'ilike', query))
-                domain.append(('alpha_range', 'ilike', query))
-                domain.append(('content_description', 'ilike', query))
-
-            Container = request.env['records.container'].sudo()
-
-            # Get total count
-            total_count = Container.search_count(domain)
-
-            # Get paginated results
-            containers = Container.search(
-                domain,
-                offset=offset,
-                limit=limit,
-                order='name asc'
+            # Shared per-customer result cache (per record rule visibility),
+            # invalidated when the customer's containers are created, changed
+            # or deleted
+            cache = request.env['records.search.cache'].sudo()
+            cache_params = dict(
+                request.env['records.search.cache'].get_visibility(),
+                offset=int(offset or 0), limit=int(limit or 50), cursor=cursor,
+            )
+            cached = cache.get('portal_container_search', partner.id, query, params=cache_params)
+            search_monitor.log_cache('portal_container_search', cached is not None)
+            if cached is not None:
+                return cached
+
+            # Ranked full-text search (weighted tsvector + trigram prefix match on
+            # box number / barcodes) - see records.search.engine
+            containers, pagination = self._instant_search_page(
+                'records.container', query, domain, cursor=cursor, offset=offset, limit=limit
             )
 
             results = []
@@ -4495,14 +4148,14 @@ class RecordsManagementController(http.Controller):
                     'contents': (container.content_description or '')[:100],  # Truncate for performance
                 })
 
-            return {
-                'success': True,
-                'containers': results,
-                'count': len(results),
-                'total': total_count,
-                'has_more': (offset + limit) < total_count,
-                'next_offset': offset + limit if (offset + limit) < total_count else None
-            }
+            response = dict(
+                pagination,
+                success=True,
+                containers=results,
+                count=len(results),
+            )
+            cache.put('portal_container_search', partner.id, query, response, params=cache_params)
+            return response
 
         except Exception as e:
             _logger.error(f"Instant container search failed: {str(e)}")
@@ -5030,33 +4683,19 @@ class RecordsManagementController(http.Controller):
             }
 
     @http.route(['/my/files/search'], type='json', auth='user', methods=['POST'])
-    def instant_file_search(self, query='', offset=0, limit=50, **kw):
+    @search_monitor.monitored('portal_file_search')
+    def instant_file_search(self, query='', offset=0, limit=50, cursor=None, **kw):
         """
         Chunked instant search for files with indexed fields.
-        Handles large datasets with pagination.
+        Handles large datasets with cursor pagination (see _instant_search_page).
         """
         try:
             partner = request.env.user.partner_id.commercial_partner_id
 
             domain = [('partner_id', '=', partner.id)]
 
-            if query:
-                query = query.strip()
-                domain.append('|')
-                domain.append('|')
-                domain.append(('name', 'ilike', query))
-                domain.append(('file_number', 'ilike', query))
-                domain.append(('description', 'ilike', query))
-
-            File = request.env['records.file'].sudo()
-
-            total_count = File.search_count(domain)
-
-            files = File.search(
-                domain,
-                offset=offset,
-                limit=limit,
-                order='name asc'
+            files, pagination = self._instant_search_page(
+                'records.file', query, domain, cursor=cursor, offset=offset, limit=limit
             )
 
             results = []
@@ -5064,20 +4703,18 @@ class RecordsManagementController(http.Controller):
                 results.append({
                     'id': file_rec.id,
                     'name': file_rec.name,
-                    'number': file_rec.file_number or '',
+                    'number': file_rec.barcode or file_rec.temp_barcode or '',
                     'container': file_rec.container_id.name if file_rec.container_id else '',
                     'container_id': file_rec.container_id.id if file_rec.container_id else None,
                     'description': (file_rec.description or '')[:100],
                 })
 
-            return {
-                'success': True,
-                'files': results,
-                'count': len(results),
-                'total': total_count,
-                'has_more': (offset + limit) < total_count,
-                'next_offset': offset + limit if (offset + limit) < total_count else None
-            }
+            return dict(
+                pagination,
+                success=True,
+                files=results,
+                count=len(results),
+            )
 
         except Exception as e:
             _logger.error(f"Instant file search failed: {str(e)}")
@@ -5720,20 +5357,34 @@ class RecordsManagementController(http.Controller):
     @http.route(['/my/inventory/counts'], type='http', auth='user', website=True)
     def portal_inventory_counts(self, **kw):
         """Inventory count summary - Returns JSON for AJAX calls."""
+        import json
+        return request.make_response(
+            json.dumps(self._get_inventory_section_counts()),
+            headers=[('Content-Type', 'application/json')]
+        )
+
+    def _get_inventory_section_counts(self):
+        """Inventory totals per dashboard section, from the inventory counters"""
         user = request.env.user
         partner = user.partner_id
 
         # Department filtering
-        domain = [('partner_id', '=', partner.commercial_partner_id.id)]
+        department_ids = None
         if not user.has_group('records_management.group_portal_company_admin'):
             accessible_departments = user.accessible_department_ids.ids
             if accessible_departments:
-                domain.append(('department_id', 'in', accessible_departments))
-
-        # Get counts for all inventory types (use sudo for portal access)
-        containers_count = request.env['records.container'].sudo().search_count(domain)
-        files_count = request.env['records.file'].sudo().search_count(domain)
-        documents_count = request.env['records.document'].sudo().search_count(domain)
+                department_ids = accessible_departments
+
+        # Get counts for all inventory types from the inventory counters
+        Counter = request.env['records.inventory.counter'].sudo()
+        counts = Counter.get_counts(
+            [partner.commercial_partner_id.id],
+            ['records.container', 'records.file', 'records.document'],
+            department_ids=department_ids,
+        )
+        containers_count = Counter.get_total(counts['records.container'])
+        files_count = Counter.get_total(counts['records.file'])
+        documents_count = Counter.get_total(counts['records.document'])
         
         # Temp inventory count
         temp_domain = [('partner_id', '=', partner.commercial_partner_id.id)]
@@ -5743,17 +5394,13 @@ class RecordsManagementController(http.Controller):
         locations_domain = [('partner_id', '=', partner.commercial_partner_id.id)]
         locations_count = request.env['customer.staging.location'].sudo().search_count(locations_domain)
 
-        import json
-        return request.make_response(
-            json.dumps({
-                'containers': containers_count,
-                'files': files_count,
-                'documents': documents_count,
-                'temp': temp_count,
-                'locations': locations_count,
-            }),
-            headers=[('Content-Type', 'application/json')]
-        )
+        return {
+            'containers': containers_count,
+            'files': files_count,
+            'documents': documents_count,
+            'temp': temp_count,
+            'locations': locations_count,
+        }
 
     @http.route(['/my/inventory/recent_activity'], type='http', auth='user', website=True)
     def portal_inventory_recent_activity(self, page=1, **kw):
@@ -6538,11 +6185,7 @@ class RecordsManagementController(http.Controller):
             return request.not_found()
 
         # Get PDF scans
-        pdf_scans = request.env['ir.attachment'].sudo().search([
-            ('res_model', '=', 'records.document'),
-            ('res_id', '=', document_id),
-            ('mimetype', 'like', 'pdf')
-        ])
+        pdf_scans = request.env['records.attachment.index'].get_scans(document)[document.id]
 
         values = {
             'document': document,
@@ -7609,103 +7252,6 @@ class RecordsManagementController(http.Controller):
         }
         return request.render('records_management.portal_document_retrieval_template', values)
 
-    # ============================================================================
-    # ENHANCED STOCK INTEGRATION HELPER METHODS (PHASE 1)
-    # ============================================================================
-
-    def _get_comprehensive_stock_summary(self, stock_quants):
-        """
-        Get comprehensive stock summary for enhanced dashboard.
-        Integrates with native Odoo stock system for real-time data.
-        """
-        if not stock_quants:
-            return {
-                'total_quantity': 0,
-                'locations_count': 0,
-                'last_movement': None,
-                'total_containers': 0,
-                'stock_value': 0.0,
-            }
-
-        # Calculate comprehensive metrics
-        total_quantity = sum(quant.quantity for quant in stock_quants)
-        unique_locations = stock_quants.mapped('location_id')
-
-        # Get containers linked to these quants
-        Container = request.env['records.container'].sudo()
-        containers = Container.search([('quant_id', 'in', stock_quants.ids)])
-
-        # Get last movement from any container
-        last_movement = None
-        if containers:
-            latest_movements = request.env['records.stock.movement'].sudo().search([
-                ('container_id', 'in', containers.ids)
-            ], order='movement_date desc', limit=1)
-            if latest_movements:
-                last_movement = latest_movements[0].movement_date
-
-        return {
-            'total_quantity': int(total_quantity),
-            'locations_count': len(unique_locations),
-            'last_movement': last_movement,
-            'total_containers': len(containers),
-            'stock_value': sum(quant.value for quant in stock_quants),
-            'locations': [{'name': loc.complete_name, 'id': loc.id} for loc in unique_locations],
-        }
-
-    def _get_recent_dashboard_movements(self, partner, limit=10):
-        """Get recent movements for dashboard display"""
-        Movement = request.env['records.stock.movement'].sudo()
-        movements = Movement.search([
-            ('partner_id', '=', partner.id),
-            ('is_portal_visible', '=', True),
-            ('state', 'in', ['confirmed', 'done'])
-        ], order='movement_date desc', limit=limit)
-
-        movement_data = []
-        for movement in movements:
-            movement_data.append({
-                'container_name': movement.container_id.name,
-                'movement_type': movement._get_movement_type_display(),
-                'location': movement.to_location_id.complete_name,
-                'date': movement.movement_date.strftime('%Y-%m-%d %H:%M'),
-                'user': movement.user_id.name,
-            })
-
-        return movement_data
-
-    def _group_containers_by_location(self, stock_quants):
-        """Group containers by location with enhanced data"""
-        location_groups = {}
-
-        for quant in stock_quants:
-            location = quant.location_id
-            if location.id not in location_groups:
-                location_groups[location.id] = {
-                    'location': location,
-                    'container_count': 0,
-                    'total_quantity': 0,
-                    'containers': [],
-                }
-
-            # Get container for this quant
-            container = request.env['records.container'].sudo().search([
-                ('quant_id', '=', quant.id)
-            ], limit=1)
-
-            if container:
-                location_groups[location.id]['containers'].append({
-                    'id': container.id,
-                    'name': container.name,
-                    'barcode': container.barcode or container.temp_barcode,
-                    'state': container.state,
-                })
-
-            location_groups[location.id]['container_count'] += 1
-            location_groups[location.id]['total_quantity'] += quant.quantity
-
-        return list(location_groups.values())
-
     @http.route(['/my/document-retrieval/calculate-price'], type='json', auth='user')
     def calculate_retrieval_price(self, priority='standard', item_count=1, **kw):
         """Calculate pricing for document retrieval request"""
@@ -5,11 +5,14 @@ Customer-facing calendar showing scheduled services, pickups, and deliveries
 Also includes the Work Order Coordinator view for company/department admins
 """
 
+import json
 import logging
-from datetime import datetime, timedelta
-from odoo import http, _
+from datetime import datetime, timedelta, timezone
+from odoo import http
 from odoo.http import request
 from odoo.addons.portal.controllers.portal import CustomerPortal
+from odoo.addons.records_management.models.records_calendar_feed import CALENDAR_HORIZON_DAYS
+from odoo.addons.records_management.models.unified_work_order import COORDINATOR_COLUMNS, UPCOMING_DAYS
 
 _logger = logging.getLogger(__name__)
 
@@ -88,13 +91,13 @@ class PortalCalendarController(CustomerPortal):
         
         work_orders = UnifiedWO.search(domain, order=order, limit=step, offset=offset)
         
-        # Group by state for kanban
-        state_groups = {}
-        for wo in UnifiedWO.search(domain):
-            state = wo.state or 'draft'
-            if state not in state_groups:
-                state_groups[state] = []
-            state_groups[state].append(wo)
+        # Summary cards come from one grouped query; the kanban board shows
+        # the current page, split into its columns
+        summary = UnifiedWO.get_coordinator_summary(domain)
+        kanban_columns = {
+            column: work_orders.filtered(lambda wo, states=states: (wo.state or 'draft') in states)
+            for column, states in COORDINATOR_COLUMNS.items()
+        }
         
         values.update({
             'work_orders': work_orders,
@@ -104,7 +107,10 @@ class PortalCalendarController(CustomerPortal):
             'sortby': sortby,
             'filterby': filterby,
             'search': search or '',
-            'state_groups': state_groups,
+            'upcoming_days': UPCOMING_DAYS,
+            'summary': summary,
+            'kanban_columns': kanban_columns,
+            'work_order_types': dict(UnifiedWO._fields['work_order_type']._description_selection(request.env)),
             'filter_options': [
                 ('all', 'All Work Orders'),
                 ('active', 'Active (Not Completed)'),
@@ -157,14 +163,35 @@ class PortalCalendarController(CustomerPortal):
         Display customer's scheduled services in a calendar view.
         """
         partner = request.env.user.partner_id
+        feed = request.env['records.calendar.feed']._get_feed(partner)
 
         values = {
             'page_name': 'calendar',
             'partner': partner,
+            'ics_url': '%s/calendar/ics/%s.ics' % (request.httprequest.host_url.rstrip('/'), feed.access_token),
         }
 
         return request.render("records_management.portal_calendar_view", values)
 
+    def _parse_calendar_date(self, value, default):
+        """FullCalendar ISO string (any offset) to a naive UTC datetime, ``default`` if malformed"""
+        if not value:
+            return default
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return default
+        if parsed.tzinfo:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    def _get_calendar_window(self, start, end):
+        now = datetime.now()
+        return (
+            self._parse_calendar_date(start, now - timedelta(days=30)),
+            self._parse_calendar_date(end, now + timedelta(days=90)),
+        )
+
     @http.route(['/my/calendar/events'], type='json', auth='user')
     def portal_calendar_events(self, start=None, end=None, **kw):
         """
@@ -181,202 +208,52 @@ class PortalCalendarController(CustomerPortal):
             'url': detail_url (optional),
             'extendedProps': {...}
         }
-        """
-        partner = request.env.user.partner_id
-        events = []
-
-        # Parse date range (FullCalendar sends ISO strings)
-        if start:
-            start_date = datetime.fromisoformat(start.replace('Z', '+00:00'))
-        else:
-            start_date = datetime.now() - timedelta(days=30)
-
-        if end:
-            end_date = datetime.fromisoformat(end.replace('Z', '+00:00'))
-        else:
-            end_date = datetime.now() + timedelta(days=90)
-
-        # ============================================================================
-        # 1. SHREDDING SERVICES (Recurring bin services)
-        # ============================================================================
-        ShredBin = request.env['shredding.service.bin'].sudo()
-        shred_bins = ShredBin.search([
-            ('current_customer_id', '=', partner.commercial_partner_id.id),
-            ('status', '=', 'in_service')
-        ])
-
-        for bin in shred_bins:
-            # Use next_service_date from shredding.service.bin
-            if bin.next_service_date:
-                events.append({
-                    'id': f'shred_{bin.id}',
-                    'title': _('Shredding Service: %s') % bin.barcode,
-                    'start': bin.next_service_date.isoformat(),
-                    'backgroundColor': '#8B0000',  # Dark red
-                    'borderColor': '#8B0000',
-                    'extendedProps': {
-                        'type': 'shredding',
-                        'bin_size': bin.bin_size,
-                        'bin_id': bin.id,
-                        'location': bin.current_department_id.name if bin.current_department_id else 'On-site',
-                    }
-                })
-
-        # ============================================================================
-        # 2. FIELD SERVICE TASKS (Pickups, Retrievals, Deliveries)
-        # ============================================================================
-        Task = request.env['project.task'].sudo()
-
-        # Search for FSM tasks related to this customer
-        task_domain = [
-            ('partner_id', '=', partner.commercial_partner_id.id),
-            '|',
-            ('scheduled_start_time', '>=', start_date),
-            ('date_deadline', '>=', start_date.date()),
-        ]
-
-        tasks = Task.search(task_domain)
-
-        for task in tasks:
-            # Determine event date (prefer scheduled_start_time, fallback to date_deadline)
-            event_start = task.scheduled_start_time or datetime.combine(
-                task.date_deadline or datetime.now().date(),
-                datetime.min.time()
-            )
-
-            event_end = task.scheduled_end_time or (event_start + timedelta(hours=2))
-
-            # Color code by work order type
-            color_map = {
-                'pickup': '#007bff',      # Blue
-                'retrieval': '#28a745',   # Green
-                'destruction': '#dc3545', # Red
-                'delivery': '#ffc107',    # Yellow
-                'internal': '#6c757d',    # Gray
-            }
-
-            task_type = task.work_order_type or 'other'
-            color = color_map.get(task_type, '#17a2b8')  # Teal default
-
-            # Build detail URL
-            detail_url = f'/my/tasks/{task.id}' if task.portal_show else None
-
-            events.append({
-                'id': f'task_{task.id}',
-                'title': task.name,
-                'start': event_start.isoformat(),
-                'end': event_end.isoformat() if event_end else None,
-                'backgroundColor': color,
-                'borderColor': color,
-                'url': detail_url,
-                'extendedProps': {
-                    'type': 'service',
-                    'work_order_type': task_type,
-                    'task_id': task.id,
-                    'stage': task.stage_id.name if task.stage_id else 'Scheduled',
-                }
-            })
-
-        # ============================================================================
-        # 3. PORTAL REQUESTS (Pending pickups, destructions)
-        # ============================================================================
-        PortalRequest = request.env['portal.request'].sudo()
-
-        portal_requests = PortalRequest.search([
-            ('partner_id', '=', partner.commercial_partner_id.id),
-            ('state', 'in', ['draft', 'submitted', 'approved']),
-            ('requested_date', '!=', False),
-            ('requested_date', '>=', start_date.date()),
-            ('requested_date', '<=', end_date.date()),
-        ])
 
-        for req in portal_requests:
-            req_date = datetime.combine(req.requested_date, datetime.min.time())
-
-            # Color by request type
-            req_color = '#6610f2' if req.request_type == 'destruction' else '#fd7e14'  # Purple or Orange
-
-            events.append({
-                'id': f'request_{req.id}',
-                'title': _('%s Request') % req.request_type.capitalize(),
-                'start': req_date.isoformat(),
-                'backgroundColor': req_color,
-                'borderColor': req_color,
-                'url': f'/my/requests/{req.id}',
-                'extendedProps': {
-                    'type': 'request',
-                    'request_type': req.request_type,
-                    'request_id': req.id,
-                    'state': req.state,
-                }
-            })
-
-        # ============================================================================
-        # 4. CONTAINER RETRIEVALS (Scheduled document access)
-        # ============================================================================
-        RetrievalOrder = request.env['records.retrieval.order'].sudo()
-
-        retrievals = RetrievalOrder.search([
-            ('partner_id', '=', partner.commercial_partner_id.id),
-            ('state', 'not in', ['cancelled', 'delivered']),
-            ('scheduled_date', '>=', start_date),
-            ('scheduled_date', '<=', end_date),
-        ])
-
-        for retrieval in retrievals:
-            events.append({
-                'id': f'retrieval_{retrieval.id}',
-                'title': _('Document Retrieval: %s') % retrieval.name,
-                'start': retrieval.scheduled_date.isoformat(),
-                'backgroundColor': '#20c997',  # Teal
-                'borderColor': '#20c997',
-                'url': f'/my/retrievals/{retrieval.id}' if hasattr(retrieval, 'portal_url') else None,
-                'extendedProps': {
-                    'type': 'retrieval',
-                    'retrieval_id': retrieval.id,
-                    'state': retrieval.state,
-                }
-            })
-
-        return events
+        Events are read from the customer's calendar feed (one indexed range
+        query, see records.calendar.feed).
+        """
+        start_date, end_date = self._get_calendar_window(start, end)
+        feed = request.env['records.calendar.feed']._get_feed(request.env.user.partner_id)
+        return feed.get_events(start_date, end_date)
 
-    def _generate_recurring_dates(self, start_date, frequency, range_start, range_end):
+    @http.route(['/my/calendar/feed'], type='http', auth='user', methods=['GET'])
+    def portal_calendar_feed(self, start=None, end=None, **kw):
         """
-        Generate recurring service dates based on frequency.
-        
-        Args:
-            start_date: First service date
-            frequency: 'weekly', 'biweekly', 'monthly', 'quarterly'
-            range_start: Calendar view start
-            range_end: Calendar view end
-            
-        Returns:
-            List of datetime objects
+        Same events as /my/calendar/events over plain GET, with an ETag:
+        polling clients get a 304 until the customer's events change.
         """
-        if not start_date or not frequency:
-            return []
-
-        dates = []
-        current = start_date
-
-        # Frequency intervals
-        intervals = {
-            'weekly': timedelta(days=7),
-            'biweekly': timedelta(days=14),
-            'monthly': timedelta(days=30),  # Approximate
-            'quarterly': timedelta(days=90),
-        }
-
-        interval = intervals.get(frequency, timedelta(days=7))
-
-        # Generate dates within range
-        while current <= range_end:
-            if current >= range_start:
-                dates.append(current)
-            current += interval
-
-            # Safety limit: max 100 occurrences
-            if len(dates) > 100:
-                break
+        start_date, end_date = self._get_calendar_window(start, end)
+        feed = request.env['records.calendar.feed']._get_feed(request.env.user.partner_id)
+        etag = feed.get_etag(start_date, end_date)
+        headers = [('ETag', '"%s"' % etag), ('Cache-Control', 'private, no-cache')]
+        if etag in request.httprequest.if_none_match:
+            return request.make_response('', headers=headers, status=304)
+        return request.make_response(
+            json.dumps(feed.get_events(start_date, end_date)),
+            headers=headers + [('Content-Type', 'application/json')],
+        )
 
-        return dates
+    @http.route(['/calendar/ics/<string:token>.ics'], type='http', auth='public', methods=['GET'])
+    def portal_calendar_ics(self, token, **kw):
+        """
+        ICS subscription of a customer's service calendar (secret URL shown
+        on /my/calendar), from 30 days back to the recurrence horizon.
+        """
+        feed = request.env['records.calendar.feed'].sudo().search([('access_token', '=', token)], limit=1)
+        if not token or not feed:
+            return request.not_found()
+        feed = feed._get_feed(feed.partner_id)
+        now = datetime.now()
+        start_date = now - timedelta(days=30)
+        end_date = now + timedelta(days=CALENDAR_HORIZON_DAYS)
+        etag = feed.get_etag('ics', start_date.date())
+        headers = [('ETag', '"%s"' % etag), ('Cache-Control', 'private, no-cache')]
+        if etag in request.httprequest.if_none_match:
+            return request.make_response('', headers=headers, status=304)
+        return request.make_response(
+            feed.render_ics(start_date, end_date),
+            headers=headers + [
+                ('Content-Type', 'text/calendar; charset=utf-8'),
+                ('Content-Disposition', 'inline; filename="service-calendar.ics"'),
+            ],
+        )
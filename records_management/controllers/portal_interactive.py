@@ -5,9 +5,47 @@ Provides JSON endpoints for AJAX-powered portal widgets
 """
 
 from odoo import http, fields, _
-from odoo.http import request
+from odoo.http import request, Response, content_disposition
 from odoo.addons.portal.controllers.portal import CustomerPortal
+from odoo.addons.records_management.models.records_export_engine import CSV_MIMETYPE, XLSX_MIMETYPE
+from werkzeug.wsgi import wrap_file
 import json
+import tempfile
+
+
+def get_export_async_threshold():
+    """Rows above which exports run as background jobs instead of in the request"""
+    return int(request.env['ir.config_parameter'].sudo().get_param(
+        'records_management.export.async_threshold', 5000
+    ))
+
+
+def stream_export_response(engine, sections, file_format):
+    """
+    Response streaming a [(kind, ids)] export (see records.export.engine).
+
+    CSV rows are generated chunk by chunk while the response is sent. XLSX is
+    written in constant_memory mode to a temporary file, which is then
+    streamed: the zip container can only be produced once all rows are written.
+    """
+    filename = engine.get_filename(sections[0][0], file_format)
+    headers = [('Content-Disposition', content_disposition(filename))]
+    if file_format == 'xlsx':
+        output = tempfile.TemporaryFile()
+        engine.write_xlsx(sections, output)
+        headers += [('Content-Type', XLSX_MIMETYPE), ('Content-Length', str(output.tell()))]
+        output.seek(0)
+        body = wrap_file(request.httprequest.environ, output)
+    else:
+        headers += [('Content-Type', '%s; charset=utf-8' % CSV_MIMETYPE)]
+        body = engine.stream_csv(sections)
+    return Response(body, headers=headers, direct_passthrough=True)
+
+
+def enqueue_export_response(name, file_format, sections, use_sudo=False):
+    """Queue a background export job and send the user to its progress page"""
+    job = request.env['records.export.job'].enqueue(name, file_format, sections, use_sudo=use_sudo)
+    return request.redirect('/my/export/job/%s' % job.id)
 
 
 class PortalInteractiveController(CustomerPortal):
@@ -101,11 +139,16 @@ class PortalInteractiveController(CustomerPortal):
                     ('id', 'in', ids),
                     ('partner_id', '=', request.env.user.partner_id.id)
                 ]
-                containers = Container.search(domain, order='name')
             else:
                 # Otherwise use standard domain filter
                 domain = self._get_containers_domain(**kw)
-                containers = Container.search(domain, order='name')
+
+            # Large exports run in the background (see records.export.job)
+            if format in ('xlsx', 'csv') and Container.search_count(domain) > get_export_async_threshold():
+                return enqueue_export_response(_('Containers'), format, [
+                    {'kind': 'containers', 'model': 'records.container', 'domain': domain, 'order': 'name'},
+                ])
+            containers = Container.search(domain, order='name')
             
             if format == 'xlsx':
                 return self._export_containers_xlsx(containers)
@@ -137,139 +180,18 @@ class PortalInteractiveController(CustomerPortal):
         
         return domain
 
+    def _stream_export(self, kind, records, file_format):
+        """Stream an export of records without building it in memory"""
+        engine = request.env['records.export.engine'].with_env(records.env)
+        return stream_export_response(engine, [(kind, records.ids)], file_format)
+
     def _export_containers_xlsx(self, containers):
         """Export containers to Excel with comprehensive data"""
-        import io
-        from odoo.tools.misc import xlsxwriter
-        from datetime import datetime
-        
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        worksheet = workbook.add_worksheet('Containers')
-        
-        # Header format
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4F81BD',
-            'font_color': 'white',
-            'border': 1,
-            'text_wrap': True,
-            'valign': 'vcenter'
-        })
-        
-        # Date format
-        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
-        
-        # Write headers - comprehensive columns
-        headers = [
-            'Container Number',
-            'Barcode', 
-            'Status',
-            'Location',
-            'Department',
-            'Description',
-            'Storage Start Date',
-            'Destruction Due Date',
-            'Retention Policy',
-            'File Count',
-            'Document Count',
-            'Date Created',
-            'Last Updated'
-        ]
-        
-        # Set column widths
-        col_widths = [18, 15, 12, 20, 20, 30, 15, 18, 20, 10, 12, 15, 15]
-        for col, (header, width) in enumerate(zip(headers, col_widths)):
-            worksheet.write(0, col, header, header_format)
-            worksheet.set_column(col, col, width)
-        
-        # Write data
-        for row, container in enumerate(containers, start=1):
-            worksheet.write(row, 0, container.name or '')
-            worksheet.write(row, 1, container.barcode or container.temp_barcode or '')
-            worksheet.write(row, 2, dict(container._fields['state'].selection).get(container.state, container.state) if container.state else '')
-            worksheet.write(row, 3, container.location_id.name if container.location_id else '')
-            worksheet.write(row, 4, container.department_id.name if container.department_id else '')
-            worksheet.write(row, 5, container.description or '')
-            worksheet.write(row, 6, fields.Date.to_string(container.storage_start_date) if container.storage_start_date else '')
-            worksheet.write(row, 7, fields.Date.to_string(container.destruction_due_date) if container.destruction_due_date else '')
-            worksheet.write(row, 8, container.retention_policy_id.name if container.retention_policy_id else '')
-            worksheet.write(row, 9, container.file_count if hasattr(container, 'file_count') else 0)
-            worksheet.write(row, 10, container.document_count if hasattr(container, 'document_count') else 0)
-            worksheet.write(row, 11, fields.Date.to_string(container.create_date.date()) if container.create_date else '')
-            worksheet.write(row, 12, fields.Date.to_string(container.write_date.date()) if container.write_date else '')
-        
-        # Freeze header row
-        worksheet.freeze_panes(1, 0)
-        
-        workbook.close()
-        output.seek(0)
-        
-        # Generate filename with date
-        filename = f"containers_export_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
-        
-        return request.make_response(
-            output.read(),
-            headers=[
-                ('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
-                ('Content-Disposition', f'attachment; filename="{filename}"')
-            ]
-        )
+        return self._stream_export('containers', containers, 'xlsx')
 
     def _export_containers_csv(self, containers):
         """Export containers to CSV with comprehensive data"""
-        import csv
-        import io
-        from datetime import datetime
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write comprehensive header
-        writer.writerow([
-            'Container Number',
-            'Barcode', 
-            'Status',
-            'Location',
-            'Department',
-            'Description',
-            'Storage Start Date',
-            'Destruction Due Date',
-            'Retention Policy',
-            'File Count',
-            'Document Count',
-            'Date Created',
-            'Last Updated'
-        ])
-        
-        # Write data
-        for container in containers:
-            writer.writerow([
-                container.name or '',
-                container.barcode or container.temp_barcode or '',
-                dict(container._fields['state'].selection).get(container.state, container.state) if container.state else '',
-                container.location_id.name if container.location_id else '',
-                container.department_id.name if container.department_id else '',
-                container.description or '',
-                fields.Date.to_string(container.storage_start_date) if container.storage_start_date else '',
-                fields.Date.to_string(container.destruction_due_date) if container.destruction_due_date else '',
-                container.retention_policy_id.name if container.retention_policy_id else '',
-                container.file_count if hasattr(container, 'file_count') else 0,
-                container.document_count if hasattr(container, 'document_count') else 0,
-                fields.Date.to_string(container.create_date.date()) if container.create_date else '',
-                fields.Date.to_string(container.write_date.date()) if container.write_date else ''
-            ])
-        
-        # Generate filename with date
-        filename = f"containers_export_{datetime.now().strftime('%Y-%m-%d')}.csv"
-        
-        return request.make_response(
-            output.getvalue(),
-            headers=[
-                ('Content-Type', 'text/csv'),
-                ('Content-Disposition', f'attachment; filename="{filename}"')
-            ]
-        )
+        return self._stream_export('containers', containers, 'csv')
 
     @http.route(['/my/requests/export'], type='http', auth="user", website=True)
     def export_requests(self, format='xlsx', **kw):
@@ -290,70 +212,11 @@ class PortalInteractiveController(CustomerPortal):
 
     def _export_requests_xlsx(self, requests):
         """Export requests to Excel"""
-        import io
-        from odoo.tools.misc import xlsxwriter
-        
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        worksheet = workbook.add_worksheet('Requests')
-        
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4F81BD',
-            'font_color': 'white',
-            'border': 1
-        })
-        
-        headers = ['Request #', 'Type', 'Status', 'Description', 'Created', 'Updated']
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header, header_format)
-        
-        for row, req in enumerate(requests, start=1):
-            worksheet.write(row, 0, req.name or '')
-            worksheet.write(row, 1, req.request_type or '')
-            worksheet.write(row, 2, req.state or '')
-            worksheet.write(row, 3, req.description or '')
-            worksheet.write(row, 4, fields.Date.to_string(req.create_date.date()) if req.create_date else '')
-            worksheet.write(row, 5, fields.Date.to_string(req.write_date.date()) if req.write_date else '')
-        
-        workbook.close()
-        output.seek(0)
-        
-        return request.make_response(
-            output.read(),
-            headers=[
-                ('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
-                ('Content-Disposition', 'attachment; filename="requests_export.xlsx"')
-            ]
-        )
+        return self._stream_export('requests', requests, 'xlsx')
 
     def _export_requests_csv(self, requests):
         """Export requests to CSV"""
-        import csv
-        import io
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        writer.writerow(['Request #', 'Type', 'Status', 'Description', 'Created', 'Updated'])
-        
-        for req in requests:
-            writer.writerow([
-                req.name or '',
-                req.request_type or '',
-                req.state or '',
-                req.description or '',
-                fields.Date.to_string(req.create_date.date()) if req.create_date else '',
-                fields.Date.to_string(req.write_date.date()) if req.write_date else ''
-            ])
-        
-        return request.make_response(
-            output.getvalue(),
-            headers=[
-                ('Content-Type', 'text/csv'),
-                ('Content-Disposition', 'attachment; filename="requests_export.csv"')
-            ]
-        )
+        return self._stream_export('requests', requests, 'csv')
 
     # ================================================================
     # FILE FOLDER EXPORT
@@ -383,6 +246,12 @@ class PortalInteractiveController(CustomerPortal):
                               ('description', 'ilike', kw['search']),
                               ('barcode', 'ilike', kw['search'])]
                 files = File.search(domain, order='name')
+
+            # Large exports run in the background (see records.export.job)
+            if format in ('xlsx', 'csv') and len(files) > get_export_async_threshold():
+                return enqueue_export_response(_('File Folders'), format, [
+                    {'kind': 'files', 'model': 'records.file', 'domain': domain, 'order': 'name'},
+                ])
             
             if format == 'xlsx':
                 return self._export_files_xlsx(files)
@@ -396,122 +265,11 @@ class PortalInteractiveController(CustomerPortal):
 
     def _export_files_xlsx(self, files):
         """Export file folders to Excel with comprehensive data"""
-        import io
-        from odoo.tools.misc import xlsxwriter
-        from datetime import datetime
-        
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        worksheet = workbook.add_worksheet('File Folders')
-        
-        # Header format
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4F81BD',
-            'font_color': 'white',
-            'border': 1,
-            'text_wrap': True,
-            'valign': 'vcenter'
-        })
-        
-        # Write headers - comprehensive columns
-        headers = [
-            'File Name/Number',
-            'Barcode', 
-            'Container',
-            'Location',
-            'Department',
-            'Description',
-            'Document Count',
-            'Responsible Person',
-            'Date Created',
-            'Last Updated'
-        ]
-        
-        # Set column widths
-        col_widths = [25, 20, 20, 20, 20, 35, 12, 20, 15, 15]
-        for col, (header, width) in enumerate(zip(headers, col_widths)):
-            worksheet.write(0, col, header, header_format)
-            worksheet.set_column(col, col, width)
-        
-        # Write data
-        for row, file_rec in enumerate(files, start=1):
-            worksheet.write(row, 0, file_rec.name or '')
-            worksheet.write(row, 1, file_rec.barcode or file_rec.temp_barcode or '')
-            worksheet.write(row, 2, file_rec.container_id.name if file_rec.container_id else '')
-            worksheet.write(row, 3, file_rec.current_location_id.name if file_rec.current_location_id else (file_rec.container_id.current_location_id.name if file_rec.container_id and file_rec.container_id.current_location_id else ''))
-            worksheet.write(row, 4, file_rec.department_id.name if file_rec.department_id else '')
-            worksheet.write(row, 5, file_rec.description or '')
-            worksheet.write(row, 6, file_rec.document_count or 0)
-            worksheet.write(row, 7, file_rec.responsible_person_id.name if file_rec.responsible_person_id else '')
-            worksheet.write(row, 8, fields.Date.to_string(file_rec.create_date.date()) if file_rec.create_date else '')
-            worksheet.write(row, 9, fields.Date.to_string(file_rec.write_date.date()) if file_rec.write_date else '')
-        
-        # Freeze header row
-        worksheet.freeze_panes(1, 0)
-        
-        workbook.close()
-        output.seek(0)
-        
-        # Generate filename with date
-        filename = f"file_folders_export_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
-        
-        return request.make_response(
-            output.read(),
-            headers=[
-                ('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
-                ('Content-Disposition', f'attachment; filename="{filename}"')
-            ]
-        )
+        return self._stream_export('files', files, 'xlsx')
 
     def _export_files_csv(self, files):
         """Export file folders to CSV with comprehensive data"""
-        import csv
-        import io
-        from datetime import datetime
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write comprehensive header
-        writer.writerow([
-            'File Name/Number',
-            'Barcode', 
-            'Container',
-            'Location',
-            'Department',
-            'Description',
-            'Document Count',
-            'Responsible Person',
-            'Date Created',
-            'Last Updated'
-        ])
-        
-        # Write data
-        for file_rec in files:
-            writer.writerow([
-                file_rec.name or '',
-                file_rec.barcode or file_rec.temp_barcode or '',
-                file_rec.container_id.name if file_rec.container_id else '',
-                file_rec.current_location_id.name if file_rec.current_location_id else (file_rec.container_id.current_location_id.name if file_rec.container_id and file_rec.container_id.current_location_id else ''),
-                file_rec.department_id.name if file_rec.department_id else '',
-                file_rec.description or '',
-                file_rec.document_count or 0,
-                file_rec.responsible_person_id.name if file_rec.responsible_person_id else '',
-                fields.Date.to_string(file_rec.create_date.date()) if file_rec.create_date else '',
-                fields.Date.to_string(file_rec.write_date.date()) if file_rec.write_date else ''
-            ])
-        
-        # Generate filename with date
-        filename = f"file_folders_export_{datetime.now().strftime('%Y-%m-%d')}.csv"
-        
-        return request.make_response(
-            output.getvalue(),
-            headers=[
-                ('Content-Type', 'text/csv'),
-                ('Content-Disposition', f'attachment; filename="{filename}"')
-            ]
-        )
+        return self._stream_export('files', files, 'csv')
 
     # ================================================================
     # USER EXPORT (Company Portal Admin)
@@ -533,140 +291,65 @@ class PortalInteractiveController(CustomerPortal):
                 ('groups_id', 'in', [request.env.ref('base.group_portal').id])
             ], order='name')
             
-            # Get departments for user department mapping
-            departments = request.env['records.department'].sudo().search([
-                ('company_id', '=', partner.id)
-            ])
-            dept_map = {d.id: d.name for d in departments}
-            
             if format == 'xlsx':
-                return self._export_users_xlsx(users, dept_map)
+                return self._export_users_xlsx(users)
             elif format == 'csv':
-                return self._export_users_csv(users, dept_map)
+                return self._export_users_csv(users)
             else:
                 return request.redirect('/my/users')
                 
         except Exception as e:
             return request.redirect('/my/users?error=' + str(e))
 
-    def _export_users_xlsx(self, users, dept_map):
+    def _export_users_xlsx(self, users):
         """Export users to Excel with comprehensive data"""
-        import io
-        from odoo.tools.misc import xlsxwriter
-        from datetime import datetime
-        
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        worksheet = workbook.add_worksheet('Portal Users')
-        
-        # Header format
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4F81BD',
-            'font_color': 'white',
-            'border': 1,
-            'text_wrap': True,
-            'valign': 'vcenter'
-        })
-        
-        # Write headers
-        headers = [
-            'Name',
-            'Email (Login)', 
-            'Department',
-            'Phone',
-            'Job Title',
-            'Status',
-            'Last Login',
-            'Date Created'
-        ]
-        
-        # Set column widths
-        col_widths = [25, 30, 20, 15, 20, 10, 18, 15]
-        for col, (header, width) in enumerate(zip(headers, col_widths)):
-            worksheet.write(0, col, header, header_format)
-            worksheet.set_column(col, col, width)
-        
-        # Write data
-        for row, user in enumerate(users, start=1):
-            dept_name = ''
-            if hasattr(user.partner_id, 'department_id') and user.partner_id.department_id:
-                dept_name = user.partner_id.department_id.name
-            
-            worksheet.write(row, 0, user.name or '')
-            worksheet.write(row, 1, user.login or '')
-            worksheet.write(row, 2, dept_name)
-            worksheet.write(row, 3, user.partner_id.phone or user.partner_id.mobile or '')
-            worksheet.write(row, 4, user.partner_id.function or '')
-            worksheet.write(row, 5, 'Active' if user.active else 'Inactive')
-            worksheet.write(row, 6, fields.Datetime.to_string(user.login_date) if user.login_date else 'Never')
-            worksheet.write(row, 7, fields.Date.to_string(user.create_date.date()) if user.create_date else '')
-        
-        # Freeze header row
-        worksheet.freeze_panes(1, 0)
-        
-        workbook.close()
-        output.seek(0)
-        
-        # Generate filename with date
-        filename = f"portal_users_export_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
-        
-        return request.make_response(
-            output.read(),
-            headers=[
-                ('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
-                ('Content-Disposition', f'attachment; filename="{filename}"')
-            ]
-        )
+        return self._stream_export('users', users, 'xlsx')
 
-    def _export_users_csv(self, users, dept_map):
+    def _export_users_csv(self, users):
         """Export users to CSV with comprehensive data"""
-        import csv
-        import io
-        from datetime import datetime
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Name',
-            'Email (Login)', 
-            'Department',
-            'Phone',
-            'Job Title',
-            'Status',
-            'Last Login',
-            'Date Created'
-        ])
-        
-        # Write data
-        for user in users:
-            dept_name = ''
-            if hasattr(user.partner_id, 'department_id') and user.partner_id.department_id:
-                dept_name = user.partner_id.department_id.name
-            
-            writer.writerow([
-                user.name or '',
-                user.login or '',
-                dept_name,
-                user.partner_id.phone or user.partner_id.mobile or '',
-                user.partner_id.function or '',
-                'Active' if user.active else 'Inactive',
-                fields.Datetime.to_string(user.login_date) if user.login_date else 'Never',
-                fields.Date.to_string(user.create_date.date()) if user.create_date else ''
-            ])
-        
-        # Generate filename with date
-        filename = f"portal_users_export_{datetime.now().strftime('%Y-%m-%d')}.csv"
-        
-        return request.make_response(
-            output.getvalue(),
-            headers=[
-                ('Content-Type', 'text/csv'),
-                ('Content-Disposition', f'attachment; filename="{filename}"')
-            ]
-        )
+        return self._stream_export('users', users, 'csv')
+
+    # ================================================================
+    # BACKGROUND EXPORT JOBS
+    # ================================================================
+
+    def _get_export_job(self, job_id):
+        """Export job of the current user, or None"""
+        job = request.env['records.export.job'].sudo().browse(job_id).exists()
+        if not job or job.user_id != request.env.user:
+            return None
+        return job
+
+    @http.route(['/my/export/job/<int:job_id>'], type='http', auth="user", website=True)
+    def portal_export_job(self, job_id, **kw):
+        """Progress page of a background export (refreshes until the file is ready)"""
+        job = self._get_export_job(job_id)
+        if not job:
+            return request.not_found()
+        values = self._prepare_portal_layout_values()
+        values.update({
+            'job': job,
+            'status': job.get_status(),
+            'page_name': 'export_job',
+        })
+        return request.render('records_management.portal_export_job', values)
+
+    @http.route(['/my/export/job/<int:job_id>/progress'], type='json', auth="user")
+    def portal_export_job_progress(self, job_id, **kw):
+        """Polling endpoint: state, percentage and download link"""
+        job = self._get_export_job(job_id)
+        if not job:
+            return {'error': _('Export not found')}
+        return job.get_status()
+
+    @http.route(['/my/export/job/<int:job_id>/download'], type='http', auth="user")
+    def portal_export_job_download(self, job_id, **kw):
+        """Download the finished export, streamed from the filestore"""
+        job = self._get_export_job(job_id)
+        if not job or job.state != 'done' or not job.attachment_id:
+            return request.not_found()
+        stream = request.env['ir.binary']._get_stream_from(job.attachment_id, filename=job.filename)
+        return stream.get_response(as_attachment=True)
 
     # ================================================================
     # BULK IMPORT FUNCTIONALITY
@@ -1491,76 +1174,33 @@ class PortalInteractiveController(CustomerPortal):
     # Count endpoints for dashboard stat cards
     # ========================================================================
 
+    def _get_widget_count(self, res_model, exclude_states=()):
+        """Inventory counter total of the user's contact and its company"""
+        partner = request.env.user.partner_id
+        commercial = partner.commercial_partner_id or partner
+        Counter = request.env['records.inventory.counter'].sudo()
+        counts = Counter.get_counts(list({partner.id, commercial.id}), [res_model])
+        return Counter.get_total(counts[res_model], exclude_states=exclude_states)
+
     @http.route(['/my/containers/count'], type='json', auth='user')
     def portal_containers_count(self, **kw):
         """Return count of containers for dashboard widget"""
-        partner = request.env.user.partner_id
-        commercial = partner.commercial_partner_id or partner
-        
-        count = request.env['records.container'].sudo().search_count([
-            '|',
-            ('partner_id', '=', partner.id),
-            ('partner_id', '=', commercial.id)
-        ])
-        return {'count': count}
+        return {'count': self._get_widget_count('records.container')}
 
     @http.route(['/my/documents/count'], type='json', auth='user')
     def portal_documents_count(self, **kw):
         """Return count of documents for dashboard widget"""
-        partner = request.env.user.partner_id
-        commercial = partner.commercial_partner_id or partner
-        
-        # Try records.document first
-        Document = request.env.get('records.document')
-        if Document:
-            count = Document.sudo().search_count([
-                '|',
-                ('partner_id', '=', partner.id),
-                ('partner_id', '=', commercial.id)
-            ])
-        else:
-            # Fall back to customer.inventory.document
-            Document = request.env.get('customer.inventory.document')
-            if Document:
-                count = Document.sudo().search_count([
-                    '|',
-                    ('partner_id', '=', partner.id),
-                    ('partner_id', '=', commercial.id)
-                ])
-            else:
-                count = 0
-        return {'count': count}
+        return {'count': self._get_widget_count('records.document')}
 
     @http.route(['/my/requests/count'], type='json', auth='user')
     def portal_requests_count(self, **kw):
         """Return count of service requests for dashboard widget"""
-        partner = request.env.user.partner_id
-        commercial = partner.commercial_partner_id or partner
-        
-        count = request.env['portal.request'].sudo().search_count([
-            '|',
-            ('partner_id', '=', partner.id),
-            ('partner_id', '=', commercial.id),
-            ('state', 'not in', ['cancelled', 'done'])
-        ])
-        return {'count': count}
+        return {'count': self._get_widget_count('portal.request', exclude_states=('cancelled', 'done'))}
 
     @http.route(['/my/certificates/count'], type='json', auth='user')
     def portal_certificates_count(self, **kw):
         """Return count of destruction certificates for dashboard widget"""
-        partner = request.env.user.partner_id
-        commercial = partner.commercial_partner_id or partner
-        
-        Certificate = request.env.get('destruction.certificate')
-        if Certificate:
-            count = Certificate.sudo().search_count([
-                '|',
-                ('partner_id', '=', partner.id),
-                ('partner_id', '=', commercial.id)
-            ])
-        else:
-            count = 0
-        return {'count': count}
+        return {'count': self._get_widget_count('destruction.certificate')}
 
     @http.route(['/my/invoices/count'], type='json', auth='user')
     def portal_invoices_count(self, **kw):
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Migration 18.0.1.0.27: make file folder temporary barcodes unique
+
+records.file gets unique(temp_barcode, company_id). Folders created before
+the barcode allocator could share a temporary barcode (count-based
+{container}-FILE-NN numbering), which would make adding the constraint fail.
+Every duplicate but the oldest gets its id appended, and the global
+constraint of earlier development builds is dropped.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("SELECT 1 FROM information_schema.tables WHERE table_name = 'records_file'")
+    if not cr.fetchone():
+        return
+
+    cr.execute("""
+        UPDATE records_file f
+           SET temp_barcode = f.temp_barcode || '-' || f.id
+          FROM (
+                SELECT id, row_number() OVER (PARTITION BY temp_barcode ORDER BY id) AS position
+                  FROM records_file
+                 WHERE temp_barcode IS NOT NULL
+               ) AS duplicate
+         WHERE duplicate.id = f.id
+           AND duplicate.position > 1
+    """)
+    if cr.rowcount:
+        _logger.warning("Renamed %d duplicate file folder temporary barcodes", cr.rowcount)
+
+    cr.execute("ALTER TABLE records_file DROP CONSTRAINT IF EXISTS records_file_temp_barcode_uniq")
@@ -194,6 +194,7 @@ from . import records_container_transfer
 from . import records_container_transfer_line
 from . import records_container_type
 from . import records_container_type_converter
+from . import records_db_index  # Managed composite/partial database indexes
 from . import records_deletion_request
 from . import records_storage_department_user  # Must load BEFORE records_department
 from . import records_storage_department_user_actions
@@ -210,6 +211,7 @@ from . import records_document_type
 from . import records_file  # File folders (hierarchical inventory)
 from . import records_installer
 from . import records_inventory_dashboard
+from . import records_inventory_search  # Unified container/file/document search (single UNION query)
 from . import records_management_dashboard
 from . import records_location  # Re-enabled in 18.0.0.2.7
 from . import records_location_inspection
@@ -226,6 +228,21 @@ from . import records_retrieval_order
 from . import records_retrieval_order_line
 # from . import records_retrieval_work_order  # REMOVED: Use work.order.retrieval
 from . import records_saved_search  # Advanced inventory search presets
+from . import records_saved_search_match  # Materialized saved search results (watermark refresh)
+from . import records_search_engine  # Full-text/trigram search engine for portal instant search
+from . import records_search_cache  # Per-partner shared search result cache (generation invalidated)
+from . import records_container_autocomplete  # In-memory prefix/trigram container autocomplete index
+from . import records_search_metric  # Search latency histograms and slow query plans
+from . import records_inventory_counter  # Trigger-maintained per-partner inventory counters
+from . import records_export_engine  # Chunked, constant-memory CSV/XLSX portal exports
+from . import records_export_job  # Background export jobs with checkpointed chunks
+from . import records_portal_access  # Cached per-user portal roles, permissions and department scope
+from . import records_portal_inventory  # Paginated JSON sections of the portal inventory dashboard
+from . import records_attachment_index  # Batched scan lookups (count, list, latest) per page of records
+from . import records_calendar_feed  # Date-indexed portal calendar events with ETag and ICS feed
+from . import records_stock_reconciliation  # SQL diff-based container/stock reconciliation reports
+from . import records_barcode_allocator  # Leased blocks of unique temp barcodes (containers, folders, documents, labels)
+from . import records_container_counter  # Trigger-maintained document/file counts per container
 from . import records_security_audit
 from . import records_series
 from . import records_service_type
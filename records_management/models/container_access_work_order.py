@@ -337,7 +337,18 @@ class ContainerAccessWorkOrder(models.Model):
         for vals in vals_list:
             if vals.get('name', _('New')) == _('New'):
                 vals['name'] = self.env['ir.sequence'].next_by_code('container.access.work.order') or _('New')
-        return super().create(vals_list)
+        records = super().create(vals_list)
+        self.env['unified.work.order']._refresh_sources(records)
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        self.env['unified.work.order']._refresh_sources(self, vals)
+        return result
+
+    def unlink(self):
+        self.env['unified.work.order']._refresh_sources(self)
+        return super().unlink()
 
     @api.depends('name', 'partner_id.name', 'container_count', 'access_type')
     def _compute_display_name(self):
@@ -69,13 +69,15 @@ class CustomerInventoryLine(models.Model):
             raise UserError(_("No variance to resolve."))
         if not self.env.user.has_group('records_management.group_records_manager'):
             raise UserError(_("Only managers can update system counts."))
-        self.container_id.write({'file_count': self.file_count})
+        # The container's file_count is maintained from its file folders (see
+        # records.container.counter): the accepted count is kept on the line only
         self.write({'expected_file_count': self.file_count})
         self.inventory_id.message_post(body=_(
-            "System count updated for container %(container)s: %(files)s files"
+            "Counted %(files)s files accepted for container %(container)s (system: %(system)s)"
         ) % {
             'container': self.container_id.name,
             'files': self.file_count,
+            'system': self.container_id.file_count,
         })
 
     def action_investigate_variance(self):
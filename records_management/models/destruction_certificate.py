@@ -317,6 +317,10 @@ class DestructionCertificate(models.Model):
         rand_part = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
         return f"COD/{prefix_token}/{rand_part}"
 
+    def init(self):
+        """Maintain the per-partner inventory counters (see records.inventory.counter)."""
+        self.env['records.inventory.counter']._setup_counter_trigger(self._name)
+
     @api.model_create_multi
     def create(self, vals_list):
         # Generate certificate numbers for new records
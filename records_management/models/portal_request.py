@@ -300,6 +300,10 @@ class PortalRequest(models.Model):
     # ============================================================================
     # ORM OVERRIDES
     # ============================================================================
+    def init(self):
+        """Maintain the per-partner inventory counters (see records.inventory.counter)."""
+        self.env['records.inventory.counter']._setup_counter_trigger(self._name)
+
     @api.model_create_multi
     def create(self, vals_list):
         for vals in vals_list:
@@ -311,7 +315,20 @@ class PortalRequest(models.Model):
             # Generate sequence number for request #
             if vals.get('name', 'New') == 'New':
                 vals['name'] = self.env['ir.sequence'].next_by_code('portal.request') or 'New'
-        return super().create(vals_list)
+        records = super().create(vals_list)
+        self.env['records.calendar.feed']._invalidate_records(records)
+        return records
+
+    def write(self, vals):
+        calendar_feed = self.env['records.calendar.feed']
+        calendar_feed._invalidate_records(self, vals)
+        res = super().write(vals)
+        calendar_feed._invalidate_records(self, vals)
+        return res
+
+    def unlink(self):
+        self.env['records.calendar.feed']._invalidate_records(self)
+        return super().unlink()
 
     # ============================================================================
     # ACTION METHODS
@@ -296,6 +296,7 @@ class ProjectTask(models.Model):
             if task.naid_compliant:
                 description = _('Task created') + f": {task.name}"
                 task._create_audit_log('task_created', description)
+        self.env['records.calendar.feed']._invalidate_records(tasks)
         return tasks
 
     def write(self, vals):
@@ -322,7 +323,11 @@ class ProjectTask(models.Model):
                 if task.naid_compliant:
                     task._create_audit_log('assignment_change', _("User assignment updated."))
 
-        return super().write(vals)
+        calendar_feed = self.env['records.calendar.feed']
+        calendar_feed._invalidate_records(self, vals)
+        res = super().write(vals)
+        calendar_feed._invalidate_records(self, vals)
+        return res
 
     def unlink(self):
         """
@@ -336,4 +341,5 @@ class ProjectTask(models.Model):
         for task in self:
             if task.naid_audit_log_ids:
                 raise UserError(_("Cannot delete a task with NAID audit trail entries. Please archive it instead."))
+        self.env['records.calendar.feed']._invalidate_records(self)
         return super().unlink()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Attachment Index
+
+Scan indicators (PDF count, scan list, latest scan preview) for a whole page
+of records in one grouped query, instead of one ir.attachment search per
+record. Base Odoo stores no thumbnails for PDF attachments: the preview of
+a record is its newest scan, rendered inline by the browser.
+
+Used by the portal document lists and detail pages, the inventory dashboard
+sections and the document exports.
+"""
+
+from collections import defaultdict
+
+from odoo import api, models
+from odoo.osv import expression
+
+SCAN_MIMETYPE = 'pdf'
+
+
+class RecordsAttachmentIndex(models.AbstractModel):
+    _name = 'records.attachment.index'
+    _description = 'Attachment Index'
+
+    @api.model
+    def lookup(self, pairs, mimetype=SCAN_MIMETYPE):
+        """
+        Attachments of a set of records, grouped per record.
+
+        Args:
+            pairs (iterable): (res_model, res_id) of the records
+            mimetype (str): mimetype fragment the attachments must match
+                (default: PDF scans)
+
+        Returns:
+            dict: {(res_model, res_id): {
+                'count': int,
+                'attachments': ir.attachment recordset, newest first,
+                'latest': newest ir.attachment (empty recordset if none),
+                'preview_url': inline URL of the newest one,
+            }}; only records with attachments are present
+        """
+        ids_by_model = defaultdict(set)
+        for res_model, res_id in pairs:
+            if res_id:
+                ids_by_model[res_model].add(res_id)
+        if not ids_by_model:
+            return {}
+
+        Attachment = self.env['ir.attachment'].sudo()
+        domain = expression.AND([
+            [('mimetype', 'like', mimetype)] if mimetype else [],
+            expression.OR([
+                [('res_model', '=', res_model), ('res_id', 'in', list(res_ids))]
+                for res_model, res_ids in ids_by_model.items()
+            ]),
+        ])
+        groups = Attachment._read_group(domain, ['res_model', 'res_id'], ['id:array_agg'])
+        # One prefetch set: reading the scans of the whole page is one query
+        prefetch_ids = [attachment_id for _model, _res_id, ids in groups for attachment_id in ids]
+        index = {}
+        for res_model, res_id, attachment_ids in groups:
+            attachments = Attachment.browse(sorted(attachment_ids, reverse=True)).with_prefetch(prefetch_ids)
+            index[(res_model, res_id)] = {
+                'count': len(attachments),
+                'attachments': attachments,
+                'latest': attachments[:1],
+                'preview_url': '/web/content/%s' % attachments[0].id,
+            }
+        return index
+
+    @api.model
+    def get_scans(self, records, mimetype=SCAN_MIMETYPE):
+        """
+        Scans of the records of one model.
+
+        Returns:
+            dict: {res_id: ir.attachment recordset, newest first}; records
+                without scans map to an empty recordset
+        """
+        index = self.lookup(((records._name, res_id) for res_id in records.ids), mimetype=mimetype)
+        empty = self.env['ir.attachment'].sudo()
+        return {
+            res_id: index[(records._name, res_id)]['attachments'] if (records._name, res_id) in index else empty
+            for res_id in records.ids
+        }
+
+    @api.model
+    def get_counts(self, records, mimetype=SCAN_MIMETYPE):
+        """{res_id: number of scans} of the records of one model (0 included)"""
+        index = self.lookup(((records._name, res_id) for res_id in records.ids), mimetype=mimetype)
+        return {
+            res_id: index[(records._name, res_id)]['count'] if (records._name, res_id) in index else 0
+            for res_id in records.ids
+        }
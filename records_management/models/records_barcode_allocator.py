@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Temporary Barcode Allocator
+
+One allocation service for the temporary barcodes of portal containers, file
+folders and documents, and for the pre-printed label batches.
+
+Each series is backed by an ir.sequence. Instead of drawing one number per
+record (and searching the table for collisions before using it), a worker
+leases a block of numbers from the sequence's PostgreSQL sequence in one
+query and serves them from memory until the block runs out. ``nextval`` is
+never rolled back, so a leased number is handed out at most once across all
+workers, even when the transaction that used it fails: numbers may be
+skipped, never repeated. The unique constraints on the temp_barcode columns
+are the safety net for values typed in or imported by hand.
+
+Sequences that cannot hand out blocks (no-gap or date-range implementations)
+are served one number at a time through the regular ir.sequence API.
+"""
+
+import logging
+import re
+import threading
+
+from odoo import _, api, models
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Series served by the allocator: {kind: ir.sequence code}
+BARCODE_SERIES = {
+    'container': 'records.container.temp.barcode',
+    'file': 'records.file.temp.barcode',
+    'document': 'records.document.temp.barcode',
+}
+
+# Numbers leased per worker and series at once
+LEASE_SIZE = 50
+
+# Leased numbers not handed out yet: {(dbname, sequence id): [numbers]}
+_leases = {}
+_leases_lock = threading.Lock()
+
+
+class RecordsBarcodeAllocator(models.AbstractModel):
+    _name = 'records.barcode.allocator'
+    _description = 'Temporary Barcode Allocator'
+
+    @api.model
+    def _get_sequence(self, kind):
+        if kind not in BARCODE_SERIES:
+            raise UserError(_("Unknown barcode series: %s") % kind)
+        sequence = self.env['ir.sequence'].sudo().search([
+            ('code', '=', BARCODE_SERIES[kind]),
+            ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
+        if not sequence:
+            raise UserError(_("No sequence is configured for %s barcodes (code %s).") % (kind, BARCODE_SERIES[kind]))
+        return sequence
+
+    @api.model
+    def _lease_numbers(self, sequence, count):
+        """``count`` unused numbers of a standard sequence, from this worker's lease"""
+        key = (self.env.cr.dbname, sequence.id)
+        with _leases_lock:
+            lease = _leases.setdefault(key, [])
+            if len(lease) < count:
+                rows = self.env.execute_query(SQL(
+                    "SELECT nextval(%s) FROM generate_series(1, %s)",
+                    'ir_sequence_%03d' % sequence.id, max(LEASE_SIZE, count - len(lease)),
+                ))
+                lease.extend(number for number, in rows)
+            numbers = lease[:count]
+            del lease[:count]
+        return numbers
+
+    @api.model
+    def allocate(self, kind, count=1):
+        """
+        Reserve temporary barcodes.
+
+        Args:
+            kind (str): series, a key of BARCODE_SERIES
+            count (int): number of barcodes
+
+        Returns:
+            list: ``count`` formatted barcodes (sequence prefix, suffix and
+                padding applied), never handed out before
+        """
+        if count <= 0:
+            return []
+        sequence = self._get_sequence(kind)
+        if sequence.implementation != 'standard' or sequence.use_date_range:
+            return [sequence._next() for _i in range(count)]
+        return [sequence.get_next_char(number) for number in self._lease_numbers(sequence, count)]
+
+    @api.model
+    def allocate_numbers(self, kind, count=1):
+        """Raw numbers of a series, for labels formatted by the caller (see allocate)"""
+        if count <= 0:
+            return []
+        sequence = self._get_sequence(kind)
+        if sequence.implementation != 'standard' or sequence.use_date_range:
+            numbers = []
+            for _i in range(count):
+                match = re.search(r'(\d+)\D*$', sequence._next())
+                numbers.append(int(match.group(1)) if match else 0)
+            return numbers
+        return self._lease_numbers(sequence, count)
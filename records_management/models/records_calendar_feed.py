@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+Portal Calendar Feed
+
+Customer calendar events (bin services, field service tasks, portal
+requests, retrieval orders and the occurrences of recurring work order
+schedules) are kept in a denormalized ``records.calendar.event`` table,
+indexed on (partner, start date), so a calendar window is one range query.
+
+Each customer has a ``records.calendar.feed`` row with two generations: the
+source models bump ``generation`` right after a commit that touches the
+customer's events, and a read rebuilds the events whenever
+``built_generation`` lags behind (or the rebuild is from a previous day, to
+roll the recurrence horizon). The feed also carries the ETag of the events
+and the secret token of the ICS subscription URL.
+"""
+
+import hashlib
+import logging
+import uuid
+from datetime import datetime, time, timedelta
+
+import psycopg2
+
+from odoo import _, api, fields, models
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Days ahead recurring schedules are expanded
+CALENDAR_HORIZON_DAYS = 180
+
+# Safety limit of occurrences per recurring schedule
+MAX_OCCURRENCES = 400
+
+# Models feeding the calendar: customer field and fields shown on the events
+CALENDAR_SOURCES = {
+    'shredding.service.bin': (
+        'current_customer_id', {'barcode', 'bin_size', 'status', 'next_service_date', 'current_department_id'},
+    ),
+    'project.task': (
+        'partner_id', {'name', 'scheduled_start_time', 'scheduled_end_time', 'date_deadline', 'work_order_type',
+                       'stage_id', 'project_id', 'active'},
+    ),
+    'portal.request': ('partner_id', {'request_type', 'state', 'requested_date'}),
+    'records.retrieval.order': ('partner_id', {'name', 'state', 'scheduled_date'}),
+    'recurring.work.order.schedule': (
+        'partner_id', {'name', 'active', 'work_order_type', 'interval_type', 'interval_number', 'day_of_week',
+                       'day_of_month', 'preferred_time', 'start_date', 'end_date', 'bin_ids', 'department_id'},
+    ),
+}
+
+TASK_COLORS = {
+    'pickup': '#007bff',      # Blue
+    'retrieval': '#28a745',   # Green
+    'destruction': '#dc3545', # Red
+    'delivery': '#ffc107',    # Yellow
+    'internal': '#6c757d',    # Gray
+}
+
+
+class RecordsCalendarFeed(models.Model):
+    _name = 'records.calendar.feed'
+    _description = 'Portal Calendar Feed'
+
+    partner_id = fields.Many2one(comodel_name='res.partner', string='Customer', required=True, ondelete='cascade')
+    generation = fields.Integer(string='Generation', default=1, help="Bumped when the customer's events change")
+    built_generation = fields.Integer(string='Built Generation', help="Generation the stored events were built from")
+    built_date = fields.Date(string='Built On')
+    event_count = fields.Integer(string='Events')
+    access_token = fields.Char(
+        string='ICS Token',
+        required=True,
+        copy=False,
+        index=True,
+        default=lambda self: uuid.uuid4().hex,
+    )
+
+    _sql_constraints = [
+        ('partner_unique', 'unique(partner_id)', 'A customer has a single calendar feed.'),
+    ]
+
+    # ============================================================================
+    # INVALIDATION (called by the source models)
+    # ============================================================================
+    @api.model
+    def _invalidate_records(self, records, vals=None):
+        """Invalidate the feeds of the customers of calendar source records."""
+        partner_field, shown_fields = CALENDAR_SOURCES[records._name]
+        if vals is not None and not (shown_fields | {partner_field}) & vals.keys():
+            return
+        self._invalidate_partners(records.sudo()[partner_field].ids)
+
+    @api.model
+    def _invalidate_partners(self, partner_ids):
+        """Bump the generation of these customers' feeds once the transaction commits."""
+        partner_ids = {pid for pid in partner_ids if pid}
+        if not partner_ids:
+            return
+        partner_ids = set(self.env['res.partner'].sudo().browse(partner_ids).commercial_partner_id.ids)
+        postcommit = self.env.cr.postcommit
+        pending = postcommit.data.get('records.calendar.feed.partners')
+        if pending is None:
+            pending = postcommit.data['records.calendar.feed.partners'] = set()
+            dbname = self.env.cr.dbname
+            postcommit.add(lambda: self._bump_generations(dbname, pending))
+        pending.update(partner_ids)
+
+    @api.model
+    def _bump_generations(self, dbname, partner_ids):
+        try:
+            with self.pool.cursor() as cr:
+                cr.execute(
+                    "UPDATE records_calendar_feed SET generation = generation + 1 WHERE partner_id = ANY(%s)",
+                    (sorted(partner_ids),),
+                )
+        except psycopg2.Error as e:
+            _logger.warning("Calendar feed: invalidation failed on %s (%s); feeds roll over tomorrow", dbname, e)
+
+    # ============================================================================
+    # FEED ACCESS
+    # ============================================================================
+    @api.model
+    def _get_feed(self, partner):
+        """The up-to-date feed of a customer, created and (re)built as needed."""
+        commercial_partner = partner.commercial_partner_id
+        Feed = self.sudo()
+        feed = Feed.search([('partner_id', '=', commercial_partner.id)], limit=1)
+        if not feed:
+            feed = Feed.create({'partner_id': commercial_partner.id, 'generation': 1})
+        if feed.built_generation != feed.generation or feed.built_date != fields.Date.context_today(self):
+            feed._rebuild()
+        return feed
+
+    def get_etag(self, start=None, end=None):
+        """ETag of the events of a window (changes with every rebuild)"""
+        self.ensure_one()
+        payload = '%s-%s-%s-%s-%s' % (self.id, self.built_generation, self.built_date, start, end)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def get_events(self, start, end):
+        """
+        Events overlapping [start, end), in FullCalendar format.
+
+        Args:
+            start (datetime): window start (UTC)
+            end (datetime): window end (UTC), excluded
+        """
+        self.ensure_one()
+        rows = self.env.execute_query(SQL("""
+            SELECT id, source_model, source_id, kind, name, date_start, date_end, all_day, color, url, props
+              FROM records_calendar_event
+             WHERE partner_id = %s
+               AND date_start < %s
+               AND coalesce(date_end, date_start) >= %s
+             ORDER BY date_start, id
+        """, self.partner_id.id, end, start))
+        events = []
+        for _event_id, source_model, source_id, kind, name, date_start, date_end, all_day, color, url, props in rows:
+            events.append({
+                # Stable across rebuilds (ICS clients key events on it)
+                'id': '%s_%s_%s' % (source_model.replace('.', '_'), source_id, date_start.strftime('%Y%m%d%H%M')),
+                'title': name,
+                'start': date_start.date().isoformat() if all_day else date_start.isoformat(),
+                'end': date_end.isoformat() if date_end else None,
+                'allDay': all_day,
+                'backgroundColor': color,
+                'borderColor': color,
+                'url': url or None,
+                'extendedProps': dict(props or {}, type=kind),
+            })
+        return events
+
+    # ============================================================================
+    # BUILD
+    # ============================================================================
+    def _rebuild(self):
+        """Replace the stored events of the customer with freshly computed ones."""
+        self.ensure_one()
+        # Read the generation first: a bump committed while we rebuild leaves
+        # the feed stale, and the next read rebuilds again
+        self.env.cr.execute("SELECT generation FROM records_calendar_feed WHERE id = %s", (self.id,))
+        [generation] = self.env.cr.fetchone()
+        partner = self.partner_id
+        today = fields.Date.context_today(self)
+
+        values = []
+        for source in ('bins', 'tasks', 'requests', 'retrievals', 'schedules'):
+            for event in getattr(self, '_collect_%s' % source)(partner, today):
+                event['partner_id'] = partner.id
+                values.append(event)
+
+        Event = self.env['records.calendar.event'].sudo()
+        self.env.execute_query(SQL("DELETE FROM records_calendar_event WHERE partner_id = %s", partner.id))
+        Event.create(values)
+        self.write({
+            'built_generation': generation,
+            'built_date': today,
+            'event_count': len(values),
+        })
+
+    def _collect_bins(self, partner, today):
+        bins = self.env['shredding.service.bin'].sudo().search([
+            ('current_customer_id', '=', partner.id),
+            ('status', '=', 'in_service'),
+            ('next_service_date', '!=', False),
+        ])
+        return [{
+            'kind': 'shredding',
+            'source_model': bin._name,
+            'source_id': bin.id,
+            'name': _('Shredding Service: %s') % bin.barcode,
+            'date_start': datetime.combine(bin.next_service_date, time.min),
+            'all_day': True,
+            'color': '#8B0000',  # Dark red
+            'props': {
+                'bin_size': bin.bin_size,
+                'bin_id': bin.id,
+                'location': bin.current_department_id.name or 'On-site',
+            },
+        } for bin in bins]
+
+    def _collect_tasks(self, partner, today):
+        tasks = self.env['project.task'].sudo().search([
+            ('partner_id', '=', partner.id),
+            '|', ('scheduled_start_time', '!=', False), ('date_deadline', '!=', False),
+        ])
+        events = []
+        for task in tasks:
+            # Prefer scheduled_start_time, fallback to date_deadline
+            event_start = task.scheduled_start_time or fields.Datetime.to_datetime(task.date_deadline)
+            task_type = task.work_order_type or 'other'
+            color = TASK_COLORS.get(task_type, '#17a2b8')  # Teal default
+            events.append({
+                'kind': 'service',
+                'source_model': task._name,
+                'source_id': task.id,
+                'name': task.name,
+                'date_start': event_start,
+                'date_end': task.scheduled_end_time or (event_start + timedelta(hours=2)),
+                'color': color,
+                'url': '/my/tasks/%s' % task.id if task.project_id.privacy_visibility == 'portal' else False,
+                'props': {
+                    'work_order_type': task_type,
+                    'task_id': task.id,
+                    'stage': task.stage_id.name or 'Scheduled',
+                },
+            })
+        return events
+
+    def _collect_requests(self, partner, today):
+        portal_requests = self.env['portal.request'].sudo().search([
+            ('partner_id', '=', partner.id),
+            ('state', 'in', ['draft', 'submitted', 'approved']),
+            ('requested_date', '!=', False),
+        ])
+        events = []
+        for req in portal_requests:
+            # Color by request type: purple or orange
+            color = '#6610f2' if req.request_type == 'destruction' else '#fd7e14'
+            events.append({
+                'kind': 'request',
+                'source_model': req._name,
+                'source_id': req.id,
+                'name': _('%s Request') % (req.request_type or '').capitalize(),
+                'date_start': req.requested_date,
+                'color': color,
+                'url': '/my/requests/%s' % req.id,
+                'props': {
+                    'request_type': req.request_type,
+                    'request_id': req.id,
+                    'state': req.state,
+                },
+            })
+        return events
+
+    def _collect_retrievals(self, partner, today):
+        retrievals = self.env['records.retrieval.order'].sudo().search([
+            ('partner_id', '=', partner.id),
+            ('state', 'not in', ['cancelled', 'delivered']),
+            ('scheduled_date', '!=', False),
+        ])
+        return [{
+            'kind': 'retrieval',
+            'source_model': retrieval._name,
+            'source_id': retrieval.id,
+            'name': _('Document Retrieval: %s') % retrieval.name,
+            'date_start': retrieval.scheduled_date,
+            'color': '#20c997',  # Teal
+            'props': {
+                'retrieval_id': retrieval.id,
+                'state': retrieval.state,
+            },
+        } for retrieval in retrievals]
+
+    def _collect_schedules(self, partner, today):
+        """Occurrences of the recurring schedules from today up to the horizon"""
+        horizon = today + timedelta(days=CALENDAR_HORIZON_DAYS)
+        schedules = self.env['recurring.work.order.schedule'].sudo().search([
+            ('partner_id', '=', partner.id),
+            ('start_date', '<=', horizon),
+            '|', ('end_date', '=', False), ('end_date', '>=', today),
+        ])
+        events = []
+        for schedule in schedules:
+            hours = schedule.preferred_time or 0.0
+            occurrence = schedule.start_date
+            for _index in range(MAX_OCCURRENCES):
+                if not occurrence or occurrence > horizon or (schedule.end_date and occurrence > schedule.end_date):
+                    break
+                if occurrence >= today:
+                    date_start = datetime.combine(occurrence, time.min) + timedelta(hours=hours)
+                    events.append({
+                        'kind': 'shredding' if schedule.work_order_type == 'shredding' else 'service',
+                        'source_model': schedule._name,
+                        'source_id': schedule.id,
+                        'name': schedule.name,
+                        'date_start': date_start,
+                        'date_end': date_start + timedelta(hours=2),
+                        'color': '#8B0000' if schedule.work_order_type == 'shredding' else TASK_COLORS.get(
+                            schedule.work_order_type, '#17a2b8'),
+                        'props': {
+                            'frequency': schedule.interval_type,
+                            'work_order_type': schedule.work_order_type,
+                            'schedule_id': schedule.id,
+                            'location': schedule.department_id.name or 'On-site',
+                        },
+                    })
+                occurrence = schedule._get_next_occurrence_from_date(occurrence)
+        return events
+
+    # ============================================================================
+    # ICS EXPORT
+    # ============================================================================
+    @staticmethod
+    def _ics_escape(text):
+        return (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+    def render_ics(self, start, end):
+        """iCalendar document of the events overlapping [start, end)"""
+        self.ensure_one()
+        stamp = fields.Datetime.now().strftime('%Y%m%dT%H%M%SZ')
+        host = self.env['ir.config_parameter'].sudo().get_param('web.base.url', '').split('//')[-1] or 'odoo'
+        lines = [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:-//Records Management//Service Calendar//EN',
+            'CALSCALE:GREGORIAN',
+            'X-WR-CALNAME:%s' % self._ics_escape(_('%s Services') % self.partner_id.name),
+        ]
+        for event in self.get_events(start, end):
+            begin = datetime.fromisoformat(event['start'])
+            lines += ['BEGIN:VEVENT', 'UID:%s@%s' % (event['id'], host), 'DTSTAMP:%s' % stamp]
+            if event['allDay']:
+                lines += [
+                    'DTSTART;VALUE=DATE:%s' % begin.strftime('%Y%m%d'),
+                    'DTEND;VALUE=DATE:%s' % (begin + timedelta(days=1)).strftime('%Y%m%d'),
+                ]
+            else:
+                lines.append('DTSTART:%s' % begin.strftime('%Y%m%dT%H%M%SZ'))
+                if event['end']:
+                    lines.append('DTEND:%s' % datetime.fromisoformat(event['end']).strftime('%Y%m%dT%H%M%SZ'))
+            lines.append('SUMMARY:%s' % self._ics_escape(event['title']))
+            if event['url']:
+                lines.append('URL:%s' % event['url'])
+            lines.append('END:VEVENT')
+        lines.append('END:VCALENDAR')
+        return '\r\n'.join(lines) + '\r\n'
+
+
+class RecordsCalendarEvent(models.Model):
+    _name = 'records.calendar.event'
+    _description = 'Portal Calendar Event'
+    _order = 'date_start, id'
+
+    partner_id = fields.Many2one(comodel_name='res.partner', string='Customer', required=True, ondelete='cascade')
+    kind = fields.Selection(
+        selection=[
+            ('shredding', 'Shredding Service'),
+            ('service', 'Field Service'),
+            ('request', 'Portal Request'),
+            ('retrieval', 'Retrieval'),
+        ],
+        string='Type',
+        required=True,
+    )
+    source_model = fields.Char(string='Source Model', required=True)
+    source_id = fields.Integer(string='Source Record', required=True)
+    name = fields.Char(string='Title', required=True)
+    date_start = fields.Datetime(string='Start', required=True)
+    date_end = fields.Datetime(string='End')
+    all_day = fields.Boolean(string='All Day')
+    color = fields.Char(string='Color')
+    url = fields.Char(string='URL')
+    props = fields.Json(string='Details')
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS records_calendar_event_partner_start_idx
+                ON records_calendar_event (partner_id, date_start)
+        """)
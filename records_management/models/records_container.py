@@ -1,5 +1,6 @@
 from dateutil.relativedelta import relativedelta  # type: ignore
 import base64
+from collections import Counter
 from io import BytesIO
 
 from odoo import models, fields, api, _  # pyright: ignore[reportMissingModuleSource, reportAttributeAccessIssue]
@@ -304,11 +305,12 @@ class RecordsContainer(models.Model):
     cubic_feet = fields.Float(string="Cubic Feet", related="container_type_id.cubic_feet", readonly=True)
     is_full = fields.Boolean(string="Container Full", default=False)
     document_ids = fields.One2many("records.document", "container_id", string="Documents")
-    document_count = fields.Integer(compute="_compute_document_count", string="Document Count", store=True)
+    # Maintained in SQL by records.container.counter (triggers on documents and file folders)
+    document_count = fields.Integer(string="Document Count", default=0, readonly=True, copy=False)
 
     # File Folder Management
     file_ids = fields.One2many("records.file", "container_id", string="File Folders")
-    file_count = fields.Integer(compute="_compute_file_count", string="File Count", store=True)
+    file_count = fields.Integer(string="File Count", default=0, readonly=True, copy=False)
 
     # ============================================================================
     # BILLING & RATES (Derived from customer rates, then container type)
@@ -439,6 +441,12 @@ class RecordsContainer(models.Model):
         ('temp_barcode_company_uniq', 'unique(temp_barcode, company_id)', 'The temporary barcode must be unique per company.'),
     ]
 
+    def init(self):
+        """Maintain the full-text search column, trigger and indexes (see records.search.engine)
+        and the per-partner inventory counters (see records.inventory.counter)."""
+        self.env['records.search.engine']._setup_search_infrastructure(self._name)
+        self.env['records.inventory.counter']._setup_counter_trigger(self._name)
+
     # ============================================================================
     # ORM OVERRIDES
     # ============================================================================
@@ -486,20 +494,47 @@ class RecordsContainer(models.Model):
                 vals["container_type_id"] = default_type_id
         return vals
 
+    @api.model
+    def _get_department_default_users(self, department_ids):
+        """{department id: default responsible user id} for a batch of containers.
+
+        Priority: the department's responsible user, then its first active user.
+        """
+        result = {}
+        for department in self.env['records.department'].browse(department_ids).exists():
+            if department.user_id and department.user_id.active:
+                result[department.id] = department.user_id.id
+            else:
+                active_users = department.user_ids.filtered(lambda u: u.active)
+                if active_users:
+                    result[department.id] = active_users[0].id
+        return result
+
     @api.model_create_multi
     def create(self, vals_list):
+        # Defaults shared by the whole batch are resolved once, not per container
+        default_partner_id = None
+        default_type_id = None
+        today = fields.Date.today()
+        department_users = self._get_department_default_users(
+            {vals["department_id"] for vals in vals_list if vals.get("department_id") and not vals.get("user_id")}
+        )
+        temp_barcodes = iter(self._reserve_temp_barcodes(sum(
+            1 for vals in vals_list
+            if vals.get("created_via_portal") and not vals.get("temp_barcode") and not vals.get("barcode")
+        )))
+
         for vals in vals_list:
             # Ensure required linkage to a partner to satisfy DB NOT NULL and test scenarios
             if not vals.get("partner_id"):
-                # Prefer current user's partner; fallback to company partner; then root partner
-                partner = self.env.user.partner_id or self.env.company.partner_id
-                if not partner:
-                    try:
-                        partner = self.env.ref("base.partner_root")
-                    except Exception:
-                        partner = False
-                if partner:
-                    vals["partner_id"] = partner.id
+                if default_partner_id is None:
+                    # Prefer current user's partner; fallback to company partner; then root partner
+                    partner = self.env.user.partner_id or self.env.company.partner_id
+                    if not partner:
+                        partner = self.env.ref("base.partner_root", raise_if_not_found=False)
+                    default_partner_id = partner.id if partner else False
+                if default_partner_id:
+                    vals["partner_id"] = default_partner_id
 
             # Default stock_owner_id to partner_id if not explicitly set
             # Organizational hierarchy: Company → Department → Child Department
@@ -511,24 +546,7 @@ class RecordsContainer(models.Model):
             # ============================================================================
             # Priority: Department's responsible user > First department user > Current user
             if not vals.get("user_id"):
-                user_set = False
-                if vals.get("department_id"):
-                    department = self.env['records.department'].browse(vals["department_id"])
-                    if department.exists():
-                        # Priority 1: Department's responsible user (user_id)
-                        if department.user_id and department.user_id.active:
-                            vals["user_id"] = department.user_id.id
-                            user_set = True
-                        # Priority 2: First active user in department's user_ids
-                        elif department.user_ids:
-                            active_users = department.user_ids.filtered(lambda u: u.active)
-                            if active_users:
-                                vals["user_id"] = active_users[0].id
-                                user_set = True
-                
-                # Fallback: Current user if no department user found
-                if not user_set:
-                    vals["user_id"] = self.env.user.id
+                vals["user_id"] = department_users.get(vals.get("department_id")) or self.env.user.id
 
             # ⚠️ REMOVED: Automatic name generation
             # Customer must provide their own container name/number
@@ -536,39 +554,40 @@ class RecordsContainer(models.Model):
 
             # Ensure a safe default container type to satisfy NOT NULL constraints in tests/runtime
             if not vals.get("container_type_id"):
-                default_type_id = self._get_default_container_type_id()
+                if default_type_id is None:
+                    default_type_id = self._get_default_container_type_id()
                 if default_type_id:
                     vals["container_type_id"] = default_type_id
 
             # Auto-generate temp_barcode for portal-created containers that don't have one
             # This ensures all portal containers have a customer-printable barcode
             if vals.get("created_via_portal") and not vals.get("temp_barcode") and not vals.get("barcode"):
-                vals["temp_barcode"] = self._generate_temp_barcode(vals)
+                vals["temp_barcode"] = next(temp_barcodes)
 
             # Billing starts at portal creation → if storage_start_date is empty set today
             if not vals.get("storage_start_date"):
-                vals["storage_start_date"] = fields.Date.today()
+                vals["storage_start_date"] = today
+
+        # ✅ Link a stock.quant.package to each container (enables Stock Barcode scanning);
+        # the packages of the whole batch are looked up and created together
+        self._prepare_stock_packages(vals_list)
 
         # Create records
         records = super().create(vals_list)
 
-        # ✅ Create stock.quant.package for each container (enables Stock Barcode scanning)
-        for record in records:
-            record._create_or_update_stock_package()
-        
         # ✅ Create stock.quant when container is scanned IN (not pending)
-        for record in records:
-            if record.state == 'in' and not record.quant_id:
-                record._create_stock_quant()
+        records.filtered(lambda record: record.state == 'in' and not record.quant_id)._create_stock_quants()
         
         # Update location container counts
         records._update_location_counts()
 
+        self.env['records.search.cache']._invalidate_partners(records.partner_id.ids)
         return records
 
     def write(self, vals):
         # Track old locations before write
         old_locations = self.mapped('location_id')
+        old_partner_ids = self.partner_id.ids
         
         if any(key in vals for key in ["location_id", "state"]) and "last_access_date" not in vals:
             vals["last_access_date"] = fields.Date.today()
@@ -580,32 +599,13 @@ class RecordsContainer(models.Model):
 
         # ✅ Sync stock.quant.package barcode when container barcode changes
         if 'barcode' in vals or 'temp_barcode' in vals:
-            for record in self:
-                record._create_or_update_stock_package()
+            self._sync_stock_packages()
 
         # ✅ Create stock.quant when container is scanned IN (state changes to 'in')
         # ✅ Also update child file folder states to match container state
         if 'state' in vals:
-            for record in self:
-                if record.state == 'in' and not record.quant_id:
-                    record._create_stock_quant()
-                
-                # Sync file folder states with container state
-                # When container goes IN, files should also be IN
-                # When container goes OUT, files should also be OUT
-                # When container is DESTROYED, files should also be DESTROYED
-                if record.file_ids:
-                    files_to_update = record.file_ids.filtered(
-                        lambda f: f.state != record.state and f.state not in ('perm_out', 'destroyed')
-                    )
-                    if files_to_update:
-                        files_to_update.write({'state': record.state})
-                        record.message_post(
-                            body=_('Updated %d file folder(s) to status: %s') % (
-                                len(files_to_update), 
-                                dict(record._fields['state'].selection).get(record.state, record.state)
-                            )
-                        )
+            self.filtered(lambda record: record.state == 'in' and not record.quant_id)._create_stock_quants()
+            self._propagate_state_to_files()
         
         # Update location counts if location changed
         if 'location_id' in vals:
@@ -613,12 +613,51 @@ class RecordsContainer(models.Model):
             affected_locations = old_locations | new_locations
             # Location counts are handled via native quant_ids relationship
             pass
-        
+
+        # Cached portal searches of both the previous and the new owner are stale
+        self.env['records.search.cache']._invalidate_partners(old_partner_ids + self.partner_id.ids)
         return result
 
+    def _propagate_state_to_files(self):
+        """
+        Sync file folder states with their container's state, set-based.
+
+        When container goes IN, files should also be IN; when container goes
+        OUT, files should also be OUT. Containers are grouped per target
+        state: each group updates its files in one write (the files' own
+        tracking and audit log still record every folder), and the summary
+        note is logged on the containers in one batch.
+
+        Folder states only mirror IN and OUT: pending, perm-out and destroyed
+        containers leave their folders as they are.
+        """
+        File = self.env['records.file']
+        file_states = dict(File._fields['state']._description_selection(self.env))
+        container_states = dict(self._fields['state']._description_selection(self.env))
+        bodies = {}
+        for state in set(self.mapped('state')):
+            if state not in file_states:
+                continue
+            containers = self.filtered(lambda record, state=state: record.state == state)
+            files = File.search([
+                ('container_id', 'in', containers.ids),
+                ('state', '!=', state),
+                ('state', 'not in', ('perm_out', 'destroyed')),
+            ])
+            if not files:
+                continue
+            files.write({'state': state})
+            for container_id, count in Counter(file.container_id.id for file in files).items():
+                bodies[container_id] = _('Updated %d file folder(s) to status: %s') % (
+                    count, container_states.get(state, state)
+                )
+        if bodies:
+            self.browse(list(bodies))._message_log_batch(bodies=bodies)
+
     def unlink(self):
         # Track locations before deletion
         locations = self.mapped('location_id')
+        partner_ids = self.partner_id.ids
         
         for record in self:
             if record.active:
@@ -629,7 +668,8 @@ class RecordsContainer(models.Model):
         result = super().unlink()
         
         # Location counts are handled via native quant_ids relationship
-        
+        self.env['records.search.cache']._invalidate_partners(partner_ids)
+
         return result
 
     # ============================================================================
@@ -665,16 +705,6 @@ class RecordsContainer(models.Model):
                 state_dict = dict(container._fields['state'].selection)
                 container.state_display = state_dict.get(container.state, container.state)
     
-    @api.depends("document_ids")
-    def _compute_document_count(self):
-        for container in self:
-            container.document_count = len(container.document_ids)
-
-    @api.depends("file_ids")
-    def _compute_file_count(self):
-        for container in self:
-            container.file_count = len(container.file_ids)
-
     @api.depends("storage_start_date", "retention_policy_id.retention_years", "permanent_retention")
     def _compute_destruction_due_date(self):
         for container in self:
@@ -1170,37 +1200,24 @@ class RecordsContainer(models.Model):
     # TEMP BARCODE HELPERS
     # ==========================================================================
     def _generate_temp_barcode(self, vals=None):
-        """Generate a temporary barcode.
+        """Generate a temporary barcode from the shared allocator (see records.barcode.allocator).
 
-        Strategy:
-        1. Try dedicated sequence 'records.container.temp.barcode'.
-        2. Fallback: TMP-<company>-<YYYYMMDD>-<zero padded sequence from container seq or random>.
-        3. Ensure uniqueness (attempt up to 5 tries on collision).
-        """
-        import random, string
-        date_part = fields.Date.today().strftime("%Y%m%d")
-        company = self.env.company.id if self.env.company else 0
-        attempt = 0
-        while attempt < 5:
-            seq = self.env["ir.sequence"].next_by_code("records.container.temp.barcode")
-            if not seq:
-                # Fallback simple random segment
-                rand_seg = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
-                seq = f"TMP-{company}-{date_part}-{rand_seg}"
-            # Check uniqueness quickly (no full search if likely unique)
-            exists = self.env["records.container"].sudo().search_count([("temp_barcode", "=", seq)])
-            if not exists:
-                # Audit log only if context indicates creation phase
-                if self.env.context.get('creating_temp_barcode_log'):
-                    try:
-                        self.env['records.audit.log'].log_event(self, 'action', _("Temporary barcode %s generated") % seq)
-                    except Exception:
-                        pass
-                return seq
-            attempt += 1
-        # Final fallback with high entropy
-        rand_seg = "".join(random.choices(string.ascii_uppercase + string.digits, k=10))
-        return f"TMP-{company}-{date_part}-{rand_seg}"
+        Uniqueness is guaranteed by the allocator's sequence and enforced by the
+        temp_barcode_company_uniq constraint, so no pre-check search is needed.
+        """
+        barcode = self._reserve_temp_barcodes(1)[0]
+        # Audit log only if context indicates creation phase
+        if self.env.context.get('creating_temp_barcode_log'):
+            try:
+                self.env['records.audit.log'].log_event(self, 'action', _("Temporary barcode %s generated") % barcode)
+            except Exception:
+                pass
+        return barcode
+
+    @api.model
+    def _reserve_temp_barcodes(self, count):
+        """Reserve ``count`` temporary barcodes at once (TMP series of records.barcode.allocator)."""
+        return self.env["records.barcode.allocator"].allocate("container", count)
 
     @api.depends("barcode")
     def _compute_barcode_assigned(self):
@@ -1560,113 +1577,156 @@ class RecordsContainer(models.Model):
         Valuation is controlled by product categories, not packages.
         """
         self.ensure_one()
-        
-        # Determine which barcode to use (prefer physical barcode over temp)
-        package_barcode = self.barcode or self.temp_barcode
-        
-        if not package_barcode:
-            # No barcode yet - nothing to sync
-            return
-        
+        self._sync_stock_packages()
+
+    @api.model
+    def _get_or_create_packages(self, package_vals):
+        """{package name: stock.quant.package} for {name: creation values}.
+
+        Existing packages are reused (one search); the missing ones are
+        created together.
+        """
         Package = self.env['stock.quant.package'].sudo()
-        
-        if self.package_id:
-            # Package exists - update barcode if changed
-            if self.package_id.name != package_barcode:
-                self.package_id.write({
-                    'name': package_barcode,
-                })
-        else:
-            # Check if package with this barcode already exists
-            existing_package = Package.search([('name', '=', package_barcode)], limit=1)
-            
-            if existing_package:
-                # Link to existing package
-                self.write({'package_id': existing_package.id})
-            else:
-                # Create new package
-                package = Package.create({
+        if not package_vals:
+            return {}
+        packages = {package.name: package for package in Package.search([('name', 'in', list(package_vals))])}
+        missing = [vals for name, vals in package_vals.items() if name not in packages]
+        if missing:
+            packages.update({package.name: package for package in Package.create(missing)})
+        return packages
+
+    @api.model
+    def _prepare_stock_packages(self, vals_list):
+        """Set package_id in creation values from the barcode (or temp barcode)"""
+        package_vals = {}
+        for vals in vals_list:
+            package_barcode = vals.get("barcode") or vals.get("temp_barcode")
+            if package_barcode and not vals.get("package_id"):
+                package_vals.setdefault(package_barcode, {
                     'name': package_barcode,
-                    'company_id': self.company_id.id,
-                    'location_id': self.location_id.id if self.location_id else False,
+                    'company_id': vals.get("company_id") or self.env.company.id,
+                    'location_id': vals.get("location_id") or False,
                 })
-                self.write({'package_id': package.id})
+        packages = self._get_or_create_packages(package_vals)
+        for vals in vals_list:
+            package_barcode = vals.get("barcode") or vals.get("temp_barcode")
+            if package_barcode and not vals.get("package_id"):
+                vals["package_id"] = packages[package_barcode].id
+
+    def _sync_stock_packages(self):
+        """Keep the linked packages named after the containers' barcodes (batched)"""
+        to_link = self.browse()
+        for record in self:
+            # Determine which barcode to use (prefer physical barcode over temp)
+            package_barcode = record.barcode or record.temp_barcode
+            if not package_barcode:
+                # No barcode yet - nothing to sync
+                continue
+            if not record.package_id:
+                to_link |= record
+            elif record.package_id.name != package_barcode:
+                # Package exists - update barcode if changed
+                record.package_id.sudo().write({'name': package_barcode})
+
+        packages = self._get_or_create_packages({
+            record.barcode or record.temp_barcode: {
+                'name': record.barcode or record.temp_barcode,
+                'company_id': record.company_id.id,
+                'location_id': record.location_id.id,
+            }
+            for record in to_link
+        })
+        for record in to_link:
+            record.package_id = packages[record.barcode or record.temp_barcode]
     
     def _create_stock_quant(self):
+        """Create stock.quant for this container (see _create_stock_quants)"""
+        self.ensure_one()
+        self._create_stock_quants()
+        return self.quant_id
+
+    def _create_stock_quants(self):
         """
-        Create stock.quant for this container in Odoo's inventory system.
+        Create stock.quant for these containers in Odoo's inventory system.
         
-        This integrates the container with native Odoo stock tracking:
-        - Creates a quant (inventory on-hand record)
+        This integrates the containers with native Odoo stock tracking:
+        - Creates a quant (inventory on-hand record) per container, in one batch
         - Sets location to location_id (native stock.location)
         - Sets owner to partner_id (customer ownership)
         - Quantity = 1 (one container)
         
-        Called automatically when container state changes from draft to active.
+        The default location and the container product are resolved once per
+        company. Called automatically when container state changes from draft
+        to active.
         
         TEMPORARILY DISABLED - Product type field compatibility issue
         """
-        self.ensure_one()
         return  # Disabled until product type field resolved
 
         # Don't create duplicate quants
-        if self.quant_id:
-            return self.quant_id
+        containers = self.filtered(lambda record: not record.quant_id)
+        if not containers:
+            return
 
-        # Get or create default records location
-        stock_location = self.location_id  # Use location_id (now stock.location)
-        if not stock_location:
-            # Find or create a default "Records Storage" location
-            stock_location = self.env['stock.location'].search([
-                ('usage', '=', 'internal'),
-                ('company_id', '=', self.company_id.id),
-                ('name', 'ilike', 'Records Storage'),
-            ], limit=1)
+        default_locations = {}
+        products = {}
+        quant_vals = []
+        for container in containers:
+            company = container.company_id
+            if company.id not in default_locations:
+                default_locations[company.id] = container._get_default_records_location()
+                products[company.id] = container._get_or_create_container_product()
+            quant_vals.append({
+                'product_id': products[company.id].id,
+                'location_id': (container.location_id or default_locations[company.id]).id,
+                'owner_id': container.stock_owner_id.id or container.partner_id.id,  # Department/child dept or company
+                'quantity': 1,  # One container
+                'company_id': company.id,
+            })
 
-            if not stock_location:
-                # Use WH/Stock as parent (standard Odoo location that always exists)
-                # This is the main warehouse stock location, guaranteed to be usage='internal'
-                wh_stock = self.env.ref('stock.stock_location_stock', raise_if_not_found=False)
-
-                if not wh_stock:
-                    # Fallback: search for any location named 'Stock' with usage='internal'
-                    wh_stock = self.env['stock.location'].search([
-                        ('usage', '=', 'internal'),
-                        ('name', '=', 'Stock'),
-                    ], limit=1)
-
-                # Create Records Storage as child of WH/Stock
-                stock_location = self.env['stock.location'].create({
-                    'name': 'Records Storage',
-                    'usage': 'internal',
-                    'location_id': wh_stock.id if wh_stock else False,
-                    'company_id': self.company_id.id,
-                })
+        quants = self.env['stock.quant'].create(quant_vals)
 
-        # Get or create product for containers (needed for stock.quant)
-        product = self._get_or_create_container_product()
+        # Link quants to containers
+        for container, quant in zip(containers, quants):
+            container.write({
+                'quant_id': quant.id,
+                'location_id': quant.location_id.id,  # Use location_id (now stock.location)
+            })
 
-        # Create the stock quant with organizational ownership
-        quant = self.env['stock.quant'].create({
-            'product_id': product.id,
-            'location_id': stock_location.id,
-            'owner_id': self.stock_owner_id.id or self.partner_id.id,  # Department/child dept or company
-            'quantity': 1,  # One container
-            'company_id': self.company_id.id,
-        })
+            # Post message to chatter
+            container.message_post(
+                body=_("Stock quant created: Container integrated with Odoo inventory system at location %s") % quant.location_id.complete_name
+            )
 
-        # Link quant to container
-        self.write({
-            'quant_id': quant.id,
-            'location_id': stock_location.id,  # Use location_id (now stock.location)
-        })
+    def _get_default_records_location(self):
+        """Find or create the default "Records Storage" location of the container's company"""
+        self.ensure_one()
+        stock_location = self.env['stock.location'].search([
+            ('usage', '=', 'internal'),
+            ('company_id', '=', self.company_id.id),
+            ('name', 'ilike', 'Records Storage'),
+        ], limit=1)
 
-        # Post message to chatter
-        self.message_post(
-            body=_("Stock quant created: Container integrated with Odoo inventory system at location %s") % stock_location.complete_name
-        )
+        if not stock_location:
+            # Use WH/Stock as parent (standard Odoo location that always exists)
+            # This is the main warehouse stock location, guaranteed to be usage='internal'
+            wh_stock = self.env.ref('stock.stock_location_stock', raise_if_not_found=False)
+
+            if not wh_stock:
+                # Fallback: search for any location named 'Stock' with usage='internal'
+                wh_stock = self.env['stock.location'].search([
+                    ('usage', '=', 'internal'),
+                    ('name', '=', 'Stock'),
+                ], limit=1)
 
-        return quant
+            # Create Records Storage as child of WH/Stock
+            stock_location = self.env['stock.location'].create({
+                'name': 'Records Storage',
+                'usage': 'internal',
+                'location_id': wh_stock.id if wh_stock else False,
+                'company_id': self.company_id.id,
+            })
+        return stock_location
 
     def _get_or_create_container_product(self):
         """
@@ -2046,20 +2106,10 @@ class RecordsContainer(models.Model):
     def sync_all_containers_with_stock(self):
         """
         Batch synchronization of all containers with their stock quants.
-        Can be called via cron job for regular sync maintenance.
+        Runs a full records.stock.reconciliation (the nightly cron runs it
+        incrementally) and returns the number of containers repaired.
         """
-        containers = self.search([('quant_id', '!=', False)])
-        synced_count = 0
-
-        for container in containers:
-            if container.location_id != container.quant_id.location_id:
-                container.sync_with_stock_quant()
-                synced_count += 1
-
-        if synced_count > 0:
-            _logger.info(f"Synchronized {synced_count} containers with stock system")
-
-        return synced_count
+        return self.env['records.stock.reconciliation'].run(full=True).repaired_count
 
     def get_stock_movement_history(self, limit=None, movement_type=None):
         """
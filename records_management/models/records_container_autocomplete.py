@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Container Autocomplete Index
+
+In-memory prefix + trigram index of container names and barcodes, one per
+customer (commercial partner) and one global index for staff searching every
+customer. Lookups never touch the container table:
+
+- prefix matches come from a sorted key list (bisect),
+- typo-tolerant matches (one insertion, deletion, substitution or adjacent
+  transposition within the typed prefix) come from a padded trigram index.
+
+Indexes live in each worker process, are built lazily on first use and kept
+in sync through the per-partner generations of ``records.search.cache``: a
+container create/write/unlink bumps the generation after commit, and the next
+lookup in any worker only re-reads the containers written since its watermark.
+That refresh cannot see rows that left the scope (deleted, or reassigned to
+another customer), so the candidates of each lookup are re-checked against
+the table and stale ones are dropped from the index.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict, defaultdict
+from datetime import timedelta
+
+from odoo import api, models
+
+_logger = logging.getLogger(__name__)
+
+# Container states offered as suggestions (perm_out/destroyed are archived)
+AUTOCOMPLETE_STATES = ('pending', 'in', 'out')
+
+# Typo tolerance only kicks in from this many characters - below that one
+# edit matches nearly every box number
+MIN_FUZZY_LENGTH = 4
+
+# Fuzzy candidates verified per lookup (best trigram overlap first)
+MAX_FUZZY_CANDIDATES = 200
+
+# Rebuild from scratch after this many seconds, whatever the generation says
+MAX_INDEX_AGE = 3600
+
+# Re-read rows written slightly before the watermark (late commits)
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Lookups retried after dropping stale candidates
+MAX_STALE_ROUNDS = 3
+
+# Indexes kept per worker (least recently used dropped first)
+MAX_INDEXES = 64
+
+_INDEXES = OrderedDict()
+_INDEXES_LOCK = threading.Lock()
+
+
+def normalize_key(value):
+    """Lowercase and drop separators, so '45-11', '45 11' and '4511' match"""
+    return ''.join(char for char in (value or '').lower() if char.isalnum())
+
+
+def prefix_trigrams(key):
+    """Trigrams of a key padded at the start only (matches are prefixes)"""
+    padded = '^^' + key
+    return {padded[i:i + 3] for i in range(len(key))}
+
+
+def within_one_edit(a, b):
+    """True if a and b differ by at most one edit (incl. adjacent transposition)"""
+    if a == b:
+        return True
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > 1:
+        return False
+    i = 0
+    while i < min(len_a, len_b) and a[i] == b[i]:
+        i += 1
+    if len_a == len_b:
+        return a[i + 1:] == b[i + 1:] or (
+            i + 1 < len_a and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        )
+    if len_a > len_b:
+        return a[i + 1:] == b[i:]
+    return a[i:] == b[i + 1:]
+
+
+def prefix_within_one_edit(query, key):
+    """True if some prefix of key is within one edit of query"""
+    size = len(query)
+    return any(within_one_edit(query, key[:length]) for length in (size, size - 1, size + 1) if length > 0)
+
+
+class ContainerPrefixIndex:
+    """Prefix and trigram index over the normalized keys of one scope"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.built_at = 0.0
+        self.watermark = None
+        self.entries = {}  # container id -> (department_id, keys)
+        self.key_ids = {}  # key -> {container ids}
+        self.sorted_keys = []
+        self.grams = defaultdict(set)  # trigram -> {keys}
+
+    def clear(self):
+        self.entries.clear()
+        self.key_ids.clear()
+        self.sorted_keys = []
+        self.grams.clear()
+
+    def add(self, container_id, department_id, values):
+        self.remove(container_id)
+        keys = tuple({key for key in map(normalize_key, values) if key})
+        self.entries[container_id] = (department_id, keys)
+        for key in keys:
+            ids = self.key_ids.get(key)
+            if ids is None:
+                ids = self.key_ids[key] = set()
+                insort(self.sorted_keys, key)
+                for gram in prefix_trigrams(key):
+                    self.grams[gram].add(key)
+            ids.add(container_id)
+
+    def remove(self, container_id):
+        entry = self.entries.pop(container_id, None)
+        if not entry:
+            return
+        for key in entry[1]:
+            ids = self.key_ids[key]
+            ids.discard(container_id)
+            if ids:
+                continue
+            del self.key_ids[key]
+            del self.sorted_keys[bisect_left(self.sorted_keys, key)]
+            for gram in prefix_trigrams(key):
+                keys = self.grams[gram]
+                keys.discard(key)
+                if not keys:
+                    del self.grams[gram]
+
+    def lookup(self, query, limit=10, department_ids=None):
+        """
+        Suggestions for a typed prefix.
+
+        Returns:
+            list: [(container id, 'prefix' | 'fuzzy')], prefix matches first
+        """
+        query = normalize_key(query)
+        if not query:
+            return []
+        # Refreshes of other threads mutate the same dicts under the lock
+        with self.lock:
+            return self._lookup(query, limit, department_ids)
+
+    def _lookup(self, query, limit, department_ids):
+        allowed = set(department_ids) if department_ids else None
+        results, seen = [], set()
+
+        def collect(keys, match):
+            for key in keys:
+                for container_id in sorted(self.key_ids.get(key, ())):
+                    if container_id in seen:
+                        continue
+                    if allowed is not None:
+                        department_id = self.entries[container_id][0]
+                        if department_id and department_id not in allowed:
+                            continue
+                    seen.add(container_id)
+                    results.append((container_id, match))
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        # Exact prefix: walk the sorted keys from the insertion point
+        position = bisect_left(self.sorted_keys, query)
+        prefix_keys = []
+        while position < len(self.sorted_keys) and self.sorted_keys[position].startswith(query):
+            prefix_keys.append(self.sorted_keys[position])
+            if len(prefix_keys) >= limit * 4:
+                break
+            position += 1
+        if collect(prefix_keys, 'prefix') or len(query) < MIN_FUZZY_LENGTH:
+            return results
+
+        # One edit changes at most three padded trigrams of the prefix
+        query_grams = prefix_trigrams(query)
+        overlap = Counter()
+        for gram in query_grams:
+            overlap.update(self.grams.get(gram, ()))
+        needed = max(1, len(query_grams) - 3)
+        candidates = sorted(
+            (key for key, count in overlap.items() if count >= needed and not key.startswith(query)),
+            key=lambda key: (-overlap[key], key),
+        )[:MAX_FUZZY_CANDIDATES]
+        collect([key for key in candidates if prefix_within_one_edit(query, key)], 'fuzzy')
+        return results
+
+
+class RecordsContainerAutocomplete(models.AbstractModel):
+    _name = 'records.container.autocomplete'
+    _description = 'Container Autocomplete Index'
+
+    @api.model
+    def suggest(self, query, partner_id=None, department_ids=None, limit=10):
+        """
+        Container suggestions for a partially typed box number or barcode.
+
+        Args:
+            query (str): typed text
+            partner_id (int): customer scope (False = every customer)
+            department_ids (list): restrict to these departments (plus none)
+            limit (int): maximum suggestions
+
+        Returns:
+            list: [(container id, 'prefix' | 'fuzzy')]
+        """
+        scope = self.env['records.search.cache']._scope_partner_id(partner_id)
+        index = self._get_index(scope)
+        for _attempt in range(MAX_STALE_ROUNDS):
+            matches = index.lookup(query, limit=limit, department_ids=department_ids)
+            stale = self._get_stale_ids(scope, [container_id for container_id, _match in matches])
+            if not stale:
+                return matches
+            # Deleted, archived or reassigned since the index saw them: drop
+            # them and look again so they do not use up the limit
+            with index.lock:
+                for container_id in stale:
+                    index.remove(container_id)
+        return [match for match in matches if match[0] not in stale]
+
+    @api.model
+    def _get_stale_ids(self, scope, container_ids):
+        """Candidates that no longer exist, are hidden, or moved to another customer"""
+        if not container_ids:
+            return set()
+        self.env.cr.execute("""
+            SELECT id
+              FROM records_container
+             WHERE id = ANY(%s)
+               AND coalesce(active, false) AND state = ANY(%s)
+               AND (%s = 0 OR partner_id = %s)
+        """, (container_ids, list(AUTOCOMPLETE_STATES), scope or 0, scope or 0))
+        return set(container_ids) - {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _get_index(self, scope):
+        """Worker-local index of a scope, built or refreshed as needed"""
+        generation = self.env['records.search.cache']._get_generation(scope)
+        index_key = (self.env.cr.dbname, scope)
+        with _INDEXES_LOCK:
+            index = _INDEXES.get(index_key)
+            if index is None:
+                index = _INDEXES[index_key] = ContainerPrefixIndex()
+                while len(_INDEXES) > MAX_INDEXES:
+                    _INDEXES.popitem(last=False)
+            else:
+                _INDEXES.move_to_end(index_key)
+
+        with index.lock:
+            if index.generation is None or time.time() - index.built_at > MAX_INDEX_AGE:
+                self._build_index(index, scope, generation)
+            elif index.generation != generation:
+                self._refresh_index(index, scope, generation)
+        return index
+
+    @api.model
+    def _fetch_rows(self, scope, since=None):
+        """(id, name, barcode, temp_barcode, department_id, visible) of a scope"""
+        conditions, params = [], [list(AUTOCOMPLETE_STATES)]
+        if scope:
+            conditions.append("partner_id = %s")
+            params.append(scope)
+        if since:
+            conditions.append("write_date >= %s")
+            params.append(since)
+        else:
+            conditions.append("active AND state = ANY(%s)")
+            params.append(list(AUTOCOMPLETE_STATES))
+        self.env.cr.execute("""
+            SELECT id, name, barcode, temp_barcode, department_id,
+                   coalesce(active, false) AND state = ANY(%%s) AS visible
+              FROM records_container
+             WHERE %s
+        """ % " AND ".join(conditions), params)
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _current_time(self):
+        self.env.cr.execute("SELECT now() at time zone 'UTC'")
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _build_index(self, index, scope, generation):
+        started = time.time()
+        watermark = self._current_time()
+        rows = self._fetch_rows(scope)
+        index.clear()
+        for container_id, name, barcode, temp_barcode, department_id, _visible in rows:
+            index.add(container_id, department_id, (name, barcode, temp_barcode))
+        index.generation = generation
+        index.watermark = watermark
+        index.built_at = time.time()
+        _logger.debug(
+            "Container autocomplete: built index for scope %s (%d containers, %d keys) in %.1fms",
+            scope, len(index.entries), len(index.sorted_keys), (time.time() - started) * 1000,
+        )
+
+    @api.model
+    def _refresh_index(self, index, scope, generation):
+        watermark = self._current_time()
+        rows = self._fetch_rows(scope, since=index.watermark - WATERMARK_OVERLAP)
+        for container_id, name, barcode, temp_barcode, department_id, visible in rows:
+            if visible:
+                index.add(container_id, department_id, (name, barcode, temp_barcode))
+            else:
+                index.remove(container_id)
+        index.generation = generation
+        index.watermark = watermark
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Container Content Counters
+
+records.container.document_count and file_count are maintained by AFTER
+INSERT/UPDATE/DELETE triggers on the documents and file folders tables: each
+change adds or subtracts one on the container row it enters or leaves, so
+adding a document to a box is one UPDATE whatever the box already holds,
+instead of reloading the box's one2many to recount it. Triggers also follow
+changes the ORM never routes through write(), such as the stored related
+records.document.container_id when a file folder moves to another box.
+Unlike the per-partner inventory counters (see records.inventory.counter),
+the updated row is the box itself, which is only contended when the same box
+is filled from two transactions at once.
+
+Only active records are counted, like the container's one2many fields.
+The ORM hooks of the counted models mark the stored fields computed from the
+counters (see _invalidate_container_counts) for recomputation.
+
+A nightly verification recounts both tables and repairs drifted containers
+(e.g. rows changed by raw SQL with triggers disabled).
+"""
+
+import logging
+
+from odoo import api, models
+from odoo.tools import SQL
+from odoo.tools.sql import column_exists
+
+_logger = logging.getLogger(__name__)
+
+# Counted models: {model: counter column on records_container}
+CONTAINER_COUNTERS = {
+    'records.document': 'document_count',
+    'records.file': 'file_count',
+}
+
+
+class RecordsContainerCounter(models.AbstractModel):
+    _name = 'records.container.counter'
+    _description = 'Container Content Counters'
+
+    # ============================================================================
+    # TRIGGERS (installed from the counted models' init())
+    # ============================================================================
+    @api.model
+    def _setup_container_counter_trigger(self, model_name):
+        """Install the counter triggers of a counted model and verify its counters."""
+        table = self.env[model_name]._table
+        params = {'table': table, 'counter': CONTAINER_COUNTERS[model_name]}
+        self.env.cr.execute("""
+            CREATE OR REPLACE FUNCTION %(table)s_container_counter() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' AND OLD.container_id IS NOT NULL AND coalesce(OLD.active, false) THEN
+                    UPDATE records_container SET %(counter)s = coalesce(%(counter)s, 0) - 1 WHERE id = OLD.container_id;
+                END IF;
+                IF TG_OP <> 'DELETE' AND NEW.container_id IS NOT NULL AND coalesce(NEW.active, false) THEN
+                    UPDATE records_container SET %(counter)s = coalesce(%(counter)s, 0) + 1 WHERE id = NEW.container_id;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """ % params)
+        self.env.cr.execute("""
+            DROP TRIGGER IF EXISTS %(table)s_container_counter_trg ON %(table)s;
+            CREATE TRIGGER %(table)s_container_counter_trg
+                AFTER INSERT OR DELETE ON %(table)s
+                FOR EACH ROW EXECUTE FUNCTION %(table)s_container_counter();
+            DROP TRIGGER IF EXISTS %(table)s_container_counter_upd_trg ON %(table)s;
+            CREATE TRIGGER %(table)s_container_counter_upd_trg
+                AFTER UPDATE OF container_id, active ON %(table)s
+                FOR EACH ROW
+                WHEN (OLD.container_id IS DISTINCT FROM NEW.container_id OR OLD.active IS DISTINCT FROM NEW.active)
+                EXECUTE FUNCTION %(table)s_container_counter();
+        """ % params)
+        # On first install the container table may not have its counter yet;
+        # the nightly verification fills it in then
+        if column_exists(self.env.cr, 'records_container', params['counter']):
+            self._verify_model(model_name)
+
+    @api.model
+    def _get_stored_containers(self, records):
+        """Containers of counted records as stored in the database (the cache may already hold pending writes)"""
+        if not records.ids:
+            return self.env['records.container']
+        rows = self.env.execute_query(SQL(
+            "SELECT DISTINCT container_id FROM %s WHERE id IN %s AND container_id IS NOT NULL",
+            SQL.identifier(records._table), tuple(records.ids),
+        ))
+        return self.env['records.container'].browse(id_ for id_, in rows)
+
+    @api.model
+    def _invalidate_container_counts(self, containers):
+        """
+        Drop cached counters once the triggers changed them (see the counted
+        models' hooks), and mark the stored fields depending on them (e.g.
+        account.move.line.document_count) for recomputation: the triggers
+        bypass the ORM, which would never notice the change otherwise.
+        """
+        fnames = list(CONTAINER_COUNTERS.values())
+        self.env['records.container'].invalidate_model(fnames, flush=False)
+        containers.exists().modified(fnames)
+
+    # ============================================================================
+    # VERIFICATION
+    # ============================================================================
+    @api.model
+    def _verify_model(self, model_name):
+        """
+        Recount a model per container and repair the containers whose counter drifted.
+
+        Returns:
+            int: number of containers repaired
+        """
+        counter = CONTAINER_COUNTERS[model_name]
+        rows = self.env.execute_query(SQL("""
+            UPDATE records_container c
+               SET %(counter)s = truth.count
+              FROM (
+                    SELECT c2.id, COUNT(content.id) AS count
+                      FROM records_container c2
+                      LEFT JOIN %(table)s content
+                        ON content.container_id = c2.id AND coalesce(content.active, false)
+                     GROUP BY c2.id
+                   ) AS truth
+             WHERE truth.id = c.id
+               AND c.%(counter)s IS DISTINCT FROM truth.count
+         RETURNING c.id
+        """, counter=SQL.identifier(counter), table=SQL.identifier(self.env[model_name]._table)))
+        if rows:
+            _logger.warning("Container counters: %s of %d containers drifted, recounted", counter, len(rows))
+            self._invalidate_container_counts(self.env['records.container'].browse(id_ for id_, in rows))
+        return len(rows)
+
+    @api.model
+    def _cron_verify_counters(self):
+        """Nightly safety net: recount the documents and file folders of every container"""
+        for model_name in CONTAINER_COUNTERS:
+            if model_name in self.env:
+                self._verify_model(model_name)
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+Managed Database Indexes
+
+Composite and partial indexes that Odoo cannot express with ``index=True`` on a
+single field. Indexes are declared in ``DECLARED_INDEXES`` with a version
+number; on install/upgrade ``init()`` syncs the declarations into
+``records.db.index`` rows and, once the upgrade transaction has committed,
+builds pending indexes with ``CREATE INDEX CONCURRENTLY`` so production tables
+are never write-locked. A daily cron retries failed builds and refreshes the
+health snapshot (missing / invalid / unused / bloated) from
+``pg_stat_user_indexes``.
+
+To change an index definition, edit it here and bump its ``version``: the old
+index is dropped concurrently and rebuilt.
+"""
+
+import logging
+from contextlib import closing
+
+import psycopg2
+
+from odoo import api, fields, models, sql_db, SUPERUSER_ID, _
+
+_logger = logging.getLogger(__name__)
+
+
+DECLARED_INDEXES = [
+    {
+        'name': 'idx_container_search_composite',
+        'model': 'records.container',
+        'columns': 'partner_id, alpha_range_start, primary_content_type, content_date_from',
+        'version': 1,
+        'purpose': 'Partner-scoped intelligent search (alpha range, content type, dates).',
+    },
+    {
+        'name': 'idx_container_alpha_range',
+        'model': 'records.container',
+        'columns': 'alpha_range_start, alpha_range_end',
+        'where': 'alpha_range_start IS NOT NULL',
+        'version': 1,
+        'purpose': 'Alphabetical range containment for container recommendations.',
+    },
+    {
+        'name': 'idx_container_date_range',
+        'model': 'records.container',
+        'columns': 'content_date_from, content_date_to',
+        'where': 'content_date_from IS NOT NULL',
+        'version': 1,
+        'purpose': 'Content date range overlap for container recommendations.',
+    },
+    {
+        'name': 'idx_container_destruction_due',
+        'model': 'records.container',
+        'columns': 'destruction_due_date',
+        'where': 'active AND NOT permanent_retention',
+        'version': 1,
+        'purpose': 'Destruction due lists and retention alerts.',
+    },
+    {
+        'name': 'idx_container_partner_name',
+        'model': 'records.container',
+        'columns': 'partner_id, name, id',
+        'version': 1,
+        'purpose': 'Portal container listings ordered by box number.',
+    },
+    {
+        'name': 'idx_file_partner_name',
+        'model': 'records.file',
+        'columns': 'partner_id, name, id',
+        'version': 1,
+        'purpose': 'Portal file folder listings ordered by name.',
+    },
+    {
+        'name': 'idx_document_search_composite',
+        'model': 'records.document',
+        'columns': 'partner_id, container_id, document_type_id',
+        'version': 1,
+        'purpose': 'Partner-scoped document search by container and type.',
+    },
+]
+
+# Health thresholds
+BLOAT_RATIO_THRESHOLD = 0.5
+BLOAT_MIN_SIZE_BYTES = 10 * 1024 * 1024
+
+
+class RecordsDbIndex(models.Model):
+    _name = 'records.db.index'
+    _description = 'Managed Database Index'
+    _order = 'table_name, name'
+
+    name = fields.Char(string="Index Name", required=True, readonly=True)
+    model_name = fields.Char(string="Model", required=True, readonly=True)
+    table_name = fields.Char(string="Table", required=True, readonly=True)
+    columns = fields.Char(string="Columns", required=True, readonly=True)
+    method = fields.Char(string="Access Method", default='btree', readonly=True)
+    where_clause = fields.Char(string="Partial Index Condition", readonly=True)
+    purpose = fields.Char(string="Purpose", readonly=True)
+    version = fields.Integer(string="Declared Version", readonly=True)
+    applied_version = fields.Integer(string="Built Version", readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending Build'),
+        ('built', 'Built'),
+        ('error', 'Build Failed'),
+    ], string="Build Status", default='pending', required=True, readonly=True)
+    last_error = fields.Text(string="Last Error", readonly=True)
+    last_build_date = fields.Datetime(string="Last Build", readonly=True)
+
+    # Health snapshot (refreshed by action_refresh_health / cron)
+    health = fields.Selection([
+        ('ok', 'Healthy'),
+        ('missing', 'Missing'),
+        ('invalid', 'Invalid'),
+        ('unused', 'Unused'),
+        ('bloated', 'Bloated'),
+    ], string="Health", readonly=True)
+    # bigint statistics: Float, as fields.Integer is a 32-bit column
+    idx_scan = fields.Float(string="Index Scans", digits=(16, 0), readonly=True)
+    idx_tup_read = fields.Float(string="Tuples Read", digits=(16, 0), readonly=True)
+    size_bytes = fields.Float(string="Size (bytes)", digits=(16, 0), readonly=True)
+    size_display = fields.Char(string="Size", readonly=True)
+    bloat_ratio = fields.Float(string="Estimated Bloat", digits=(3, 2), readonly=True)
+    health_checked_date = fields.Datetime(string="Health Checked", readonly=True)
+
+    _sql_constraints = [
+        ('name_uniq', 'unique(name)', 'Managed index names must be unique.'),
+    ]
+
+    def init(self):
+        """Sync declarations and schedule concurrent builds after the upgrade commits."""
+        if self._sync_declared_indexes():
+            dbname = self.env.cr.dbname
+            self.env.cr.postcommit.add(lambda: self._build_pending_indexes_after_commit(dbname))
+
+    # ============================================================================
+    # DECLARATION SYNC
+    # ============================================================================
+    @api.model
+    def _sync_declared_indexes(self):
+        """
+        Create/update index rows from DECLARED_INDEXES.
+
+        Returns:
+            bool: True when at least one index needs (re)building.
+        """
+        existing = {rec.name: rec for rec in self.sudo().search([])}
+        needs_build = False
+        for decl in DECLARED_INDEXES:
+            if decl['model'] not in self.env:
+                continue
+            vals = {
+                'name': decl['name'],
+                'model_name': decl['model'],
+                'table_name': self.env[decl['model']]._table,
+                'columns': decl['columns'],
+                'method': decl.get('method', 'btree'),
+                'where_clause': decl.get('where') or False,
+                'purpose': decl.get('purpose') or False,
+                'version': decl['version'],
+            }
+            record = existing.get(decl['name'])
+            if not record:
+                self.sudo().create(vals)
+                needs_build = True
+                continue
+            if record.applied_version != decl['version'] or record.state != 'built':
+                vals['state'] = 'pending'
+                needs_build = True
+            record.write(vals)
+        return needs_build
+
+    # ============================================================================
+    # BUILD
+    # ============================================================================
+    def _get_create_statement(self):
+        self.ensure_one()
+        statement = 'CREATE INDEX CONCURRENTLY IF NOT EXISTS "%s" ON "%s" USING %s (%s)' % (
+            self.name, self.table_name, self.method, self.columns
+        )
+        if self.where_clause:
+            statement += ' WHERE %s' % self.where_clause
+        return statement
+
+    @api.model
+    def _build_pending_indexes_after_commit(self, dbname):
+        """postcommit hook: open a fresh registry cursor and build pending indexes."""
+        try:
+            with self.pool.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['records.db.index']._build_pending_indexes()
+        except Exception as e:
+            _logger.error("Managed indexes: post-upgrade build failed on %s: %s", dbname, e)
+
+    @api.model
+    def _build_pending_indexes(self):
+        """
+        Build every pending/failed index concurrently.
+
+        CREATE INDEX CONCURRENTLY waits for every transaction older than
+        itself, including the caller's: the work list is read first, our
+        transaction is committed before each build, and each result is saved
+        in its own short transaction.
+        """
+        pending = self.sudo().search([('state', 'in', ('pending', 'error'))])
+        builds = [
+            (index, index.name, index._get_create_statement(), index.applied_version != index.version, index.version)
+            for index in pending
+        ]
+        for index, name, statement, rebuild, version in builds:
+            self.env.cr.commit()  # no open snapshot of ours while the index builds
+            error = self._run_concurrent_build(name, statement, rebuild)
+            index._save_build_result(version, error)
+        self.env.cr.commit()  # keep the build status even if a later step fails
+        return True
+
+    @api.model
+    def _run_concurrent_build(self, name, statement, rebuild):
+        """
+        (Re)build one index with CREATE INDEX CONCURRENTLY on an autocommit connection.
+
+        A stale version (or a same-named index created by hand) is dropped
+        first; a build interrupted by an error leaves an INVALID index behind,
+        which is dropped so the next attempt starts clean.
+
+        Returns:
+            str: error message, False on success
+        """
+        error = False
+        with closing(sql_db.db_connect(self.env.cr.dbname).cursor()) as cr:
+            cr._cnx.autocommit = True
+            try:
+                if rebuild or self._is_invalid(cr, name):
+                    cr.execute('DROP INDEX CONCURRENTLY IF EXISTS "%s"' % name)
+                cr.execute(statement)
+                if self._is_invalid(cr, name):
+                    cr.execute('DROP INDEX CONCURRENTLY IF EXISTS "%s"' % name)
+                    error = _("Index build left an INVALID index; it was dropped.")
+            except psycopg2.Error as e:
+                error = str(e)
+            finally:
+                cr._cnx.autocommit = False
+        return error
+
+    def _save_build_result(self, version, error):
+        self.ensure_one()
+        if error:
+            _logger.warning("Managed indexes: building %s failed: %s", self.name, error)
+            self.write({'state': 'error', 'last_error': error})
+        else:
+            _logger.info("Managed indexes: built %s (version %s)", self.name, version)
+            self.write({
+                'state': 'built',
+                'applied_version': version,
+                'last_error': False,
+                'last_build_date': fields.Datetime.now(),
+            })
+
+    @api.model
+    def _is_invalid(self, cr, name):
+        cr.execute("""
+            SELECT NOT i.indisvalid
+              FROM pg_class c
+              JOIN pg_index i ON i.indexrelid = c.oid
+             WHERE c.relname = %s
+        """, (name,))
+        row = cr.fetchone()
+        return bool(row and row[0])
+
+    def action_rebuild(self):
+        """Manually queue indexes for a concurrent rebuild."""
+        self.write({'state': 'pending', 'applied_version': 0})
+        self.env.cr.postcommit.add(lambda: self._build_pending_indexes_after_commit(self.env.cr.dbname))
+        return True
+
+    # ============================================================================
+    # HEALTH REPORT
+    # ============================================================================
+    @api.model
+    def _cron_maintain_indexes(self):
+        """Daily: retry failed builds and refresh the health snapshot."""
+        self._build_pending_indexes()
+        self.sudo().search([]).action_refresh_health()
+
+    def action_refresh_health(self):
+        """Refresh size/scan/bloat figures from pg_stat_user_indexes and pg_stats."""
+        indexes = self or self.sudo().search([])
+        if not indexes:
+            return True
+        cr = self.env.cr
+        cr.execute("""
+            SELECT c.relname,
+                   i.indisvalid,
+                   coalesce(s.idx_scan, 0),
+                   coalesce(s.idx_tup_read, 0),
+                   pg_relation_size(c.oid),
+                   pg_size_pretty(pg_relation_size(c.oid)),
+                   c.reltuples,
+                   (SELECT sum(st.avg_width)
+                      FROM pg_attribute a
+                      JOIN pg_stats st ON st.schemaname = current_schema()
+                                    AND st.tablename = t.relname AND st.attname = a.attname
+                     WHERE a.attrelid = t.oid AND a.attnum = ANY(i.indkey::int2[])) AS key_width
+              FROM pg_class c
+              JOIN pg_index i ON i.indexrelid = c.oid
+              JOIN pg_class t ON t.oid = i.indrelid
+              LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = c.oid
+             WHERE c.relname IN %s
+        """, (tuple(indexes.mapped('name')),))
+        stats = {row[0]: row[1:] for row in cr.fetchall()}
+
+        now = fields.Datetime.now()
+        for index in indexes:
+            if index.name not in stats:
+                index.write({
+                    'health': 'missing', 'idx_scan': 0, 'idx_tup_read': 0,
+                    'size_bytes': 0, 'size_display': False, 'bloat_ratio': 0.0,
+                    'health_checked_date': now,
+                })
+                continue
+            valid, scans, tuples_read, size, size_pretty, reltuples, key_width = stats[index.name]
+            bloat = index._estimate_bloat(size, reltuples, key_width)
+            if not valid:
+                health = 'invalid'
+            elif bloat >= BLOAT_RATIO_THRESHOLD and size >= BLOAT_MIN_SIZE_BYTES:
+                health = 'bloated'
+            elif not scans:
+                health = 'unused'
+            else:
+                health = 'ok'
+            index.write({
+                'health': health,
+                'idx_scan': scans,
+                'idx_tup_read': tuples_read,
+                'size_bytes': size,
+                'size_display': size_pretty,
+                'bloat_ratio': bloat,
+                'health_checked_date': now,
+            })
+        return True
+
+    def _estimate_bloat(self, size, reltuples, key_width):
+        """
+        Rough btree bloat estimate without pgstattuple.
+
+        Expected size = rows x (key width + 16 bytes tuple overhead) / 90% fillfactor.
+        Returns the fraction of the index that is estimated to be dead space.
+        """
+        self.ensure_one()
+        if self.method != 'btree' or not size or not key_width or reltuples <= 0:
+            return 0.0
+        expected = reltuples * (float(key_width) + 16) / 0.9
+        return max(0.0, 1.0 - expected / size)
+
+    @api.model
+    def get_health_report(self):
+        """Return the health snapshot as a list of dicts (for logs, scripts and RPC)."""
+        indexes = self.sudo().search([])
+        indexes.action_refresh_health()
+        return [{
+            'name': index.name,
+            'table': index.table_name,
+            'state': index.state,
+            'health': index.health,
+            'idx_scan': int(index.idx_scan),
+            'size': index.size_display,
+            'bloat_ratio': index.bloat_ratio,
+        } for index in indexes]
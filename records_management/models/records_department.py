@@ -134,6 +134,27 @@ class RecordsDepartment(models.Model):
         for record in self:
             record.child_count = len(record.child_department_ids)
 
+    # ============================================================================
+    # ORM METHODS
+    # ============================================================================
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['records.portal.access']._invalidate_snapshots()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        # The department scope snapshots depend on the tree and its owners
+        if {'parent_department_id', 'partner_id', 'active'} & vals.keys():
+            self.env['records.portal.access']._invalidate_snapshots()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['records.portal.access']._invalidate_snapshots()
+        return res
+
     # ============================================================================
     # ACTION METHODS
     # ============================================================================
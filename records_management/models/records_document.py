@@ -552,6 +552,23 @@ class RecordsDocument(models.Model):
     # ============================================================================
     # ORM OVERRIDES
     # ============================================================================
+    def init(self):
+        """Maintain the per-partner inventory counters (see records.inventory.counter)
+        and the container document counts (see records.container.counter)."""
+        self.env['records.inventory.counter']._setup_counter_trigger(self._name)
+        self.env['records.container.counter']._setup_container_counter_trigger(self._name)
+
+    def _write(self, vals):
+        # Container counters are updated by triggers when the row is written
+        # (including recomputes of the stored related container_id)
+        Counter = self.env['records.container.counter']
+        counted = 'container_id' in vals or 'active' in vals
+        containers = Counter._get_stored_containers(self) if counted else None
+        res = super()._write(vals)
+        if counted:
+            Counter._invalidate_container_counts(containers | self.container_id)
+        return res
+
     @api.model_create_multi
     def create(self, vals_list):
         """
@@ -588,15 +605,13 @@ class RecordsDocument(models.Model):
                     if user_partner:
                         vals['partner_id'] = user_partner.commercial_partner_id.id
 
-            # Assign TF* temp barcode if absent and no physical barcode present
-            if not vals.get('temp_barcode') and not vals.get('barcode'):
-                seq = self.env['ir.sequence'].next_by_code('records.document.temp.barcode')
-                if not seq:
-                    # Fallback pattern if sequence misconfigured
-                    today = fields.Date.context_today(self)
-                    seq = "TF%s%05d" % (today.strftime('%Y%m%d'), self.env['ir.sequence'].next_by_code('records.document') or 0)
-                vals['temp_barcode'] = seq
+        # Assign TF* temp barcodes (one allocation for the batch) if absent and no physical barcode present
+        vals_without_barcode = [vals for vals in vals_list if not vals.get('temp_barcode') and not vals.get('barcode')]
+        temp_barcodes = self.env['records.barcode.allocator'].allocate('document', len(vals_without_barcode))
+        for vals, temp_barcode in zip(vals_without_barcode, temp_barcodes):
+            vals['temp_barcode'] = temp_barcode
         docs = super().create(vals_list)
+        self.env['records.container.counter']._invalidate_container_counts(docs.container_id)
         for doc in docs:
             doc.message_post(body=_('Document "%s" created') % doc.name)
             # Auto-generate attachment tracking number if file is attached
@@ -675,7 +690,11 @@ class RecordsDocument(models.Model):
             container_state = doc.file_id.container_id.state if doc.file_id and doc.file_id.container_id else False
             if container_state == 'destroyed':
                 raise UserError(_("Cannot delete a document from a destroyed container."))
-        return super().unlink()
+        # Pending moves are flushed by unlink: count both the cached and the stored container
+        containers = self.container_id | self.env['records.container.counter']._get_stored_containers(self)
+        res = super().unlink()
+        self.env['records.container.counter']._invalidate_container_counts(containers)
+        return res
 
     # ============================================================================
     # COMPUTE & ONCHANGE METHODS
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+Background Export Jobs
+
+Large portal and advanced search exports run outside the HTTP request:
+
+1. the request enqueues a job (or reuses an identical one requested less than
+   ``records_management.export.job_ttl`` seconds ago),
+2. the export cron snapshots the matching ids, then renders them chunk by
+   chunk with ``records.export.engine``; every chunk is stored as a JSON-lines
+   part attachment and committed, so an interrupted job resumes from its last
+   checkpoint instead of starting over,
+3. once every row is rendered, the parts are assembled into the CSV/XLSX file,
+   stored as an ``ir.attachment`` on the job, and the portal progress page
+   offers the download.
+"""
+
+import hashlib
+import json
+import logging
+import tempfile
+import time
+import traceback
+from datetime import date, datetime, timedelta
+
+from odoo import api, fields, models
+
+from .records_export_engine import CSV_MIMETYPE, EXPORT_CHUNK_SIZE, XLSX_MIMETYPE
+
+_logger = logging.getLogger(__name__)
+
+# Seconds of work per cron run before handing over (the cron is re-triggered)
+JOB_TIME_BUDGET = 120
+
+# Days finished jobs and their files are kept
+JOB_RETENTION_DAYS = 7
+
+
+class RecordsExportJob(models.Model):
+    _name = 'records.export.job'
+    _description = 'Background Export Job'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Export', required=True)
+    user_id = fields.Many2one(
+        comodel_name='res.users',
+        string='Requested By',
+        required=True,
+        default=lambda self: self.env.user,
+        ondelete='cascade',
+        index=True,
+    )
+    request_key = fields.Char(
+        string='Request Key',
+        index=True,
+        readonly=True,
+        help="Hash of user, format and sections: identical requests within the TTL reuse this job",
+    )
+    file_format = fields.Selection(
+        selection=[('csv', 'CSV'), ('xlsx', 'Excel')],
+        string='Format',
+        required=True,
+        default='xlsx',
+    )
+    sections = fields.Json(
+        string='Sections',
+        required=True,
+        help="[{'kind': export definition, 'model': model, 'domain': domain, 'order': order}]",
+    )
+    use_sudo = fields.Boolean(
+        string='Bypass Record Rules',
+        help="Read the records as superuser (the domains already restrict them to the customer)",
+    )
+    state = fields.Selection(
+        selection=[
+            ('queued', 'Queued'),
+            ('running', 'Running'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        string='Status',
+        default='queued',
+        required=True,
+        index=True,
+    )
+    res_ids = fields.Json(string='Record IDs', help="Ids of each section, snapshotted when the job starts")
+    total_count = fields.Integer(string='Rows')
+    processed_count = fields.Integer(string='Rows Processed', help="Checkpoint: rows already stored in parts")
+    part_count = fields.Integer(string='Parts')
+    progress = fields.Float(string='Progress (%)', compute='_compute_progress')
+    attachment_id = fields.Many2one(comodel_name='ir.attachment', string='File', ondelete='set null')
+    filename = fields.Char(string='File Name')
+    error_message = fields.Text(string='Error')
+    date_started = fields.Datetime(string='Started')
+    date_done = fields.Datetime(string='Finished')
+
+    @api.depends('state', 'total_count', 'processed_count')
+    def _compute_progress(self):
+        for job in self:
+            if job.state == 'done':
+                job.progress = 100.0
+            elif job.total_count:
+                # Keep the last percent for assembling the file
+                job.progress = min(99.0, 100.0 * job.processed_count / job.total_count)
+            else:
+                job.progress = 0.0
+
+    # ============================================================================
+    # ENQUEUE
+    # ============================================================================
+    @api.model
+    def _get_ttl(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param('records_management.export.job_ttl', 900))
+
+    @api.model
+    def _to_json_value(self, value):
+        """Domain value storable in fields.Json (plain json.dumps): dates as strings"""
+        if isinstance(value, datetime):
+            return fields.Datetime.to_string(value)
+        if isinstance(value, date):
+            return fields.Date.to_string(value)
+        if isinstance(value, (list, tuple)):
+            return [self._to_json_value(item) for item in value]
+        return value
+
+    @api.model
+    def _to_json_sections(self, sections):
+        return [
+            dict(section, domain=[
+                [term[0], term[1], self._to_json_value(term[2])] if isinstance(term, (list, tuple)) else term
+                for term in section.get('domain') or []
+            ])
+            for section in sections
+        ]
+
+    @api.model
+    def _make_request_key(self, file_format, sections, use_sudo):
+        payload = json.dumps([self.env.uid, file_format, sections, bool(use_sudo)], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    @api.model
+    def enqueue(self, name, file_format, sections, use_sudo=False):
+        """
+        Queue an export for the current user, or return the identical job
+        requested within the TTL (still running, or done and not expired).
+
+        Args:
+            name (str): label shown on the progress page
+            file_format (str): 'csv' or 'xlsx'
+            sections (list): [{'kind', 'model', 'domain', 'order'}] rendered in order
+            use_sudo (bool): read the records as superuser
+
+        Returns:
+            records.export.job
+        """
+        sections = self._to_json_sections(sections)
+        key = self._make_request_key(file_format, sections, use_sudo)
+        Job = self.sudo()
+        reusable_since = fields.Datetime.now() - timedelta(seconds=self._get_ttl())
+        job = Job.search([
+            ('request_key', '=', key),
+            ('user_id', '=', self.env.uid),
+            '|',
+            ('state', 'in', ('queued', 'running')),
+            '&', ('state', '=', 'done'), ('date_done', '>=', reusable_since),
+        ], limit=1)
+        if job:
+            return job
+        job = Job.create({
+            'name': name,
+            'user_id': self.env.uid,
+            'request_key': key,
+            'file_format': file_format,
+            'sections': sections,
+            'use_sudo': use_sudo,
+        })
+        cron = self.env.ref('records_management.ir_cron_process_export_jobs', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return job
+
+    # ============================================================================
+    # PROCESSING
+    # ============================================================================
+    def _get_job_env(self):
+        """Environment the records are read in: the requesting user's"""
+        self.ensure_one()
+        job_env = self.env(user=self.user_id.id, su=False)
+        return job_env(su=True) if self.use_sudo else job_env
+
+    def _snapshot(self):
+        """Search every section once; later chunks read these ids"""
+        self.ensure_one()
+        job_env = self._get_job_env()
+        res_ids = [
+            job_env[section['model']].search(section.get('domain') or [], order=section.get('order')).ids
+            for section in self.sections
+        ]
+        self.write({
+            'res_ids': res_ids,
+            'total_count': sum(len(ids) for ids in res_ids),
+            'processed_count': 0,
+            'part_count': 0,
+            'state': 'running',
+            'date_started': fields.Datetime.now(),
+        })
+
+    def _locate(self, offset):
+        """(section index, offset within the section) of a global row offset"""
+        for index, ids in enumerate(self.res_ids):
+            if offset < len(ids):
+                return index, offset
+            offset -= len(ids)
+        return len(self.res_ids), 0
+
+    def _process_chunk(self):
+        """Render the next chunk into a part attachment and advance the checkpoint"""
+        self.ensure_one()
+        index, offset = self._locate(self.processed_count)
+        ids = self.res_ids[index][offset:offset + EXPORT_CHUNK_SIZE]
+        engine = self._get_job_env()['records.export.engine']
+        rows = engine.iter_rows(self.sections[index]['kind'], ids, self.file_format)
+        data = ''.join(json.dumps(row, default=str) + '\n' for row in rows).encode()
+        self.env['ir.attachment'].sudo().create({
+            'name': 'part-%05d.jsonl' % self.part_count,
+            'res_model': self._name,
+            'res_id': self.id,
+            'raw': data,
+            'mimetype': 'application/jsonl',
+            'description': str(index),
+        })
+        self.write({
+            'processed_count': self.processed_count + len(ids),
+            'part_count': self.part_count + 1,
+        })
+
+    def _get_parts(self):
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('name', '=like', 'part-%'),
+        ], order='id')
+
+    def _iter_part_rows(self, parts):
+        for part in parts:
+            for line in part.raw.decode().splitlines():
+                yield json.loads(line)
+
+    def _finalize(self):
+        """Assemble the parts into the export file and attach it to the job"""
+        self.ensure_one()
+        engine = self._get_job_env()['records.export.engine']
+        parts = self._get_parts()
+        # Same layout as a direct export: empty sections are skipped, but the
+        # file keeps at least the first section's headers
+        section_parts = [
+            (section, parts.filtered(lambda part, index=index: part.description == str(index)))
+            for index, section in enumerate(self.sections)
+        ]
+        sections = []
+        for section, part_records in [item for item in section_parts if item[1]] or section_parts[:1]:
+            definition = engine._get_export_definition(section['kind'])
+            columns = [(header, width) for header, width, _getter in engine._get_columns(definition, self.file_format)]
+            sections.append((definition['sheet'], columns, self._iter_part_rows(part_records)))
+
+        with tempfile.TemporaryFile() as output:
+            if self.file_format == 'xlsx':
+                engine._write_xlsx(output, sections)
+                mimetype = XLSX_MIMETYPE
+            else:
+                for chunk in engine._write_csv(sections):
+                    output.write(chunk)
+                mimetype = CSV_MIMETYPE
+            output.seek(0)
+            filename = engine.get_filename(self.sections[0]['kind'], self.file_format)
+            attachment = self.env['ir.attachment'].sudo().create({
+                'name': filename,
+                'res_model': self._name,
+                'res_id': self.id,
+                'raw': output.read(),
+                'mimetype': mimetype,
+            })
+        parts.unlink()
+        self.write({
+            'attachment_id': attachment.id,
+            'filename': filename,
+            'state': 'done',
+            'date_done': fields.Datetime.now(),
+            'res_ids': False,
+        })
+
+    def _run(self, deadline):
+        """Process the job until done or past the deadline, committing each checkpoint"""
+        self.ensure_one()
+        if self.state == 'queued':
+            self._snapshot()
+            self.env.cr.commit()
+        while self.processed_count < self.total_count:
+            if time.monotonic() > deadline:
+                return False
+            self._process_chunk()
+            self.env.cr.commit()
+        self._finalize()
+        self.env.cr.commit()
+        return True
+
+    @api.model
+    def _cron_process_export_jobs(self):
+        """Run queued jobs within the time budget; re-trigger if work remains"""
+        deadline = time.monotonic() + JOB_TIME_BUDGET
+        for job in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            try:
+                if not job._run(deadline):
+                    break
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error("Export job %s failed: %s\n%s", job.id, e, traceback.format_exc())
+                job.write({'state': 'failed', 'error_message': str(e)})
+                job._get_parts().unlink()
+                self.env.cr.commit()
+        if self.search_count([('state', 'in', ('queued', 'running'))]):
+            self.env.ref('records_management.ir_cron_process_export_jobs')._trigger()
+
+    @api.model
+    def _cron_purge_export_jobs(self):
+        """Drop jobs (and their files) past the retention period"""
+        limit = fields.Datetime.now() - timedelta(days=JOB_RETENTION_DAYS)
+        jobs = self.search([('create_date', '<', limit), ('state', 'in', ('done', 'failed'))])
+        self.env['ir.attachment'].sudo().search([('res_model', '=', self._name), ('res_id', 'in', jobs.ids)]).unlink()
+        jobs.unlink()
+
+    # ============================================================================
+    # PORTAL
+    # ============================================================================
+    def get_status(self):
+        """Progress payload for the portal polling endpoint"""
+        self.ensure_one()
+        return {
+            'id': self.id,
+            'name': self.name,
+            'state': self.state,
+            'progress': round(self.progress, 1),
+            'processed': self.processed_count,
+            'total': self.total_count,
+            'error': self.error_message if self.state == 'failed' else False,
+            'download_url': '/my/export/job/%s/download' % self.id if self.state == 'done' else False,
+            'label': dict(self._fields['state']._description_selection(self.env)).get(self.state),
+        }
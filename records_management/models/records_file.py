@@ -29,6 +29,10 @@ class RecordsFile(models.Model):
     _inherit = ['mail.thread', 'mail.activity.mixin']
     _order = 'name'
     
+    _sql_constraints = [
+        ('temp_barcode_company_uniq', 'unique(temp_barcode, company_id)', 'The temporary barcode must be unique per company.'),
+    ]
+    
     # ============================================================================
     # CORE IDENTIFICATION (Customer-Defined)
     # ============================================================================
@@ -123,6 +127,8 @@ class RecordsFile(models.Model):
     # ============================================================================
     # CUSTOMER RELATIONSHIP
     # ============================================================================
+    company_id = fields.Many2one(comodel_name='res.company', string='Company', default=lambda self: self.env.company, required=True, readonly=True)
+
     partner_id = fields.Many2one(
         'res.partner',
         string="Customer",
@@ -273,6 +279,24 @@ class RecordsFile(models.Model):
              'Can be inherited from container/record series or set manually.'
     )
     
+    def init(self):
+        """Maintain the full-text search column, trigger and indexes (see records.search.engine),
+        the per-partner inventory counters (see records.inventory.counter)
+        and the container file counts (see records.container.counter)."""
+        self.env['records.search.engine']._setup_search_infrastructure(self._name)
+        self.env['records.inventory.counter']._setup_counter_trigger(self._name)
+        self.env['records.container.counter']._setup_container_counter_trigger(self._name)
+
+    def _write(self, vals):
+        # Container counters are updated by triggers when the row is written
+        Counter = self.env['records.container.counter']
+        counted = 'container_id' in vals or 'active' in vals
+        containers = Counter._get_stored_containers(self) if counted else None
+        res = super()._write(vals)
+        if counted:
+            Counter._invalidate_container_counts(containers | self.container_id)
+        return res
+
     # ============================================================================
     # COMPUTE METHODS
     # ============================================================================
@@ -436,31 +460,26 @@ class RecordsFile(models.Model):
         """
         Generate temporary barcode with container prefix.
         
-        Format: {CONTAINER_NUMBER}-FILE-{SEQUENCE}
-        Example: BOX-001-FILE-01, HR-1001-A-FILE-02
+        Format: {CONTAINER_NUMBER}-{FILE_SEQUENCE}
+        Example: BOX-001-FILE-0000042, HR-1001-A-FILE-0000043
         
-        The sequence number restarts at 1 for each container, based on
-        how many files already exist in that container.
+        The FILE-* part comes from the shared allocator (see
+        records.barcode.allocator), so it is unique even across containers,
+        deleted files and concurrent creations.
         
-        If no container, uses a global sequence: FILE-{GLOBAL_SEQUENCE}
+        If no container, the allocated number alone: FILE-{GLOBAL_SEQUENCE}
         """
         self.ensure_one()
-        
-        if self.container_id and self.container_id.name:
-            # Count existing files in this container (excluding current record if it exists)
-            domain = [('container_id', '=', self.container_id.id)]
-            if self.id:
-                domain.append(('id', '!=', self.id))
-            existing_count = self.search_count(domain)
-            # Next file number is count + 1
-            file_number = existing_count + 1
-            return f"{self.container_id.name}-FILE-{file_number:02d}"
-        else:
-            # No container - use global sequence
-            sequence = self.env['ir.sequence'].next_by_code('records.file.temp.barcode')
-            if not sequence:
-                sequence = str(self.id or 1)
-            return f"FILE-{sequence}"
+        return self._prepare_temp_barcodes([self.container_id.name])[0]
+
+    @api.model
+    def _prepare_temp_barcodes(self, container_names):
+        """One temporary barcode per container name (False: no container), allocated as one block"""
+        numbers = self.env['records.barcode.allocator'].allocate('file', len(container_names))
+        return [
+            f"{container_name}-{number}" if container_name else number
+            for container_name, number in zip(container_names, numbers)
+        ]
     
     # ============================================================================
     # LIFECYCLE METHODS
@@ -487,13 +506,26 @@ class RecordsFile(models.Model):
             if not vals.get('responsible_person_id'):
                 vals['responsible_person_id'] = self._get_customer_responsible_user(vals)
         
+        # Auto-generate temp_barcode if not provided (one allocation for the batch)
+        vals_without_barcode = [vals for vals in vals_list if not vals.get('temp_barcode') and not vals.get('barcode')]
+        if vals_without_barcode:
+            default_container_id = self.env.context.get('default_container_id')
+            container_names = {
+                container.id: container.name
+                for container in self.env['records.container'].browse(
+                    {vals.get('container_id', default_container_id) for vals in vals_without_barcode} - {False, None}
+                )
+            }
+            temp_barcodes = self._prepare_temp_barcodes(
+                [container_names.get(vals.get('container_id', default_container_id)) for vals in vals_without_barcode]
+            )
+            for vals, temp_barcode in zip(vals_without_barcode, temp_barcodes):
+                vals['temp_barcode'] = temp_barcode
+        
         files = super().create(vals_list)
+        self.env['records.container.counter']._invalidate_container_counts(files.container_id)
         
         for file in files:
-            # Auto-generate temp_barcode if not provided
-            if not file.temp_barcode and not file.barcode:
-                file.temp_barcode = file._generate_temp_barcode()
-            
             # Auto-add customer's portal users as followers
             file._add_customer_followers()
             
@@ -546,29 +578,31 @@ class RecordsFile(models.Model):
             for file in self:
                 file._create_or_update_stock_package()
         
-        for file in self:
-            # Track important field changes
-            important_fields = ['name', 'barcode', 'container_id', 'state', 'location_id']
-            changed_fields = [field for field in important_fields if field in vals]
+        # Track important field changes: one audit entry per file, created in one batch
+        important_fields = ['name', 'barcode', 'container_id', 'state', 'location_id']
+        changed_fields = [field for field in important_fields if field in vals]
+        
+        if changed_fields:
+            change_parts = []
+            if 'name' in vals:
+                change_parts.append(_('Name changed'))
+            if 'barcode' in vals:
+                change_parts.append(_('Barcode: %s') % (vals['barcode'] or 'Removed'))
+            if 'container_id' in vals:
+                container = self.env['records.container'].browse(vals['container_id']) if vals['container_id'] else None
+                change_parts.append(_('Container: %s') % (container.name if container else 'Removed'))
+            if 'state' in vals:
+                change_parts.append(_('State: %s') % vals['state'])
             
-            if changed_fields:
-                description_parts = [_('File updated: %s') % file.name]
-                if 'name' in vals:
-                    description_parts.append(_('Name changed'))
-                if 'barcode' in vals:
-                    description_parts.append(_('Barcode: %s') % (vals['barcode'] or 'Removed'))
-                if 'container_id' in vals:
-                    container = self.env['records.container'].browse(vals['container_id']) if vals['container_id'] else None
-                    description_parts.append(_('Container: %s') % (container.name if container else 'Removed'))
-                if 'state' in vals:
-                    description_parts.append(_('State: %s') % vals['state'])
-                
-                self.env['naid.audit.log'].sudo().create({
+            self.env['naid.audit.log'].sudo().create([
+                {
                     'name': _('File Updated: %s') % file.name,
                     'action_type': 'file_updated',
-                    'description': ', '.join(description_parts),
+                    'description': ', '.join([_('File updated: %s') % file.name] + change_parts),
                     'user_id': self.env.user.id,
-                })
+                }
+                for file in self
+            ])
         
         return result
     
@@ -586,7 +620,11 @@ class RecordsFile(models.Model):
                 'user_id': self.env.user.id,
             })
         
-        return super().unlink()
+        # Pending moves are flushed by unlink: count both the cached and the stored container
+        containers = self.container_id | self.env['records.container.counter']._get_stored_containers(self)
+        res = super().unlink()
+        self.env['records.container.counter']._invalidate_container_counts(containers)
+        return res
     
     def _get_or_create_draft_staging_location(self, partner):
         """
@@ -688,7 +726,7 @@ class RecordsFile(models.Model):
         # Create new package
         package_vals = {
             'name': barcode,
-            'company_id': self.company_id.id if hasattr(self, 'company_id') and self.company_id else self.env.company.id,
+            'company_id': self.company_id.id,
         }
         
         package = self.env['stock.quant.package'].create(package_vals)
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Inventory Counters
+
+Per-partner, per-department, per-state totals of containers, file folders,
+documents, portal requests and destruction certificates, so portal badges
+and dashboard cards are one indexed read instead of a search_count each.
+
+Counters are maintained by AFTER INSERT/UPDATE/DELETE triggers on the counted
+tables, in the same transaction as the change (they also follow stored
+computed fields such as records.file.partner_id, which never go through
+write()). Triggers append signed delta rows instead of updating a shared row:
+under REPEATABLE READ, concurrent updates of one hot counter row would fail
+with serialization errors, while inserts never conflict. A cron compacts the
+deltas, and a nightly reconciliation recounts the source tables and repairs
+any drift (e.g. rows changed by raw SQL with triggers disabled).
+
+Only active records are counted, like the portal searches (active_test).
+"""
+
+import logging
+
+from odoo import api, models
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+COUNTER_TABLE = 'records_inventory_counter'
+
+# Models kept in the counters
+COUNTED_MODELS = (
+    'records.container',
+    'records.file',
+    'records.document',
+    'portal.request',
+    'destruction.certificate',
+)
+
+
+class RecordsInventoryCounter(models.AbstractModel):
+    _name = 'records.inventory.counter'
+    _description = 'Inventory Counters'
+
+    def init(self):
+        self._ensure_counter_table()
+
+    @api.model
+    def _ensure_counter_table(self):
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS %s (
+                id bigserial PRIMARY KEY,
+                res_model varchar NOT NULL,
+                partner_id integer NOT NULL,
+                department_id integer NOT NULL DEFAULT 0,
+                state varchar NOT NULL DEFAULT '',
+                count integer NOT NULL
+            )
+        """ % COUNTER_TABLE)
+        self.env.cr.execute(
+            "CREATE INDEX IF NOT EXISTS %s_lookup_idx ON %s (res_model, partner_id)" % (COUNTER_TABLE, COUNTER_TABLE)
+        )
+
+    # ============================================================================
+    # TRIGGERS (installed from the counted models' init())
+    # ============================================================================
+    @api.model
+    def _counter_columns(self, model_name):
+        """(state column or None, active column or None) of a counted model"""
+        fields_map = self.env[model_name]._fields
+        state = 'state' if 'state' in fields_map and fields_map['state'].store else None
+        active = 'active' if 'active' in fields_map and fields_map['active'].store else None
+        return state, active
+
+    @api.model
+    def _setup_counter_trigger(self, model_name):
+        """Install the counter triggers of a model and reconcile its counters."""
+        self._ensure_counter_table()
+        Model = self.env[model_name]
+        table = Model._table
+        state, active = self._counter_columns(model_name)
+
+        def row(alias):
+            return {
+                'state': "coalesce(%s.%s::varchar, '')" % (alias, state) if state else "''",
+                'visible': "%s.partner_id IS NOT NULL%s" % (
+                    alias, " AND coalesce(%s.%s, false)" % (alias, active) if active else ""
+                ),
+            }
+
+        old, new = row('OLD'), row('NEW')
+        self.env.cr.execute("""
+            CREATE OR REPLACE FUNCTION %(table)s_inventory_counter() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' AND %(old_visible)s THEN
+                    INSERT INTO %(counter)s (res_model, partner_id, department_id, state, count)
+                    VALUES ('%(model)s', OLD.partner_id, coalesce(OLD.department_id, 0), %(old_state)s, -1);
+                END IF;
+                IF TG_OP <> 'DELETE' AND %(new_visible)s THEN
+                    INSERT INTO %(counter)s (res_model, partner_id, department_id, state, count)
+                    VALUES ('%(model)s', NEW.partner_id, coalesce(NEW.department_id, 0), %(new_state)s, 1);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """ % {
+            'table': table,
+            'counter': COUNTER_TABLE,
+            'model': model_name,
+            'old_visible': old['visible'],
+            'new_visible': new['visible'],
+            'old_state': old['state'],
+            'new_state': new['state'],
+        })
+
+        columns = ['partner_id', 'department_id'] + [column for column in (state, active) if column]
+        self.env.cr.execute("""
+            DROP TRIGGER IF EXISTS %(table)s_inventory_counter_trg ON %(table)s;
+            CREATE TRIGGER %(table)s_inventory_counter_trg
+                AFTER INSERT OR DELETE ON %(table)s
+                FOR EACH ROW EXECUTE FUNCTION %(table)s_inventory_counter();
+            DROP TRIGGER IF EXISTS %(table)s_inventory_counter_upd_trg ON %(table)s;
+            CREATE TRIGGER %(table)s_inventory_counter_upd_trg
+                AFTER UPDATE OF %(columns)s ON %(table)s
+                FOR EACH ROW
+                WHEN (%(changed)s)
+                EXECUTE FUNCTION %(table)s_inventory_counter();
+        """ % {
+            'table': table,
+            'columns': ', '.join(columns),
+            'changed': ' OR '.join('OLD.%s IS DISTINCT FROM NEW.%s' % (column, column) for column in columns),
+        })
+        self._reconcile_model(model_name)
+
+    # ============================================================================
+    # READS
+    # ============================================================================
+    @api.model
+    def get_counts(self, partner_ids, res_models=None, department_ids=None):
+        """
+        Counter totals for a set of partners.
+
+        Args:
+            partner_ids (list): partners owning the records (partner_id)
+            res_models (list): counted models (default: all)
+            department_ids (list): restrict to these departments; records
+                without a department are then excluded, like a
+                ('department_id', 'in', ids) domain
+
+        Returns:
+            dict: {res_model: {state: count}} ('' is the state of models
+                without one); every requested model is present
+        """
+        res_models = list(res_models or COUNTED_MODELS)
+        counts = {model_name: {} for model_name in res_models}
+        if not partner_ids:
+            return counts
+        department_filter = SQL("")
+        if department_ids is not None:
+            department_filter = SQL("AND department_id = ANY(%s)", list(department_ids))
+        rows = self.env.execute_query(SQL("""
+            SELECT res_model, state, SUM(count)
+              FROM records_inventory_counter
+             WHERE res_model = ANY(%s)
+               AND partner_id = ANY(%s)
+               %s
+             GROUP BY res_model, state
+        """, res_models, list(partner_ids), department_filter))
+        for model_name, state, count in rows:
+            if count:
+                counts[model_name][state] = int(count)
+        return counts
+
+    @api.model
+    def get_total(self, state_counts, states=None, exclude_states=()):
+        """Sum of a {state: count} dict, optionally limited to / excluding states"""
+        return sum(
+            count for state, count in state_counts.items()
+            if (states is None or state in states) and state not in exclude_states
+        )
+
+    # ============================================================================
+    # MAINTENANCE
+    # ============================================================================
+    @api.model
+    def _compact(self):
+        """Fold delta rows into one row per (model, partner, department, state)."""
+        self.env.cr.execute("""
+            WITH moved AS (
+                DELETE FROM records_inventory_counter
+                RETURNING res_model, partner_id, department_id, state, count
+            )
+            INSERT INTO records_inventory_counter (res_model, partner_id, department_id, state, count)
+            SELECT res_model, partner_id, department_id, state, SUM(count)
+              FROM moved
+             GROUP BY res_model, partner_id, department_id, state
+            HAVING SUM(count) <> 0
+        """)
+
+    @api.model
+    def _reconcile_model(self, model_name):
+        """
+        Recount a model from its table and replace its counters if they drifted.
+
+        Runs on one snapshot: deltas committed after it stay in the table and
+        apply on top of the recount, so concurrent writes are never lost.
+
+        Returns:
+            int: number of (partner, department, state) totals that were wrong
+        """
+        Model = self.env[model_name]
+        state, active = self._counter_columns(model_name)
+        truth = SQL(
+            """
+            SELECT partner_id, coalesce(department_id, 0) AS department_id, %s AS state, COUNT(*) AS count
+              FROM %s
+             WHERE partner_id IS NOT NULL %s
+             GROUP BY 1, 2, 3
+            """,
+            SQL("coalesce(%s::varchar, '')", SQL.identifier(state)) if state else SQL("''"),
+            SQL.identifier(Model._table),
+            SQL("AND coalesce(%s, false)", SQL.identifier(active)) if active else SQL(""),
+        )
+        [[drift]] = self.env.execute_query(SQL("""
+            WITH truth AS (%s),
+            current AS (
+                SELECT partner_id, department_id, state, SUM(count) AS count
+                  FROM records_inventory_counter
+                 WHERE res_model = %s
+                 GROUP BY 1, 2, 3
+            )
+            SELECT COUNT(*)
+              FROM truth
+              FULL JOIN current USING (partner_id, department_id, state)
+             WHERE coalesce(truth.count, 0) <> coalesce(current.count, 0)
+        """, truth, model_name))
+        if drift:
+            _logger.warning("Inventory counters: %s had %d drifted totals, recounted", model_name, drift)
+            self.env.execute_query(SQL("DELETE FROM records_inventory_counter WHERE res_model = %s", model_name))
+            self.env.execute_query(SQL("""
+                INSERT INTO records_inventory_counter (res_model, partner_id, department_id, state, count)
+                SELECT %s, partner_id, department_id, state, count FROM (%s) AS truth
+            """, model_name, truth))
+        return drift
+
+    @api.model
+    def _cron_compact_counters(self):
+        self._compact()
+
+    @api.model
+    def _cron_reconcile_counters(self):
+        """Nightly safety net: recount every counted model"""
+        self._compact()
+        for model_name in COUNTED_MODELS:
+            if model_name in self.env:
+                self._reconcile_model(model_name)
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Unified Inventory Search
+
+One round trip for the portal advanced inventory search: containers, file
+folders and documents are matched by a single UNION ALL statement that also
+returns the merged ranking and the facet counts (type, state, location,
+department) through GROUPING SETS. PDF scan counts for the returned documents
+come from one grouped ``ir.attachment`` query instead of one count per row.
+"""
+
+from datetime import datetime
+
+from odoo import api, models
+from odoo.tools import SQL
+
+
+class RecordsInventorySearch(models.AbstractModel):
+    _name = 'records.inventory.search'
+    _description = 'Unified Inventory Search'
+
+    # search type -> model and the columns used for ranking and facets
+    _SOURCES = {
+        'container': {
+            'model': 'records.container',
+            'barcodes': ('barcode', 'temp_barcode'),
+            'state': 'state',
+            'location': 'current_location_id',
+        },
+        'file': {
+            'model': 'records.file',
+            'barcodes': ('barcode', 'temp_barcode'),
+            'state': 'state',
+            'location': 'current_location_id',
+        },
+        'document': {
+            'model': 'records.document',
+            'barcodes': ('barcode', 'temp_barcode'),
+            'state': None,  # documents follow their folder's state
+            'location': 'location_id',
+        },
+    }
+
+    @api.model
+    def build_domains(self, partner, filters):
+        """
+        Domains per search type for the portal advanced search filters.
+
+        Filters supported:
+        - barcode: Search by barcode
+        - location_id / location: Filter by warehouse location
+        - date_from/date_to: Date range filter
+        - state: Container / file folder state
+        - retention_status: Active, eligible for destruction, etc.
+        - document_type_id / document_type: Document type classification
+
+        Returns:
+            dict: {'container' | 'file' | 'document': domain}
+        """
+        base_domain = [('partner_id', '=', partner.id)]
+
+        domains = {
+            'container': list(base_domain),
+            'file': list(base_domain),
+            'document': list(base_domain),
+        }
+
+        # Barcode search (across all types)
+        if filters.get('barcode'):
+            barcode = filters['barcode']
+            domains['container'].append('|')
+            domains['container'].append(('barcode', 'ilike', barcode))
+            domains['container'].append(('temp_barcode', 'ilike', barcode))
+
+            domains['file'].append(('barcode', 'ilike', barcode))
+
+            domains['document'].append(('temp_barcode', 'ilike', barcode))
+
+        # Location filter
+        if filters.get('location_id') or filters.get('location'):
+            location_id = int(filters.get('location_id') or filters['location'])
+            domains['container'].append(('current_location_id', '=', location_id))
+            domains['file'].append(('container_id.current_location_id', '=', location_id))
+            domains['document'].append(('container_id.current_location_id', '=', location_id))
+
+        # Date range filter
+        if filters.get('date_from'):
+            date_from = datetime.strptime(filters['date_from'], '%Y-%m-%d')
+            for domain in domains.values():
+                domain.append(('create_date', '>=', date_from))
+
+        if filters.get('date_to'):
+            date_to = datetime.strptime(filters['date_to'], '%Y-%m-%d')
+            for domain in domains.values():
+                domain.append(('create_date', '<=', date_to))
+
+        # State filter (documents have no state of their own - they follow their folder)
+        if filters.get('state'):
+            state = filters['state']
+            domains['container'].append(('state', '=', state))
+            domains['file'].append(('state', '=', state))
+
+        # Document type filter (documents only)
+        if filters.get('document_type_id') or filters.get('document_type'):
+            document_type_id = int(filters.get('document_type_id') or filters['document_type'])
+            domains['document'].append(('document_type_id', '=', document_type_id))
+
+        # Retention status filter
+        if filters.get('retention_status'):
+            status = filters['retention_status']
+            if status in ('eligible_destruction', 'eligible'):
+                # Documents eligible for destruction based on retention policy
+                today = datetime.today().date()
+                domains['document'].append(('destruction_eligible_date', '<=', today))
+            elif status in ('active_retention', 'active'):
+                today = datetime.today().date()
+                domains['document'].append(('destruction_eligible_date', '>', today))
+
+        return domains
+
+    @api.model
+    def get_search_domains(self, partner, filters):
+        """
+        build_domains limited to the requested type.
+
+        The type comes from 'record_type' (portal form) or 'search_type' (API).
+        """
+        search_type = filters.get('search_type') or filters.get('record_type') or False
+        if search_type == 'file_folder':
+            search_type = 'file'
+        return {
+            key: domain for key, domain in self.build_domains(partner, filters).items()
+            if search_type in (False, 'all', key)
+        }
+
+    @api.model
+    def _source_select(self, search_type, domain, barcode):
+        """SELECT for one source: type, id, rank, create_date and facet columns."""
+        source = self._SOURCES[search_type]
+        query = self.env[source['model']]._search(domain)
+        alias = query.table
+
+        def column(name):
+            return SQL.identifier(alias, name)
+
+        rank = SQL("0")
+        if barcode:
+            prefix = barcode.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            exact = SQL(" OR ").join(
+                SQL("lower(%s) = lower(%s)", column(field), barcode) for field in source['barcodes']
+            )
+            starts = SQL(" OR ").join(
+                SQL("%s ILIKE %s", column(field), prefix) for field in source['barcodes']
+            )
+            rank = SQL("CASE WHEN %s THEN 2 WHEN %s THEN 1 ELSE 0 END", exact, starts)
+
+        state = SQL("%s::varchar", column(source['state'])) if source['state'] else SQL("NULL::varchar")
+        return query.select(SQL(
+            "%s::varchar AS type, %s AS id, %s AS rank, %s AS create_date,"
+            " %s AS state, %s AS location_id, %s AS department_id",
+            search_type, column('id'), rank, column('create_date'),
+            state, column(source['location']), column('department_id'),
+        ))
+
+    @api.model
+    def search_inventory(self, domains, barcode=None, limit_per_type=100):
+        """
+        Search every requested inventory type in one statement.
+
+        Args:
+            domains (dict): {'container' | 'file' | 'document': domain}; only
+                the types present are searched
+            barcode (str): optional barcode typed by the user, used for ranking
+            limit_per_type (int): maximum rows returned per type
+
+        Returns:
+            dict: items (merged ranking), containers / files / documents
+                recordsets, pdf_scans {document id: count}, facets, totals
+        """
+        selects = [
+            self._source_select(search_type, domain, barcode)
+            for search_type, domain in domains.items()
+            if search_type in self._SOURCES
+        ]
+        result = {
+            'items': [],
+            'containers': self.env['records.container'],
+            'files': self.env['records.file'],
+            'documents': self.env['records.document'],
+            'pdf_scans': {},
+            'facets': {'type': {}, 'state': {}, 'location': [], 'department': []},
+            'total': 0,
+        }
+        if not selects:
+            return result
+
+        rows = self.env.execute_query(SQL("""
+            WITH matches AS (%s),
+            ranked AS (
+                SELECT m.*,
+                       row_number() OVER (PARTITION BY type ORDER BY rank DESC, create_date DESC, id DESC) AS type_pos,
+                       row_number() OVER (ORDER BY rank DESC, create_date DESC, type, id DESC) AS merged_pos
+                  FROM matches m
+            )
+            SELECT 'row', type, id, merged_pos, rank, NULL::varchar, NULL::integer, NULL::integer, NULL::bigint, NULL::integer
+              FROM ranked
+             WHERE type_pos <= %s
+            UNION ALL
+            SELECT 'facet', type, NULL, NULL, NULL, state, location_id, department_id, COUNT(*),
+                   GROUPING(type, state, location_id, department_id)
+              FROM matches
+             GROUP BY GROUPING SETS ((type), (type, state), (location_id), (department_id))
+        """, SQL(" UNION ALL ").join(selects), limit_per_type))
+
+        page_rows = sorted((row for row in rows if row[0] == 'row'), key=lambda row: row[3])
+        facet_rows = [row for row in rows if row[0] == 'facet']
+
+        # Merged ranking across types
+        ids_by_type = {'container': [], 'file': [], 'document': []}
+        for _kind, search_type, record_id, _pos, rank, *_rest in page_rows:
+            ids_by_type[search_type].append(record_id)
+        records = {
+            search_type: self.env[self._SOURCES[search_type]['model']].browse(ids)
+            for search_type, ids in ids_by_type.items()
+        }
+        result['containers'] = records['container']
+        result['files'] = records['file']
+        result['documents'] = records['document']
+        result['items'] = [
+            {'type': search_type, 'record': self.env[self._SOURCES[search_type]['model']].browse(record_id), 'rank': rank}
+            for _kind, search_type, record_id, _pos, rank, *_rest in page_rows
+        ]
+
+        # Facets - GROUPING() bitmask tells which grouping set a row belongs to
+        # (bits: type=8, state=4, location=2, department=1; a set bit = aggregated)
+        location_counts, department_counts = {}, {}
+        for row in facet_rows:
+            _kind, search_type, _id, _pos, _rank, state, location_id, department_id, count, grouping = row
+            if grouping == 0b0111:
+                result['facets']['type'][search_type] = count
+                result['total'] += count
+            elif grouping == 0b0011 and state:
+                result['facets']['state'].setdefault(search_type, {})[state] = count
+            elif grouping == 0b1101 and location_id:
+                location_counts[location_id] = count
+            elif grouping == 0b1110 and department_id:
+                department_counts[department_id] = count
+        result['facets']['location'] = self._named_facet('stock.location', location_counts)
+        result['facets']['department'] = self._named_facet('records.department', department_counts)
+
+        result['pdf_scans'] = self._count_pdf_scans(result['documents'])
+        return result
+
+    @api.model
+    def _named_facet(self, model_name, counts):
+        """[(id, display name, count)] sorted by count, names fetched in one batch."""
+        records = self.env[model_name].sudo().browse(list(counts))
+        return sorted(
+            ((record.id, record.display_name, counts[record.id]) for record in records),
+            key=lambda facet: (-facet[2], facet[1] or ''),
+        )
+
+    @api.model
+    def _count_pdf_scans(self, documents):
+        """{document id: number of PDF attachments} with one grouped query."""
+        if not documents:
+            return {}
+        groups = self.env['ir.attachment'].sudo()._read_group(
+            [
+                ('res_model', '=', 'records.document'),
+                ('res_id', 'in', documents.ids),
+                ('mimetype', 'like', 'pdf'),
+            ],
+            groupby=['res_id'],
+            aggregates=['__count'],
+        )
+        return dict(groups)
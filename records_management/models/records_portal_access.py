@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Portal Access Snapshot
+
+Every portal page needs the user's role, the permission matrix derived from
+it and the departments the user may see. Rebuilding them per request costs a
+series of has_group checks and department searches; instead they are computed
+once per user and kept in the registry's ``groups`` ormcache, shared by every
+request of the worker.
+
+The ``groups`` cache is already cleared by Odoo whenever group memberships
+change; department assignments, the department tree and the users' company
+(res.partner parent_id) clear it through
+``_invalidate_snapshots`` (the clear is signalled to the other workers through
+the registry sequences).
+"""
+
+import copy
+
+from odoo import api, models, tools
+
+# Role flags and the group granting each, in precedence order
+ROLE_GROUPS = (
+    ('is_system_admin', 'base.group_system'),
+    ('is_records_manager', 'records_management.group_records_manager'),
+    ('is_records_user', 'records_management.group_records_user'),
+    ('is_portal_company_admin', 'records_management.group_portal_company_admin'),
+    ('is_portal_dept_admin', 'records_management.group_portal_department_admin'),
+    ('is_portal_dept_user', 'records_management.group_portal_department_user'),
+    ('is_portal_readonly', 'records_management.group_portal_readonly_employee'),
+    ('is_department_restricted', 'records_management.group_department_restricted'),
+)
+
+ROLE_LABELS = (
+    ('is_system_admin', 'System Administrator'),
+    ('is_records_manager', 'Records Manager'),
+    ('is_records_user', 'Records User'),
+    ('is_portal_company_admin', 'Company Administrator'),
+    ('is_portal_dept_admin', 'Department Administrator'),
+    ('is_portal_dept_user', 'Department User'),
+    ('is_portal_readonly', 'Read-Only User'),
+)
+
+
+def make_perm(can_create, can_read, can_update, can_request_destruction):
+    """Helper to build permission dict from action flags.
+
+    Args:
+        can_create: Can add new items
+        can_read: Can view items
+        can_update: Can edit item details
+        can_request_destruction: Can submit destruction service requests
+    """
+    if can_create and can_read and can_update and can_request_destruction:
+        level = 'full'
+        color = 'green'
+        message = 'Full access: You can add, view, edit, and request destruction'
+    elif can_create and can_read and can_update:
+        level = 'partial'
+        color = 'yellow'
+        message = 'Partial access: You can add, view, and edit (cannot request destruction)'
+    elif can_read and can_update:
+        level = 'partial'
+        color = 'yellow'
+        message = 'Partial access: You can view and edit (cannot add new or request destruction)'
+    elif can_read:
+        level = 'readonly'
+        color = 'yellow'
+        message = 'Read only: You can view but cannot make changes'
+    else:
+        level = 'none'
+        color = 'red'
+        message = 'No access: You do not have permission for this feature'
+
+    return {
+        'level': level,
+        'color': color,
+        'can_create': can_create,
+        'can_read': can_read,
+        'can_update': can_update,
+        'can_request_destruction': can_request_destruction,
+        # Keep can_delete as alias for backward compatibility
+        'can_delete': can_request_destruction,
+        'message': message,
+    }
+
+
+def build_permissions(roles):
+    """Permission matrix of the portal features for a dict of role flags"""
+    is_system_admin = roles['is_system_admin']
+    is_records_manager = roles['is_records_manager']
+    is_records_user = roles['is_records_user']
+    is_portal_company_admin = roles['is_portal_company_admin']
+    is_portal_dept_admin = roles['is_portal_dept_admin']
+    is_portal_dept_user = roles['is_portal_dept_user']
+    is_portal_readonly = roles['is_portal_readonly']
+
+    permissions = {}
+
+    # Containers, files/folders, inventory items and requests share one matrix
+    for feature in ('containers', 'files', 'inventory', 'requests'):
+        if is_system_admin or is_records_manager or is_portal_company_admin:
+            permissions[feature] = make_perm(True, True, True, True)
+        elif is_portal_dept_admin or is_portal_dept_user or is_records_user:
+            permissions[feature] = make_perm(True, True, True, False)
+        elif is_portal_readonly:
+            permissions[feature] = make_perm(False, True, False, False)
+        else:
+            permissions[feature] = make_perm(False, False, False, False)
+
+    # User management
+    if is_system_admin or is_records_manager or is_portal_company_admin:
+        permissions['users'] = make_perm(True, True, True, True)
+    elif is_portal_dept_admin:
+        permissions['users'] = make_perm(True, True, True, False)
+        permissions['users']['message'] = 'Partial access: You can manage users in your department only'
+    else:
+        permissions['users'] = make_perm(False, False, False, False)
+
+    # Departments
+    if is_system_admin or is_records_manager or is_portal_company_admin:
+        permissions['departments'] = make_perm(True, True, True, True)
+    elif is_portal_dept_admin:
+        permissions['departments'] = make_perm(False, True, True, False)
+        permissions['departments']['message'] = 'Partial access: You can view and edit your department only'
+    else:
+        permissions['departments'] = make_perm(False, True, False, False)
+
+    # Billing/Invoices (view only for most portal users)
+    if is_system_admin or is_records_manager:
+        permissions['billing'] = make_perm(True, True, True, True)
+    else:
+        permissions['billing'] = make_perm(False, True, False, False)
+
+    # Reports/Analytics
+    if is_system_admin or is_records_manager or is_portal_company_admin:
+        permissions['reports'] = make_perm(True, True, True, True)
+    elif is_portal_dept_admin:
+        permissions['reports'] = make_perm(False, True, False, False)
+        permissions['reports']['message'] = 'Read only: You can view reports for your department'
+    else:
+        permissions['reports'] = make_perm(False, False, False, False)
+
+    # Destruction certificates
+    permissions['certificates'] = make_perm(False, True, False, False)
+    if is_system_admin or is_records_manager or is_portal_company_admin:
+        permissions['certificates']['message'] = 'Read only: Certificates are system-generated'
+
+    # Settings/Configuration
+    if is_system_admin or is_records_manager:
+        permissions['settings'] = make_perm(True, True, True, True)
+    elif is_portal_company_admin:
+        permissions['settings'] = make_perm(False, True, True, False)
+        permissions['settings']['message'] = 'Partial access: You can view and edit company settings'
+    else:
+        permissions['settings'] = make_perm(False, False, False, False)
+
+    # Add user role info for display
+    permissions['user_role'] = next(
+        (label for flag, label in ROLE_LABELS if roles[flag]), 'Portal User'
+    )
+    return permissions
+
+
+class RecordsPortalAccess(models.AbstractModel):
+    _name = 'records.portal.access'
+    _description = 'Portal Access Snapshot'
+
+    @api.model
+    def get_snapshot(self, user_id=None):
+        """
+        Roles, permissions and department scope of a user.
+
+        Args:
+            user_id (int): user (default: the current user)
+
+        Returns:
+            dict: {
+                'roles': {flag: bool} (see ROLE_GROUPS),
+                'permissions': portal permission matrix (see build_permissions),
+                'commercial_partner_id': int,
+                'accessible_department_ids': assigned departments and all
+                    their descendants (record visibility),
+                'selectable_department_ids': departments offered in portal
+                    forms (assignments and their direct children, or every
+                    company department for a company administrator),
+                'has_departments': True if the company uses departments,
+            }
+            The dict is a copy: callers may change it freely.
+        """
+        return copy.deepcopy(self._get_snapshot(user_id or self.env.uid))
+
+    @api.model
+    @tools.ormcache('user_id', cache='groups')
+    def _get_snapshot(self, user_id):
+        user = self.env['res.users'].sudo().browse(user_id)
+        roles = {
+            flag: bool(self.env.ref(xmlid, raise_if_not_found=False)) and user.has_group(xmlid)
+            for flag, xmlid in ROLE_GROUPS
+        }
+
+        Department = self.env['records.department'].sudo()
+        assigned = self.env['records.storage.department.user'].sudo().search([
+            ('user_id', '=', user_id),
+            ('state', '=', 'active'),
+            ('active', '=', True),
+        ]).department_id
+        commercial_partner = user.partner_id.commercial_partner_id
+        company_departments = Department.search([('partner_id', '=', commercial_partner.id)])
+
+        if assigned:
+            selectable = assigned | assigned.child_department_ids
+        elif roles['is_portal_company_admin']:
+            selectable = company_departments
+        else:
+            selectable = Department
+
+        return {
+            'roles': roles,
+            'permissions': build_permissions(roles),
+            'commercial_partner_id': commercial_partner.id,
+            'accessible_department_ids': tuple(sorted((assigned | assigned._get_all_children()).ids)),
+            'selectable_department_ids': tuple(selectable.ids),
+            'has_departments': bool(company_departments),
+        }
+
+    @api.model
+    def _invalidate_snapshots(self):
+        """Drop every user's snapshot (department assignments or tree changed)"""
+        self.env.registry.clear_cache('groups')
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Portal Inventory Dashboard Sections
+
+The /my/inventory page reads its headline numbers from the inventory
+counters and renders one page of its inventory list from this model; the
+same pages (and the stock sections) are served as JSON by the section
+endpoint. A section page
+reads at most one page of records per model, and related data (PDF scans,
+locations) for the whole page in batched queries, so the cost of a page does
+not depend on the size of the customer's inventory.
+"""
+
+import math
+
+from odoo import api, fields, models
+
+SECTION_PAGE_SIZE = 20
+
+# Section sort options: label and the field sorted on (per section)
+SECTION_SORTINGS = {
+    'date': {'label': 'Recent First', 'descending': True},
+    'name': {'label': 'Name A-Z', 'descending': False},
+    'type': {'label': 'Type', 'descending': False},
+    'state': {'label': 'Status', 'descending': False},
+}
+
+# Inventory sections, in the order of the 'type' sorting of the 'all' section
+INVENTORY_SECTIONS = ('containers', 'documents', 'files', 'temp')
+
+
+class RecordsPortalInventory(models.AbstractModel):
+    _name = 'records.portal.inventory'
+    _description = 'Portal Inventory Sections'
+
+    # ============================================================================
+    # SECTION DEFINITIONS
+    # ============================================================================
+    @api.model
+    def _get_section_definition(self, section):
+        method = getattr(self, '_section_definition_%s' % section, None)
+        if method is None:
+            raise ValueError("Unknown inventory section: %s" % section)
+        return method()
+
+    def _section_definition_containers(self):
+        return {
+            'model': 'records.container',
+            'sudo': True,
+            'search_fields': ['name', 'barcode', 'temp_barcode'],
+            'sort_fields': {'date': 'create_date', 'name': 'name', 'state': 'state'},
+            'fields': ['name', 'barcode', 'temp_barcode', 'state', 'current_location_id', 'create_date'],
+            'row': lambda container, extra: {
+                'type': 'container',
+                'name': container.name,
+                'barcode': container.barcode or container.temp_barcode,
+                'description': "Container - %s" % (container.state.title() if container.state else 'Active'),
+                'location': container.current_location_id.name or 'Unknown',
+                'date': container.create_date,
+                'state': container.state or 'active',
+                'icon': 'fa-archive',
+                'color': 'primary',
+            },
+        }
+
+    def _section_definition_files(self):
+        return {
+            'model': 'records.file',
+            'search_fields': ['name', 'barcode', 'description'],
+            'sort_fields': {'date': 'create_date', 'name': 'name', 'state': 'state'},
+            'fields': ['name', 'barcode', 'description', 'state', 'location_id', 'create_date'],
+            'row': lambda file_folder, extra: {
+                'type': 'file',
+                'name': file_folder.name,
+                'barcode': file_folder.barcode,
+                'description': "File Folder - %s" % (file_folder.description or 'No description'),
+                'location': file_folder.location_id.name or 'Unknown',
+                'date': file_folder.create_date,
+                'state': file_folder.state or 'active',
+                'icon': 'fa-folder',
+                'color': 'info',
+            },
+        }
+
+    def _section_definition_documents(self):
+        def prepare(documents):
+            # PDF scans of the whole page in one grouped query
+            return self.env['records.attachment.index'].get_counts(documents)
+
+        def row(document, pdf_counts):
+            pdf_count = pdf_counts.get(document.id, 0)
+            return {
+                'type': 'document',
+                'name': document.name,
+                'barcode': document.temp_barcode,
+                'description': "Document - %s%s" % (
+                    document.description or 'No description',
+                    " - %s PDF scan(s)" % pdf_count if pdf_count else "",
+                ),
+                'location': document.container_id.current_location_id.name or 'Unknown',
+                'date': document.create_date,
+                'state': document.file_id.state or 'in',
+                'icon': 'fa-file-text',
+                'color': 'success',
+                'has_pdf': bool(pdf_count),
+                'pdf_count': pdf_count,
+            }
+
+        return {
+            'model': 'records.document',
+            'search_fields': ['name', 'temp_barcode', 'description'],
+            'sort_fields': {'date': 'create_date', 'name': 'name'},
+            'fields': ['name', 'temp_barcode', 'description', 'file_id', 'container_id', 'create_date'],
+            'prepare': prepare,
+            'row': row,
+        }
+
+    def _section_definition_temp(self):
+        return {
+            'model': 'temp.inventory',
+            # Temp inventory belongs to the contact who declared it
+            'own_partner': True,
+            'search_fields': ['name', 'description'],
+            'sort_fields': {'date': 'date_created', 'name': 'name', 'state': 'state'},
+            'fields': ['name', 'description', 'state', 'date_created'],
+            'row': lambda temp_item, extra: {
+                'type': 'temp',
+                'name': temp_item.name,
+                'barcode': temp_item.name or '',  # temp.inventory has no barcode field
+                'description': "Temp Item - %s" % (temp_item.description or 'No description'),
+                'location': 'Temporary',
+                'date': temp_item.date_created,
+                'state': temp_item.state or 'draft',
+                'icon': 'fa-clock-o',
+                'color': 'warning',
+            },
+        }
+
+    # ============================================================================
+    # SECTION QUERIES
+    # ============================================================================
+    def _get_section_model(self, definition):
+        Model = self.env[definition['model']]
+        return Model.sudo() if definition.get('sudo') else Model
+
+    def _get_section_domain(self, definition, search=None):
+        partner = self.env.user.partner_id
+        owner = partner if definition.get('own_partner') else partner.commercial_partner_id
+        domain = [('partner_id', '=', owner.id)]
+        if search:
+            search_fields = definition['search_fields']
+            domain += ['|'] * (len(search_fields) - 1) + [(name, 'ilike', search) for name in search_fields]
+        return domain
+
+    def _get_section_order(self, definition, sortby):
+        sort_field = definition['sort_fields'].get(sortby) or definition['sort_fields']['date']
+        direction = 'desc' if SECTION_SORTINGS.get(sortby, SECTION_SORTINGS['date'])['descending'] else 'asc'
+        return '%s %s, id %s' % (sort_field, direction, direction)
+
+    def _render_rows(self, definition, records):
+        """JSON rows of one page of records, related data batched per page"""
+        records.fetch(definition['fields'])
+        extra = definition['prepare'](records) if definition.get('prepare') else None
+        rows = []
+        for record in records:
+            row = definition['row'](record, extra)
+            row.update({
+                'id': record.id,
+                'model': definition['model'],
+                'date': fields.Datetime.to_string(row['date']) if row['date'] else False,
+            })
+            rows.append(row)
+        return rows
+
+    @api.model
+    def get_section(self, section, page=1, search=None, sortby=None):
+        """
+        One page of a dashboard section.
+
+        Args:
+            section (str): 'all' or one of INVENTORY_SECTIONS
+            page (int): 1-based page number
+            search (str): text searched in the section's search fields
+            sortby (str): key of SECTION_SORTINGS
+
+        Returns:
+            dict: {'items': rows, 'total': int, 'page': int, 'page_count': int, 'step': int}
+        """
+        page = max(int(page or 1), 1)
+        sortby = sortby if sortby in SECTION_SORTINGS else 'date'
+        offset = (page - 1) * SECTION_PAGE_SIZE
+        if section == 'all':
+            rows, total = self._get_all_sections_page(offset, search, sortby)
+        else:
+            definition = self._get_section_definition(section)
+            Model = self._get_section_model(definition)
+            domain = self._get_section_domain(definition, search)
+            total = Model.search_count(domain)
+            records = Model.search(
+                domain, order=self._get_section_order(definition, sortby), limit=SECTION_PAGE_SIZE, offset=offset,
+            )
+            rows = self._render_rows(definition, records)
+        return {
+            'items': rows,
+            'total': total,
+            'page': page,
+            'page_count': max(math.ceil(total / SECTION_PAGE_SIZE), 1),
+            'step': SECTION_PAGE_SIZE,
+        }
+
+    def _get_all_sections_page(self, offset, search, sortby):
+        """
+        One page of every section merged.
+
+        Sorted by type, the sections follow each other and the page is cut
+        from the section counts. Otherwise each section contributes at most
+        offset + page size candidates (ids and sort key only), the candidates
+        are merged, and only the rows of the page are read. Documents have no
+        status of their own, so the merged view sorts by status as by date.
+        """
+        if sortby == 'state':
+            sortby = 'date'
+        limit = offset + SECTION_PAGE_SIZE
+        sections = []
+        for section in INVENTORY_SECTIONS:
+            definition = self._get_section_definition(section)
+            Model = self._get_section_model(definition)
+            domain = self._get_section_domain(definition, search)
+            sections.append((definition, Model, domain, Model.search_count(domain)))
+        total = sum(count for _definition, _model, _domain, count in sections)
+
+        page_ids = {}
+        if sortby == 'type':
+            skip = offset
+            for definition, Model, domain, count in sections:
+                if skip >= count:
+                    skip -= count
+                    continue
+                take = limit - offset - sum(len(ids) for ids in page_ids.values())
+                if take <= 0:
+                    break
+                page_ids[definition['model']] = Model.search(
+                    domain, order=self._get_section_order(definition, 'date'), limit=take, offset=skip,
+                ).ids
+                skip = 0
+            ordered = [(model_name, res_id) for model_name, ids in page_ids.items() for res_id in ids]
+        else:
+            candidates = []
+            descending = SECTION_SORTINGS[sortby]['descending']
+            for definition, Model, domain, count in sections:
+                if not count:
+                    continue
+                sort_field = definition['sort_fields'].get(sortby) or definition['sort_fields']['date']
+                for record in Model.search_fetch(
+                    domain, [sort_field], order=self._get_section_order(definition, sortby), limit=limit,
+                ):
+                    value = record[sort_field]
+                    if sortby == 'name':
+                        value = (value or '').lower()
+                    else:
+                        value = fields.Datetime.to_string(value) if value else ''
+                    candidates.append((value, definition['model'], record.id))
+            candidates.sort(key=lambda candidate: (candidate[0], candidate[2]), reverse=descending)
+            ordered = [(model_name, res_id) for _value, model_name, res_id in candidates[offset:limit]]
+            for model_name, res_id in ordered:
+                page_ids.setdefault(model_name, []).append(res_id)
+
+        rows_by_key = {}
+        for definition, Model, _domain, _count in sections:
+            ids = page_ids.get(definition['model'])
+            if ids:
+                for row in self._render_rows(definition, Model.browse(ids)):
+                    rows_by_key[(row['model'], row['id'])] = row
+        return [rows_by_key[key] for key in ordered if key in rows_by_key], total
+
+    # ============================================================================
+    # STOCK SECTIONS
+    # ============================================================================
+    @api.model
+    def get_locations(self, page=1):
+        """One page of the customer's stock locations with container quantities"""
+        page = max(int(page or 1), 1)
+        commercial_partner = self.env.user.partner_id.commercial_partner_id
+        domain = [
+            ('owner_id', '=', commercial_partner.id),
+            ('quantity', '>', 0),
+            ('product_id.default_code', '=', 'RECORDS-CONTAINER'),
+        ]
+        Quant = self.env['stock.quant'].sudo()
+        total = len(Quant._read_group(domain, ['location_id']))
+        groups = Quant._read_group(
+            domain, ['location_id'], ['quantity:sum', '__count'],
+            order='location_id', limit=SECTION_PAGE_SIZE, offset=(page - 1) * SECTION_PAGE_SIZE,
+        )
+        return {
+            'items': [
+                {
+                    'id': location.id,
+                    'name': location.complete_name,
+                    'total_quantity': int(quantity),
+                    'container_count': count,
+                }
+                for location, quantity, count in groups
+            ],
+            'total': total,
+            'page': page,
+            'page_count': max(math.ceil(total / SECTION_PAGE_SIZE), 1),
+            'step': SECTION_PAGE_SIZE,
+        }
+
+    @api.model
+    def get_recent_movements(self, limit=10):
+        """Latest portal-visible container movements of the customer"""
+        commercial_partner = self.env.user.partner_id.commercial_partner_id
+        movements = self.env['records.stock.movement'].sudo().search([
+            ('partner_id', '=', commercial_partner.id),
+            ('is_portal_visible', '=', True),
+            ('state', 'in', ['confirmed', 'done']),
+        ], order='movement_date desc', limit=limit)
+        return [
+            {
+                'container_name': movement.container_id.name,
+                'movement_type': movement._get_movement_type_display(),
+                'location': movement.to_location_id.complete_name,
+                'date': movement.movement_date.strftime('%Y-%m-%d %H:%M') if movement.movement_date else '',
+                'user': movement.user_id.name,
+            }
+            for movement in movements
+        ]
@@ -358,6 +358,7 @@ class RecordsRetrievalOrder(models.Model):
                     body=_("Request approved and linked to Retrieval Order: %s") % record.name
                 )
         
+        self.env['records.calendar.feed']._invalidate_records(records)
         return records
 
     def write(self, vals):
@@ -366,7 +367,10 @@ class RecordsRetrievalOrder(models.Model):
         if 'portal_request_id' in vals and vals['portal_request_id']:
             portal_request_to_approve = self.env['portal.request'].browse(vals['portal_request_id'])
         
+        calendar_feed = self.env['records.calendar.feed']
+        calendar_feed._invalidate_records(self, vals)
         result = super().write(vals)
+        calendar_feed._invalidate_records(self, vals)
         
         # Approve portal request when linked to work order
         if portal_request_to_approve and portal_request_to_approve.state in ['draft', 'submitted', 'pending']:
@@ -379,3 +383,7 @@ class RecordsRetrievalOrder(models.Model):
             )
         
         return result
+
+    def unlink(self):
+        self.env['records.calendar.feed']._invalidate_records(self)
+        return super().unlink()
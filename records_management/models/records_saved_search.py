@@ -5,14 +5,38 @@ Saved Search Presets Model
 Allows users to save frequently used search criteria for quick access.
 Supports physical inventory search across containers, file folders, and documents.
 
+Presets can be materialized: the matching record ids are stored in
+records.saved.search.match together with a write_date watermark, and each
+open only re-evaluates the rows changed since the watermark.
+
 Author: Records Management System
 Version: 19.0.0.1
 License: LGPL-3
 """
 
+from datetime import timedelta
+from urllib.parse import urlencode
+
 from odoo import models, fields, api
+from odoo.osv import expression
+from odoo.tools import SQL
 import json
 
+# Re-read rows written slightly before the watermark: transactions that
+# started earlier may commit after a refresh with an older write_date
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Filters whose meaning depends on today's date - rows can enter or leave the
+# result set without being written, so these presets are rebuilt once a day
+TIME_RELATIVE_FILTERS = ('retention_status',)
+
+# search type -> model, as used by records.inventory.search
+MATERIALIZED_MODELS = {
+    'container': 'records.container',
+    'file': 'records.file',
+    'document': 'records.document',
+}
+
 
 class RecordsSavedSearch(models.Model):
     """User-defined saved search presets for physical inventory"""
@@ -76,6 +100,82 @@ class RecordsSavedSearch(models.Model):
         help="Number of times this search has been used"
     )
 
+    materialize = fields.Boolean(
+        string='Materialize Results',
+        default=False,
+        help="Store the matching records and only re-evaluate changed rows on each open "
+             "(recommended for large standing searches)"
+    )
+
+    match_ids = fields.One2many(
+        comodel_name='records.saved.search.match',
+        inverse_name='search_id',
+        string='Materialized Matches',
+        readonly=True
+    )
+
+    match_count = fields.Integer(
+        string='Matches',
+        readonly=True,
+        help="Number of materialized matches at the last refresh"
+    )
+
+    watermark = fields.Datetime(
+        string='Refreshed Up To',
+        readonly=True,
+        copy=False,
+        help="Rows written after this time are re-evaluated on the next refresh"
+    )
+
+    materialized_date = fields.Datetime(
+        string='Last Refresh',
+        readonly=True,
+        copy=False
+    )
+
+    last_viewed_date = fields.Datetime(
+        string='Last Viewed',
+        readonly=True,
+        copy=False,
+        help="Last time the user opened the materialized results"
+    )
+
+    last_viewed_match_id = fields.Integer(
+        string='Last Viewed Match',
+        readonly=True,
+        copy=False,
+        help="Highest materialized match id when the results were last viewed"
+    )
+
+    new_match_count = fields.Integer(
+        string='New Matches',
+        compute='_compute_new_match_count',
+        help="Matches added since the user last viewed this search"
+    )
+
+    # ============================================================================
+    # COMPUTE METHODS
+    # ============================================================================
+
+    @api.depends('match_ids', 'last_viewed_match_id')
+    def _compute_new_match_count(self):
+        # Match ids are serial: rows inserted after the last view are new
+        counts = {}
+        if self.ids:
+            self.env['records.saved.search.match'].flush_model()
+            self.flush_model(['last_viewed_match_id'])
+            self.env.cr.execute("""
+                SELECT m.search_id, COUNT(*)
+                  FROM records_saved_search_match m
+                  JOIN records_saved_search s ON s.id = m.search_id
+                 WHERE m.search_id IN %s
+                   AND m.id > coalesce(s.last_viewed_match_id, 0)
+                 GROUP BY m.search_id
+            """, (tuple(self.ids),))
+            counts = dict(self.env.cr.fetchall())
+        for search in self:
+            search.new_match_count = counts.get(search.id, 0)
+
     # ============================================================================
     # METHODS
     # ============================================================================
@@ -111,9 +211,13 @@ class RecordsSavedSearch(models.Model):
         # Get filter criteria
         filters = self.get_filters_dict()
 
+        if self.materialize:
+            self.refresh_matches()
+            filters['saved_search_id'] = self.id
+
         # Return URL with filters applied
         base_url = '/my/inventory/advanced_search'
-        params = '&'.join([f"{k}={v}" for k, v in filters.items()])
+        params = urlencode(filters)
 
         return {
             'type': 'ir.actions.act_url',
@@ -121,6 +225,155 @@ class RecordsSavedSearch(models.Model):
             'target': 'self',
         }
 
+    def _get_search_domains(self):
+        """Domains per search type for this preset, scoped to the owner's company"""
+        self.ensure_one()
+        partner = self.user_id.partner_id.commercial_partner_id
+        return self.env['records.inventory.search'].get_search_domains(partner, self.get_filters_dict())
+
+    def _needs_full_refresh(self):
+        """No watermark yet, or a date-relative preset last refreshed on another day"""
+        self.ensure_one()
+        if not self.watermark:
+            return True
+        filters = self.get_filters_dict()
+        if any(filters.get(key) for key in TIME_RELATIVE_FILTERS):
+            return self.materialized_date.date() != fields.Date.context_today(self)
+        return False
+
+    @api.model
+    def _get_changed_domain(self, domain, since):
+        """
+        Rows to re-evaluate in an incremental refresh: written since ``since``,
+        or whose related record a filter goes through was (e.g. the container
+        of a file moved by container_id.current_location_id).
+        """
+        paths = set()
+        for leaf in domain:
+            if expression.is_leaf(leaf) and isinstance(leaf[0], str):
+                parts = leaf[0].split('.')[:-1]
+                paths.update('.'.join(parts[:index]) for index in range(1, len(parts) + 1))
+        return expression.OR([
+            [(path + '.write_date' if path else 'write_date', '>=', since)]
+            for path in [''] + sorted(paths)
+        ])
+
+    def refresh_matches(self, full=False):
+        """
+        Bring the materialized result set up to date.
+
+        Incremental refresh: only rows written since the watermark (or whose
+        related records used by the filters were) are re-evaluated against
+        the preset domain - matching ones are added, the others removed -
+        plus an anti-join dropping deleted records.
+        A full refresh re-evaluates the whole domain in one INSERT ... SELECT.
+        """
+        Match = self.env['records.saved.search.match']
+        for search in self.filtered('materialize'):
+            refresh_date = fields.Datetime.now()
+            rebuild = full or search._needs_full_refresh()
+            domains = search._get_search_domains()
+            since = search.watermark - WATERMARK_OVERLAP if search.watermark else None
+
+            for search_type, model_name in MATERIALIZED_MODELS.items():
+                Model = self.env[model_name].sudo()
+                Model.flush_model()
+                if search_type not in domains:
+                    self.env.cr.execute(
+                        "DELETE FROM records_saved_search_match WHERE search_id = %s AND res_model = %s",
+                        (search.id, model_name),
+                    )
+                    continue
+
+                domain = domains[search_type]
+                if rebuild:
+                    matching = Model._search(domain)
+                    stale = SQL("TRUE")
+                else:
+                    changed_domain = self._get_changed_domain(domain, since)
+                    matching = Model._search(expression.AND([domain, changed_domain]))
+                    changed = Model.with_context(active_test=False)._search(changed_domain)
+                    stale = SQL("res_id IN (%s)", changed.subselect())
+
+                # Rows no longer matching (or deleted since the last refresh)
+                self.env.execute_query(SQL("""
+                    DELETE FROM records_saved_search_match m
+                     WHERE m.search_id = %(search_id)s
+                       AND m.res_model = %(res_model)s
+                       AND (
+                            (%(stale)s AND m.res_id NOT IN (%(matching)s))
+                            OR NOT EXISTS (SELECT 1 FROM %(table)s t WHERE t.id = m.res_id)
+                       )
+                """,
+                    search_id=search.id,
+                    res_model=model_name,
+                    stale=stale,
+                    matching=matching.subselect(),
+                    table=SQL.identifier(Model._table),
+                ))
+                # New matches keep the time they entered the result set
+                self.env.execute_query(SQL("""
+                    INSERT INTO records_saved_search_match (search_id, res_model, res_id, matched_date)
+                    SELECT %(search_id)s, %(res_model)s, matching.id, %(refresh_date)s
+                      FROM (%(matching)s) AS matching
+                    ON CONFLICT (search_id, res_model, res_id) DO NOTHING
+                """,
+                    search_id=search.id,
+                    res_model=model_name,
+                    refresh_date=refresh_date,
+                    matching=matching.subselect(),
+                ))
+
+            [[match_count]] = self.env.execute_query(SQL(
+                "SELECT COUNT(*) FROM records_saved_search_match WHERE search_id = %s", search.id,
+            ))
+            search.write({
+                'watermark': refresh_date,
+                'materialized_date': refresh_date,
+                'match_count': match_count,
+            })
+        Match.invalidate_model()
+        self.invalidate_recordset(['match_ids', 'new_match_count'])
+        return True
+
+    def get_materialized_domains(self, mark_viewed=True):
+        """
+        Refresh the materialized result set and return domains selecting it.
+
+        Returns:
+            dict: {'container' | 'file' | 'document': domain} for the types the
+                preset searches (an id subquery on the match table), plus
+                'new_match_count' since the last view
+        """
+        self.ensure_one()
+        self.refresh_matches()
+        new_match_count = self.new_match_count
+        domains = self._get_search_domains()
+        Match = self.env['records.saved.search.match']
+        result = {
+            search_type: [('id', 'in', Match._search([
+                ('search_id', '=', self.id),
+                ('res_model', '=', model_name),
+            ]).subselect('res_id'))]
+            for search_type, model_name in MATERIALIZED_MODELS.items()
+            if search_type in domains
+        }
+        result['new_match_count'] = new_match_count
+        if mark_viewed:
+            [[last_match_id]] = self.env.execute_query(SQL(
+                "SELECT coalesce(MAX(id), 0) FROM records_saved_search_match WHERE search_id = %s", self.id,
+            ))
+            self.write({
+                'last_viewed_date': fields.Datetime.now(),
+                'last_viewed_match_id': last_match_id,
+            })
+        return result
+
+    @api.model
+    def _cron_refresh_materialized_searches(self):
+        """Keep materialized presets warm so opening them stays instant"""
+        self.search([('materialize', '=', True)]).refresh_matches()
+
     @api.model_create_multi
     def create(self, vals_list):
         """Ensure only one default search per user"""
@@ -145,4 +398,9 @@ class RecordsSavedSearch(models.Model):
                     ('id', '!=', record.id)
                 ]).write({'is_default': False})
 
+        # New criteria invalidate the materialized result set
+        if 'filters' in vals or vals.get('materialize') is False:
+            vals = dict(vals, watermark=False, match_count=0)
+            self.match_ids.unlink()
+
         return super().write(vals)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Saved Search Match Model
+
+Materialized result set of a saved search preset: one row per matching
+container, file folder or document, with the time it entered the result set.
+Rows are maintained incrementally by ``records.saved.search.refresh_matches``.
+
+Author: Records Management System
+Version: 19.0.0.1
+License: LGPL-3
+"""
+
+from odoo import models, fields
+
+
+class RecordsSavedSearchMatch(models.Model):
+    """One materialized match of a saved search preset"""
+
+    _name = 'records.saved.search.match'
+    _description = 'Saved Search Materialized Match'
+    _order = 'matched_date desc, id desc'
+    _log_access = False
+
+    search_id = fields.Many2one(
+        comodel_name='records.saved.search',
+        string='Saved Search',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+
+    res_model = fields.Selection(
+        selection=[
+            ('records.container', 'Container'),
+            ('records.file', 'File Folder'),
+            ('records.document', 'Document'),
+        ],
+        string='Record Type',
+        required=True,
+    )
+
+    res_id = fields.Integer(
+        string='Record ID',
+        required=True,
+    )
+
+    matched_date = fields.Datetime(
+        string='Matched On',
+        required=True,
+        default=fields.Datetime.now,
+        help="When the record entered the saved search results"
+    )
+
+    _sql_constraints = [
+        ('search_record_uniq', 'unique(search_id, res_model, res_id)',
+         'A record can only be materialized once per saved search.'),
+    ]
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Records Search Cache
+
+Per-partner cache of portal search responses, shared by every worker through
+an UNLOGGED PostgreSQL table (cheap writes, no WAL, emptied on crash - which
+is fine for a cache).
+
+Entries are keyed by endpoint, partner, normalized query, department scope,
+the user's record rule inputs (see get_visibility) and paging parameters. Each partner has a generation counter; an entry is only
+served while its generation matches. ``records.container`` create/write/unlink
+bump the generation of the partners they touch right after commit, so an
+entry computed from an older snapshot can never be served afterwards.
+The same mechanism caches the customer recycling statistics, invalidated by
+shredding service events and shred box work order lines.
+
+The cache is bounded: entries expire after
+``records_management.search.cache_timeout`` seconds and the least recently
+used entries are evicted beyond ``records_management.search.cache_max_entries``.
+"""
+
+import hashlib
+import json
+import logging
+import random
+
+import psycopg2
+
+from odoo import api, models
+
+_logger = logging.getLogger(__name__)
+
+CACHE_TABLE = 'records_search_cache'
+GENERATION_TABLE = 'records_search_cache_generation'
+
+# Partner id used for entries that are not scoped to one customer
+# (internal users searching every customer)
+GLOBAL_SCOPE = 0
+
+# Run the LRU trim on roughly one insert out of EVICTION_SAMPLE
+EVICTION_SAMPLE = 50
+
+
+class RecordsSearchCache(models.AbstractModel):
+    _name = 'records.search.cache'
+    _description = 'Records Search Result Cache'
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS %s (
+                key varchar(40) PRIMARY KEY,
+                endpoint varchar NOT NULL,
+                partner_id integer NOT NULL,
+                generation bigint NOT NULL,
+                payload jsonb NOT NULL,
+                hits integer NOT NULL DEFAULT 0,
+                create_date timestamp NOT NULL DEFAULT (now() at time zone 'UTC'),
+                last_access timestamp NOT NULL DEFAULT (now() at time zone 'UTC')
+            )
+        """ % CACHE_TABLE)
+        self.env.cr.execute(
+            "CREATE INDEX IF NOT EXISTS %s_last_access_idx ON %s (last_access)" % (CACHE_TABLE, CACHE_TABLE)
+        )
+        self.env.cr.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS %s (
+                partner_id integer PRIMARY KEY,
+                generation bigint NOT NULL DEFAULT 0
+            )
+        """ % GENERATION_TABLE)
+
+    # ============================================================================
+    # KEYS & CONFIGURATION
+    # ============================================================================
+    @api.model
+    def _make_key(self, endpoint, partner_id, query, scope=None, params=None):
+        """Stable key: endpoint + partner + normalized query + department scope + params."""
+        normalized = ' '.join((query or '').lower().split())
+        payload = json.dumps(
+            [endpoint, partner_id or GLOBAL_SCOPE, normalized, sorted(scope) if scope else None, params or {}],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    @api.model
+    def get_visibility(self):
+        """
+        Record rule inputs of the current user, to be part of the key params.
+
+        Cached results are computed under the user's record rules, so users
+        only share an entry when those rules see the same rows: same role
+        groups, same department assignments and same allowed companies.
+        """
+        snapshot = self.env['records.portal.access'].get_snapshot()
+        return {
+            'internal': self.env.user._is_internal(),
+            'roles': sorted(flag for flag, enabled in snapshot['roles'].items() if enabled),
+            'departments': list(snapshot['accessible_department_ids']),
+            'companies': sorted(self.env.companies.ids),
+        }
+
+    @api.model
+    def _scope_partner_id(self, partner_id):
+        """Cache scope of a partner: its commercial entity (0 when unscoped)."""
+        if not partner_id:
+            return GLOBAL_SCOPE
+        return self.env['res.partner'].sudo().browse(partner_id).commercial_partner_id.id or partner_id
+
+    @api.model
+    def _get_limits(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        ttl = int(ICP.get_param('records_management.search.cache_timeout', 300))
+        max_entries = int(ICP.get_param('records_management.search.cache_max_entries', 5000))
+        return ttl, max_entries
+
+    @api.model
+    def _is_enabled(self):
+        ttl, max_entries = self._get_limits()
+        return ttl > 0 and max_entries > 0
+
+    # ============================================================================
+    # LOOKUP / STORE
+    # ============================================================================
+    @api.model
+    def _get_generation(self, partner_id):
+        """
+        Current generation of a partner scope.
+
+        The global scope is bumped by every invalidation, so unscoped entries
+        (internal users) are dropped whenever any customer's containers change.
+        """
+        self.env.cr.execute(
+            "SELECT generation FROM %s WHERE partner_id = %%s" % GENERATION_TABLE,
+            (partner_id or GLOBAL_SCOPE,),
+        )
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def get(self, endpoint, partner_id, query, scope=None, params=None):
+        """
+        Return the cached payload, or None on a miss.
+
+        A hit refreshes the entry's LRU timestamp.
+        """
+        if not self._is_enabled():
+            return None
+        ttl, _max_entries = self._get_limits()
+        partner_id = self._scope_partner_id(partner_id)
+        key = self._make_key(endpoint, partner_id, query, scope, params)
+        generation = self._get_generation(partner_id)
+        cr = self.env.cr
+        cr.execute("""
+            SELECT payload
+              FROM %s
+             WHERE key = %%s
+               AND generation = %%s
+               AND create_date > (now() at time zone 'UTC') - %%s * interval '1 second'
+        """ % CACHE_TABLE, (key, generation, ttl))
+        row = cr.fetchone()
+        if not row:
+            return None
+        try:
+            with cr.savepoint(flush=False):
+                cr.execute(
+                    "UPDATE %s SET hits = hits + 1, last_access = now() at time zone 'UTC' WHERE key = %%s"
+                    % CACHE_TABLE,
+                    (key,),
+                )
+        except psycopg2.Error:
+            pass  # a concurrent hit already touched the entry
+        return row[0]
+
+    @api.model
+    def put(self, endpoint, partner_id, query, payload, scope=None, params=None):
+        """Store a payload under the partner's current generation."""
+        if not self._is_enabled():
+            return
+        _ttl, max_entries = self._get_limits()
+        partner_id = self._scope_partner_id(partner_id)
+        key = self._make_key(endpoint, partner_id, query, scope, params)
+        generation = self._get_generation(partner_id)
+        cr = self.env.cr
+        try:
+            with cr.savepoint(flush=False):
+                cr.execute("""
+                    INSERT INTO %s (key, endpoint, partner_id, generation, payload)
+                    VALUES (%%s, %%s, %%s, %%s, %%s)
+                    ON CONFLICT (key) DO UPDATE
+                       SET generation = EXCLUDED.generation,
+                           payload = EXCLUDED.payload,
+                           create_date = now() at time zone 'UTC',
+                           last_access = now() at time zone 'UTC'
+                """ % CACHE_TABLE, (
+                    key, endpoint, partner_id or GLOBAL_SCOPE, generation, json.dumps(payload, default=str),
+                ))
+                if random.randrange(EVICTION_SAMPLE) == 0:
+                    self._evict(max_entries)
+        except psycopg2.Error as e:
+            _logger.debug("Search cache: store skipped (%s)", e)
+
+    @api.model
+    def _evict(self, max_entries):
+        """Drop expired entries and trim least-recently-used ones beyond max_entries."""
+        ttl, _max_entries = self._get_limits()
+        self.env.cr.execute("""
+            DELETE FROM %s
+             WHERE create_date < (now() at time zone 'UTC') - %%s * interval '1 second'
+                OR key IN (SELECT key FROM %s ORDER BY last_access DESC OFFSET %%s)
+        """ % (CACHE_TABLE, CACHE_TABLE), (ttl, max_entries))
+
+    # ============================================================================
+    # INVALIDATION
+    # ============================================================================
+    @api.model
+    def _invalidate_partners(self, partner_ids):
+        """
+        Invalidate every entry of these partners once the transaction commits.
+
+        Bumping after commit keeps container writes from queueing on the
+        generation rows, and an entry computed from the pre-commit snapshot is
+        still rejected because it carries the old generation.
+        """
+        partner_ids = {pid for pid in partner_ids if pid}
+        if not partner_ids:
+            return
+        partners = self.env['res.partner'].sudo().browse(partner_ids)
+        partner_ids |= set(partners.commercial_partner_id.ids)
+        postcommit = self.env.cr.postcommit
+        pending = postcommit.data.get('records.search.cache.partners')
+        if pending is None:
+            pending = postcommit.data['records.search.cache.partners'] = set()
+            dbname = self.env.cr.dbname
+            postcommit.add(lambda: self._bump_generations(dbname, pending))
+        pending.update(partner_ids)
+
+    @api.model
+    def _bump_generations(self, dbname, partner_ids):
+        scopes = sorted(set(partner_ids) | {GLOBAL_SCOPE})
+        try:
+            with self.pool.cursor() as cr:
+                cr.execute("""
+                    INSERT INTO %s (partner_id, generation)
+                    SELECT unnest(%%s::integer[]), 1
+                    ON CONFLICT (partner_id) DO UPDATE SET generation = %s.generation + 1
+                """ % (GENERATION_TABLE, GENERATION_TABLE), (scopes,))
+        except psycopg2.Error as e:
+            _logger.warning("Search cache: invalidation failed on %s (%s); entries expire by TTL", dbname, e)
+
+    @api.model
+    def clear(self):
+        """Drop every cached entry (admin action / tests)."""
+        self.env.cr.execute("TRUNCATE %s" % CACHE_TABLE)
+
+    @api.model
+    def get_stats(self):
+        """Entry count and hit totals per endpoint, for the search monitor."""
+        self.env.cr.execute("""
+            SELECT endpoint, COUNT(*), coalesce(SUM(hits), 0)
+              FROM %s
+             GROUP BY endpoint
+        """ % CACHE_TABLE)
+        return {endpoint: {'entries': entries, 'hits': hits} for endpoint, entries, hits in self.env.cr.fetchall()}
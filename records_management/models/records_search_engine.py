@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+"""
+Records Search Engine
+
+PostgreSQL-backed full-text and trigram search for portal instant search.
+
+Each searchable model gets a ``search_vector`` tsvector column that is kept
+current by a database trigger (so ORM writes, imports and raw SQL updates all
+stay in sync), a GIN index on that column and pg_trgm GIN indexes on the
+identifier columns (box number, barcodes) for fast prefix matching.
+
+The column, trigger and indexes are created by ``init()`` of the searchable
+models during install/upgrade; they are not ORM fields.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import re
+
+import psycopg2
+
+from odoo import api, models
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Bump when the weighting configuration changes so existing rows are re-indexed
+SEARCH_VECTOR_VERSION = 1
+
+# Text search configuration - 'simple' avoids stemming box numbers and names
+TS_CONFIG = 'simple'
+
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+class RecordsSearchEngine(models.AbstractModel):
+    _name = 'records.search.engine'
+    _description = 'Records Full-Text Search Engine'
+
+    # model name -> weighted columns and identifier columns (prefix matching)
+    _SEARCH_CONFIG = {
+        'records.container': {
+            'weights': (
+                ('A', ('name', 'barcode', 'temp_barcode')),
+                ('B', ('alpha_range',)),
+                ('C', ('content_description',)),
+                ('D', ('search_keywords',)),
+            ),
+            'identifiers': ('name', 'barcode', 'temp_barcode'),
+        },
+        'records.file': {
+            'weights': (
+                ('A', ('name', 'barcode', 'temp_barcode')),
+                ('C', ('description',)),
+            ),
+            'identifiers': ('name', 'barcode', 'temp_barcode'),
+        },
+    }
+
+    # ============================================================================
+    # DATABASE INFRASTRUCTURE (called from init() of searchable models)
+    # ============================================================================
+    @api.model
+    def _setup_search_infrastructure(self, model_name):
+        """Create/refresh the tsvector column, trigger and indexes for a model."""
+        config = self._SEARCH_CONFIG[model_name]
+        table = self.env[model_name]._table
+        cr = self.env.cr
+
+        cr.execute(
+            "ALTER TABLE %s ADD COLUMN IF NOT EXISTS search_vector tsvector" % table
+        )
+
+        weighted_columns = [col for _weight, cols in config['weights'] for col in cols]
+        cr.execute("""
+            CREATE OR REPLACE FUNCTION %(table)s_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := %(expression)s;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """ % {'table': table, 'expression': self._vector_expression(config, 'NEW.')})
+        cr.execute("DROP TRIGGER IF EXISTS %(table)s_search_vector_trg ON %(table)s" % {'table': table})
+        cr.execute("""
+            CREATE TRIGGER %(table)s_search_vector_trg
+            BEFORE INSERT OR UPDATE OF %(columns)s ON %(table)s
+            FOR EACH ROW EXECUTE FUNCTION %(table)s_search_vector_update()
+        """ % {'table': table, 'columns': ', '.join(weighted_columns)})
+
+        cr.execute(
+            "CREATE INDEX IF NOT EXISTS %(table)s_search_vector_idx ON %(table)s USING gin (search_vector)"
+            % {'table': table}
+        )
+        if self._ensure_trigram_extension():
+            for column in config['identifiers']:
+                cr.execute(
+                    "CREATE INDEX IF NOT EXISTS %(table)s_%(column)s_trgm_idx "
+                    "ON %(table)s USING gin (%(column)s gin_trgm_ops)"
+                    % {'table': table, 'column': column}
+                )
+
+        # Backfill rows created before the trigger existed, or everything when
+        # the weighting configuration changed since the last upgrade.
+        ICP = self.env['ir.config_parameter'].sudo()
+        version_key = 'records_management.search.vector_version.%s' % table
+        if ICP.get_param(version_key) != str(SEARCH_VECTOR_VERSION):
+            where = ''
+        else:
+            where = 'WHERE search_vector IS NULL'
+        cr.execute(
+            "UPDATE %s SET search_vector = %s %s" % (table, self._vector_expression(config, ''), where)
+        )
+        if cr.rowcount:
+            _logger.info("Search engine: indexed %s rows of %s", cr.rowcount, table)
+        ICP.set_param(version_key, str(SEARCH_VECTOR_VERSION))
+
+    @api.model
+    def _vector_expression(self, config, prefix):
+        """SQL expression building the weighted tsvector from row columns."""
+        parts = []
+        for weight, columns in config['weights']:
+            text = " || ' ' || ".join("coalesce(%s%s, '')" % (prefix, col) for col in columns)
+            parts.append("setweight(to_tsvector('%s', %s), '%s')" % (TS_CONFIG, text, weight))
+        return ' || '.join(parts)
+
+    @api.model
+    def _ensure_trigram_extension(self):
+        """Install pg_trgm when possible; return whether it is available."""
+        cr = self.env.cr
+        cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cr.fetchone():
+            return True
+        try:
+            with cr.savepoint(flush=False):
+                cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            return True
+        except psycopg2.Error as e:
+            _logger.warning(
+                "Search engine: pg_trgm extension unavailable (%s); prefix search will use the tsvector index only", e
+            )
+            return False
+
+    # ============================================================================
+    # QUERY API
+    # ============================================================================
+    @api.model
+    def _tokenize(self, query):
+        """Split user input into lowercase word tokens safe for to_tsquery()."""
+        return [token.lower() for token in _TOKEN_RE.findall(query or '')]
+
+    @api.model
+    def _build_search_clauses(self, model_name, alias, query):
+        """
+        Build the match and rank SQL for a free-text query.
+
+        Returns:
+            tuple: (match SQL, rank SQL) or (None, None) for an empty query.
+        """
+        query = (query or '').strip()
+        if not query:
+            return None, None
+
+        config = self._SEARCH_CONFIG[model_name]
+        tokens = self._tokenize(query)
+        escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        prefix = escaped + '%'
+
+        prefix_matches = [
+            SQL("%s ILIKE %s", SQL.identifier(alias, column), prefix)
+            for column in config['identifiers']
+        ]
+        exact_matches = [
+            SQL("lower(%s) = lower(%s)", SQL.identifier(alias, column), query)
+            for column in config['identifiers']
+        ]
+        prefix_any = SQL("(%s)", SQL(" OR ").join(prefix_matches))
+        exact_any = SQL("(%s)", SQL(" OR ").join(exact_matches))
+
+        if not tokens:
+            # Punctuation-only input: identifier prefix matching only
+            return prefix_any, SQL("(CASE WHEN %s THEN 2.0 ELSE 1.0 END)::float8", exact_any)
+
+        tsquery = SQL(
+            "to_tsquery(%s::regconfig, %s)", TS_CONFIG, ' & '.join('%s:*' % token for token in tokens)
+        )
+        vector = SQL.identifier(alias, 'search_vector')
+        match = SQL("(%s @@ %s OR %s)", vector, tsquery, prefix_any)
+        rank = SQL(
+            "(ts_rank_cd(%s, %s, 32) + CASE WHEN %s THEN 2.0 WHEN %s THEN 1.0 ELSE 0.0 END)::float8",
+            vector, tsquery, exact_any, prefix_any,
+        )
+        return match, rank
+
+    @api.model
+    def _prepare_search_query(self, model_name, query, domain):
+        """
+        Return (Model, Query, rank SQL or None) for a search, without ordering.
+
+        The rank is None when the query is empty (plain name, id browsing).
+        """
+        Model = self.env[model_name]
+        query_obj = Model._search(domain or [])
+        match, rank = self._build_search_clauses(model_name, query_obj.table, query)
+        if match is not None:
+            query_obj.add_where(match)
+        return Model, query_obj, rank
+
+    @api.model
+    def _order_search_query(self, query_obj, rank):
+        alias = query_obj.table
+        if rank is not None:
+            query_obj.order = SQL(
+                "%s DESC, %s, %s", rank, SQL.identifier(alias, 'name'), SQL.identifier(alias, 'id')
+            )
+        else:
+            query_obj.order = SQL("%s, %s", SQL.identifier(alias, 'name'), SQL.identifier(alias, 'id'))
+
+    @api.model
+    def search_ranked(self, model_name, query, domain=None, offset=0, limit=50, count=True):
+        """
+        Ranked full-text search over a searchable model (OFFSET pagination).
+
+        Prefer search_page() for infinite scroll: OFFSET gets slower the deeper
+        the page.
+
+        Args:
+            model_name (str): 'records.container' or 'records.file'
+            query (str): free text typed by the user
+            domain (list): additional ORM domain (partner scope, etc.)
+            offset (int): number of rows to skip
+            limit (int): page size
+            count (bool): also return the total number of matches
+
+        Returns:
+            tuple: (ordered recordset, total or None)
+        """
+        Model, query_obj, rank = self._prepare_search_query(model_name, query, domain)
+
+        total = None
+        if count:
+            total = self.env.execute_query(query_obj.select(SQL("COUNT(*)")))[0][0]
+
+        self._order_search_query(query_obj, rank)
+        query_obj.limit = limit
+        query_obj.offset = offset
+        ids = [row[0] for row in self.env.execute_query(query_obj.select())]
+        return Model.browse(ids), total
+
+    # ============================================================================
+    # KEYSET (SEEK) PAGINATION
+    # ============================================================================
+    @api.model
+    def _query_fingerprint(self, model_name, query, domain):
+        payload = json.dumps([model_name, (query or '').strip(), domain or []], default=str, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    @api.model
+    def _encode_cursor(self, payload):
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+    @api.model
+    def _decode_cursor(self, cursor, fingerprint):
+        """Decode an opaque cursor; return None when it is malformed or for another query."""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, TypeError, AttributeError):
+            return None
+        if not isinstance(payload, dict) or payload.get('f') != fingerprint:
+            return None
+        # The client hands the cursor back: check its shape before trusting it
+        def is_number(value, types=(int, float)):
+            return isinstance(value, types) and not isinstance(value, bool)
+
+        total, key = payload.get('t'), payload.get('k')
+        if not is_number(total, int) or not isinstance(key, list) or len(key) != 3:
+            return None
+        last_rank, last_name, last_id = key
+        if not (last_rank is None or is_number(last_rank)) \
+                or not (last_name is None or isinstance(last_name, str)) or not is_number(last_id, int):
+            return None
+        return payload
+
+    @api.model
+    def search_page(self, model_name, query, domain=None, cursor=None, limit=50):
+        """
+        Ranked search with seek pagination keyed on (rank, name, id).
+
+        The first page (no cursor) counts the matches once; the total travels
+        inside the opaque ``next_cursor`` so later pages never recount, and each
+        page is a bounded index range scan rather than an OFFSET skip.
+
+        Returns:
+            dict: records, total, has_more, next_cursor
+        """
+        fingerprint = self._query_fingerprint(model_name, query, domain)
+        state = self._decode_cursor(cursor, fingerprint) if cursor else None
+
+        Model, query_obj, rank = self._prepare_search_query(model_name, query, domain)
+        alias = query_obj.table
+        name_col = SQL.identifier(alias, 'name')
+        id_col = SQL.identifier(alias, 'id')
+
+        if state:
+            total = state['t']
+            last_rank, last_name, last_id = state['k']
+            if rank is not None:
+                query_obj.add_where(SQL(
+                    "(%s < %s OR (%s = %s AND (%s, %s) > (%s, %s)))",
+                    rank, last_rank, rank, last_rank, name_col, id_col, last_name, last_id,
+                ))
+            else:
+                query_obj.add_where(SQL("(%s, %s) > (%s, %s)", name_col, id_col, last_name, last_id))
+        else:
+            total = self.env.execute_query(query_obj.select(SQL("COUNT(*)")))[0][0]
+
+        self._order_search_query(query_obj, rank)
+        query_obj.limit = limit + 1  # one extra row tells us whether another page exists
+        rows = self.env.execute_query(query_obj.select(
+            id_col, rank if rank is not None else SQL("NULL::float8"), name_col,
+        ))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            last_id, last_rank, last_name = rows[-1]
+            next_cursor = self._encode_cursor({
+                'f': fingerprint,
+                't': total,
+                'k': [last_rank, last_name, last_id],
+            })
+        return {
+            'records': Model.browse([row[0] for row in rows]),
+            'total': total,
+            'has_more': has_more,
+            'next_cursor': next_cursor,
+        }
+
+    # ============================================================================
+    # CONTAINER RECOMMENDATIONS (SQL-side scoring)
+    # ============================================================================
+    # Score weights mirror the historical Python scorer
+    RECOMMEND_MIN_SCORE = 20
+
+    @api.model
+    def recommend_containers(self, file_name='', service_date=None, content_type='', domain=None, limit=15):
+        """
+        Score every container in ``domain`` against file search criteria in one query.
+
+        Scoring:
+            alphabetical range contains the name's first letter   +50
+            content date range contains the service date          +40
+            primary content type matches                          +30
+            keyword hits (words of 3+ chars)                      +25, +5 per hit
+            description word hits / plain substring               +20, +5 per hit / +15
+
+        Only containers scoring at least RECOMMEND_MIN_SCORE are returned. A
+        cheap pre-filter (alpha/date range, content type, tsvector word match)
+        lets PostgreSQL use indexes before the scoring expressions run.
+
+        Returns:
+            tuple: (list of dicts with 'container', 'score', 'reasons'), total
+        """
+        Container = self.env['records.container']
+        query = Container._search(domain or [])
+        alias = query.table
+        file_name = (file_name or '').strip()
+
+        def column(name):
+            return SQL.identifier(alias, name)
+
+        words = [word for word in file_name.lower().split() if len(word) >= 3]
+        first_letter = file_name[:1].upper()
+
+        alpha_hit = SQL("FALSE")
+        if first_letter:
+            alpha_hit = SQL(
+                "coalesce(upper(%s) COLLATE \"C\" <= %s AND %s <= upper(%s) COLLATE \"C\", FALSE)",
+                column('alpha_range_start'), first_letter, first_letter, column('alpha_range_end'),
+            )
+        date_hit = SQL("FALSE")
+        if service_date:
+            date_hit = SQL(
+                "coalesce(%s <= %s AND %s <= %s, FALSE)",
+                column('content_date_from'), service_date, service_date, column('content_date_to'),
+            )
+        type_hit = SQL("FALSE")
+        if content_type:
+            type_hit = SQL("coalesce(lower(%s) = lower(%s), FALSE)", column('primary_content_type'), content_type)
+
+        def word_hits(field):
+            return SQL(
+                "cardinality(ARRAY(SELECT unnest(regexp_split_to_array(lower(coalesce(%s, '')), '\\s+'))"
+                " INTERSECT SELECT unnest(%s::text[])))",
+                column(field), words,
+            )
+
+        description_substring = SQL("FALSE")
+        if file_name:
+            description_substring = SQL(
+                "coalesce(strpos(lower(%s), %s) > 0, FALSE)", column('content_description'), file_name.lower()
+            )
+
+        # Pre-filter: a row can only reach the minimum score through one of these
+        prefilter = [condition for condition, active in (
+            (alpha_hit, bool(first_letter)),
+            (date_hit, bool(service_date)),
+            (type_hit, bool(content_type)),
+        ) if active]
+        word_tokens = sorted({token for word in words for token in self._tokenize(word)})
+        if word_tokens:
+            prefilter.append(SQL(
+                "%s @@ to_tsquery(%s::regconfig, %s)",
+                column('search_vector'), TS_CONFIG, ' | '.join(word_tokens),
+            ))
+        if not prefilter:
+            return [], 0
+        query.add_where(SQL("(%s)", SQL(" OR ").join(prefilter)))
+
+        hits = query.select(SQL(
+            "%s AS id, %s AS name, %s AS alpha_hit, %s AS date_hit, %s AS type_hit,"
+            " %s AS keyword_hits, %s AS description_hits, %s AS description_substring",
+            column('id'), column('name'), alpha_hit, date_hit, type_hit,
+            word_hits('search_keywords'), word_hits('content_description'), description_substring,
+        ))
+        rows = self.env.execute_query(SQL("""
+            WITH hits AS (%s),
+            scored AS (
+                SELECT hits.*,
+                       CASE WHEN alpha_hit THEN 50 ELSE 0 END
+                     + CASE WHEN date_hit THEN 40 ELSE 0 END
+                     + CASE WHEN type_hit THEN 30 ELSE 0 END
+                     + CASE WHEN keyword_hits > 0 THEN 25 + 5 * keyword_hits ELSE 0 END
+                     + CASE WHEN description_hits > 0 THEN 20 + 5 * description_hits
+                            WHEN description_substring THEN 15 ELSE 0 END AS score
+                  FROM hits
+            )
+            SELECT id, alpha_hit, date_hit, type_hit, keyword_hits, description_hits,
+                   description_substring, score, COUNT(*) OVER ()
+              FROM scored
+             WHERE score >= %s
+             ORDER BY score DESC, name, id
+             LIMIT %s
+        """, hits, self.RECOMMEND_MIN_SCORE, limit))
+
+        if not rows:
+            return [], 0
+        containers = Container.browse([row[0] for row in rows])
+        results = []
+        for container, row in zip(containers, rows):
+            (_id, alpha, date_match, type_match, keyword_hits,
+             description_hits, description_substring_hit, score, _total) = row
+            reasons = []
+            if alpha:
+                reasons.append("Name '%s' fits alphabetical range %s" % (file_name, container.alpha_range_display))
+            if date_match:
+                reasons.append(
+                    "Service date %s falls within container date range" % service_date.strftime('%m/%d/%Y')
+                )
+            if type_match:
+                reasons.append("Content type matches: %s" % content_type)
+            if keyword_hits:
+                reasons.append("Found %d matching keywords in container" % keyword_hits)
+            if description_hits:
+                reasons.append("Found %d matching words in description" % description_hits)
+            elif description_substring_hit:
+                reasons.append("File name found in content description")
+            results.append({'container': container, 'score': score, 'reasons': reasons})
+        return results, rows[0][-1]
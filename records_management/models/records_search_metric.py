@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Search Performance Metrics
+
+Hourly latency histograms per search endpoint, fed by the controllers'
+SearchPerformanceMonitor. Workers buffer samples in memory and flush them here
+periodically (one upsert per endpoint and hour), so the request path never
+writes. Searches over the slow query threshold are stored with the
+EXPLAIN (ANALYZE, BUFFERS) plan of their slowest SQL statement.
+
+Rows are tagged with the installed module version, which lets the regression
+report compare latency before and after a deploy.
+"""
+
+import json
+import logging
+import re
+from collections import defaultdict
+from datetime import timedelta
+
+import psycopg2
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; one overflow bucket follows
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+# Keywords that make a statement unsafe to run again under EXPLAIN ANALYZE
+UNSAFE_EXPLAIN_RE = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|SHARE)\b')
+
+
+class _ExplainDone(Exception):
+    """Carries the plan out of the savepoint so that it is rolled back"""
+
+    def __init__(self, plan):
+        super().__init__()
+        self.plan = plan
+
+
+def bucket_index(duration_ms):
+    for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+        if duration_ms <= bound:
+            return index
+    return len(HISTOGRAM_BOUNDS_MS)
+
+
+def histogram_percentile(histogram, fraction):
+    """Percentile (ms) of a bucket histogram, interpolated inside the bucket"""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    rank = fraction * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            lower = HISTOGRAM_BOUNDS_MS[index - 1] if index else 0.0
+            upper = HISTOGRAM_BOUNDS_MS[index] if index < len(HISTOGRAM_BOUNDS_MS) else HISTOGRAM_BOUNDS_MS[-1] * 2
+            return round(lower + (upper - lower) * (rank - seen) / count, 2)
+        seen += count
+    return float(HISTOGRAM_BOUNDS_MS[-1])
+
+
+def merge_histograms(histograms):
+    merged = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for histogram in histograms:
+        for index, count in enumerate(histogram or ()):
+            merged[index] += count
+    return merged
+
+
+class RecordsSearchMetric(models.Model):
+    _name = 'records.search.metric'
+    _description = 'Search Latency Histogram (hourly)'
+    _order = 'period_start desc, query_type'
+    _rec_name = 'query_type'
+
+    query_type = fields.Char(string='Search Endpoint', required=True, index=True, readonly=True)
+    period_start = fields.Datetime(string='Hour', required=True, index=True, readonly=True)
+    module_version = fields.Char(string='Module Version', readonly=True, index=True)
+    query_count = fields.Integer(string='Searches', readonly=True)
+    slow_count = fields.Integer(string='Slow Searches', readonly=True)
+    total_ms = fields.Float(string='Total Time (ms)', readonly=True)
+    avg_ms = fields.Float(string='Average (ms)', readonly=True, aggregator='avg')
+    max_ms = fields.Float(string='Max (ms)', readonly=True, aggregator='max')
+    p50_ms = fields.Float(string='p50 (ms)', readonly=True, aggregator='max')
+    p95_ms = fields.Float(string='p95 (ms)', readonly=True, aggregator='max')
+    p99_ms = fields.Float(string='p99 (ms)', readonly=True, aggregator='max')
+    result_count = fields.Integer(string='Results Returned', readonly=True)
+    avg_results = fields.Float(string='Average Results', readonly=True, aggregator='avg')
+    histogram = fields.Json(string='Latency Histogram', readonly=True)
+
+    _sql_constraints = [
+        ('period_type_version_uniq', 'unique(query_type, period_start, module_version)',
+         'One histogram row per endpoint, hour and module version.'),
+    ]
+
+    # ============================================================================
+    # FLUSH (called by the controllers' SearchPerformanceMonitor)
+    # ============================================================================
+    @api.model
+    def _get_module_version(self):
+        module = self.env['ir.module.module'].sudo().search([('name', '=', 'records_management')], limit=1)
+        return module.latest_version or ''
+
+    @api.model
+    def _aggregate_samples(self, samples):
+        """[(query_type, duration_ms, result_count, slow, timestamp)] -> {(type, hour): aggregate}"""
+        aggregates = defaultdict(lambda: {
+            'count': 0, 'slow': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'results': 0,
+            'histogram': [0] * (len(HISTOGRAM_BOUNDS_MS) + 1),
+        })
+        for query_type, duration_ms, result_count, slow, timestamp in samples:
+            aggregate = aggregates[(query_type, timestamp.replace(minute=0, second=0, microsecond=0))]
+            aggregate['count'] += 1
+            aggregate['slow'] += 1 if slow else 0
+            aggregate['total_ms'] += duration_ms
+            aggregate['max_ms'] = max(aggregate['max_ms'], duration_ms)
+            aggregate['results'] += result_count or 0
+            aggregate['histogram'][bucket_index(duration_ms)] += 1
+        return aggregates
+
+    @api.model
+    def _flush_samples(self, samples):
+        """
+        Merge buffered samples into the hourly rows, in a transaction of its own
+        so a failing search request does not lose the metrics of others.
+        """
+        if not samples:
+            return
+        aggregates = self._aggregate_samples(samples)
+        try:
+            with self.pool.cursor() as cr:
+                Metric = self.with_env(self.env(cr=cr)).sudo()
+                version = Metric._get_module_version()
+                for (query_type, period_start), aggregate in aggregates.items():
+                    Metric._merge_aggregate(query_type, period_start, version, aggregate)
+        except psycopg2.Error as e:
+            _logger.warning("Search metrics: flush of %d samples failed (%s)", len(samples), e)
+
+    def _merge_aggregate(self, query_type, period_start, version, aggregate):
+        # Lock the hour row: several workers may flush the same endpoint at once
+        self.env.cr.execute("""
+            INSERT INTO records_search_metric (query_type, period_start, module_version, query_count, histogram)
+            VALUES (%s, %s, %s, 0, '[]')
+            ON CONFLICT (query_type, period_start, module_version) DO NOTHING
+        """, (query_type, period_start, version))
+        self.env.cr.execute("""
+            SELECT id FROM records_search_metric
+             WHERE query_type = %s AND period_start = %s AND module_version = %s
+               FOR UPDATE
+        """, (query_type, period_start, version))
+        metric = self.browse(self.env.cr.fetchone()[0])
+        histogram = merge_histograms([metric.histogram, aggregate['histogram']])
+        count = metric.query_count + aggregate['count']
+        results = metric.result_count + aggregate['results']
+        total_ms = metric.total_ms + aggregate['total_ms']
+        metric.write({
+            'query_count': count,
+            'slow_count': metric.slow_count + aggregate['slow'],
+            'total_ms': total_ms,
+            'avg_ms': round(total_ms / count, 2),
+            'max_ms': max(metric.max_ms, aggregate['max_ms']),
+            'p50_ms': histogram_percentile(histogram, 0.50),
+            'p95_ms': histogram_percentile(histogram, 0.95),
+            'p99_ms': histogram_percentile(histogram, 0.99),
+            'result_count': results,
+            'avg_results': round(results / count, 2),
+            'histogram': histogram,
+        })
+
+    # ============================================================================
+    # REGRESSION REPORT
+    # ============================================================================
+    @api.model
+    def _get_last_deploy_date(self):
+        """First hour recorded with the current module version"""
+        version = self._get_module_version()
+        first = self.search([('module_version', '=', version)], order='period_start asc', limit=1)
+        if first and self.search_count([('module_version', '!=', version)], limit=1):
+            return first.period_start
+        return fields.Datetime.now() - timedelta(days=1)
+
+    @api.model
+    def get_regression_report(self, split_date=None, window_days=7, tolerance=0.2, min_samples=20):
+        """
+        Compare each endpoint's latency before and after split_date.
+
+        Histograms of each window are merged before taking percentiles, so
+        p95/p99 are exact to the bucket rather than averages of hourly values.
+
+        Returns:
+            list: dicts per endpoint with before/after count and percentiles,
+                p95 change and a 'regressed' flag, worst change first
+        """
+        split_date = split_date or self._get_last_deploy_date()
+        window = timedelta(days=window_days)
+        rows = self.search([
+            ('period_start', '>=', split_date - window),
+            ('period_start', '<', split_date + window),
+        ])
+        windows = defaultdict(lambda: {'before': [], 'after': []})
+        for row in rows:
+            windows[row.query_type]['before' if row.period_start < split_date else 'after'].append(row)
+
+        def summary(metrics):
+            histogram = merge_histograms(metrics.mapped('histogram'))
+            return {
+                'count': sum(metrics.mapped('query_count')),
+                'slow': sum(metrics.mapped('slow_count')),
+                'p50': histogram_percentile(histogram, 0.50),
+                'p95': histogram_percentile(histogram, 0.95),
+                'p99': histogram_percentile(histogram, 0.99),
+            }
+
+        report = []
+        for query_type, parts in windows.items():
+            before = summary(self.browse([row.id for row in parts['before']]))
+            after = summary(self.browse([row.id for row in parts['after']]))
+            change = (after['p95'] - before['p95']) / before['p95'] if before['p95'] else 0.0
+            report.append({
+                'query_type': query_type,
+                'before': before,
+                'after': after,
+                'p95_change': round(change, 3),
+                'regressed': bool(
+                    before['count'] >= min_samples and after['count'] >= min_samples and change > tolerance
+                ),
+            })
+        report.sort(key=lambda line: -line['p95_change'])
+        return report
+
+    @api.model
+    def _cron_purge_search_metrics(self):
+        """Drop histograms and slow query plans past their retention"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        metric_days = int(ICP.get_param('records_management.search.metrics_retention_days', 90))
+        slow_days = int(ICP.get_param('records_management.search.slow_query_retention_days', 30))
+        now = fields.Datetime.now()
+        self.search([('period_start', '<', now - timedelta(days=metric_days))]).unlink()
+        self.env['records.search.slow.query'].search([
+            ('create_date', '<', now - timedelta(days=slow_days)),
+        ]).unlink()
+
+
+class RecordsSearchSlowQuery(models.Model):
+    _name = 'records.search.slow.query'
+    _description = 'Slow Search Query'
+    _order = 'create_date desc'
+    _rec_name = 'query_type'
+
+    query_type = fields.Char(string='Search Endpoint', required=True, index=True, readonly=True)
+    duration_ms = fields.Float(string='Duration (ms)', readonly=True)
+    statement_ms = fields.Float(string='Slowest Statement (ms)', readonly=True)
+    module_version = fields.Char(string='Module Version', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True, ondelete='set null')
+    params = fields.Text(string='Search Parameters', readonly=True)
+    statement = fields.Text(string='Slowest SQL Statement', readonly=True)
+    explain_plan = fields.Text(string='EXPLAIN (ANALYZE, BUFFERS)', readonly=True)
+
+    @api.model
+    def _explain(self, statement, params):
+        """
+        EXPLAIN (ANALYZE, BUFFERS) of a read-only statement on the current cursor.
+
+        ANALYZE executes the statement again, so only single plain SELECTs
+        are explained, inside a savepoint that is always rolled back (even
+        a function with side effects called by the SELECT leaves nothing).
+        """
+        head = statement.strip().rstrip(';').upper()
+        if not head.startswith('SELECT') or ';' in head or UNSAFE_EXPLAIN_RE.search(head):
+            return False
+        cr = self.env.cr
+        try:
+            with cr.savepoint(flush=False):
+                cr.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, params)
+                raise _ExplainDone("\n".join(row[0] for row in cr.fetchall()))
+        except _ExplainDone as done:
+            return done.plan
+        except psycopg2.Error as e:
+            _logger.debug("Search metrics: EXPLAIN failed (%s)", e)
+            return False
+
+    @api.model
+    def _record_slow_query(self, query_type, duration_ms, params=None, slowest=None):
+        """Store a slow search with the plan of its slowest statement (own transaction)"""
+        statement_ms, statement, statement_params = slowest or (0.0, False, None)
+        plan = self._explain(statement, statement_params) if statement else False
+        if statement:
+            try:
+                statement = self.env.cr.mogrify(statement, statement_params).decode()
+            except (psycopg2.Error, TypeError, ValueError):
+                pass  # keep the placeholders
+        try:
+            with self.pool.cursor() as cr:
+                SlowQuery = self.with_env(self.env(cr=cr)).sudo()
+                SlowQuery.create({
+                    'query_type': query_type,
+                    'duration_ms': duration_ms,
+                    'statement_ms': statement_ms,
+                    'module_version': SlowQuery.env['records.search.metric']._get_module_version(),
+                    'user_id': self.env.uid,
+                    'params': json.dumps(params, default=str) if params else False,
+                    'statement': statement or False,
+                    'explain_plan': plan,
+                })
+        except psycopg2.Error as e:
+            _logger.warning("Search metrics: could not store slow %s query (%s)", query_type, e)
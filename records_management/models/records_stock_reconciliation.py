@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Container / Stock Reconciliation
+
+Containers mirror their location on a stock.quant. The nightly job finds the
+containers whose location drifted from their quant's with one join, instead of
+reading every container and quant, and repairs them chunk by chunk:
+
+1. mismatches are selected in SQL, optionally only among containers or quants
+   changed since the last run (``write_date`` watermark),
+2. each chunk is repaired inside a savepoint with set-based writes (one write
+   per target location, one multi-create of adjustment movements, one batch
+   of chatter notes); a failing chunk is rolled back and reported without
+   stopping the run,
+3. quants of the container product that no container points to, and packages
+   that nothing uses any more, are counted and sampled in the report.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import _, api, fields, models
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Containers repaired per savepoint
+RECONCILE_CHUNK_SIZE = 500
+
+# A full (non-incremental) run is forced when the last one is older than this
+FULL_RECONCILE_DAYS = 7
+
+# Orphan ids kept in the report, per kind
+ORPHAN_SAMPLE_SIZE = 50
+
+# Re-check rows written slightly before the watermark: transactions that
+# started before the last run may commit after it with an older write_date
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+class RecordsStockReconciliation(models.Model):
+    _name = 'records.stock.reconciliation'
+    _description = 'Container / Stock Reconciliation Report'
+    _order = 'date_start desc, id desc'
+    _rec_name = 'date_start'
+
+    date_start = fields.Datetime(string='Started', required=True, readonly=True, default=fields.Datetime.now)
+    date_done = fields.Datetime(string='Finished', readonly=True)
+    mode = fields.Selection(
+        selection=[('full', 'Full'), ('incremental', 'Incremental')],
+        string='Mode',
+        required=True,
+        readonly=True,
+        default='full',
+    )
+    watermark = fields.Datetime(
+        string='Changes Since',
+        readonly=True,
+        help="Incremental runs only check containers and quants written after this date",
+    )
+    state = fields.Selection(
+        selection=[('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')],
+        string='Status',
+        required=True,
+        readonly=True,
+        default='running',
+    )
+    mismatch_count = fields.Integer(string='Mismatches', readonly=True)
+    repaired_count = fields.Integer(string='Repaired', readonly=True)
+    failed_count = fields.Integer(string='Not Repaired', readonly=True)
+    orphan_quant_count = fields.Integer(string='Orphaned Quants', readonly=True)
+    orphan_package_count = fields.Integer(string='Orphaned Packages', readonly=True)
+    details = fields.Json(
+        string='Details',
+        readonly=True,
+        help="{'orphan_quant_ids': [...], 'orphan_package_ids': [...], 'errors': [...]} (samples)",
+    )
+
+    # ============================================================================
+    # ENTRY POINTS
+    # ============================================================================
+    @api.model
+    def _cron_reconcile(self):
+        """Nightly run: incremental, with a full pass every FULL_RECONCILE_DAYS"""
+        last_full = self.search([('mode', '=', 'full'), ('state', '=', 'done')], limit=1)
+        full = not last_full or last_full.date_start < fields.Datetime.now() - timedelta(days=FULL_RECONCILE_DAYS)
+        return self.run(full=full)
+
+    @api.model
+    def run(self, full=True):
+        """
+        Reconcile container locations with their quants and record a report.
+
+        Args:
+            full (bool): check every container; otherwise only those changed
+                since shortly before the start of the last finished run
+
+        Returns:
+            records.stock.reconciliation: the report
+        """
+        watermark = False
+        if not full:
+            last_run = self.search([('state', '=', 'done')], limit=1)
+            watermark = last_run.date_start - WATERMARK_OVERLAP if last_run else False
+        report = self.sudo().create({
+            'mode': 'incremental' if watermark else 'full',
+            'watermark': watermark,
+        })
+        try:
+            with self.env.cr.savepoint():
+                report._reconcile()
+        except Exception as e:
+            _logger.error("Stock reconciliation %s failed: %s", report.id, e)
+            report.write({'state': 'failed', 'date_done': fields.Datetime.now(), 'details': {'errors': [str(e)]}})
+        return report
+
+    # ============================================================================
+    # ENGINE
+    # ============================================================================
+    def _get_change_filter(self, *aliases):
+        """SQL condition keeping the rows of any alias written since the watermark"""
+        if not self.watermark:
+            return SQL("TRUE")
+        return SQL("(%s)", SQL(" OR ").join(
+            SQL("%s >= %s", SQL.identifier(alias, 'write_date'), self.watermark) for alias in aliases
+        ))
+
+    def _find_mismatches(self):
+        """[(container id, container location id, quant location id)] of drifted containers"""
+        return self.env.execute_query(SQL("""
+            SELECT c.id, c.location_id, q.location_id
+              FROM records_container c
+              JOIN stock_quant q ON q.id = c.quant_id
+             WHERE c.location_id IS DISTINCT FROM q.location_id
+               AND q.location_id IS NOT NULL
+               AND %s
+          ORDER BY c.id
+        """, self._get_change_filter('c', 'q')))
+
+    def _repair_chunk(self, rows):
+        """Move a chunk of containers to their quant's location (set-based)"""
+        Container = self.env['records.container'].sudo()
+        Location = self.env['stock.location'].sudo()
+        containers_by_location = defaultdict(list)
+        for container_id, _old_location_id, quant_location_id in rows:
+            containers_by_location[quant_location_id].append(container_id)
+        for location_id, container_ids in containers_by_location.items():
+            Container.browse(container_ids).write({'location_id': location_id})
+
+        # Movement history and chatter, as the per-container sync records them
+        containers = Container.browse([row[0] for row in rows])
+        locations = Location.browse({location_id for row in rows for location_id in row[1:] if location_id})
+        names = {location.id: location.complete_name for location in locations}
+        self.env['records.stock.movement'].sudo().create([
+            {
+                'container_id': container.id,
+                'movement_type': 'adjustment',
+                'from_location_id': old_location_id,
+                'to_location_id': quant_location_id,
+                'quant_id': container.quant_id.id,
+                'user_id': self.env.user.id,
+                'state': 'confirmed',
+                'reason': 'Auto-sync with stock system. Previous location: %s' % names.get(old_location_id, 'Unknown'),
+            }
+            for container, (_container_id, old_location_id, quant_location_id) in zip(containers, rows)
+        ])
+        containers._message_log_batch(bodies={
+            container_id: _("Location automatically synchronized with stock system: %s → %s") % (
+                names.get(old_location_id, 'Unknown'), names.get(quant_location_id),
+            )
+            for container_id, old_location_id, quant_location_id in rows
+        })
+
+    def _find_orphan_quants(self):
+        """Quants of the container product that no container points to"""
+        return [row[0] for row in self.env.execute_query(SQL("""
+            SELECT q.id
+              FROM stock_quant q
+              JOIN product_product p ON p.id = q.product_id
+             WHERE p.default_code = 'RECORDS-CONTAINER'
+               AND NOT EXISTS (SELECT 1 FROM records_container c WHERE c.quant_id = q.id)
+               AND %s
+          ORDER BY q.id
+        """, self._get_change_filter('q')))]
+
+    def _find_orphan_packages(self):
+        """Packages no container, file folder, document or quant uses"""
+        return [row[0] for row in self.env.execute_query(SQL("""
+            SELECT pk.id
+              FROM stock_quant_package pk
+             WHERE NOT EXISTS (SELECT 1 FROM records_container c WHERE c.package_id = pk.id)
+               AND NOT EXISTS (SELECT 1 FROM records_file f WHERE f.package_id = pk.id)
+               AND NOT EXISTS (SELECT 1 FROM records_document d WHERE d.package_id = pk.id)
+               AND NOT EXISTS (SELECT 1 FROM stock_quant q WHERE q.package_id = pk.id)
+               AND %s
+          ORDER BY pk.id
+        """, self._get_change_filter('pk')))]
+
+    def _reconcile(self):
+        self.ensure_one()
+        mismatches = self._find_mismatches()
+        repaired = 0
+        errors = []
+        for start in range(0, len(mismatches), RECONCILE_CHUNK_SIZE):
+            rows = mismatches[start:start + RECONCILE_CHUNK_SIZE]
+            try:
+                with self.env.cr.savepoint():
+                    self._repair_chunk(rows)
+                repaired += len(rows)
+            except Exception as e:
+                _logger.warning("Stock reconciliation: chunk of %d containers from #%s not repaired: %s", len(rows), rows[0][0], e)
+                errors.append("Containers #%s-#%s: %s" % (rows[0][0], rows[-1][0], e))
+
+        orphan_quant_ids = self._find_orphan_quants()
+        orphan_package_ids = self._find_orphan_packages()
+        self.write({
+            'state': 'done',
+            'date_done': fields.Datetime.now(),
+            'mismatch_count': len(mismatches),
+            'repaired_count': repaired,
+            'failed_count': len(mismatches) - repaired,
+            'orphan_quant_count': len(orphan_quant_ids),
+            'orphan_package_count': len(orphan_package_ids),
+            'details': {
+                'orphan_quant_ids': orphan_quant_ids[:ORPHAN_SAMPLE_SIZE],
+                'orphan_package_ids': orphan_package_ids[:ORPHAN_SAMPLE_SIZE],
+                'errors': errors,
+            },
+        })
+        if mismatches or orphan_quant_ids or orphan_package_ids:
+            _logger.info(
+                "Stock reconciliation (%s): %d/%d containers repaired, %d orphaned quants, %d orphaned packages",
+                self.mode, repaired, len(mismatches), len(orphan_quant_ids), len(orphan_package_ids),
+            )
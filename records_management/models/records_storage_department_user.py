@@ -230,6 +230,26 @@ class RecordsStorageDepartmentUser(models.Model):
         # Default safe fallback
         return [('id', '!=', 0)]
 
+    # ============================================================================
+    # ORM METHODS
+    # ============================================================================
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['records.portal.access']._invalidate_snapshots()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'user_id', 'department_id', 'state', 'active'} & vals.keys():
+            self.env['records.portal.access']._invalidate_snapshots()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['records.portal.access']._invalidate_snapshots()
+        return res
+
     # ============================================================================
     # ACTION METHODS
     # ============================================================================
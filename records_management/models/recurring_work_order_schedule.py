@@ -371,6 +371,26 @@ class RecurringWorkOrderSchedule(models.Model):
             if schedule.end_date and schedule.start_date > schedule.end_date:
                 raise ValidationError(_("End date must be after start date."))
 
+    # ============================================================================
+    # ORM OVERRIDES
+    # ============================================================================
+    @api.model_create_multi
+    def create(self, vals_list):
+        schedules = super().create(vals_list)
+        self.env['records.calendar.feed']._invalidate_records(schedules)
+        return schedules
+
+    def write(self, vals):
+        calendar_feed = self.env['records.calendar.feed']
+        calendar_feed._invalidate_records(self, vals)
+        res = super().write(vals)
+        calendar_feed._invalidate_records(self, vals)
+        return res
+
+    def unlink(self):
+        self.env['records.calendar.feed']._invalidate_records(self)
+        return super().unlink()
+
     # ============================================================================
     # WORK ORDER GENERATION
     # ============================================================================
@@ -1240,6 +1240,12 @@ class ResPartner(models.Model):
         res = super().write(vals)
         if 'portal_access_level' in vals:
             self._apply_portal_groups()
+        # The portal access snapshots hold the users' commercial partner,
+        # which follows the parent of the contact (or of its ancestors)
+        if {'parent_id', 'is_company'} & vals.keys() and self.env['res.users'].sudo().with_context(
+            active_test=False,
+        ).search_count([('partner_id', 'child_of', self.ids)], limit=1):
+            self.env['records.portal.access']._invalidate_snapshots()
         return res
 
     po_number = fields.Char(string='Default PO Number', help='Default Purchase Order number for this contact. Will be used to prefill work orders.')
@@ -360,6 +360,10 @@ class ResUsers(models.Model):
         # Only apply if our custom profile was explicitly changed
         if 'records_user_profile' in vals and vals.get('records_user_profile'):
             self._apply_records_user_profile()
+        # Group changes clear the snapshots already; the company and the
+        # department assignments are part of them too
+        if {'partner_id', 'department_assignment_ids'} & vals.keys():
+            self.env['records.portal.access']._invalidate_snapshots()
         return res
 
     def _update_last_login(self):
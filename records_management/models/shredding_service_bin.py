@@ -1394,4 +1394,16 @@ class ShreddingServiceBin(models.Model):
             customer_name = bin_record.current_customer_id.name if bin_record.current_customer_id else 'Unassigned'
             bin_record._create_service_audit_log('bin_created',
                 _("Shredding bin created: %s - placed at %s") % (bin_record.barcode, customer_name))
+        self.env['records.calendar.feed']._invalidate_records(bins)
         return bins
+
+    def write(self, vals):
+        calendar_feed = self.env['records.calendar.feed']
+        calendar_feed._invalidate_records(self, vals)
+        res = super().write(vals)
+        calendar_feed._invalidate_records(self, vals)
+        return res
+
+    def unlink(self):
+        self.env['records.calendar.feed']._invalidate_records(self)
+        return super().unlink()
@@ -1,5 +1,21 @@
+from datetime import datetime, timedelta
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+# Billable service types counted as recycled paper
+RECYCLING_SERVICE_TYPES = ('tip', 'swap_out')
+
+# Shredding work order states whose shred boxes have been destroyed
+SHRED_BOX_DONE_STATES = ('completed', 'pending_billing', 'invoiced')
+
+# Fields of a service event that change the recycling statistics
+RECYCLING_STAT_FIELDS = ('service_customer_id', 'service_type', 'service_date', 'fill_level_at_service', 'bin_id')
+
+# Stored computed fields summed by the recycling statistics; they also change
+# through recomputes (e.g. a bin's weight capacity), which never call write()
+RECYCLING_STAT_COMPUTED_FIELDS = ('actual_weight_lbs',)
 
 
 class ShreddingServiceEvent(models.Model):
@@ -88,6 +104,7 @@ class ShreddingServiceEvent(models.Model):
     service_customer_id = fields.Many2one(
         comodel_name='res.partner',
         string="Service Customer",
+        index=True,
         help="Customer location where service was performed"
     )
 
@@ -481,4 +498,114 @@ class ShreddingServiceEvent(models.Model):
                 event.bin_id.write({
                     'last_service_date': event.service_date
                 })
+        self._invalidate_recycling_stats(events.service_customer_id.ids)
         return events
+
+    def write(self, vals):
+        if not any(fname in vals for fname in RECYCLING_STAT_FIELDS):
+            return super().write(vals)
+        partner_ids = set(self.service_customer_id.ids)
+        result = super().write(vals)
+        self._invalidate_recycling_stats(partner_ids | set(self.service_customer_id.ids))
+        return result
+
+    def _write(self, vals):
+        result = super()._write(vals)
+        if any(fname in vals for fname in RECYCLING_STAT_COMPUTED_FIELDS):
+            self._invalidate_recycling_stats(self.service_customer_id.ids)
+        return result
+
+    def unlink(self):
+        self._invalidate_recycling_stats(self.service_customer_id.ids)
+        return super().unlink()
+
+    # ============================================================================
+    # RECYCLING STATISTICS (customer dashboard)
+    # ============================================================================
+    @api.model
+    def _invalidate_recycling_stats(self, partner_ids):
+        """Drop the cached recycling statistics of these customers after commit"""
+        self.env['records.search.cache']._invalidate_partners(partner_ids)
+
+    @api.model
+    def get_recycling_stats(self, partner):
+        """
+        Paper recycling statistics of a customer (and its contacts), cached
+        per company until a service event or shred box line changes.
+
+        Entries are keyed by day, so the year/month/week buckets roll over
+        at midnight even without any change.
+        """
+        commercial_partner = partner.commercial_partner_id
+        now = fields.Datetime.now()
+        cache = self.env['records.search.cache']
+        params = {'day': fields.Date.to_string(now.date())}
+        stats = cache.get('recycling_stats', commercial_partner.id, '', params=params)
+        if stats is None:
+            stats = self._compute_recycling_stats(commercial_partner, now)
+            cache.put('recycling_stats', commercial_partner.id, '', stats, params=params)
+        return stats
+
+    @api.model
+    def _compute_recycling_stats(self, commercial_partner, now):
+        """All-time, year, month and week totals in one grouped query each"""
+        year_start = datetime(now.year, 1, 1)
+        month_start = datetime(now.year, now.month, 1)
+        week_start = datetime.combine(now.date() - timedelta(days=now.weekday()), datetime.min.time())
+
+        # Bin services (tips and swap outs), bucketed by service date
+        Event = self.sudo()
+        query = Event._search([
+            ('service_customer_id', 'child_of', commercial_partner.id),
+            ('service_type', 'in', list(RECYCLING_SERVICE_TYPES)),
+        ])
+        weight = Event._field_to_sql(Event._table, 'actual_weight_lbs', query)
+        service_date = Event._field_to_sql(Event._table, 'service_date', query)
+        [(total_lbs, bins_serviced, year_lbs, year_bins, month_lbs, month_bins,
+          week_lbs, week_bins)] = self.env.execute_query(query.select(
+            SQL("COALESCE(SUM(%s), 0)", weight),
+            SQL("COUNT(*)"),
+            *[
+                sql
+                for start in (year_start, month_start, week_start)
+                for sql in (
+                    SQL("COALESCE(SUM(%s) FILTER (WHERE %s >= %s), 0)", weight, service_date, start),
+                    SQL("COUNT(*) FILTER (WHERE %s >= %s)", service_date, start),
+                )
+            ],
+        ))
+
+        # Shred boxes destroyed (customer-supplied boxes)
+        Line = self.env['work.order.line'].sudo()
+        line_query = Line._search([
+            ('shredding_work_order_id.partner_id', 'child_of', commercial_partner.id),
+            ('line_type', '=', 'shred_box'),
+            ('shredding_work_order_id.state', 'in', list(SHRED_BOX_DONE_STATES)),
+        ])
+        [(shred_boxes_qty,)] = self.env.execute_query(line_query.select(
+            SQL("COALESCE(SUM(%s), 0)", Line._field_to_sql(Line._table, 'quantity', line_query)),
+        ))
+        shred_boxes_qty = int(shred_boxes_qty)
+
+        # Environmental impact estimates
+        # ~3.5 lbs CO2 saved per lb of paper recycled (vs landfill)
+        co2_saved_lbs = round(total_lbs * 3.5, 1)
+        # ~1 tree saved per 1,000 lbs paper recycled
+        trees_saved = round(total_lbs / 1000, 1)
+
+        return {
+            'total_lbs': round(total_lbs, 1),
+            'year_lbs': round(year_lbs, 1),
+            'month_lbs': round(month_lbs, 1),
+            'week_lbs': round(week_lbs, 1) if week_lbs else None,
+            'bins_serviced': bins_serviced,
+            'year_bins': year_bins,
+            'month_bins': month_bins,
+            'week_bins': week_bins or None,
+            'shred_boxes_qty': shred_boxes_qty,
+            'service_count': bins_serviced + shred_boxes_qty,
+            'co2_saved_lbs': co2_saved_lbs,
+            'trees_saved': trees_saved,
+            'current_year': now.year,
+            'current_month': now.strftime('%B'),
+        }
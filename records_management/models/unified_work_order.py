@@ -11,8 +11,51 @@ Version: 18.0.1.0.0
 License: LGPL-3
 """
 
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools import SQL, sql, str2bool
+
+_logger = logging.getLogger(__name__)
+
+# Source models of the unified view and the fields their rows are built from
+UNIFIED_SOURCES = {
+    'work.order.retrieval': {
+        'name', 'state', 'priority', 'partner_id', 'scheduled_date', 'completion_date',
+        'portal_request_id', 'portal_visible', 'user_id', 'active',
+    },
+    'work.order.shredding': {
+        'name', 'display_name', 'state', 'priority', 'partner_id', 'scheduled_date',
+        'completion_date', 'portal_request_id', 'portal_visible', 'active',
+    },
+    'container.access.work.order': {
+        'name', 'state', 'priority', 'partner_id', 'scheduled_access_date', 'actual_end_time',
+        'portal_request_id', 'portal_visible', 'user_id', 'active',
+    },
+}
+
+# System parameter switching the unified relation to an indexed table
+MATERIALIZED_PARAM = 'records_management.unified_work_order.materialized'
+
+# Transaction-level queue of source rows to refresh
+REFRESH_KEY = 'unified.work.order.refresh'
+
+# Coordinator board columns and the source states each one collects
+COORDINATOR_COLUMNS = {
+    'pending': ('draft', 'confirmed', 'authorized'),
+    'scheduled': ('scheduled', 'assigned'),
+    'in_progress': ('in_progress',),
+    'completed': ('completed', 'verified', 'certified'),
+}
+
+# States that no longer count as upcoming work
+CLOSED_STATES = ('completed', 'verified', 'certified', 'invoiced', 'cancelled')
+
+# Days ahead counted as "upcoming" on the coordinator board
+UPCOMING_DAYS = 7
 
 
 class UnifiedWorkOrder(models.Model):
@@ -123,17 +166,25 @@ class UnifiedWorkOrder(models.Model):
     # DATABASE VIEW CREATION
     # ============================================================================
     def init(self):
-        """Create the SQL view that unions all work order types."""
-        # Drop the view if it exists
-        self.env.cr.execute("DROP VIEW IF EXISTS unified_work_order CASCADE")
-
-        # Create the unified view
-        # Use numeric IDs: type_offset + source_id
-        # Offsets: retrieval=1000000, shredding=2000000, destruction=3000000, access=4000000
-        self.env.cr.execute("""
-            CREATE OR REPLACE VIEW unified_work_order AS (
-                -- Retrieval Work Orders (IDs: 1,000,001 - 1,999,999)
-                SELECT 
+        """
+        Create the relation that unions all work order types: a plain view,
+        or in materialized mode an indexed table whose rows are refreshed
+        whenever their source work order changes.
+        """
+        self._setup_storage()
+
+    @api.model
+    def _get_source_queries(self):
+        """
+        One SELECT per source model, all with the same columns.
+
+        Use numeric IDs: type_offset + source_id
+        Offsets: retrieval=1000000, shredding=2000000, destruction=3000000, access=4000000
+        """
+        return {
+            # Retrieval Work Orders (IDs: 1,000,001 - 1,999,999)
+            'work.order.retrieval': SQL("""
+                SELECT
                     (1000000 + wo.id)::bigint AS id,
                     wo.name,
                     COALESCE(wo.name, 'Retrieval #' || wo.id::text) AS display_name,
@@ -152,11 +203,10 @@ class UnifiedWorkOrder(models.Model):
                     wo.user_id
                 FROM work_order_retrieval wo
                 WHERE wo.active = true OR wo.active IS NULL
-                
-                UNION ALL
-                
-                -- Shredding Work Orders (IDs: 2,000,001 - 2,999,999)
-                SELECT 
+            """),
+            # Shredding Work Orders (IDs: 2,000,001 - 2,999,999)
+            'work.order.shredding': SQL("""
+                SELECT
                     (2000000 + wo.id)::bigint AS id,
                     wo.name,
                     COALESCE(wo.display_name, wo.name, 'Shredding #' || wo.id::text) AS display_name,
@@ -175,11 +225,10 @@ class UnifiedWorkOrder(models.Model):
                     NULL::integer AS user_id
                 FROM work_order_shredding wo
                 WHERE wo.active = true OR wo.active IS NULL
-                
-                UNION ALL
-                
-                -- Container Access Work Orders (IDs: 4,000,001 - 4,999,999)
-                SELECT 
+            """),
+            # Container Access Work Orders (IDs: 4,000,001 - 4,999,999)
+            'container.access.work.order': SQL("""
+                SELECT
                     (4000000 + wo.id)::bigint AS id,
                     wo.name,
                     COALESCE(wo.name, 'Access #' || wo.id::text) AS display_name,
@@ -198,9 +247,199 @@ class UnifiedWorkOrder(models.Model):
                     wo.user_id
                 FROM container_access_work_order wo
                 WHERE wo.active = true OR wo.active IS NULL
-            )
+            """),
+        }
+
+    @api.model
+    def _get_union_query(self):
+        return SQL(" UNION ALL ").join(self._get_source_queries().values())
+
+    @api.model
+    def _is_materialized_requested(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return str2bool(ICP.get_param(MATERIALIZED_PARAM, 'False'))
+
+    @api.model
+    def _is_materialized(self):
+        """True when the relation actually is the table (whatever the parameter says)"""
+        return sql.table_kind(self.env.cr, self._table) == sql.TableKind.Regular
+
+    @api.model
+    def _setup_storage(self):
+        """(Re)create the view, or the materialized table and its indexes"""
+        cr = self.env.cr
+        kind = sql.table_kind(cr, self._table)
+        if kind == sql.TableKind.Regular:
+            cr.execute(SQL("DROP TABLE %s CASCADE", SQL.identifier(self._table)))
+        elif kind == sql.TableKind.View:
+            cr.execute(SQL("DROP VIEW %s CASCADE", SQL.identifier(self._table)))
+
+        if not self._is_materialized_requested():
+            cr.execute(SQL("CREATE VIEW %s AS (%s)", SQL.identifier(self._table), self._get_union_query()))
+            return
+
+        cr.execute(SQL("CREATE TABLE %s AS (%s)", SQL.identifier(self._table), self._get_union_query()))
+        cr.execute("""
+            ALTER TABLE unified_work_order ADD PRIMARY KEY (id);
+            CREATE UNIQUE INDEX unified_work_order_source_uniq ON unified_work_order (source_model, source_id);
+            CREATE INDEX unified_work_order_scheduled_idx ON unified_work_order (scheduled_date, priority);
+            CREATE INDEX unified_work_order_partner_idx ON unified_work_order (partner_id, scheduled_date);
+            CREATE INDEX unified_work_order_state_idx ON unified_work_order (state);
+            CREATE INDEX unified_work_order_type_idx ON unified_work_order (work_order_type);
+            ANALYZE unified_work_order;
         """)
 
+    @api.model
+    def _sync_storage(self):
+        """Rebuild the relation if it does not match the system parameter"""
+        if self._is_materialized() == self._is_materialized_requested():
+            return False
+        self._setup_storage()
+        self.invalidate_model()
+        return True
+
+    @api.model
+    def _set_materialized(self, enabled):
+        """Switch between the plain view and the materialized table"""
+        self.env['ir.config_parameter'].sudo().set_param(MATERIALIZED_PARAM, bool(enabled))
+        self._sync_storage()
+
+    # ============================================================================
+    # MATERIALIZED MODE: ROW REFRESH
+    # ============================================================================
+    @api.model
+    def _refresh_sources(self, records, vals=None):
+        """
+        Queue the unified rows of source work orders for refresh; the rows are
+        rewritten once per transaction, right before commit, after the ORM
+        has flushed (stored computes such as display_name included).
+
+        Args:
+            records: work orders of one of the UNIFIED_SOURCES models
+            vals (dict): written values; writes not touching a unified column
+                are ignored
+        """
+        if not records:
+            return
+        if vals is not None and not UNIFIED_SOURCES[records._name].intersection(vals):
+            return
+        if not self._is_materialized():
+            return
+        data = self.env.cr.precommit.data
+        if REFRESH_KEY not in data:
+            data[REFRESH_KEY] = defaultdict(set)
+            self.env.cr.precommit.add(self._flush_refresh)
+        data[REFRESH_KEY][records._name].update(records.ids)
+
+    @api.model
+    def _flush_refresh(self):
+        pending = self.env.cr.precommit.data.pop(REFRESH_KEY, {})
+        for model_name, source_ids in pending.items():
+            self._refresh_rows(model_name, source_ids)
+
+    @api.model
+    def _refresh_rows(self, model_name, source_ids):
+        """Rewrite the unified rows of some source work orders (deleted or archived ones are dropped)"""
+        source_ids = tuple(source_ids)
+        if not source_ids:
+            return
+        self.env.execute_query(SQL(
+            "DELETE FROM unified_work_order WHERE source_model = %s AND source_id IN %s",
+            model_name, source_ids,
+        ))
+        self.env.execute_query(SQL(
+            "INSERT INTO unified_work_order SELECT * FROM (%s) AS src WHERE src.source_id IN %s",
+            self._get_source_queries()[model_name], source_ids,
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _cron_check_consistency(self):
+        """
+        Compare the materialized table with the live union and repair the
+        rows that drifted (e.g. a partner renamed under a shredding order's
+        stored display name, or SQL-level changes that bypassed the ORM).
+
+        Returns:
+            int: number of repaired work orders
+        """
+        # The parameter may have been edited by hand (System Parameters)
+        self._sync_storage()
+        if not self._is_materialized():
+            return 0
+        union = self._get_union_query()
+        rows = self.env.execute_query(SQL("""
+            SELECT DISTINCT source_model, source_id FROM (
+                (SELECT * FROM (%s) AS src EXCEPT SELECT * FROM unified_work_order)
+                UNION ALL
+                (SELECT * FROM unified_work_order EXCEPT SELECT * FROM (%s) AS src)
+            ) AS drift
+        """, union, union))
+        drifted = defaultdict(set)
+        for model_name, source_id in rows:
+            drifted[model_name].add(source_id)
+        for model_name, source_ids in drifted.items():
+            self._refresh_rows(model_name, source_ids)
+        if rows:
+            _logger.warning("Unified work orders: repaired %d drifted rows", len(rows))
+        return len(rows)
+
+    # ============================================================================
+    # PORTAL SUMMARY
+    # ============================================================================
+    @api.model
+    def get_coordinator_summary(self, domain):
+        """
+        Summary figures of the work orders matching a domain, in one grouped
+        query: the cost depends on the number of (state, type) pairs, not on
+        the number of work orders.
+
+        Returns:
+            dict: {
+                'total': int,
+                'states': {state: count},
+                'types': {work_order_type: count},
+                'columns': {coordinator column: count} (see COORDINATOR_COLUMNS),
+                'upcoming': open work orders scheduled in the next UPCOMING_DAYS,
+            }
+        """
+        query = self._search(domain)
+        alias = query.table
+        scheduled_date = SQL.identifier(alias, 'scheduled_date')
+        state = SQL.identifier(alias, 'state')
+        query.groupby = SQL("%s, %s", state, SQL.identifier(alias, 'work_order_type'))
+        now = fields.Datetime.now()
+        rows = self.env.execute_query(query.select(
+            state,
+            SQL.identifier(alias, 'work_order_type'),
+            SQL("COUNT(*)"),
+            SQL(
+                "COUNT(*) FILTER (WHERE %s >= %s AND %s < %s AND %s NOT IN %s)",
+                scheduled_date, now, scheduled_date, now + timedelta(days=UPCOMING_DAYS),
+                state, CLOSED_STATES,
+            ),
+        ))
+
+        summary = {
+            'total': 0,
+            'states': {},
+            'types': {},
+            'columns': dict.fromkeys(COORDINATOR_COLUMNS, 0),
+            'upcoming': 0,
+        }
+        column_of_state = {
+            wo_state: column for column, states in COORDINATOR_COLUMNS.items() for wo_state in states
+        }
+        for wo_state, wo_type, count, upcoming in rows:
+            wo_state = wo_state or 'draft'
+            summary['total'] += count
+            summary['upcoming'] += upcoming
+            summary['states'][wo_state] = summary['states'].get(wo_state, 0) + count
+            summary['types'][wo_type or 'other'] = summary['types'].get(wo_type or 'other', 0) + count
+            if wo_state in column_of_state:
+                summary['columns'][column_of_state[wo_state]] += count
+        return summary
+
     # ============================================================================
     # ACTION METHODS
     # ============================================================================
@@ -227,3 +466,28 @@ class UnifiedWorkOrder(models.Model):
             'view_mode': 'form',
             'target': 'current',
         }
+
+
+class IrConfigParameter(models.Model):
+    _inherit = 'ir.config_parameter'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if any(vals.get('key') == MATERIALIZED_PARAM for vals in vals_list):
+            self.env['unified.work.order']._sync_storage()
+        return records
+
+    def write(self, vals):
+        keys = set(self.mapped('key')) | {vals.get('key')}
+        res = super().write(vals)
+        if MATERIALIZED_PARAM in keys:
+            self.env['unified.work.order']._sync_storage()
+        return res
+
+    def unlink(self):
+        materialized = MATERIALIZED_PARAM in self.mapped('key')
+        res = super().unlink()
+        if materialized:
+            self.env['unified.work.order']._sync_storage()
+        return res
@@ -153,6 +153,35 @@ class WorkOrderLine(models.Model):
     
     notes = fields.Text(string="Notes")
     
+    # ============================================================================
+    # ORM OVERRIDES
+    # ============================================================================
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines._invalidate_recycling_stats()
+        return lines
+
+    def write(self, vals):
+        if not {'line_type', 'quantity', 'shredding_work_order_id'} & set(vals):
+            return super().write(vals)
+        self._invalidate_recycling_stats()
+        result = super().write(vals)
+        self._invalidate_recycling_stats()
+        return result
+
+    def unlink(self):
+        self._invalidate_recycling_stats()
+        return super().unlink()
+
+    def _invalidate_recycling_stats(self):
+        """Shred box lines feed the customer's recycling statistics"""
+        shred_box_lines = self.filtered(lambda line: line.line_type == 'shred_box')
+        if shred_box_lines:
+            self.env['shredding.service.event']._invalidate_recycling_stats(
+                shred_box_lines.shredding_work_order_id.partner_id.ids
+            )
+
     # ============================================================================
     # COMPUTE METHODS
     # ============================================================================
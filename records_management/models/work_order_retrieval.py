@@ -250,7 +250,18 @@ class WorkOrderRetrieval(models.Model):
         for vals in vals_list:
             if vals.get('name', _('New')) == _('New'):
                 vals['name'] = self.env['ir.sequence'].next_by_code('work.order.retrieval') or _('New')
-        return super().create(vals_list)
+        records = super().create(vals_list)
+        self.env['unified.work.order']._refresh_sources(records)
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        self.env['unified.work.order']._refresh_sources(self, vals)
+        return result
+
+    def unlink(self):
+        self.env['unified.work.order']._refresh_sources(self)
+        return super().unlink()
 
     # ===================== CRUD / DISPLAY HELPERS =====================
     # Deprecated name_get in Odoo 19; rely on computed display_name
@@ -463,6 +463,7 @@ class WorkOrderShredding(models.Model):
                 vals['name'] = self.env['ir.sequence'].next_by_code('work.order.shredding') or _('New')
         
         records = super().create(vals_list)
+        self.env['unified.work.order']._refresh_sources(records)
         
         # Approve portal requests when linked during creation
         for record in records:
@@ -489,6 +490,13 @@ class WorkOrderShredding(models.Model):
             vals.setdefault('completion_date', fields.Datetime.now())
         
         result = super().write(vals)
+        self.env['unified.work.order']._refresh_sources(self, vals)
+
+        # Completing (or reopening) an order changes which shred boxes count as destroyed
+        if 'state' in vals:
+            self.env['shredding.service.event']._invalidate_recycling_stats(
+                self.filtered(lambda order: order.line_ids.filtered(lambda l: l.line_type == 'shred_box')).partner_id.ids
+            )
         
         # Approve portal request when linked to work order
         if portal_request_to_approve and portal_request_to_approve.state in ['draft', 'submitted', 'pending']:
@@ -502,6 +510,10 @@ class WorkOrderShredding(models.Model):
         
         return result
 
+    def unlink(self):
+        self.env['unified.work.order']._refresh_sources(self)
+        return super().unlink()
+
     # ============================================================================
     # ACTION METHODS
     # ============================================================================
@@ -6,7 +6,7 @@
  * 
  * ARCHITECTURE:
  * - Uses FullCalendar library (loaded via CDN in template)
- * - Fetches events from /my/calendar/events JSON endpoint
+ * - Fetches events from the /my/calendar/feed JSON endpoint (ETag revalidated)
  * - No Odoo dependencies (vanilla JS only)
  * 
  * CONVERSION NOTES (Odoo 18):
@@ -128,20 +128,15 @@
         }
 
         _fetchEvents(start, end) {
-            return fetch('/my/calendar/events', {
-                method: 'POST',
+            // Plain GET: the browser revalidates with the feed's ETag and
+            // reuses its cached copy on 304 Not Modified
+            const params = new URLSearchParams({ start: start, end: end });
+            return fetch('/my/calendar/feed?' + params.toString(), {
+                method: 'GET',
+                credentials: 'same-origin',
                 headers: {
-                    'Content-Type': 'application/json',
+                    'Accept': 'application/json',
                 },
-                body: JSON.stringify({
-                    jsonrpc: '2.0',
-                    method: 'call',
-                    params: {
-                        start: start,
-                        end: end
-                    },
-                    id: Math.floor(Math.random() * 1000000)
-                })
             })
             .then(function(response) {
                 if (!response.ok) {
@@ -150,11 +145,7 @@
                 return response.json();
             })
             .then(function(data) {
-                if (data.error) {
-                    throw new Error(data.error.message || 'Server error');
-                }
-                // Return the result array (or empty array if null)
-                return data.result || [];
+                return data || [];
             });
         }
 
@@ -5,3 +5,25 @@ from . import test_hard_drive_scanning  # Hard drive scanning workflow tests
 from . import test_records_location  # Records location functionality tests
 from . import test_records_management  # Core records management functionality tests
 from . import test_records_management_basic_tour  # Basic JS tour navigation test
+from . import test_records_search_engine  # Portal full-text search engine tests
+from . import test_records_search_cache  # Shared search result cache tests
+from . import test_records_saved_search  # Materialized saved search presets
+from . import test_records_container_autocomplete  # In-memory container autocomplete index
+from . import test_records_search_metric  # Search latency histograms and regression report
+from . import test_records_inventory_counter  # Trigger-maintained inventory counters
+from . import test_recycling_stats  # SQL-aggregated, cached recycling statistics
+from . import test_records_export_engine  # Streaming CSV/XLSX exports
+from . import test_records_export_job  # Background export jobs
+from . import test_records_portal_access  # Cached portal roles, permissions and department scope
+from . import test_records_portal_inventory  # Paginated inventory dashboard sections
+from . import test_records_attachment_index  # Batched scan lookups
+from . import test_records_calendar_feed  # Indexed portal calendar feed
+from . import test_unified_work_order_summary  # Coordinator board summary query
+from . import test_unified_work_order_materialized  # Materialized unified work orders
+from . import test_portal_downloads  # Conditional and range portal downloads
+from . import test_records_container_bulk_create  # Batched container creation
+from . import test_records_container_state_propagation  # Set-based container to folder state sync
+from . import test_records_stock_reconciliation  # Container / stock reconciliation engine
+from . import test_records_barcode_allocator  # Shared temp barcode allocator
+from . import test_records_container_counter  # Trigger-maintained container document/file counts
+from . import test_records_inventory_search  # Unified inventory search ranking and facets
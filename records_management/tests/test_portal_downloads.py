@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import base64
+
+from odoo.tests import HttpCase, tagged
+
+
+@tagged('-at_install', 'post_install')
+class TestPortalDownloads(HttpCase):
+
+    def setUp(self):
+        super().setUp()
+        self.partner = self.env['res.partner'].create({'name': 'Download Customer', 'is_company': True})
+        self.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Download Portal User',
+            'login': 'portal_download_user',
+            'password': 'portal_download_user',
+            'partner_id': self.partner.id,
+            'groups_id': [(6, 0, [self.env.ref('base.group_portal').id])],
+        })
+        document = self.env['records.document'].create({'name': 'DOWNLOAD-DOC', 'partner_id': self.partner.id})
+        self.attachment = self.env['ir.attachment'].create({
+            'name': 'scan.pdf',
+            'res_model': 'records.document',
+            'res_id': document.id,
+            'datas': base64.b64encode(b'%PDF-1.4 scanned pages'),
+            'mimetype': 'application/pdf',
+        })
+        self.url = '/my/document/%s/download' % document.id
+        self.authenticate('portal_download_user', 'portal_download_user')
+
+    def test_conditional_and_range_download(self):
+        response = self.url_open(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'%PDF-1.4 scanned pages')
+        self.assertEqual(response.headers['ETag'], '"%s"' % self.attachment.checksum)
+
+        response = self.url_open(self.url, headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.url_open(self.url, headers={'Range': 'bytes=0-7'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, b'%PDF-1.4')
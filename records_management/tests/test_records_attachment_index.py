@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import base64
+
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsAttachmentIndex(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Index = cls.env['records.attachment.index']
+        partner = cls.env['res.partner'].create({'name': 'Scan Customer', 'is_company': True})
+        cls.documents = cls.env['records.document'].create([
+            {'name': 'SCAN-DOC-1', 'partner_id': partner.id},
+            {'name': 'SCAN-DOC-2', 'partner_id': partner.id},
+        ])
+
+    def _attach(self, document, name, mimetype):
+        return self.env['ir.attachment'].create({
+            'name': name,
+            'res_model': 'records.document',
+            'res_id': document.id,
+            'datas': base64.b64encode(b'scan'),
+            'mimetype': mimetype,
+        })
+
+    def test_scans_grouped_per_record(self):
+        first = self._attach(self.documents[0], 'first.pdf', 'application/pdf')
+        latest = self._attach(self.documents[0], 'second.pdf', 'application/pdf')
+        self._attach(self.documents[0], 'photo.png', 'image/png')
+
+        scans = self.Index.get_scans(self.documents)
+        self.assertEqual(scans[self.documents[0].id], latest | first)
+        self.assertFalse(scans[self.documents[1].id])
+        self.assertEqual(self.Index.get_counts(self.documents), {self.documents[0].id: 2, self.documents[1].id: 0})
+
+        entry = self.Index.lookup([('records.document', self.documents[0].id)])[('records.document', self.documents[0].id)]
+        self.assertEqual(entry['latest'], latest)
+        self.assertEqual(entry['preview_url'], '/web/content/%s' % latest.id)
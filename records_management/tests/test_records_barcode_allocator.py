@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from psycopg2 import IntegrityError
+
+from odoo.tests.common import TransactionCase
+from odoo.tools import mute_logger
+
+
+class TestRecordsBarcodeAllocator(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.allocator = cls.env['records.barcode.allocator']
+        cls.partner = cls.env['res.partner'].create({'name': 'Allocator Customer', 'is_company': True})
+        cls.container = cls.env['records.container'].create({'name': 'ALLOC-BOX', 'partner_id': cls.partner.id})
+
+    def test_allocations_never_overlap(self):
+        first = self.allocator.allocate('container', 80)
+        second = self.allocator.allocate('container', 3)
+        self.assertEqual(len(set(first + second)), 83)
+        self.assertTrue(all(barcode.startswith('TMP') for barcode in first + second))
+
+        numbers = self.allocator.allocate_numbers('file', 14)
+        self.assertEqual(len(set(numbers)), 14)
+        self.assertFalse(set(self.allocator.allocate_numbers('file', 14)) & set(numbers))
+
+    def test_file_batch_gets_unique_temp_barcodes(self):
+        files = self.env['records.file'].create([
+            {'name': 'Folder %s' % index, 'partner_id': self.partner.id, 'container_id': self.container.id}
+            for index in range(5)
+        ] + [{'name': 'Loose folder', 'partner_id': self.partner.id}])
+        barcodes = files.mapped('temp_barcode')
+        self.assertEqual(len(set(barcodes)), 6)
+        self.assertTrue(all(barcode.startswith('ALLOC-BOX-FILE-') for barcode in barcodes[:5]))
+        self.assertTrue(barcodes[5].startswith('FILE-'))
+
+        with mute_logger('odoo.sql_db'), self.assertRaises(IntegrityError), self.env.cr.savepoint():
+            self.env['records.file'].create({'name': 'Duplicate', 'partner_id': self.partner.id, 'temp_barcode': barcodes[0]})
+
+        # Scoped per company, like containers and documents
+        other_company = self.env['res.company'].create({'name': 'Allocator Branch'})
+        other = self.env['records.file'].create({
+            'name': 'Branch folder', 'partner_id': self.partner.id, 'temp_barcode': barcodes[0], 'company_id': other_company.id,
+        })
+        self.assertEqual(other.temp_barcode, barcodes[0])
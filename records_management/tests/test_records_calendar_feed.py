@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.records_management.models.records_calendar_feed import CALENDAR_HORIZON_DAYS
+
+
+class TestRecordsCalendarFeed(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Feed = cls.env['records.calendar.feed']
+        cls.partner = cls.env['res.partner'].create({'name': 'Calendar Customer', 'is_company': True, 'customer_rank': 1})
+        cls.today = fields.Date.context_today(cls.Feed)
+        cls.schedule = cls.env['recurring.work.order.schedule'].create({
+            'name': 'Weekly Bin Service',
+            'partner_id': cls.partner.id,
+            'service_category': 'destruction',
+            'work_order_type': 'shredding',
+            'interval_type': 'weekly',
+            'start_date': cls.today,
+        })
+
+    def test_recurrences_expanded_to_horizon(self):
+        feed = self.Feed._get_feed(self.partner)
+        now = datetime.combine(self.today, datetime.min.time())
+        events = feed.get_events(now, now + timedelta(days=CALENDAR_HORIZON_DAYS + 30))
+        self.assertEqual(len(events), CALENDAR_HORIZON_DAYS // 7 + 1)
+        self.assertTrue(all(event['extendedProps']['type'] == 'shredding' for event in events))
+
+        # [start, end) window: only the first two weekly occurrences
+        self.assertEqual(len(feed.get_events(now, now + timedelta(days=8))), 2)
+
+    def test_generation_bump_rebuilds_and_changes_etag(self):
+        feed = self.Feed._get_feed(self.partner)
+        etag = feed.get_etag('a', 'b')
+        self.assertEqual(self.Feed._get_feed(self.partner).get_etag('a', 'b'), etag)
+
+        self.schedule.end_date = self.today + timedelta(days=10)
+        # The bump normally runs after commit
+        self.env.cr.execute(
+            "UPDATE records_calendar_feed SET generation = generation + 1 WHERE id = %s", (feed.id,)
+        )
+        feed.invalidate_recordset()
+        feed = self.Feed._get_feed(self.partner)
+        self.assertNotEqual(feed.get_etag('a', 'b'), etag)
+        self.assertEqual(feed.event_count, 2)
+
+    def test_ics_rendering(self):
+        feed = self.Feed._get_feed(self.partner)
+        now = datetime.combine(self.today, datetime.min.time())
+        ics = feed.render_ics(now, now + timedelta(days=8))
+        self.assertTrue(ics.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(ics.count('BEGIN:VEVENT'), 2)
+        self.assertIn('SUMMARY:Weekly Bin Service', ics)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsContainerAutocomplete(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.autocomplete = cls.env['records.container.autocomplete']
+        cls.partner = cls.env['res.partner'].create({'name': 'Autocomplete Customer', 'is_company': True})
+        cls.other_partner = cls.env['res.partner'].create({'name': 'Other Autocomplete Customer', 'is_company': True})
+        Container = cls.env['records.container']
+        cls.box_4511 = Container.create({'name': '4511', 'partner_id': cls.partner.id, 'barcode': 'RM0004511'})
+        cls.box_4512 = Container.create({'name': '4512', 'partner_id': cls.partner.id})
+        cls.box_4589 = Container.create({'name': '4589', 'partner_id': cls.partner.id})
+        cls.foreign_box = Container.create({'name': '4513', 'partner_id': cls.other_partner.id})
+
+    def _suggest(self, query, **kwargs):
+        return self.autocomplete.suggest(query, partner_id=self.partner.id, **kwargs)
+
+    def _bump(self):
+        # Same statement as the post-commit invalidation, on the test cursor
+        self.env.flush_all()
+        self.env.cr.execute("""
+            INSERT INTO records_search_cache_generation (partner_id, generation) VALUES (%s, 1)
+            ON CONFLICT (partner_id) DO UPDATE SET generation = records_search_cache_generation.generation + 1
+        """, (self.partner.id,))
+
+    def test_prefix_matches_are_scoped_and_sorted(self):
+        matches = self._suggest('45')
+        self.assertEqual(
+            matches,
+            [(self.box_4511.id, 'prefix'), (self.box_4512.id, 'prefix'), (self.box_4589.id, 'prefix')],
+        )
+        self.assertEqual(self._suggest('rm-000'), [(self.box_4511.id, 'prefix')])
+
+    def test_one_typo_is_tolerated(self):
+        # substitution, transposition and a missing digit
+        self.assertIn((self.box_4589.id, 'fuzzy'), self._suggest('4598'))
+        self.assertIn((self.box_4511.id, 'fuzzy'), self._suggest('4s11'))
+        self.assertEqual(self._suggest('4xy1'), [])
+
+    def test_index_follows_container_writes(self):
+        self._suggest('45')
+        self.box_4589.write({'name': '7789'})
+        self.box_4512.write({'active': False})
+        self._bump()
+        self.assertEqual(self._suggest('45'), [(self.box_4511.id, 'prefix')])
+        self.assertEqual(self._suggest('778'), [(self.box_4589.id, 'prefix')])
+
+    def test_reassigned_container_leaves_old_scope(self):
+        self.assertIn((self.box_4512.id, 'prefix'), self._suggest('45'))
+        self.box_4512.write({'partner_id': self.other_partner.id})
+        self._bump()
+        self.assertEqual(self._suggest('45', limit=2), [(self.box_4511.id, 'prefix'), (self.box_4589.id, 'prefix')])
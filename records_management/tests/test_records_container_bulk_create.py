@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsContainerBulkCreate(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Bulk Import Customer', 'is_company': True})
+        cls.manager = cls.env['res.users'].create({'name': 'Department Owner', 'login': 'bulk_department_owner'})
+        cls.department = cls.env['records.department'].create({
+            'name': 'Bulk Department',
+            'code': 'BULK',
+            'partner_id': cls.partner.id,
+            'user_id': cls.manager.id,
+        })
+
+    def test_portal_batch_gets_unique_temp_barcodes_and_packages(self):
+        containers = self.env['records.container'].create([
+            {
+                'name': 'BULK-%03d' % index,
+                'partner_id': self.partner.id,
+                'department_id': self.department.id,
+                'created_via_portal': True,
+            }
+            for index in range(50)
+        ])
+        barcodes = containers.mapped('temp_barcode')
+        self.assertEqual(len(set(barcodes)), 50)
+        self.assertTrue(all(barcodes))
+        self.assertEqual(containers.mapped('package_id.name'), barcodes)
+        self.assertEqual(containers.user_id, self.manager)
+        self.assertEqual(containers.stock_owner_id, self.partner)
+
+    def test_existing_package_is_reused(self):
+        package = self.env['stock.quant.package'].create({'name': 'BULK-PHYSICAL-1'})
+        containers = self.env['records.container'].create([
+            {'name': 'BULK-A', 'partner_id': self.partner.id, 'barcode': 'BULK-PHYSICAL-1'},
+            {'name': 'BULK-B', 'partner_id': self.partner.id, 'barcode': 'BULK-PHYSICAL-2'},
+        ])
+        self.assertEqual(containers[0].package_id, package)
+        self.assertEqual(containers[1].package_id.name, 'BULK-PHYSICAL-2')
+
+        containers[1].barcode = 'BULK-PHYSICAL-3'
+        self.assertEqual(containers[1].package_id.name, 'BULK-PHYSICAL-3')
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsContainerCounter(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Counter Customer', 'is_company': True})
+        cls.box_a, cls.box_b = cls.env['records.container'].create([
+            {'name': 'COUNT-A', 'partner_id': cls.partner.id},
+            {'name': 'COUNT-B', 'partner_id': cls.partner.id},
+        ])
+
+    def test_counters_follow_create_move_archive_unlink(self):
+        files = self.env['records.file'].create([
+            {'name': 'Counted folder %s' % index, 'partner_id': self.partner.id, 'container_id': self.box_a.id}
+            for index in range(3)
+        ])
+        documents = self.env['records.document'].create([
+            {'name': 'Counted doc %s' % index, 'partner_id': self.partner.id, 'file_id': files[0].id}
+            for index in range(4)
+        ])
+        self.env.flush_all()
+        self.assertEqual((self.box_a.file_count, self.box_a.document_count), (3, 4))
+
+        # Moving a folder moves its documents (stored related container_id)
+        files[0].container_id = self.box_b
+        files[1].active = False
+        self.env.flush_all()
+        self.assertEqual((self.box_a.file_count, self.box_a.document_count), (1, 0))
+        self.assertEqual((self.box_b.file_count, self.box_b.document_count), (1, 4))
+
+        documents[:2].unlink()
+        self.assertEqual(self.box_b.document_count, 2)
+
+    def test_verification_repairs_drift(self):
+        self.env['records.file'].create({'name': 'Drift folder', 'partner_id': self.partner.id, 'container_id': self.box_a.id})
+        self.env.cr.execute("UPDATE records_container SET file_count = 42 WHERE id = %s", [self.box_a.id])
+        Counter = self.env['records.container.counter']
+        self.assertEqual(Counter._verify_model('records.file'), 1)
+        self.assertEqual(self.box_a.file_count, 1)
+        self.assertEqual(Counter._verify_model('records.file'), 0)
+
+    def test_dependent_stored_fields_follow_the_counters(self):
+        invoice = self.env['account.move'].create({
+            'move_type': 'out_invoice',
+            'partner_id': self.partner.id,
+            'invoice_line_ids': [(0, 0, {
+                'name': 'Storage', 'quantity': 1, 'price_unit': 10,
+                'container_ids': [(6, 0, self.box_a.ids)],
+            })],
+        })
+        line = invoice.invoice_line_ids
+        self.assertEqual(line.document_count, 0)
+
+        folder = self.env['records.file'].create({'name': 'Billed folder', 'partner_id': self.partner.id, 'container_id': self.box_a.id})
+        self.env['records.document'].create([
+            {'name': 'Billed doc %s' % index, 'partner_id': self.partner.id, 'file_id': folder.id}
+            for index in range(2)
+        ])
+        self.env.flush_all()
+        self.assertEqual(line.document_count, 2)
+
+        folder.container_id = self.box_b
+        self.env.flush_all()
+        self.assertEqual(line.document_count, 0)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsContainerStatePropagation(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        partner = cls.env['res.partner'].create({'name': 'Propagation Customer', 'is_company': True})
+        cls.containers = cls.env['records.container'].create([
+            {'name': 'PROP-%02d' % index, 'partner_id': partner.id, 'state': 'in'} for index in range(3)
+        ])
+        cls.files = cls.env['records.file'].create([
+            {'name': 'PROP-FILE-%02d' % index, 'partner_id': partner.id, 'container_id': container.id}
+            for index, container in enumerate(cls.containers + cls.containers)
+        ])
+
+    def test_bulk_state_change_updates_files_once(self):
+        self.files[0].state = 'out'
+        audit_before = self.env['naid.audit.log'].search_count([('action_type', '=', 'file_updated')])
+
+        self.containers.write({'state': 'out'})
+
+        self.assertEqual(set(self.files.mapped('state')), {'out'})
+        # One audit entry per folder that actually changed
+        self.assertEqual(
+            self.env['naid.audit.log'].search_count([('action_type', '=', 'file_updated')]) - audit_before,
+            len(self.files) - 1,
+        )
+        notes = self.env['mail.message'].search([
+            ('model', '=', 'records.container'), ('res_id', 'in', self.containers.ids),
+            ('body', 'ilike', 'file folder(s)'),
+        ])
+        self.assertEqual(len(notes), len(self.containers))
+
+    def test_pending_container_leaves_folders(self):
+        self.containers[0].write({'state': 'pending'})
+        self.assertEqual(set(self.files.filtered(lambda f: f.container_id == self.containers[0]).mapped('state')), {'in'})
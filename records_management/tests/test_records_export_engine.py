@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+from unittest.mock import patch
+
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.records_management.models import records_export_engine
+
+
+class TestRecordsExportEngine(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = cls.env['records.export.engine']
+        partner = cls.env['res.partner'].create({'name': 'Export Customer', 'is_company': True})
+        cls.containers = cls.env['records.container'].create([
+            {'name': 'EXPORT-%d' % i, 'partner_id': partner.id, 'state': 'pending'} for i in range(5)
+        ])
+
+    def test_csv_is_chunked_and_complete(self):
+        with patch.object(records_export_engine, 'EXPORT_CHUNK_SIZE', 2):
+            chunks = list(self.engine.iter_csv([('containers', self.containers.ids)]))
+        self.assertGreater(len(chunks), 1)
+
+        rows = list(csv.reader(io.StringIO(b''.join(chunks).decode())))
+        self.assertEqual(rows[0][0], 'Container Number')
+        self.assertEqual([row[0] for row in rows[1:]], self.containers.mapped('name'))
+        self.assertEqual(rows[1][2], dict(self.containers._fields['state']._description_selection(self.env))['pending'])
+
+    def test_xlsx_is_written_to_file(self):
+        output = io.BytesIO()
+        self.engine.write_xlsx([('containers', self.containers.ids)], output)
+        self.assertTrue(output.getvalue().startswith(b'PK'))
+
+    def test_search_sections_share_one_csv_table(self):
+        chunks = self.engine.iter_csv([
+            ('search_containers', self.containers.ids),
+            ('search_files', []),
+            ('search_documents', []),
+        ])
+        rows = list(csv.reader(io.StringIO(b''.join(chunks).decode())))
+        self.assertEqual(rows[0][:2], ['Type', 'Name'])
+        self.assertEqual(len(rows), 1 + len(self.containers))
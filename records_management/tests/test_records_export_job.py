@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.records_management.models import records_export_job
+
+
+class TestRecordsExportJob(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Export Job Customer', 'is_company': True})
+        cls.containers = cls.env['records.container'].create([
+            {'name': 'JOB-%d' % i, 'partner_id': cls.partner.id, 'state': 'pending'} for i in range(5)
+        ])
+        cls.sections = [{
+            'kind': 'containers',
+            'model': 'records.container',
+            'domain': [('partner_id', '=', cls.partner.id)],
+            'order': 'name',
+        }]
+
+    def test_identical_requests_reuse_job(self):
+        Job = self.env['records.export.job']
+        job = Job.enqueue('Containers', 'csv', self.sections)
+        self.assertEqual(Job.enqueue('Containers', 'csv', self.sections), job)
+        self.assertNotEqual(Job.enqueue('Containers', 'xlsx', self.sections), job)
+
+    def test_enqueue_with_date_filter(self):
+        today = fields.Date.context_today(self.env['records.export.job'])
+        sections = [dict(self.sections[0], domain=[
+            ('partner_id', '=', self.partner.id),
+            ('create_date', '>=', datetime.combine(today, datetime.min.time())),
+            ('storage_start_date', '<=', today),
+        ])]
+        job = self.env['records.export.job'].enqueue('Containers', 'csv', sections)
+        self.assertEqual(job.sections[0]['domain'][2], ['storage_start_date', '<=', fields.Date.to_string(today)])
+        job._snapshot()
+        self.assertEqual(job.total_count, self.env['records.container'].search_count(sections[0]['domain']))
+
+    def test_job_resumes_from_checkpoint(self):
+        job = self.env['records.export.job'].enqueue('Containers', 'csv', self.sections)
+        # Tests cannot commit: checkpoints stay in the test transaction
+        with patch.object(records_export_job, 'EXPORT_CHUNK_SIZE', 2), \
+                patch.object(self.env.cr, 'commit', lambda: None):
+            self.assertFalse(job._run(deadline=time.monotonic() - 1))
+            self.assertEqual(job.state, 'running')
+            self.assertEqual(job.total_count, 5)
+
+            job._process_chunk()
+            self.assertEqual((job.processed_count, job.part_count), (2, 1))
+
+            self.assertTrue(job._run(deadline=time.monotonic() + 60))
+
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.get_status()['progress'], 100.0)
+        self.assertFalse(job._get_parts())
+        rows = list(csv.reader(io.StringIO(job.attachment_id.raw.decode())))
+        self.assertEqual([row[0] for row in rows[1:]], self.containers.sorted('name').mapped('name'))
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsInventoryCounter(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.counter = cls.env['records.inventory.counter']
+        cls.partner = cls.env['res.partner'].create({'name': 'Counter Customer', 'is_company': True})
+        cls.other_partner = cls.env['res.partner'].create({'name': 'Other Counter Customer', 'is_company': True})
+
+    def _container_counts(self, partner):
+        self.env.flush_all()
+        return self.counter.get_counts([partner.id], ['records.container'])['records.container']
+
+    def test_triggers_follow_create_write_archive(self):
+        Container = self.env['records.container']
+        first = Container.create({'name': 'COUNT-1', 'partner_id': self.partner.id, 'state': 'pending'})
+        Container.create({'name': 'COUNT-2', 'partner_id': self.partner.id, 'state': 'pending'})
+        self.assertEqual(self._container_counts(self.partner), {'pending': 2})
+
+        first.write({'partner_id': self.other_partner.id})
+        self.assertEqual(self._container_counts(self.partner), {'pending': 1})
+        self.assertEqual(self._container_counts(self.other_partner), {'pending': 1})
+
+        first.write({'active': False})
+        self.assertEqual(self._container_counts(self.other_partner), {})
+
+    def test_compact_and_reconcile_keep_totals(self):
+        self.env['records.container'].create({'name': 'COUNT-3', 'partner_id': self.partner.id, 'state': 'pending'})
+        self.env.flush_all()
+        self.counter._compact()
+        self.assertEqual(self._container_counts(self.partner), {'pending': 1})
+        self.assertEqual(self.counter._reconcile_model('records.container'), 0)
+
+        # Simulate drift (e.g. a raw SQL import with triggers disabled)
+        self.env.cr.execute("""
+            INSERT INTO records_inventory_counter (res_model, partner_id, department_id, state, count)
+            VALUES ('records.container', %s, 0, 'pending', 5)
+        """, (self.partner.id,))
+        self.assertEqual(self._container_counts(self.partner), {'pending': 6})
+        self.assertTrue(self.counter._reconcile_model('records.container'))
+        self.assertEqual(self._container_counts(self.partner), {'pending': 1})
+
+    def test_department_filter_excludes_unassigned(self):
+        self.env['records.container'].create({'name': 'COUNT-4', 'partner_id': self.partner.id, 'state': 'pending'})
+        self.env.flush_all()
+        counts = self.counter.get_counts([self.partner.id], ['records.container'], department_ids=[])
+        self.assertEqual(counts['records.container'], {})
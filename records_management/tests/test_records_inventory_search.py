@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsInventorySearch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Search = cls.env['records.inventory.search']
+        cls.partner = cls.env['res.partner'].create({'name': 'Unified Search Customer', 'is_company': True})
+        cls.department = cls.env['records.department'].create({'name': 'Finance', 'partner_id': cls.partner.id})
+        cls.shelf = cls.env['stock.location'].create({'name': 'Unified Shelf', 'usage': 'internal'})
+        Container = cls.env['records.container']
+        cls.box_exact, cls.box_prefix, cls.box_inside = Container.create([
+            {'name': 'Exact box', 'barcode': 'INV7001', 'partner_id': cls.partner.id, 'state': 'in',
+             'department_id': cls.department.id},
+            {'name': 'Prefix box', 'barcode': 'INV70015', 'partner_id': cls.partner.id, 'state': 'in'},
+            {'name': 'Inside box', 'barcode': 'XINV7001', 'partner_id': cls.partner.id, 'state': 'out'},
+        ])
+        (cls.box_exact | cls.box_prefix).write({'current_location_id': cls.shelf.id})
+        cls.folder = cls.env['records.file'].create({
+            'name': 'Unified folder', 'partner_id': cls.partner.id, 'container_id': cls.box_exact.id,
+        })
+        cls.document = cls.env['records.document'].create({
+            'name': 'Unified doc', 'partner_id': cls.partner.id, 'file_id': cls.folder.id,
+        })
+
+    def _search(self, filters, **kwargs):
+        return self.Search.search_inventory(self.Search.get_search_domains(self.partner, filters), **kwargs)
+
+    def test_exact_barcode_ranks_before_prefix_and_substring(self):
+        result = self._search({'record_type': 'container', 'barcode': 'INV7001'}, barcode='INV7001')
+        self.assertEqual(
+            [(item['record'], item['rank']) for item in result['items']],
+            [(self.box_exact, 2), (self.box_prefix, 1), (self.box_inside, 0)],
+        )
+
+    def test_limit_per_type_keeps_full_counts(self):
+        result = self._search({'record_type': 'container'}, limit_per_type=2)
+        self.assertEqual(len(result['containers']), 2)
+        self.assertEqual(result['facets']['type'], {'container': 3})
+        self.assertEqual(result['total'], 3)
+
+    def test_facets(self):
+        result = self._search({'record_type': 'container'})
+        self.assertEqual(result['facets']['state'], {'container': {'in': 2, 'out': 1}})
+        self.assertEqual(result['facets']['location'], [(self.shelf.id, self.shelf.display_name, 2)])
+        self.assertEqual(result['facets']['department'], [(self.department.id, self.department.display_name, 1)])
+
+        result = self._search({})
+        self.assertEqual(result['facets']['type'], {'container': 3, 'file': 1, 'document': 1})
+        self.assertEqual(result['total'], 5)
+
+    def test_file_folder_type_and_pdf_scans(self):
+        domains = self.Search.get_search_domains(self.partner, {'record_type': 'file_folder'})
+        self.assertEqual(list(domains), ['file'])
+        self.assertEqual(self.Search.search_inventory(domains)['files'], self.folder)
+
+        self.env['ir.attachment'].create([
+            {'name': 'scan-%s.pdf' % index, 'res_model': 'records.document', 'res_id': self.document.id,
+             'mimetype': 'application/pdf', 'raw': b'%PDF-1.4'}
+            for index in range(2)
+        ])
+        result = self._search({'record_type': 'document'})
+        self.assertEqual(result['pdf_scans'], {self.document.id: 2})
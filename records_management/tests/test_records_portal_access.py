@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsPortalAccess(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Access = cls.env['records.portal.access']
+        cls.partner = cls.env['res.partner'].create({'name': 'Access Customer', 'is_company': True})
+        cls.user = cls.env['res.users'].create({
+            'name': 'Access Portal User',
+            'login': 'access_portal_user',
+            'partner_id': cls.partner.id,
+            'groups_id': [(6, 0, [cls.env.ref('base.group_portal').id])],
+        })
+        cls.parent = cls.env['records.department'].create({'name': 'Legal', 'partner_id': cls.partner.id})
+        cls.child = cls.env['records.department'].create({
+            'name': 'Contracts',
+            'partner_id': cls.partner.id,
+            'parent_department_id': cls.parent.id,
+        })
+
+    def test_snapshot_is_a_copy(self):
+        snapshot = self.Access.get_snapshot(self.user.id)
+        snapshot['permissions']['containers']['can_read'] = 'tampered'
+        self.assertNotEqual(self.Access.get_snapshot(self.user.id)['permissions']['containers']['can_read'], 'tampered')
+
+    def test_assignment_invalidates_department_scope(self):
+        self.assertEqual(self.Access.get_snapshot(self.user.id)['accessible_department_ids'], ())
+        self.assertTrue(self.Access.get_snapshot(self.user.id)['has_departments'])
+
+        self.env['records.storage.department.user'].create({
+            'user_id': self.user.id,
+            'department_id': self.parent.id,
+            'state': 'active',
+        })
+        snapshot = self.Access.get_snapshot(self.user.id)
+        self.assertEqual(set(snapshot['accessible_department_ids']), {self.parent.id, self.child.id})
+        self.assertEqual(set(snapshot['selectable_department_ids']), {self.parent.id, self.child.id})
+
+        # Moving the child out of the tree is picked up as well
+        self.child.parent_department_id = False
+        self.assertEqual(self.Access.get_snapshot(self.user.id)['accessible_department_ids'], (self.parent.id,))
+
+    def test_moving_contact_to_another_company_invalidates(self):
+        other_company = self.env['res.partner'].create({'name': 'Access Acquirer', 'is_company': True})
+        contact = self.env['res.partner'].create({'name': 'Access Contact', 'parent_id': self.partner.id})
+        user = self.env['res.users'].create({
+            'name': 'Access Contact User',
+            'login': 'access_contact_user',
+            'partner_id': contact.id,
+            'groups_id': [(6, 0, [self.env.ref('base.group_portal').id])],
+        })
+        self.assertEqual(self.Access.get_snapshot(user.id)['commercial_partner_id'], self.partner.id)
+        contact.parent_id = other_company
+        self.assertEqual(self.Access.get_snapshot(user.id)['commercial_partner_id'], other_company.id)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import HttpCase, tagged
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.records_management.models.records_portal_inventory import SECTION_PAGE_SIZE
+
+
+class TestRecordsPortalInventory(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Inventory Customer', 'is_company': True})
+        cls.user = cls.env['res.users'].create({
+            'name': 'Inventory Manager',
+            'login': 'inventory_section_manager',
+            'partner_id': cls.partner.id,
+            'groups_id': [(6, 0, [cls.env.ref('records_management.group_records_manager').id])],
+        })
+        cls.containers = cls.env['records.container'].create([
+            {'name': 'SECTION-%03d' % index, 'partner_id': cls.partner.id} for index in range(SECTION_PAGE_SIZE + 5)
+        ])
+        cls.file = cls.env['records.file'].create({'name': 'SECTION-FILE', 'partner_id': cls.partner.id})
+        cls.Inventory = cls.env['records.portal.inventory'].with_user(cls.user)
+
+    def test_section_pages(self):
+        first = self.Inventory.get_section('containers', page=1, sortby='name')
+        second = self.Inventory.get_section('containers', page=2, sortby='name')
+        self.assertEqual(first['total'], SECTION_PAGE_SIZE + 5)
+        self.assertEqual(first['page_count'], 2)
+        self.assertEqual([row['name'] for row in first['items']][:2], ['SECTION-000', 'SECTION-001'])
+        self.assertEqual(len(second['items']), 5)
+
+    def test_all_sections_merge_matches_full_sort(self):
+        expected = sorted(
+            [name.lower() for name in self.containers.mapped('name')] + ['section-file']
+        )
+        names = []
+        for page in (1, 2):
+            result = self.Inventory.get_section('all', page=page, sortby='name')
+            self.assertEqual(result['total'], len(expected))
+            names += [row['name'].lower() for row in result['items']]
+        self.assertEqual(names, expected)
+
+        by_type = self.Inventory.get_section('all', page=2, sortby='type')
+        self.assertEqual(by_type['items'][-1]['type'], 'file')
+
+
+@tagged('-at_install', 'post_install')
+class TestPortalInventoryPage(HttpCase):
+
+    def test_dashboard_renders_first_page(self):
+        partner = self.env['res.partner'].create({'name': 'Inventory Page Customer', 'is_company': True})
+        self.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Inventory Page Admin',
+            'login': 'inventory_page_admin',
+            'password': 'inventory_page_admin',
+            'partner_id': partner.id,
+            'groups_id': [(6, 0, [
+                self.env.ref('base.group_portal').id,
+                self.env.ref('records_management.group_portal_company_admin').id,
+            ])],
+        })
+        self.env['records.container'].create([
+            {'name': 'PAGE-BOX-%02d' % index, 'partner_id': partner.id} for index in range(3)
+        ] + [{'name': 'OTHER-BOX', 'partner_id': partner.id}])
+        self.authenticate('inventory_page_admin', 'inventory_page_admin')
+
+        response = self.url_open('/my/inventory?inventory_type=containers&search=PAGE-BOX&sortby=name')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('PAGE-BOX-00', response.text)
+        self.assertNotIn('OTHER-BOX', response.text)
+        self.assertNotIn('No Inventory Records Found', response.text)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsSavedSearch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Preset Customer', 'is_company': True})
+        cls.user = cls.env['res.users'].create({
+            'name': 'Preset User',
+            'login': 'preset_user',
+            'partner_id': cls.env['res.partner'].create({
+                'name': 'Preset Contact', 'parent_id': cls.partner.id,
+            }).id,
+        })
+        Container = cls.env['records.container']
+        cls.box_pending = Container.create({'name': 'PRESET-1', 'partner_id': cls.partner.id, 'state': 'pending'})
+        cls.box_out = Container.create({'name': 'PRESET-2', 'partner_id': cls.partner.id, 'state': 'out'})
+        cls.preset = cls.env['records.saved.search'].create({
+            'name': 'Boxes awaiting pickup',
+            'user_id': cls.user.id,
+            'filters': json.dumps({'record_type': 'container', 'state': 'pending'}),
+            'materialize': True,
+        })
+
+    def _matches(self, model_name='records.container'):
+        result = self.preset.get_materialized_domains()
+        return self.env[model_name].search(result[model_name.split('.')[-1]]).ids
+
+    def test_incremental_refresh_tracks_changes_and_new_matches(self):
+        result = self.preset.get_materialized_domains()
+        self.assertEqual(self.env['records.container'].search(result['container']).ids, [self.box_pending.id])
+        self.assertNotIn('file', result)
+
+        # Changed rows are re-evaluated: one leaves, one enters, one is created
+        self.box_pending.write({'state': 'out'})
+        self.box_out.write({'state': 'pending'})
+        box_new = self.env['records.container'].create({'name': 'PRESET-3', 'partner_id': self.partner.id, 'state': 'pending'})
+
+        self.preset.refresh_matches()
+        self.assertEqual(self.preset.match_count, 2)
+        self.assertEqual(self.preset.new_match_count, 2)
+
+        result = self.preset.get_materialized_domains()
+        self.assertCountEqual(self.env['records.container'].search(result['container']).ids, [self.box_out.id, box_new.id])
+        self.assertEqual(result['new_match_count'], 2)
+        self.assertEqual(self.preset.new_match_count, 0)
+
+    def test_changing_filters_resets_materialization(self):
+        self.preset.refresh_matches()
+        self.assertTrue(self.preset.watermark)
+        self.preset.write({'filters': json.dumps({'record_type': 'container', 'state': 'out'})})
+        self.assertFalse(self.preset.watermark)
+        self.assertFalse(self.preset.match_ids)
+        self.assertEqual(self._matches(), [self.box_out.id])
+
+    def test_related_path_changes_are_picked_up(self):
+        location_a, location_b = self.env['stock.location'].create([
+            {'name': 'Preset Aisle A', 'usage': 'internal'},
+            {'name': 'Preset Aisle B', 'usage': 'internal'},
+        ])
+        self.box_out.current_location_id = location_a
+        folder = self.env['records.file'].create({
+            'name': 'Preset folder', 'partner_id': self.partner.id, 'container_id': self.box_out.id,
+        })
+        self.preset.write({'filters': json.dumps({'record_type': 'file', 'location_id': location_b.id})})
+        self.assertEqual(self._matches('records.file'), [])
+
+        # Only the box moves: the folder row itself is not written
+        self.box_out.current_location_id = location_b
+        self.assertEqual(self._matches('records.file'), [folder.id])
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsSearchCache(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.cache = cls.env['records.search.cache']
+        cls.partner = cls.env['res.partner'].create({'name': 'Cache Customer', 'is_company': True})
+        cls.contact = cls.env['res.partner'].create({'name': 'Cache Contact', 'parent_id': cls.partner.id})
+        cls.other_partner = cls.env['res.partner'].create({'name': 'Other Cache Customer', 'is_company': True})
+
+    def _bump(self, partner_id):
+        # Same statement as the post-commit callback, on the test cursor
+        self.env.cr.execute("""
+            INSERT INTO records_search_cache_generation (partner_id, generation) VALUES (%s, 1)
+            ON CONFLICT (partner_id) DO UPDATE SET generation = records_search_cache_generation.generation + 1
+        """, (partner_id,))
+
+    def test_hit_is_scoped_to_partner_and_params(self):
+        payload = {'suggestions': [{'id': 1, 'name': '4511'}], 'total': 1}
+        self.cache.put('container_autocomplete', self.partner.id, ' 45 ', payload, params={'limit': 10})
+
+        # Query is normalized, contacts share their company's scope
+        self.assertEqual(self.cache.get('container_autocomplete', self.contact.id, '45', params={'limit': 10}), payload)
+        self.assertIsNone(self.cache.get('container_autocomplete', self.other_partner.id, '45', params={'limit': 10}))
+        self.assertIsNone(self.cache.get('container_autocomplete', self.partner.id, '45', params={'limit': 20}))
+
+    def test_generation_bump_invalidates_partner_only(self):
+        self.cache.put('portal_container_search', self.partner.id, 'payroll', {'total': 1})
+        self.cache.put('portal_container_search', self.other_partner.id, 'payroll', {'total': 2})
+
+        self._bump(self.partner.id)
+
+        self.assertIsNone(self.cache.get('portal_container_search', self.partner.id, 'payroll'))
+        self.assertEqual(self.cache.get('portal_container_search', self.other_partner.id, 'payroll'), {'total': 2})
+
+    def test_container_write_queues_invalidation(self):
+        container = self.env['records.container'].create({'name': 'CACHE-1', 'partner_id': self.partner.id})
+        container.write({'partner_id': self.other_partner.id})
+        pending = self.env.cr.postcommit.data.get('records.search.cache.partners')
+        self.assertTrue({self.partner.id, self.other_partner.id} <= pending)
+
+    def test_visibility_separates_record_rule_scopes(self):
+        portal_user = self.env['res.users'].create({
+            'name': 'Cache Portal User',
+            'login': 'cache_portal_user',
+            'partner_id': self.contact.id,
+            'groups_id': [(6, 0, [self.env.ref('base.group_portal').id])],
+        })
+        staff_visibility = self.cache.get_visibility()
+        portal_visibility = self.cache.with_user(portal_user).get_visibility()
+        self.assertNotEqual(staff_visibility, portal_visibility)
+
+        self.cache.put('portal_container_search', self.partner.id, 'payroll', {'total': 3}, params=staff_visibility)
+        self.assertIsNone(self.cache.get('portal_container_search', self.partner.id, 'payroll', params=portal_visibility))
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestRecordsSearchEngine(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = cls.env['records.search.engine']
+        cls.partner = cls.env['res.partner'].create({'name': 'Search Engine Customer', 'is_company': True})
+        cls.other_partner = cls.env['res.partner'].create({'name': 'Other Customer', 'is_company': True})
+        Container = cls.env['records.container']
+        cls.box_4511 = Container.create({
+            'name': '4511',
+            'partner_id': cls.partner.id,
+            'barcode': 'RM0004511',
+            'content_description': 'Payroll ledgers and personnel files',
+        })
+        cls.box_4589 = Container.create({
+            'name': '4589',
+            'partner_id': cls.partner.id,
+            'content_description': 'Vendor invoices',
+        })
+        cls.foreign_box = Container.create({
+            'name': '4512',
+            'partner_id': cls.other_partner.id,
+        })
+
+    def _search(self, query, **kwargs):
+        return self.engine.search_ranked(
+            'records.container', query, [('partner_id', '=', self.partner.id)], **kwargs
+        )
+
+    def test_prefix_match_on_box_number(self):
+        containers, total = self._search('45')
+        self.assertEqual(total, 2)
+        self.assertNotIn(self.foreign_box, containers)
+
+    def test_barcode_prefix_and_content_words(self):
+        containers, _total = self._search('RM00045')
+        self.assertEqual(containers, self.box_4511)
+        containers, _total = self._search('payroll')
+        self.assertEqual(containers, self.box_4511)
+
+    def test_vector_follows_writes(self):
+        self.box_4589.write({'content_description': 'Litigation hold boxes'})
+        containers, _total = self._search('litigation')
+        self.assertEqual(containers, self.box_4589)
+
+    def test_exact_identifier_ranks_first(self):
+        containers, _total = self._search('4589')
+        self.assertEqual(containers[:1], self.box_4589)
+
+    def test_punctuation_only_query_is_safe(self):
+        containers, total = self._search("'&|!")
+        self.assertEqual(total, 0)
+        self.assertFalse(containers)
+
+    def test_recommendations_scored_in_sql(self):
+        self.box_4511.write({'alpha_range_start': 'A', 'alpha_range_end': 'M', 'search_keywords': 'johnson payroll'})
+        results, total = self.engine.recommend_containers(
+            file_name='Johnson', domain=[('partner_id', '=', self.partner.id)]
+        )
+        self.assertEqual(total, 1)
+        self.assertEqual(results[0]['container'], self.box_4511)
+        # 50 (alpha range) + 30 (one keyword hit)
+        self.assertEqual(results[0]['score'], 80)
+        self.assertEqual(len(results[0]['reasons']), 2)
+
+    def test_cursor_pagination_walks_all_rows_once(self):
+        domain = [('partner_id', '=', self.partner.id)]
+        page = self.engine.search_page('records.container', '', domain, limit=1)
+        self.assertEqual(page['total'], 2)
+        seen = page['records']
+        while page['has_more']:
+            page = self.engine.search_page('records.container', '', domain, cursor=page['next_cursor'], limit=1)
+            self.assertEqual(page['total'], 2)
+            seen |= page['records']
+        self.assertEqual(seen, self.box_4511 | self.box_4589)
+
+    def test_cursor_from_other_query_restarts(self):
+        domain = [('partner_id', '=', self.partner.id)]
+        page = self.engine.search_page('records.container', '45', domain, limit=1)
+        restarted = self.engine.search_page('records.container', 'payroll', domain, cursor=page['next_cursor'])
+        self.assertEqual(restarted['records'], self.box_4511)
+
+    def test_tampered_cursor_restarts(self):
+        domain = [('partner_id', '=', self.partner.id)]
+        first = self.engine.search_page('records.container', '', domain, limit=1)
+        fingerprint = self.engine._query_fingerprint('records.container', '', domain)
+        for tampered in (
+            {'f': fingerprint, 't': 2},
+            {'f': fingerprint, 't': 2, 'k': [None, 'BOX']},
+            {'f': fingerprint, 't': 2, 'k': [None, 'BOX', 'abc']},
+            {'f': fingerprint, 't': 2, 'k': ['high', 'BOX', 1]},
+            {'f': fingerprint, 't': 'all', 'k': [None, 'BOX', 1]},
+            {'f': fingerprint, 't': 2, 'k': [None, ['BOX'], 1]},
+        ):
+            page = self.engine.search_page(
+                'records.container', '', domain, cursor=self.engine._encode_cursor(tampered), limit=1,
+            )
+            self.assertEqual(page['records'], first['records'])
+            self.assertEqual(page['total'], 2)
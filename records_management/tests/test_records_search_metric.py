@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.records_management.models.records_search_metric import histogram_percentile, merge_histograms
+
+
+class TestRecordsSearchMetric(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Metric = cls.env['records.search.metric']
+        cls.deploy = datetime(2026, 3, 2, 12, 0)
+
+    def _record(self, query_type, durations, when, version):
+        samples = [(query_type, duration, 10, duration > 1000, when) for duration in durations]
+        for (query_type, period_start), aggregate in self.Metric._aggregate_samples(samples).items():
+            self.Metric._merge_aggregate(query_type, period_start, version, aggregate)
+
+    def test_histogram_percentiles(self):
+        histogram = merge_histograms([[0, 0, 0, 90], [0, 0, 0, 0, 0, 0, 0, 10]])
+        self.assertLessEqual(histogram_percentile(histogram, 0.50), 10)
+        self.assertGreater(histogram_percentile(histogram, 0.99), 100)
+
+    def test_flushes_merge_into_one_hourly_row(self):
+        when = self.deploy + timedelta(minutes=5)
+        self._record('container_autocomplete', [3, 4, 8], when, '18.0.1.0.26')
+        self._record('container_autocomplete', [40], when + timedelta(minutes=30), '18.0.1.0.26')
+        metric = self.Metric.search([('query_type', '=', 'container_autocomplete')])
+        self.assertEqual(len(metric), 1)
+        self.assertEqual(metric.query_count, 4)
+        self.assertEqual(metric.result_count, 40)
+        self.assertEqual(metric.max_ms, 40)
+        self.assertEqual(sum(metric.histogram), 4)
+
+    def test_regression_report_flags_slower_endpoint(self):
+        before, after = self.deploy - timedelta(hours=3), self.deploy + timedelta(hours=3)
+        self._record('portal_container_search', [15] * 50, before, '18.0.1.0.25')
+        self._record('portal_container_search', [150] * 50, after, '18.0.1.0.26')
+        self._record('container_autocomplete', [4] * 50, before, '18.0.1.0.25')
+        self._record('container_autocomplete', [4] * 50, after, '18.0.1.0.26')
+
+        report = {line['query_type']: line for line in self.Metric.get_regression_report(split_date=self.deploy)}
+        self.assertTrue(report['portal_container_search']['regressed'])
+        self.assertGreater(report['portal_container_search']['after']['p95'], 100)
+        self.assertFalse(report['container_autocomplete']['regressed'])
+
+    def test_explain_never_keeps_writes(self):
+        SlowQuery = self.env['records.search.slow.query']
+        partner = self.env['res.partner'].create({'name': 'Explained'})
+        self.env.flush_all()
+        self.assertFalse(SlowQuery._explain(
+            "WITH gone AS (DELETE FROM res_partner WHERE id = %s RETURNING id) SELECT * FROM gone", [partner.id],
+        ))
+        # A SELECT may still write through a function: the savepoint is rolled back
+        self.env.cr.execute("""
+            CREATE FUNCTION pg_temp.explain_probe(partner integer) RETURNS integer AS $$
+                UPDATE res_partner SET name = 'Written' WHERE id = partner RETURNING id
+            $$ LANGUAGE sql
+        """)
+        self.assertIn('Execution Time', SlowQuery._explain("SELECT pg_temp.explain_probe(%s)", [partner.id]))
+        self.env.cr.execute("SELECT name FROM res_partner WHERE id = %s", [partner.id])
+        self.assertEqual(self.env.cr.fetchone()[0], 'Explained')
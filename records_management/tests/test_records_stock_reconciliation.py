@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.records_management.models.records_stock_reconciliation import WATERMARK_OVERLAP
+
+
+class TestRecordsStockReconciliation(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Reconciliation = cls.env['records.stock.reconciliation']
+        stock = cls.env.ref('stock.stock_location_stock')
+        cls.shelf_a, cls.shelf_b = cls.env['stock.location'].create([
+            {'name': 'Recon Shelf A', 'usage': 'internal', 'location_id': stock.id},
+            {'name': 'Recon Shelf B', 'usage': 'internal', 'location_id': stock.id},
+        ])
+        cls.product = cls.env['product.product'].create({
+            'name': 'Records Container (Recon)',
+            'default_code': 'RECORDS-CONTAINER',
+            'type': 'consu',
+            'is_storable': True,
+        })
+        Quant = cls.env['stock.quant']
+        Quant._update_available_quantity(cls.product, cls.shelf_b, 1)
+        Quant._update_available_quantity(cls.product, cls.shelf_a, 1)
+        cls.quant_b = Quant.search([('product_id', '=', cls.product.id), ('location_id', '=', cls.shelf_b.id)])
+        cls.orphan_quant = Quant.search([('product_id', '=', cls.product.id), ('location_id', '=', cls.shelf_a.id)])
+
+        partner = cls.env['res.partner'].create({'name': 'Reconciliation Customer', 'is_company': True})
+        cls.container = cls.env['records.container'].create({
+            'name': 'RECON-001',
+            'partner_id': partner.id,
+            'location_id': cls.shelf_a.id,
+        })
+        cls.container.write({'quant_id': cls.quant_b.id})
+
+    def test_full_run_repairs_and_reports(self):
+        report = self.Reconciliation.run(full=True)
+        self.assertEqual(report.state, 'done')
+        self.assertEqual(report.mode, 'full')
+        self.assertEqual(report.mismatch_count, 1)
+        self.assertEqual(report.repaired_count, 1)
+        self.assertEqual(self.container.location_id, self.shelf_b)
+        self.assertIn(self.orphan_quant.id, report.details['orphan_quant_ids'])
+        movement = self.env['records.stock.movement'].search([('container_id', '=', self.container.id)])
+        self.assertEqual(movement.movement_type, 'adjustment')
+        self.assertEqual(movement.to_location_id, self.shelf_b)
+
+        # Nothing left to repair
+        self.assertEqual(self.Reconciliation.run(full=True).mismatch_count, 0)
+
+    def test_incremental_run_uses_watermark(self):
+        first = self.Reconciliation.run(full=True)
+        second = self.Reconciliation.run(full=False)
+        self.assertEqual(second.mode, 'incremental')
+        self.assertEqual(second.watermark, first.date_start - WATERMARK_OVERLAP)
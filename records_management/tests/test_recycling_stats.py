@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestRecyclingStats(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Event = cls.env['shredding.service.event']
+        cls.partner = cls.env['res.partner'].create({'name': 'Recycling Customer', 'is_company': True})
+        cls.branch = cls.env['res.partner'].create({'name': 'Recycling Branch', 'parent_id': cls.partner.id})
+        cls.bin = cls.env['shredding.service.bin'].create({'barcode': '9900000001'})
+
+    def _event(self, partner, service_date, service_type='tip'):
+        return self.Event.create({
+            'bin_id': self.bin.id,
+            'service_customer_id': partner.id,
+            'service_type': service_type,
+            'service_date': service_date,
+        })
+
+    def test_buckets_match_python_totals(self):
+        now = fields.Datetime.now()
+        recent = self._event(self.branch, now)
+        old = self._event(self.partner, now - timedelta(days=800), service_type='swap_out')
+        self._event(self.partner, now, service_type='swap_in')  # not billable, not counted
+
+        stats = self.Event._compute_recycling_stats(self.partner, now)
+
+        self.assertEqual(stats['bins_serviced'], 2)
+        self.assertEqual(stats['year_bins'], 1)
+        self.assertEqual(stats['week_bins'], 1)
+        self.assertAlmostEqual(stats['total_lbs'], round(recent.actual_weight_lbs + old.actual_weight_lbs, 1))
+        self.assertAlmostEqual(stats['month_lbs'], round(recent.actual_weight_lbs, 1))
+
+    def test_cached_until_event_changes(self):
+        self._event(self.partner, fields.Datetime.now())
+        first = self.Event.get_recycling_stats(self.branch)
+        self.assertEqual(first['bins_serviced'], 1)
+
+        self._event(self.partner, fields.Datetime.now())
+        pending = self.env.cr.postcommit.data.get('records.search.cache.partners')
+        self.assertIn(self.partner.id, pending)
+
+    def test_weight_recompute_invalidates(self):
+        self.bin.write({'manual_size_override': True, 'bin_size': '23'})
+        event = self._event(self.partner, fields.Datetime.now())
+        self.env.flush_all()
+        self.env.cr.postcommit.data.pop('records.search.cache.partners', None)
+
+        # The bin's capacity changes the event's stored weight without writing the event
+        weight = event.actual_weight_lbs
+        self.bin.write({'bin_size': '96'})
+        self.env.flush_all()
+        self.assertNotEqual(event.actual_weight_lbs, weight)
+        self.assertIn(self.partner.id, self.env.cr.postcommit.data.get('records.search.cache.partners'))
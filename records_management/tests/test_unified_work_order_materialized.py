@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestUnifiedWorkOrderMaterialized(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Dispatch Customer', 'is_company': True})
+        cls.UnifiedWO = cls.env['unified.work.order']
+        cls.UnifiedWO._set_materialized(True)
+
+    def _rows(self):
+        return self.UnifiedWO.search([('partner_id', '=', self.partner.id)])
+
+    def test_rows_follow_source_changes(self):
+        order = self.env['work.order.retrieval'].create({'partner_id': self.partner.id, 'state': 'scheduled'})
+        self.env.cr.flush()
+        self.assertEqual(self._rows().mapped('source_id'), [order.id])
+
+        order.write({'state': 'in_progress'})
+        self.env.cr.flush()
+        self.assertEqual(self._rows().state, 'in_progress')
+
+        order.write({'active': False})
+        self.env.cr.flush()
+        self.assertFalse(self._rows())
+
+    def test_consistency_job_repairs_drift(self):
+        order = self.env['work.order.retrieval'].create({'partner_id': self.partner.id, 'state': 'scheduled'})
+        self.env.cr.flush()
+        self.env.cr.execute("UPDATE work_order_retrieval SET state = 'completed' WHERE id = %s", [order.id])
+        self.assertEqual(self.UnifiedWO._cron_check_consistency(), 1)
+        self.assertEqual(self._rows().state, 'completed')
+        self.assertEqual(self.UnifiedWO._cron_check_consistency(), 0)
+
+    def test_parameter_edit_switches_storage(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        ICP.set_param('records_management.unified_work_order.materialized', False)
+        self.assertFalse(self.UnifiedWO._is_materialized())
+        # Writes on the sources must not touch the view
+        order = self.env['work.order.retrieval'].create({'partner_id': self.partner.id, 'state': 'scheduled'})
+        order.write({'state': 'in_progress'})
+        self.env.cr.flush()
+        self.assertEqual(self._rows().state, 'in_progress')
+
+        ICP.set_param('records_management.unified_work_order.materialized', True)
+        self.assertTrue(self.UnifiedWO._is_materialized())
+        self.assertEqual(self._rows().state, 'in_progress')
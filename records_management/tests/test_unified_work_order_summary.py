@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestUnifiedWorkOrderSummary(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Coordinator Customer', 'is_company': True})
+        now = fields.Datetime.now()
+        cls.env['work.order.retrieval'].create([
+            {'partner_id': cls.partner.id, 'state': 'scheduled', 'scheduled_date': now + timedelta(days=2)},
+            {'partner_id': cls.partner.id, 'state': 'scheduled', 'scheduled_date': now + timedelta(days=30)},
+            {'partner_id': cls.partner.id, 'state': 'in_progress', 'scheduled_date': now + timedelta(days=1)},
+            {'partner_id': cls.partner.id, 'state': 'completed', 'scheduled_date': now + timedelta(days=1)},
+        ])
+        cls.env.flush_all()
+
+    def test_summary_counts(self):
+        summary = self.env['unified.work.order'].get_coordinator_summary([('partner_id', '=', self.partner.id)])
+        self.assertEqual(summary['total'], 4)
+        self.assertEqual(summary['types'], {'retrieval': 4})
+        self.assertEqual(summary['states'], {'scheduled': 2, 'in_progress': 1, 'completed': 1})
+        self.assertEqual(summary['columns'], {'pending': 0, 'scheduled': 2, 'in_progress': 1, 'completed': 1})
+        # Completed and far-off orders are not upcoming
+        self.assertEqual(summary['upcoming'], 2)
+
+    def test_summary_follows_domain(self):
+        summary = self.env['unified.work.order'].get_coordinator_summary([
+            ('partner_id', '=', self.partner.id),
+            ('state', '=', 'in_progress'),
+        ])
+        self.assertEqual(summary['total'], 1)
+        self.assertEqual(summary['columns']['in_progress'], 1)
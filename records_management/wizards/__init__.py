@@ -46,3 +46,4 @@ from . import barcode_sheet_wizard
 from . import work_order_wizard  # Multi-step work order creation wizard
 from . import bin_migration_wizard  # Migrate bins from redundant models
 from . import bale_weighing_wizard  # Technician bale weighing workflow
+from . import search_regression_report_wizard  # Search latency regression report
@@ -5,7 +5,7 @@ Barcode Pre-Print Wizard
 
 Allows users to pre-print batches of barcode labels for future use.
 Features:
-- Generate sequential barcodes in advance
+- Generate unique barcodes in advance (shared temp barcode allocator)
 - Print blank container/folder labels with barcodes
 - Track which barcodes have been pre-printed
 - Prevent accidental reprinting
@@ -60,32 +60,22 @@ class BarcodePreprintWizard(models.TransientModel):
         """
         Generate and print blank barcode labels for future use.
         
-        Creates a tracking record and generates PDF with sequential barcodes.
+        Creates a tracking record and generates PDF with reserved barcodes.
         """
         self.ensure_one()
         
-        # Get next sequence number if not specified
-        if not self.start_number:
-            if self.label_type == 'container':
-                seq = self.env['ir.sequence'].next_by_code('records.container.temp.barcode')
-                # Extract number from sequence (e.g., "BOX-00001" -> 1)
-                import re
-                match = re.search(r'\d+', seq)
-                self.start_number = int(match.group()) if match else 1
-            else:
-                seq = self.env['ir.sequence'].next_by_code('records.file.temp.barcode')
-                match = re.search(r'\d+', seq)
-                self.start_number = int(match.group()) if match else 1
+        # Reserve the whole batch from the shared allocator, unless a start
+        # number is given (see records.barcode.allocator): numbers are never
+        # handed out twice, so batches printed concurrently cannot overlap
+        if self.start_number:
+            numbers = [self.start_number + i for i in range(self.quantity)]
+        else:
+            kind = 'container' if self.label_type == 'container' else 'file'
+            numbers = self.env['records.barcode.allocator'].allocate_numbers(kind, self.quantity)
+            self.start_number = numbers[0]
         
         # Generate barcode list
-        barcodes = []
-        for i in range(self.quantity):
-            barcode_num = self.start_number + i
-            if self.prefix:
-                barcode = f"{self.prefix}{barcode_num:05d}"
-            else:
-                barcode = f"{barcode_num:05d}"
-            barcodes.append(barcode)
+        barcodes = [f"{self.prefix or ''}{barcode_num:05d}" for barcode_num in numbers]
         
         # Create tracking record
         tracking = self.env['barcode.preprint.tracking'].create({
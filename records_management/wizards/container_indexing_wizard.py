@@ -218,17 +218,10 @@ class ContainerIndexingWizard(models.TransientModel):
     
     def _create_files_from_grid(self):
         """Create records.file objects from wizard grid data"""
-        files_created = []
-        
         files_with_names = self.file_ids.filtered(lambda f: f.name)
         
+        vals_list = []
         for file_line in files_with_names:  # Only create files with names
-            # Generate temp barcode if no physical barcode assigned and auto-generate is enabled
-            temp_barcode = None
-            if not file_line.barcode and self.auto_generate_temp_barcodes:
-                container_barcode = self.container_id.barcode or self.barcode or 'TEMP'
-                temp_barcode = f"{container_barcode}-FILE{file_line.sequence:02d}"
-            
             # Get partner_id safely
             partner_id = False
             if file_line.partner_id:
@@ -236,7 +229,7 @@ class ContainerIndexingWizard(models.TransientModel):
             elif self.container_id.partner_id:
                 partner_id = self.container_id.partner_id.id
                 
-            file_vals = {
+            vals_list.append({
                 'name': file_line.name,
                 'description': file_line.description or '',
                 'container_id': self.container_id.id,
@@ -244,12 +237,12 @@ class ContainerIndexingWizard(models.TransientModel):
                 'file_category': file_line.file_category or 'general',
                 'received_date': file_line.received_date or fields.Date.today(),
                 'barcode': file_line.barcode or False,  # Physical barcode if assigned
-                'temp_barcode': temp_barcode or False,  # Generated temp barcode
-            }
-            
-            # Use sudo() to ensure we have proper access rights
-            file_record = self.env['records.file'].sudo().create(file_vals)
-            files_created.append(file_record)
+                # Files without a physical barcode get a temp barcode from the
+                # shared allocator when created (see records.file.create)
+            })
+        
+        # Use sudo() to ensure we have proper access rights
+        files_created = list(self.env['records.file'].sudo().create(vals_list))
         
         return files_created
     
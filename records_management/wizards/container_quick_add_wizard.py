@@ -263,11 +263,9 @@ class ContainerQuickAddWizard(models.TransientModel):
             # For standard retention periods, set the destruction due date
             container_vals['destruction_due_date'] = self.destruction_date
 
-        # Generate temp barcode for tracking (customer-created containers)
-        # Format: TEMP-{PARTNER_ABBR}-{YYYYMMDD}-{SEQUENCE}
-        temp_barcode = self._generate_temp_barcode()
-        if temp_barcode:
-            container_vals['temp_barcode'] = temp_barcode
+        # Temp barcode for tracking (customer-created containers), from the
+        # shared allocator (see records.barcode.allocator)
+        container_vals['temp_barcode'] = self.env['records.container']._reserve_temp_barcodes(1)[0]
 
         container = self.env['records.container'].create(container_vals)
 
@@ -335,29 +333,3 @@ class ContainerQuickAddWizard(models.TransientModel):
             description_parts.append(self.contents_description)
 
         return " ".join(description_parts)
-
-    def _generate_temp_barcode(self):
-        """
-        Generate temporary barcode for customer-created containers
-        Format: TEMP-{PARTNER_ABBR}-{YYYYMMDD}-{SEQUENCE}
-        Example: TEMP-CITY-20251103-0001
-        """
-        partner = self.partner_id
-        if not partner:
-            return False
-
-        # Get partner abbreviation (first 4 chars of name, uppercase)
-        partner_abbr = (partner.name or "CUST")[:4].upper().replace(" ", "")
-        
-        # Get today's date in YYYYMMDD format
-        date_str = fields.Date.today().strftime("%Y%m%d")
-        
-        # Get sequence number for today (count existing temp barcodes for this partner today)
-        existing_count = self.env['records.container'].search_count([
-            ('partner_id', '=', partner.id),
-            ('temp_barcode', 'like', f'TEMP-{partner_abbr}-{date_str}-%')
-        ])
-        
-        sequence = str(existing_count + 1).zfill(4)
-        
-        return f"TEMP-{partner_abbr}-{date_str}-{sequence}"
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Search Regression Report Wizard
+
+Compares each search endpoint's latency percentiles before and after a split
+date (by default the first hour recorded with the current module version),
+using the hourly histograms of records.search.metric.
+"""
+
+from odoo import models, fields, api
+
+
+class SearchRegressionReportWizard(models.TransientModel):
+    _name = 'search.regression.report.wizard'
+    _description = 'Search Latency Regression Report'
+
+    split_date = fields.Datetime(
+        string='Deploy Date',
+        required=True,
+        default=lambda self: self.env['records.search.metric']._get_last_deploy_date(),
+        help="Latency before this date is compared with latency after it"
+    )
+    window_days = fields.Integer(
+        string='Window (days)',
+        default=7,
+        required=True,
+        help="Days compared on each side of the deploy date"
+    )
+    tolerance_percent = fields.Float(
+        string='Tolerance (%)',
+        default=20.0,
+        help="p95 increase above which an endpoint is flagged as regressed"
+    )
+    min_samples = fields.Integer(
+        string='Minimum Searches',
+        default=20,
+        help="Endpoints with fewer searches on either side are never flagged"
+    )
+    line_ids = fields.One2many(
+        comodel_name='search.regression.report.line',
+        inverse_name='wizard_id',
+        string='Endpoints',
+        readonly=True
+    )
+    regressed_count = fields.Integer(
+        string='Regressed Endpoints',
+        compute='_compute_regressed_count'
+    )
+
+    @api.depends('line_ids.regressed')
+    def _compute_regressed_count(self):
+        for wizard in self:
+            wizard.regressed_count = len(wizard.line_ids.filtered('regressed'))
+
+    def action_generate(self):
+        self.ensure_one()
+        report = self.env['records.search.metric'].get_regression_report(
+            split_date=self.split_date,
+            window_days=self.window_days,
+            tolerance=self.tolerance_percent / 100.0,
+            min_samples=self.min_samples,
+        )
+        self.line_ids = [(5, 0, 0)] + [
+            (0, 0, {
+                'query_type': line['query_type'],
+                'before_count': line['before']['count'],
+                'after_count': line['after']['count'],
+                'before_p50_ms': line['before']['p50'],
+                'after_p50_ms': line['after']['p50'],
+                'before_p95_ms': line['before']['p95'],
+                'after_p95_ms': line['after']['p95'],
+                'before_p99_ms': line['before']['p99'],
+                'after_p99_ms': line['after']['p99'],
+                'p95_change_percent': line['p95_change'] * 100.0,
+                'regressed': line['regressed'],
+            })
+            for line in report
+        ]
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+
+class SearchRegressionReportLine(models.TransientModel):
+    _name = 'search.regression.report.line'
+    _description = 'Search Latency Regression Report Line'
+    _order = 'regressed desc, p95_change_percent desc'
+
+    wizard_id = fields.Many2one('search.regression.report.wizard', required=True, ondelete='cascade')
+    query_type = fields.Char(string='Search Endpoint', readonly=True)
+    before_count = fields.Integer(string='Searches Before', readonly=True)
+    after_count = fields.Integer(string='Searches After', readonly=True)
+    before_p50_ms = fields.Float(string='p50 Before (ms)', readonly=True)
+    after_p50_ms = fields.Float(string='p50 After (ms)', readonly=True)
+    before_p95_ms = fields.Float(string='p95 Before (ms)', readonly=True)
+    after_p95_ms = fields.Float(string='p95 After (ms)', readonly=True)
+    before_p99_ms = fields.Float(string='p99 Before (ms)', readonly=True)
+    after_p99_ms = fields.Float(string='p99 After (ms)', readonly=True)
+    p95_change_percent = fields.Float(string='p95 Change (%)', readonly=True)
+    regressed = fields.Boolean(string='Regressed', readonly=True)